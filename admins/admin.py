@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Dept, Subject, Class, AttendanceRange
+from .models import User, School, Dept, Subject, Class, AttendanceRange, CalendarToken, Job
 
 
 @admin.register(User)
@@ -11,9 +11,16 @@ class CustomUserAdmin(UserAdmin):
     search_fields = ['username', 'email', 'first_name', 'last_name']
 
 
+@admin.register(School)
+class SchoolAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'domain']
+    search_fields = ['id', 'name', 'domain']
+
+
 @admin.register(Dept)
 class DeptAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name']
+    list_display = ['id', 'name', 'school']
+    list_filter = ['school']
     search_fields = ['id', 'name']
 
 
@@ -35,3 +42,18 @@ class ClassAdmin(admin.ModelAdmin):
 class AttendanceRangeAdmin(admin.ModelAdmin):
     list_display = ['start_date', 'end_date']
     date_hierarchy = 'start_date'
+
+
+@admin.register(CalendarToken)
+class CalendarTokenAdmin(admin.ModelAdmin):
+    list_display = ['user', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['token', 'created_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'priority', 'attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'priority', 'task']
+    search_fields = ['task']
+    readonly_fields = ['locked_by', 'locked_at', 'created_at', 'finished_at', 'last_error']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdminsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admins'
+
+    def ready(self):
+        # Đăng ký signal receivers (reference data cache, chỉ mục tìm kiếm, change counter)
+        from admins import signals  # noqa: F401
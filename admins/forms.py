@@ -1,3 +1,5 @@
+import math
+
 from django import forms
 from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
@@ -18,6 +20,7 @@ from utils.constant import (
     ADMIN_INVALID_CREDENTIALS_ERROR,
     ADMIN_INACTIVE_ACCOUNT_ERROR,
     ADMIN_NO_PERMISSION_ERROR,
+    LOGIN_THROTTLED_ERROR,
     USERNAME_PLACEHOLDER,
     PASSWORD_PLACEHOLDER,
     USERNAME_LABEL,
@@ -35,6 +38,9 @@ from students.models import Student
 from teachers.models import Teacher, Assign, AssignTime
 from admins.models import User, Dept, Class, Subject
 from utils.date_utils import determine_semester, determine_academic_year_start
+from utils.id_allocator import next_teacher_id, next_student_usn
+from utils import login_throttle
+from admins.widgets import AutocompleteSelect
 
 
 class UnifiedLoginForm(forms.Form):
@@ -76,6 +82,11 @@ class UnifiedLoginForm(forms.Form):
         password = cleaned_data.get('password')
 
         if username and password:
+            # Bị khoá thì từ chối trước authenticate, không tốn CPU băm mật khẩu
+            retry_after = login_throttle.retry_after(self.request, username)
+            if retry_after:
+                raise ValidationError(_(LOGIN_THROTTLED_ERROR.format(math.ceil(retry_after / 60))))
+
             # Authenticate user
             self.user_cache = authenticate(
                 self.request,
@@ -84,7 +95,9 @@ class UnifiedLoginForm(forms.Form):
             )
 
             if self.user_cache is None:
+                login_throttle.failed(self.request, username)
                 raise ValidationError(_(ADMIN_INVALID_CREDENTIALS_ERROR))
+            login_throttle.succeeded(self.request, username)
 
             if not self.user_cache.is_active:
                 raise ValidationError(_(ADMIN_INACTIVE_ACCOUNT_ERROR))
@@ -163,6 +176,11 @@ class AdminLoginForm(forms.Form):
         password = cleaned_data.get('password')
 
         if username and password:
+            # Bị khoá thì từ chối trước authenticate, không tốn CPU băm mật khẩu
+            retry_after = login_throttle.retry_after(self.request, username)
+            if retry_after:
+                raise ValidationError(_(LOGIN_THROTTLED_ERROR.format(math.ceil(retry_after / 60))))
+
             # Authenticate user
             self.user_cache = authenticate(
                 self.request,
@@ -171,7 +189,9 @@ class AdminLoginForm(forms.Form):
             )
 
             if self.user_cache is None:
+                login_throttle.failed(self.request, username)
                 raise ValidationError(_(ADMIN_INVALID_CREDENTIALS_ERROR))
+            login_throttle.succeeded(self.request, username)
 
             if not self.user_cache.is_active:
                 raise ValidationError(_(ADMIN_INACTIVE_ACCOUNT_ERROR))
@@ -237,10 +257,10 @@ class AddStudentForm(forms.ModelForm):
         max_length=STUDENT_USN_MAX_LENGTH,
         widget=forms.TextInput(attrs={
             'class': FORM_CONTROL_CLASS,
-            'placeholder': _('Enter USN'),
-            'required': True
+            'placeholder': _('Leave blank to auto-generate (e.g., 25CS001)')
         }),
-        label=_('USN')
+        label=_('USN'),
+        required=False
     )
 
     name = forms.CharField(
@@ -307,6 +327,11 @@ class AddStudentForm(forms.ModelForm):
         model = Student
         fields = ['USN', 'name', 'sex', 'DOB', 'address', 'phone', 'class_id']
 
+    def __init__(self, *args, class_obj=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Lớp cố định khi thêm học sinh từ trang lớp học
+        self.class_obj = class_obj
+
     def clean_password_confirm(self):
         password = self.cleaned_data.get('password')
         password_confirm = self.cleaned_data.get('password_confirm')
@@ -323,10 +348,18 @@ class AddStudentForm(forms.ModelForm):
 
     def clean_USN(self):
         usn = self.cleaned_data.get('USN')
-        if Student.objects.filter(USN=usn).exists():
+        if usn and Student.objects.filter(USN=usn).exists():
             raise ValidationError(_('USN already exists'))
         return usn
 
+    def clean(self):
+        """Auto-generate USN from the class department if not provided"""
+        cleaned_data = super().clean()
+        class_obj = self.class_obj or cleaned_data.get('class_id')
+        if not cleaned_data.get('USN') and class_obj and not self.errors:
+            cleaned_data['USN'] = next_student_usn(class_obj.dept_id)
+        return cleaned_data
+
     def clean_email(self):
         email = self.cleaned_data.get('email')
         if User.objects.filter(email=email).exists():
@@ -468,36 +501,12 @@ class AddTeacherForm(forms.ModelForm):
         return username
 
     def clean_id(self):
-        """Auto-generate Teacher ID if not provided"""
+        """Auto-generate Teacher ID if not provided or already taken"""
         teacher_id = self.cleaned_data.get('id')
 
-        # If no ID provided, generate automatically
-        if not teacher_id:
-            # Find the highest existing teacher ID number
-            last_teacher = Teacher.objects.filter(
-                id__startswith='T'
-            ).order_by('-id').first()
-
-            if last_teacher:
-                # Extract number from last ID (e.g., 'T003' -> 3)
-                try:
-                    last_number = int(last_teacher.id[1:])
-                    new_number = last_number + 1
-                except (ValueError, IndexError):
-                    new_number = 1
-            else:
-                new_number = 1
-
-            # Generate new ID with format T001, T002, etc.
-            teacher_id = f'T{new_number:03d}'
-
-        # Check if the generated/provided ID already exists
-        if Teacher.objects.filter(id=teacher_id).exists():
-            # If exists, find next available ID
-            counter = 1
-            while Teacher.objects.filter(id=f'T{counter:03d}').exists():
-                counter += 1
-            teacher_id = f'T{counter:03d}'
+        # IDs come from a row-locked counter, so concurrent creates never clash
+        if not teacher_id or Teacher.objects.filter(id=teacher_id).exists():
+            teacher_id = next_teacher_id()
 
         return teacher_id
 
@@ -514,7 +523,7 @@ class TeachingAssignmentForm(forms.ModelForm):
     """
     teacher = forms.ModelChoiceField(
         queryset=Teacher.objects.all(),
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_teachers', attrs={
             'class': 'form-control',
             'required': True
         }),
@@ -523,7 +532,7 @@ class TeachingAssignmentForm(forms.ModelForm):
 
     subject = forms.ModelChoiceField(
         queryset=Subject.objects.all(),
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_subjects', attrs={
             'class': 'form-control',
             'required': True
         }),
@@ -531,8 +540,8 @@ class TeachingAssignmentForm(forms.ModelForm):
     )
 
     class_id = forms.ModelChoiceField(
-        queryset=Class.objects.filter(is_active=True),
-        widget=forms.Select(attrs={
+        queryset=Class.objects.select_related('dept').filter(is_active=True),
+        widget=AutocompleteSelect('autocomplete_classes', attrs={
             'class': 'form-control',
             'required': True
         }),
@@ -630,7 +639,7 @@ class TeachingAssignmentFilterForm(forms.Form):
     teacher = forms.ModelChoiceField(
         queryset=Teacher.objects.all(),
         required=False,
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_teachers', attrs={
             'class': 'form-control',
             'placeholder': _('Select teacher')
         }),
@@ -640,7 +649,7 @@ class TeachingAssignmentFilterForm(forms.Form):
     subject = forms.ModelChoiceField(
         queryset=Subject.objects.all(),
         required=False,
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_subjects', attrs={
             'class': 'form-control',
             'placeholder': _('Select subject')
         }),
@@ -648,9 +657,9 @@ class TeachingAssignmentFilterForm(forms.Form):
     )
 
     class_id = forms.ModelChoiceField(
-        queryset=Class.objects.filter(is_active=True),
+        queryset=Class.objects.select_related('dept').filter(is_active=True),
         required=False,
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_classes', attrs={
             'class': 'form-control',
             'placeholder': _('Select class')
         }),
@@ -712,15 +721,17 @@ class TimetableForm(forms.ModelForm):
     def __init__(self, *args, year: str | None = None, semester: str | None = None, **kwargs):
         super().__init__(*args, **kwargs)
         # Nếu có tham số năm/kỳ từ URL, lọc danh sách Assign tương ứng
-        qs = Assign.objects.all()
+        qs = Assign.objects.select_related('teacher', 'subject', 'class_id__dept')
         if year:
             qs = qs.filter(academic_year__icontains=year)
         if semester and semester.isdigit():
             qs = qs.filter(semester=int(semester))
         self.fields['assign'].queryset = qs
+        # Endpoint autocomplete cũng lọc theo cùng năm/kỳ
+        self.fields['assign'].widget.params = {'academic_year': year, 'semester': semester}
     assign = forms.ModelChoiceField(
         queryset=Assign.objects.all(),
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_assignments', attrs={
             'class': 'form-control',
             'required': True
         }),
@@ -783,9 +794,9 @@ class TimetableFilterForm(forms.Form):
     Form for filtering timetable
     """
     class_id = forms.ModelChoiceField(
-        queryset=Class.objects.filter(is_active=True),
+        queryset=Class.objects.select_related('dept').filter(is_active=True),
         required=False,
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_classes', attrs={
             'class': 'form-control',
             'placeholder': _('Select class')
         }),
@@ -795,7 +806,7 @@ class TimetableFilterForm(forms.Form):
     teacher = forms.ModelChoiceField(
         queryset=Teacher.objects.all(),
         required=False,
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_teachers', attrs={
             'class': 'form-control',
             'placeholder': _('Select teacher')
         }),
@@ -1052,7 +1063,7 @@ class AddSubjectToClassForm(forms.Form):
     """
     subject = forms.ModelChoiceField(
         queryset=Subject.objects.all(),
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_subjects', attrs={
             'class': FORM_CONTROL_CLASS,
             'required': True
         }),
@@ -1062,7 +1073,7 @@ class AddSubjectToClassForm(forms.Form):
     #Chọn teacher cho môn đó         
     teacher = forms.ModelChoiceField(
         queryset=Teacher.objects.all(),
-        widget=forms.Select(attrs={
+        widget=AutocompleteSelect('autocomplete_teachers', attrs={
             'class': FORM_CONTROL_CLASS,
             'required': True
         }),
@@ -1098,6 +1109,8 @@ class AddSubjectToClassForm(forms.Form):
                 semester=current_semester
             ).values_list('subject', flat=True)
             self.fields['subject'].queryset = Subject.objects.exclude(id__in=assigned_subjects)
+            # Endpoint autocomplete bỏ qua các môn đã phân công cho lớp này
+            self.fields['subject'].widget.params = {'exclude_class': class_obj.id}
 
     def clean(self):
         cleaned_data = super().clean()
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Q, Sum
+
+from students.models import Attendance, AttendanceRollup, CompactAttendance
+from utils.constant import ATTENDANCE_ROLLUP_BATCH_SIZE
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily attendance rollups from stored attendance (rows and bitsets)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First session date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Last session date to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = _parse_date(options['since']) if options['since'] else None
+        until = _parse_date(options['until']) if options['until'] else None
+
+        def in_window(queryset):
+            if since:
+                queryset = queryset.filter(attendanceclass__date__gte=since)
+            if until:
+                queryset = queryset.filter(attendanceclass__date__lte=until)
+            return queryset
+
+        session_fields = (
+            'attendanceclass__assign_id',
+            'attendanceclass__assign__class_id_id',
+            'attendanceclass__assign__subject_id',
+            'attendanceclass__date',
+        )
+        # Một truy vấn GROUP BY (assign, date) cho mỗi định dạng lưu trữ
+        row_sessions = in_window(
+            Attendance.objects.filter(subject=F('attendanceclass__assign__subject'))
+        ).values(*session_fields).annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status=True)),
+        ).order_by()
+        compact_sessions = in_window(CompactAttendance.objects.all()).values(*session_fields).annotate(
+            total=Sum('total'),
+            present=Sum('present'),
+        ).order_by()
+
+        rollups = {}
+        for sessions in (row_sessions, compact_sessions):
+            for row in sessions.iterator():
+                key = (row['attendanceclass__assign_id'], row['attendanceclass__date'])
+                rollup = rollups.get(key)
+                if rollup is None:
+                    rollup = rollups[key] = AttendanceRollup(
+                        assign_id=key[0],
+                        class_id_id=row['attendanceclass__assign__class_id_id'],
+                        subject_id=row['attendanceclass__assign__subject_id'],
+                        date=key[1],
+                    )
+                rollup.present += row['present']
+                rollup.total += row['total']
+
+        written = 0
+        batch = []
+        for rollup in rollups.values():
+            batch.append(rollup)
+            if len(batch) >= ATTENDANCE_ROLLUP_BATCH_SIZE:
+                written += self._upsert(batch)
+                batch = []
+        if batch:
+            written += self._upsert(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} attendance rollup rows'))
+
+    def _upsert(self, batch):
+        AttendanceRollup.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['assign', 'date'],
+            update_fields=['class_id', 'subject', 'present', 'total'],
+        )
+        return len(batch)
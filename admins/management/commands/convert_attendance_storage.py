@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from admins.management.commands.backfill_attendance_rollups import _parse_date
+from teachers.models import AttendanceClass
+from utils.attendance_store import session_statuses, write_bitset, write_rows
+from utils.constant import ATTENDANCE_STORAGE_BITSET, ATTENDANCE_STORAGE_ROWS
+
+
+class Command(BaseCommand):
+    help = 'Convert stored attendance sessions between per-student rows and compact bitsets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', required=True, choices=[ATTENDANCE_STORAGE_BITSET, ATTENDANCE_STORAGE_ROWS])
+        parser.add_argument('--since', help='First session date to convert (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Last session date to convert (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        sessions = AttendanceClass.objects.select_related('assign').order_by('date', 'id')
+        if options['since']:
+            sessions = sessions.filter(date__gte=_parse_date(options['since']))
+        if options['until']:
+            sessions = sessions.filter(date__lte=_parse_date(options['until']))
+        if options['to'] == ATTENDANCE_STORAGE_BITSET:
+            sessions = sessions.filter(attendance__isnull=False).distinct()
+            write = write_bitset
+        else:
+            sessions = sessions.filter(compactattendance__isnull=False)
+            write = write_rows
+
+        converted = 0
+        for session in sessions.iterator():
+            # Mỗi buổi học được chuyển trong một transaction riêng
+            with transaction.atomic():
+                statuses = session_statuses(session)
+                if statuses:
+                    write(session, statuses)
+                    converted += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Converted {converted} sessions to {options['to']} storage"))
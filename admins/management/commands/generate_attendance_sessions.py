@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from teachers.models import Assign
+from utils.attendance_sessions import generate_sessions
+from utils.constant import ATTENDANCE_SESSION_HORIZON_DAYS
+from utils.date_utils import determine_academic_year_start, determine_semester, get_semester_date_range
+from utils.workload import filter_term
+
+
+class Command(BaseCommand):
+    help = 'Create pending attendance sessions from the timetable of active assignments, holidays excluded'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Academic year (default: the current one)')
+        parser.add_argument('--semester', type=int, help='Semester 1-3 (default: the current one)')
+        parser.add_argument('--until', help=f'Last session date, YYYY-MM-DD '
+                                            f'(default: today + {ATTENDANCE_SESSION_HORIZON_DAYS} days)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the sessions to create')
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        if options['until']:
+            try:
+                until = datetime.strptime(options['until'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f'Invalid date "{options["until"]}", expected YYYY-MM-DD')
+        else:
+            until = today + timedelta(days=ATTENDANCE_SESSION_HORIZON_DAYS)
+
+        academic_year = options['academic_year'] or determine_academic_year_start(today)
+        semester = options['semester'] or determine_semester(today)
+        assigns = filter_term(Assign.objects.filter(is_active=True), academic_year, semester)
+
+        # academic_year được lọc theo icontains nên có thể khớp cả năm học trước:
+        # chỉ tạo các buổi từ đầu kỳ được chọn
+        since, _ = get_semester_date_range(academic_year, semester)
+        count = generate_sessions(assigns, until, since=since, dry_run=options['dry_run'])
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {count} attendance sessions for {academic_year}.{semester} up to {until}'))
@@ -0,0 +1,51 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import report_cards
+from utils.constant import REPORT_CARD_FORMATS, REPORT_CARD_FORMAT_HTML, REPORT_CARD_FORMAT_PDF, REPORT_CARD_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Render the term report card of every student (or of one class) into a ZIP archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Academic year (default: the newest term with assignments)')
+        parser.add_argument('--semester', type=int, help='Semester (1-3)')
+        parser.add_argument('--class', dest='class_id', help='Only this class (default: the whole school)')
+        parser.add_argument('--format', choices=REPORT_CARD_FORMATS, default=REPORT_CARD_FORMAT_HTML)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Rendering processes, 0 renders in this process (default: CPU count)')
+        parser.add_argument('--output', help='ZIP path (default: report-cards-<year>.<semester>.zip)')
+
+    def handle(self, *args, **options):
+        if bool(options['academic_year']) != bool(options['semester']):
+            raise CommandError('--academic-year and --semester must be given together')
+        if options['format'] == REPORT_CARD_FORMAT_PDF and not report_cards.pdf_available():
+            raise CommandError('PDF output needs WeasyPrint (pip install weasyprint)')
+        if options['academic_year']:
+            academic_year, semester = options['academic_year'], options['semester']
+        else:
+            term = report_cards.latest_term(options['class_id'])
+            if term is None:
+                raise CommandError('No teaching assignments to report on')
+            academic_year, semester = term
+
+        started = time.monotonic()
+        cards = report_cards.collect(academic_year, semester, options['class_id'])
+        self.stdout.write(f'{academic_year}.{semester}: loaded {len(cards)} students '
+                          f'in {time.monotonic() - started:.1f}s')
+
+        def progress(done, total):
+            if done % REPORT_CARD_CHUNK_SIZE and done != total:
+                return
+            elapsed = time.monotonic() - started
+            remaining = elapsed / done * (total - done)
+            self.stdout.write(f'{done}/{total} ({done * 100 // total}%) elapsed {elapsed:.0f}s, '
+                              f'about {remaining:.0f}s left')
+
+        output = options['output'] or f'report-cards-{academic_year}.{semester}.zip'
+        with open(output, 'wb') as fileobj:
+            count = report_cards.write_zip(fileobj, cards, options['format'], options['workers'], progress)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} report cards to {output}'))
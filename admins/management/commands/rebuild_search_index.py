@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from utils.search_index import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the omnibox search index from students, teachers, classes, subjects and departments'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} search entries'))
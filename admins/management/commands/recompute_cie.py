@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from students.models import CieScore
+from teachers.models import Marks
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized CIE scores from Marks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Only this academic year, e.g. 2024-2025')
+        parser.add_argument('--semester', type=int, help='Only this semester')
+
+    def handle(self, *args, **options):
+        marks = Marks.objects.all()
+        scores = CieScore.objects.all()
+        if options['academic_year']:
+            marks = marks.filter(academic_year=options['academic_year'])
+            scores = scores.filter(academic_year=options['academic_year'])
+        if options['semester']:
+            marks = marks.filter(semester=options['semester'])
+            scores = scores.filter(semester=options['semester'])
+
+        grouped = {}
+        for student_subject_id, academic_year, semester, name, value in marks.values_list(
+                'student_subject_id', 'academic_year', 'semester', 'name', 'marks1').iterator():
+            grouped.setdefault((student_subject_id, academic_year, semester), []).append((name, value))
+
+        with transaction.atomic():
+            # Xoá điểm CIE của các cặp không còn điểm thành phần nào
+            existing = scores.values_list('id', 'student_subject_id', 'academic_year', 'semester')
+            stale = [score_id for score_id, *key in existing if tuple(key) not in grouped]
+            CieScore.objects.filter(id__in=stale).delete()
+            written = CieScore.objects.write(grouped)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} CIE scores, removed {len(stale)}'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from admins.models import Class
+from students.models import Student
+from utils.enrollment import enroll, missing_enrollments
+
+
+class Command(BaseCommand):
+    help = 'Create (or reactivate) missing StudentSubject enrollments from the active assignments of every class'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class', dest='class_id', help='Only this class')
+        parser.add_argument('--academic-year', help='Only assignments of this academic year (e.g. 2024-2025)')
+        parser.add_argument('--semester', type=int, help='Only assignments of this semester')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the missing enrollments')
+
+    def handle(self, *args, **options):
+        classes = Class.objects.order_by('id').values_list('id', flat=True)
+        if options['class_id']:
+            classes = classes.filter(id=options['class_id'])
+
+        term = {'academic_year': options['academic_year'], 'semester': options['semester']}
+        total = 0
+        # Mỗi lớp một lượt để bộ nhớ không phụ thuộc vào quy mô toàn trường
+        for class_id in classes:
+            students = Student.objects.filter(class_id=class_id)
+            if options['dry_run']:
+                missing = sorted(missing_enrollments(students, **term))
+                for usn, subject_id in missing:
+                    self.stdout.write(f'{class_id}: {usn} -> {subject_id}')
+                count = len(missing)
+            else:
+                with transaction.atomic():
+                    count = sum(enroll(students, **term))
+            total += count
+
+        verb = 'Missing' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} enrollments'))
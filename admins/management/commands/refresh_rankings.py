@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.models import CieScore
+from utils.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = 'Materialize class/department/school ranks of students for one or all terms'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Academic year, e.g. 2024-2025')
+        parser.add_argument('--semester', type=int, help='Semester (1-3)')
+
+    def handle(self, *args, **options):
+        if bool(options['academic_year']) != bool(options['semester']):
+            raise CommandError('--academic-year and --semester must be given together')
+        if options['academic_year']:
+            terms = [(options['academic_year'], options['semester'])]
+        else:
+            terms = CieScore.objects.values_list('academic_year', 'semester').distinct().order_by()
+
+        for academic_year, semester in terms:
+            count = refresh_rankings(academic_year, semester)
+            self.stdout.write(f'{academic_year}.{semester}: ranked {count} students')
+        self.stdout.write(self.style.SUCCESS('Rankings refreshed'))
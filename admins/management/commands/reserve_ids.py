@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from admins.models import Dept
+from utils.id_allocator import reserve_teacher_ids, reserve_student_usns
+
+
+class Command(BaseCommand):
+    help = 'Reserve a block of Teacher IDs or student USNs for a bulk import'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['teacher', 'student'])
+        parser.add_argument('count', type=int)
+        parser.add_argument('--dept', help='Department ID (required for student USNs)')
+        parser.add_argument('--year', help='Academic year start, e.g. 2025 (default: current)')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        if count < 1:
+            raise CommandError('count must be at least 1')
+
+        if options['kind'] == 'teacher':
+            identifiers = reserve_teacher_ids(count)
+        else:
+            dept_id = options['dept']
+            if not dept_id:
+                raise CommandError('--dept is required when reserving student USNs')
+            if not Dept.objects.filter(id=dept_id).exists():
+                raise CommandError(f'Department "{dept_id}" does not exist')
+            identifiers = reserve_student_usns(dept_id, count, options['year'])
+
+        for identifier in identifiers:
+            self.stdout.write(identifier)
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.constant import MIN_SEMESTER, MAX_SEMESTER
+from utils.rollover import apply_rollover, plan_rollover
+
+
+class Command(BaseCommand):
+    help = ('Roll a term over: clone its assignments into the next term and promote '
+            'every class to the next semester')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', required=True, help='Academic year being closed, e.g. 2024-2025')
+        parser.add_argument('--semester', type=int, required=True, help='Semester being closed (1-3)')
+        parser.add_argument('--dry-run', action='store_true', help='Only print what would change')
+
+    def handle(self, *args, **options):
+        if not MIN_SEMESTER <= options['semester'] <= MAX_SEMESTER:
+            raise CommandError(f'--semester must be between {MIN_SEMESTER} and {MAX_SEMESTER}')
+        try:
+            plan = plan_rollover(options['academic_year'], options['semester'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            f'{plan.academic_year}.{plan.semester} -> {plan.next_academic_year}.{plan.next_semester}')
+        for move in plan.moves:
+            state = ' (new)' if move.create else ' (reactivated)' if move.reactivate else ''
+            self.stdout.write(
+                f'  {move.source} -> {move.target}{state}: {move.students} students, '
+                f'{move.assigns} assignments, {move.times} timetable slots')
+        for class_id in plan.final_classes:
+            self.stdout.write(f'  {class_id}: final semester, not promoted')
+        self.stdout.write(f'  {plan.enrollments} enrollments deactivated before re-enrolling')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Dry run, nothing changed'))
+            return
+
+        result = apply_rollover(plan)
+        self.stdout.write(self.style.SUCCESS(
+            f'Promoted {result.students} students, created {result.classes_created} classes, '
+            f'cloned {result.assigns} assignments and {result.times} timetable slots, '
+            f'created {result.enrollments_created} and reactivated {result.enrollments_reactivated} enrollments'
+        ))
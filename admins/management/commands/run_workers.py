@@ -0,0 +1,48 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from utils import jobs
+from utils.constant import JOB_DEFAULT_WORKERS
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers: N processes claiming queued jobs from the Job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=JOB_DEFAULT_WORKERS,
+                            help=f'Worker processes, 0 runs jobs in this process (default: {JOB_DEFAULT_WORKERS})')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when no job is due instead of waiting for new ones')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 0:
+            raise CommandError('--workers must be 0 or more')
+        if workers == 0:
+            # Chạy liên tục thì tự làm mới kết nối như process worker
+            count = jobs.work(jobs.worker_name(), once=options['once'], recycle_connections=not options['once'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs'))
+            return
+
+        # Process con không được dùng chung kết nối DB của process cha
+        connections.close_all()
+        stop = multiprocessing.Event()
+        processes = [
+            multiprocessing.Process(target=jobs.worker_process, args=(stop, options['once']), name=f'job-worker-{index}')
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Started {workers} workers, Ctrl+C or SIGTERM to stop after their current job')
+
+        def request_stop(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        for process in processes:
+            process.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
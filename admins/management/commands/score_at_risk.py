@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from teachers.models import Assign
+from utils.risk import refresh_risk_scores, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Score every (student, subject) of a term for attendance/CIE risk and optionally email teachers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Academic year (default: the newest term with assignments)')
+        parser.add_argument('--semester', type=int, help='Semester (1-3)')
+        parser.add_argument('--email', action='store_true', help='Email each teacher their at-risk students')
+
+    def handle(self, *args, **options):
+        if bool(options['academic_year']) != bool(options['semester']):
+            raise CommandError('--academic-year and --semester must be given together')
+        if options['academic_year']:
+            academic_year, semester = options['academic_year'], options['semester']
+        else:
+            term = (Assign.objects.filter(is_active=True).order_by('-academic_year', '-semester')
+                    .values_list('academic_year', 'semester').first())
+            if term is None:
+                raise CommandError('No teaching assignments to score')
+            academic_year, semester = term
+
+        count = refresh_risk_scores(academic_year, semester)
+        self.stdout.write(f'{academic_year}.{semester}: scored {count} student subjects')
+        if options['email']:
+            sent = send_digests(academic_year, semester)
+            self.stdout.write(f'Sent {sent} digest emails')
+        self.stdout.write(self.style.SUCCESS('Risk scores refreshed'))
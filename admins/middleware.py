@@ -1,10 +1,15 @@
 import re
+import time
+from contextlib import ExitStack
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
+from django.db import connections
+from django.http import Http404
+from django.http.request import split_domain_port
 
 # Import constants
 from utils.constant import (
@@ -14,8 +19,11 @@ from utils.constant import (
     ADMIN_URL_PATTERN_TEMPLATE,
     ADMIN_EXEMPT_URL_PATTERNS,
     DEFAULT_LANGUAGE_CODE,
-    DEFAULT_LANGUAGE_NAME
+    DEFAULT_LANGUAGE_NAME,
+    METRICS_UNRESOLVED_VIEW,
+    METRICS_SLOW_REQUEST_THRESHOLD
 )
+from utils import db_routing, metrics, tenancy
 
 
 def is_admin_path(path, supported_langs=None):
@@ -165,3 +173,69 @@ class AdminActivityLogMiddleware(MiddlewareMixin):
         else:
             ip = request.META.get('REMOTE_ADDR')
         return ip
+
+
+class PerformanceMetricsMiddleware:
+    """
+    Middleware recording latency, DB query count and DB time per URL name
+    (exposed by the admin_metrics view)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = metrics.QueryRecorder(keep_sql=metrics.should_sample())
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else METRICS_UNRESOLVED_VIEW
+        metrics.record(view, latency, recorder.count, recorder.duration)
+        if recorder.statements is not None and latency >= METRICS_SLOW_REQUEST_THRESHOLD:
+            metrics.log_slow_request(request, view, latency, recorder)
+        metrics.maybe_flush()
+        return response
+
+
+class TenantMiddleware:
+    """
+    Resolve the school from the Host header and scope the request to it:
+    default managers filter by it and tenancy.cache_key() namespaces cache
+    keys with it. Unknown hosts are served unscoped (single-school
+    deployment) unless TENANT_REQUIRED is set
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        host, _ = split_domain_port(request.get_host())
+        school_id = tenancy.school_for_host(host)
+        if school_id is None and settings.TENANT_REQUIRED:
+            raise Http404('Unknown school')
+        request.school_id = school_id
+        with tenancy.activate(school_id):
+            return self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin users who send a write (any unsafe method) to the primary database
+    for a short while, so read_replica views show them their own changes
+    even when the replicas lag
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.DATABASE_REPLICAS and request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+                and request.user.is_authenticated):
+            db_routing.pin(request.user)
+        return response
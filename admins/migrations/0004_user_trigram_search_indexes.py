@@ -0,0 +1,40 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# (index name, column) pairs backing the admin user search
+USER_TRIGRAM_INDEXES = [
+    ('admins_user_username_trgm', 'username'),
+    ('admins_user_email_trgm', 'email'),
+    ('admins_user_first_name_trgm', 'first_name'),
+    ('admins_user_last_name_trgm', 'last_name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # GIN trigram indexes only exist on PostgreSQL; other backends use icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, column in USER_TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} '
+            f'ON admins_user USING gin ("{column}" gin_trgm_ops);'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _ in USER_TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0003_class_is_active'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# (index, table, column) phục vụ lookup istartswith của các endpoint autocomplete
+PREFIX_INDEXES = [
+    ('admins_subject_id_upper_like', 'admins_subject', 'id'),
+    ('admins_subject_name_upper_like', 'admins_subject', 'name'),
+    ('admins_subject_shortname_upper_like', 'admins_subject', 'shortname'),
+    ('admins_class_id_upper_like', 'admins_class', 'id'),
+    ('admins_dept_name_upper_like', 'admins_dept', 'name'),
+]
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # istartswith compiles to UPPER(col::text) LIKE UPPER('x%') on PostgreSQL,
+    # which only an expression index with text_pattern_ops can serve
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index, table, column in PREFIX_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index} '
+            f'ON {table} (UPPER("{column}"::text) text_pattern_ops);'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index, _table, _column in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0005_identifiercounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+
+def create_tokens_indexes(apps, schema_editor):
+    # LIKE '% tiền_tố%' trên tokens được phục vụ bởi GIN trigram (pg_trgm đã bật ở 0004),
+    # còn LIKE ' tiền_tố%' (khớp từ đầu) dùng text_pattern_ops
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS admins_searchentry_tokens_trgm '
+        'ON admins_searchentry USING gin (tokens gin_trgm_ops);'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS admins_searchentry_tokens_like '
+        'ON admins_searchentry (tokens text_pattern_ops);'
+    )
+
+
+def drop_tokens_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS admins_searchentry_tokens_trgm;')
+    schema_editor.execute('DROP INDEX IF EXISTS admins_searchentry_tokens_like;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0006_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('student', 'Student'), ('teacher', 'Teacher'), ('class', 'Class'), ('subject', 'Subject'), ('dept', 'Department')], max_length=10)),
+                ('object_id', models.CharField(max_length=100)),
+                ('tokens', models.TextField()),
+                ('display', models.CharField(max_length=255)),
+                ('detail', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'unique_together': {('entity', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_tokens_indexes, drop_tokens_indexes),
+    ]
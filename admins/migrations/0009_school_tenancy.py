@@ -0,0 +1,43 @@
+import django.db.models.deletion
+import utils.tenancy
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0008_calendartoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='School',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('domain', models.CharField(blank=True, max_length=253, null=True, unique=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='class',
+            index=models.Index(fields=['dept', 'id'], name='class_dept_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['dept', 'id'], name='subject_dept_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='dept',
+            name='school',
+            field=models.ForeignKey(blank=True, default=utils.tenancy.current_school_id, null=True, on_delete=django.db.models.deletion.RESTRICT, to='admins.school'),
+        ),
+        migrations.AddField(
+            model_name='searchentry',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='admins.school'),
+        ),
+        migrations.AddIndex(
+            model_name='dept',
+            index=models.Index(fields=['school', 'id'], name='dept_school_id_idx'),
+        ),
+    ]
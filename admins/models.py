@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 import math
+import secrets
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import AbstractUser
 from django.db.models.signals import post_save, post_delete
 from datetime import timedelta
+from django.utils import timezone
 from utils.constant import (
     # Choices
     SEX_CHOICES, TIME_SLOTS, DAYS_OF_WEEK, TEST_NAME_CHOICES,
@@ -11,6 +13,12 @@ from utils.constant import (
     DEPT_ID_MAX_LENGTH, DEPT_NAME_MAX_LENGTH,
     SUBJECT_ID_MAX_LENGTH, SUBJECT_NAME_MAX_LENGTH, SUBJECT_SHORTNAME_MAX_LENGTH,
     CLASS_ID_MAX_LENGTH, CLASS_SECTION_MAX_LENGTH,
+    IDENTIFIER_COUNTER_KEY_MAX_LENGTH,
+    SEARCH_ENTITY_CHOICES, SEARCH_ENTITY_MAX_LENGTH, SEARCH_OBJECT_ID_MAX_LENGTH, SEARCH_DISPLAY_MAX_LENGTH,
+    CALENDAR_TOKEN_BYTES, CALENDAR_TOKEN_MAX_LENGTH,
+    SCHOOL_ID_MAX_LENGTH, SCHOOL_NAME_MAX_LENGTH, SCHOOL_DOMAIN_MAX_LENGTH,
+    JOB_TASK_MAX_LENGTH, JOB_WORKER_MAX_LENGTH, JOB_STATUS_MAX_LENGTH, JOB_STATUS_CHOICES, JOB_STATUS_QUEUED,
+    JOB_PRIORITY_CHOICES, JOB_PRIORITY_NORMAL, JOB_MAX_ATTEMPTS,
     # Default Values
     DEFAULT_SUBJECT_SHORTNAME,
     # Verbose Names
@@ -21,6 +29,7 @@ from utils.constant import (
     # Legacy constants
     DEFAULT_MANY_TO_MANY_ID
 )
+from utils.tenancy import TenantManager, current_school_id
 
 
 class User(AbstractUser):
@@ -37,9 +46,31 @@ class User(AbstractUser):
         return False
 
 
+class School(models.Model):
+    """
+    Một trường trong deployment dùng chung. Dữ liệu thuộc về trường qua Dept;
+    request được gán trường theo host (<id>.TENANT_BASE_DOMAIN hoặc domain riêng)
+    """
+    id = models.CharField(primary_key=True, max_length=SCHOOL_ID_MAX_LENGTH)
+    name = models.CharField(max_length=SCHOOL_NAME_MAX_LENGTH)
+    domain = models.CharField(max_length=SCHOOL_DOMAIN_MAX_LENGTH, unique=True, null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Dept(models.Model):
     id = models.CharField(primary_key=True, max_length=DEPT_ID_MAX_LENGTH)
     name = models.CharField(max_length=DEPT_NAME_MAX_LENGTH)
+    # Null: deployment một trường, chưa gán trường nào
+    school = models.ForeignKey(School, on_delete=models.RESTRICT, null=True, blank=True, default=current_school_id)
+
+    school_path = 'school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['school', 'id'], name='dept_school_id_idx')]
 
     def __str__(self):
         return self.name
@@ -52,6 +83,13 @@ class Subject(models.Model):
     shortname = models.CharField(
         max_length=SUBJECT_SHORTNAME_MAX_LENGTH, default=DEFAULT_SUBJECT_SHORTNAME)
 
+    school_path = 'dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['dept', 'id'], name='subject_dept_id_idx')]
+
     def __str__(self):
         return self.name
 
@@ -64,15 +102,21 @@ class Class(models.Model):
     sem = models.IntegerField()
     is_active = models.BooleanField(default=True)
 
+    school_path = 'dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name_plural = CLASSES_VERBOSE_NAME_PLURAL
+        indexes = [models.Index(fields=['dept', 'id'], name='class_dept_id_idx')]
 
     def __str__(self):
-        d = Dept.objects.get(name=self.dept)
-        return '%s : %d %s' % (d.name, self.sem, self.section)
+        # Dùng quan hệ dept đã nạp (select_related) thay vì truy vấn lại theo tên
+        return '%s : %d %s' % (self.dept.name, self.sem, self.section)
 
 
 class AttendanceRange(models.Model):
+    # Khoảng ngày nghỉ: không sinh buổi điểm danh theo thời khoá biểu trong khoảng này
     start_date = models.DateField()
     end_date = models.DateField()
 
@@ -82,3 +126,122 @@ class AttendanceRange(models.Model):
     class Meta:
         verbose_name = ATTENDANCE_RANGE_VERBOSE_NAME
         verbose_name_plural = ATTENDANCE_RANGE_VERBOSE_NAME_PLURAL
+
+
+class IdentifierCounterManager(models.Manager):
+    def reserve(self, key, count=1, seed=None):
+        """
+        Reserve `count` consecutive numbers for `key` and return the first.
+
+        The counter row is locked with SELECT ... FOR UPDATE, so concurrent
+        callers never receive overlapping numbers. `seed` is an optional
+        callable returning the highest number already in use; it is only
+        called when the counter row is created.
+        """
+        if count < 1:
+            raise ValueError('count must be at least 1')
+
+        with transaction.atomic(using=self.db):
+            counter = self.select_for_update().filter(key=key).first()
+            if counter is None:
+                counter, _ = self.select_for_update().get_or_create(
+                    key=key, defaults={'last_value': seed() if seed else 0})
+            first = counter.last_value + 1
+            counter.last_value += count
+            counter.save(update_fields=['last_value'])
+        return first
+
+
+class IdentifierCounter(models.Model):
+    """Row-locked counter handing out sequential identifiers per key."""
+    key = models.CharField(primary_key=True, max_length=IDENTIFIER_COUNTER_KEY_MAX_LENGTH)
+    last_value = models.BigIntegerField(default=0)
+
+    objects = IdentifierCounterManager()
+
+    def __str__(self):
+        return f"{self.key}: {self.last_value}"
+
+
+class SearchEntry(models.Model):
+    """
+    Một dòng của chỉ mục tìm kiếm omnibox (học sinh, giáo viên, lớp, môn, khoa).
+    tokens là văn bản đã bỏ dấu, viết thường, mỗi từ có một dấu cách phía trước
+    (' nguyen van an 1cs20cs001') để tìm theo tiền tố từ bằng LIKE '% an%'.
+    Được đồng bộ bằng signal trong admins/signals.py.
+    """
+    entity = models.CharField(max_length=SEARCH_ENTITY_MAX_LENGTH, choices=SEARCH_ENTITY_CHOICES)
+    object_id = models.CharField(max_length=SEARCH_OBJECT_ID_MAX_LENGTH)
+    tokens = models.TextField()
+    display = models.CharField(max_length=SEARCH_DISPLAY_MAX_LENGTH)
+    detail = models.CharField(max_length=SEARCH_DISPLAY_MAX_LENGTH, blank=True)
+    school = models.ForeignKey(School, on_delete=models.CASCADE, null=True, blank=True)
+
+    school_path = 'school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        unique_together = (('entity', 'object_id'),)
+
+    def __str__(self):
+        return f"{self.entity}:{self.object_id} {self.display}"
+
+
+class CalendarTokenManager(models.Manager):
+    def for_user(self, user):
+        """The user's feed token, created on first use."""
+        token, _ = self.get_or_create(
+            user=user, defaults={'token': secrets.token_urlsafe(CALENDAR_TOKEN_BYTES)})
+        return token
+
+
+class CalendarToken(models.Model):
+    """
+    Token bí mật trong URL feed .ics của một người dùng: ứng dụng lịch không
+    gửi cookie đăng nhập. Xoá dòng này để thu hồi URL cũ
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    token = models.CharField(max_length=CALENDAR_TOKEN_MAX_LENGTH, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CalendarTokenManager()
+
+    def __str__(self):
+        return f"{self.user}: {self.token[:6]}..."
+
+
+class Job(models.Model):
+    """
+    Một việc chạy nền: `task` là đường dẫn import của hàm đánh dấu bằng
+    utils.jobs.task, `payload` là keyword arguments của nó. Được lấy ra và
+    chạy bởi lệnh run_workers (xem utils/jobs.py)
+    """
+    task = models.CharField(max_length=JOB_TASK_MAX_LENGTH)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(choices=JOB_PRIORITY_CHOICES, default=JOB_PRIORITY_NORMAL)
+    status = models.CharField(max_length=JOB_STATUS_MAX_LENGTH, choices=JOB_STATUS_CHOICES, default=JOB_STATUS_QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=JOB_MAX_ATTEMPTS)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=JOB_WORKER_MAX_LENGTH, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    school = models.ForeignKey(School, on_delete=models.CASCADE, null=True, blank=True, default=current_school_id)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    school_path = 'school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Worker lấy việc: status='queued' AND run_at <= now ORDER BY priority DESC, run_at
+            models.Index(fields=['status', '-priority', 'run_at'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.task} ({self.status})"
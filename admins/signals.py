@@ -0,0 +1,44 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from admins.models import School, Dept, Subject, Class, AttendanceRange
+from students.models import Student
+from teachers.models import Teacher, Assign, AssignTime
+from utils import change_counters, tenancy
+from utils.reference_cache import invalidate_reference_data
+from utils.search_index import update_search_entry, delete_search_entry
+
+
+# Bất kỳ thay đổi nào trên Dept/Subject/Class đều tăng version của reference cache
+for _model in (Dept, Subject, Class):
+    post_save.connect(invalidate_reference_data, sender=_model,
+                      dispatch_uid=f'reference_data_save_{_model.__name__}')
+    post_delete.connect(invalidate_reference_data, sender=_model,
+                        dispatch_uid=f'reference_data_delete_{_model.__name__}')
+
+# Chỉ mục tìm kiếm omnibox; QuerySet.update()/bulk_create() không gửi signal
+# nên phải gọi utils.search_index.reindex() sau các thao tác hàng loạt
+for _model in (Student, Teacher, Class, Subject, Dept):
+    post_save.connect(update_search_entry, sender=_model,
+                      dispatch_uid=f'search_entry_save_{_model.__name__}')
+    post_delete.connect(delete_search_entry, sender=_model,
+                        dispatch_uid=f'search_entry_delete_{_model.__name__}')
+
+# Change counter (ETag/Last-Modified của JSON API); điểm danh và điểm số tự
+# tăng counter trong utils.attendance_store và CieScore.objects.refresh_for
+for _model in (Assign, AssignTime):
+    post_save.connect(change_counters.assign_changed, sender=_model,
+                      dispatch_uid=f'change_counter_save_{_model.__name__}')
+    post_delete.connect(change_counters.assign_changed, sender=_model,
+                        dispatch_uid=f'change_counter_delete_{_model.__name__}')
+post_save.connect(change_counters.teacher_changed, sender=Teacher, dispatch_uid='change_counter_save_Teacher')
+pre_save.connect(change_counters.student_moving, sender=Student, dispatch_uid='change_counter_pre_save_Student')
+post_save.connect(change_counters.student_changed, sender=Student, dispatch_uid='change_counter_save_Student')
+post_delete.connect(change_counters.student_changed, sender=Student, dispatch_uid='change_counter_delete_Student')
+post_save.connect(change_counters.holidays_changed, sender=AttendanceRange,
+                  dispatch_uid='change_counter_save_AttendanceRange')
+post_delete.connect(change_counters.holidays_changed, sender=AttendanceRange,
+                    dispatch_uid='change_counter_delete_AttendanceRange')
+
+# Bảng host -> trường của TenantMiddleware
+post_save.connect(tenancy.schools_changed, sender=School, dispatch_uid='tenant_hosts_save_School')
+post_delete.connect(tenancy.schools_changed, sender=School, dispatch_uid='tenant_hosts_delete_School')
@@ -0,0 +1,111 @@
+// Lazy-loaded options for <select data-autocomplete-url="..."> rendered by
+// admins.widgets.AutocompleteSelect. Only the selected option is shipped with
+// the page; the rest is fetched page by page while the user types.
+(function () {
+  "use strict";
+
+  var LOAD_MORE_VALUE = "__autocomplete_more__";
+  var DEBOUNCE_MS = 250;
+
+  function buildUrl(base, term, page) {
+    var url = new URL(base, window.location.origin);
+    url.searchParams.set("q", term);
+    url.searchParams.set("page", page);
+    return url.toString();
+  }
+
+  function initAutocomplete(select) {
+    var state = { term: "", page: 0, more: true, loading: false, timer: null };
+
+    var search = document.createElement("input");
+    search.type = "search";
+    search.className = "form-control form-control-sm mb-1";
+    search.placeholder = select.getAttribute("placeholder") || "Type to search...";
+    search.setAttribute("autocomplete", "off");
+    select.parentNode.insertBefore(search, select);
+
+    var loadMore = document.createElement("option");
+    loadMore.value = LOAD_MORE_VALUE;
+    loadMore.textContent = "Load more...";
+
+    function keepOption(option) {
+      // Giữ lại option rỗng và option đang được chọn
+      return option.value === "" || option.selected;
+    }
+
+    function reset() {
+      Array.prototype.slice.call(select.options).forEach(function (option) {
+        if (!keepOption(option)) {
+          select.removeChild(option);
+        }
+      });
+      state.page = 0;
+      state.more = true;
+    }
+
+    function fetchPage() {
+      if (state.loading || !state.more) {
+        return;
+      }
+      state.loading = true;
+      var page = state.page + 1;
+      fetch(buildUrl(select.dataset.autocompleteUrl, state.term, page), {
+        credentials: "same-origin",
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+      })
+        .then(function (response) {
+          return response.json();
+        })
+        .then(function (data) {
+          if (loadMore.parentNode) {
+            select.removeChild(loadMore);
+          }
+          var current = select.value;
+          data.results.forEach(function (item) {
+            var value = String(item.id);
+            if (value === current) {
+              return;
+            }
+            select.appendChild(new Option(item.text, value));
+          });
+          state.page = page;
+          state.more = data.pagination.more;
+          if (state.more) {
+            select.appendChild(loadMore);
+          }
+        })
+        .finally(function () {
+          state.loading = false;
+        });
+    }
+
+    var previous = select.value;
+    select.addEventListener("focus", function () {
+      if (state.page === 0) {
+        fetchPage();
+      }
+    });
+    select.addEventListener("change", function () {
+      if (select.value === LOAD_MORE_VALUE) {
+        select.value = previous;
+        fetchPage();
+        return;
+      }
+      previous = select.value;
+    });
+    search.addEventListener("input", function () {
+      clearTimeout(state.timer);
+      state.timer = setTimeout(function () {
+        state.term = search.value.trim();
+        reset();
+        fetchPage();
+      }, DEBOUNCE_MS);
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document
+      .querySelectorAll("select[data-autocomplete-url]")
+      .forEach(initAutocomplete);
+  });
+})();
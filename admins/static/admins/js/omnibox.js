@@ -0,0 +1,123 @@
+// Global search box of the navbar (<input data-omnibox-url="...">): mixed
+// students, teachers, classes, subjects and departments from the search index,
+// fetched while the user types. Enter or click opens the highlighted result.
+(function () {
+  "use strict";
+
+  var DEBOUNCE_MS = 150;
+  var MIN_LENGTH = 2;
+
+  function buildUrl(base, term) {
+    var url = new URL(base, window.location.origin);
+    url.searchParams.set("q", term);
+    return url.toString();
+  }
+
+  function initOmnibox(input) {
+    var state = { term: "", results: [], active: -1, timer: null, request: 0 };
+
+    var menu = document.createElement("div");
+    menu.className = "dropdown-menu omnibox-results";
+    input.parentNode.appendChild(menu);
+
+    function close() {
+      menu.classList.remove("show");
+      state.active = -1;
+    }
+
+    function highlight(index) {
+      var items = menu.querySelectorAll(".dropdown-item");
+      Array.prototype.forEach.call(items, function (item, position) {
+        item.classList.toggle("active", position === index);
+      });
+      state.active = index;
+    }
+
+    function render() {
+      menu.innerHTML = "";
+      state.results.forEach(function (result, index) {
+        var item = document.createElement("a");
+        item.className = "dropdown-item";
+        item.href = result.url;
+        var text = document.createElement("div");
+        text.textContent = result.text;
+        var detail = document.createElement("small");
+        detail.className = "text-muted";
+        detail.textContent = result.entity + " · " + result.detail;
+        item.appendChild(text);
+        item.appendChild(detail);
+        item.addEventListener("mouseenter", function () {
+          highlight(index);
+        });
+        menu.appendChild(item);
+      });
+      if (state.results.length) {
+        menu.classList.add("show");
+      } else {
+        close();
+      }
+    }
+
+    function fetchResults() {
+      // Chỉ hiển thị kết quả của lần gõ mới nhất
+      var request = ++state.request;
+      fetch(buildUrl(input.dataset.omniboxUrl, state.term), {
+        credentials: "same-origin",
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+      })
+        .then(function (response) {
+          return response.json();
+        })
+        .then(function (data) {
+          if (request !== state.request) {
+            return;
+          }
+          state.results = data.results;
+          state.active = -1;
+          render();
+        });
+    }
+
+    input.addEventListener("input", function () {
+      clearTimeout(state.timer);
+      state.timer = setTimeout(function () {
+        state.term = input.value.trim();
+        if (state.term.length < MIN_LENGTH) {
+          state.request++;
+          state.results = [];
+          close();
+          return;
+        }
+        fetchResults();
+      }, DEBOUNCE_MS);
+    });
+    input.addEventListener("keydown", function (event) {
+      var count = state.results.length;
+      if (event.key === "ArrowDown" && count) {
+        event.preventDefault();
+        highlight((state.active + 1) % count);
+      } else if (event.key === "ArrowUp" && count) {
+        event.preventDefault();
+        highlight((state.active - 1 + count) % count);
+      } else if (event.key === "Enter") {
+        event.preventDefault();
+        var result = state.results[state.active >= 0 ? state.active : 0];
+        if (result && result.url) {
+          window.location.href = result.url;
+        }
+      } else if (event.key === "Escape") {
+        close();
+      }
+    });
+    input.addEventListener("blur", function () {
+      // Đợi click vào kết quả được xử lý trước khi đóng
+      setTimeout(close, DEBOUNCE_MS);
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document
+      .querySelectorAll("input[data-omnibox-url]")
+      .forEach(initOmnibox);
+  });
+})();
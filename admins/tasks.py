@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+from django.utils.translation import gettext as _
+
+from admins.models import User
+from utils import rankings, risk
+from utils.jobs import task
+
+
+@task(scrub_payload=True)
+def send_account_email(user_id, full_name, password):
+    """Welcome email with the login of a new student/teacher account."""
+    user = User.objects.get(pk=user_id)
+    body = render_to_string('admins/email_templates/account_creation_email.html', {
+        'full_name': full_name,
+        'username': user.username,
+        'password': password,
+    })
+    send_mail(
+        subject=_('Welcome to Our School System'),
+        message=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[user.email],
+        html_message=body,
+        fail_silently=False,
+    )
+
+
+@task
+def refresh_term_risk_scores(academic_year, semester):
+    """Recompute the at-risk list of a term after new marks, instead of waiting for score_at_risk."""
+    risk.refresh_risk_scores(academic_year, semester)
+
+
+@task
+def refresh_term_rankings(academic_year, semester):
+    """Rank the students of a term again after new marks, so the performance report follows them."""
+    rankings.refresh_rankings(academic_year, semester)
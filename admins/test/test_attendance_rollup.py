@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from students.models import Attendance, AttendanceRollup
+from teachers.models import Assign, AttendanceClass
+from utils.constant import ATTENDANCE_CLASS_MARKED
+
+
+class AttendanceRollupTests(AdminViewsBaseTestCase):
+    """Tests cho bảng tổng hợp điểm danh và báo cáo điểm danh"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+        self.assign = Assign.objects.create(
+            class_id=self.test_class, subject=self.subject, teacher=self.teacher)
+
+    def _session(self, day, present):
+        session = AttendanceClass.objects.create(
+            assign=self.assign, date=day, status=ATTENDANCE_CLASS_MARKED)
+        Attendance.objects.create(
+            student=self.student, subject=self.subject,
+            attendanceclass=session, date=day, status=present)
+        return session
+
+    def test_backfill_command(self):
+        """Test lệnh backfill tạo rollup từ dữ liệu Attendance"""
+        today = date.today()
+        self._session(today, True)
+        self._session(today - timedelta(days=1), False)
+
+        out = StringIO()
+        call_command('backfill_attendance_rollups', stdout=out)
+        self.assertIn('Wrote 2', out.getvalue())
+        self.assertEqual(AttendanceRollup.objects.get(date=today).present, 1)
+        self.assertEqual(AttendanceRollup.objects.get(date=today - timedelta(days=1)).present, 0)
+
+        # Chạy lại không tạo bản ghi trùng
+        call_command('backfill_attendance_rollups', '--since', today.isoformat(), stdout=StringIO())
+        self.assertEqual(AttendanceRollup.objects.count(), 2)
+
+    def test_report_reads_rollups_for_window(self):
+        """Test báo cáo điểm danh đọc rollup theo khoảng ngày"""
+        today = date.today()
+        old_day = today - timedelta(days=60)
+        for day, present in ((today, True), (old_day, False)):
+            self._session(day, present)
+        call_command('backfill_attendance_rollups', stdout=StringIO())
+
+        response = self.client.get(reverse('admin_reports'), {'type': 'attendance'})
+        rows = list(response.context['student_attendance'])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['present_records'], rows[0]['total_records']), (1, 1))
+
+        response = self.client.get(reverse('admin_reports'), {
+            'type': 'attendance',
+            'start_date': old_day.isoformat(),
+            'end_date': today.isoformat(),
+        })
+        row = list(response.context['student_attendance'])[0]
+        self.assertEqual((row['present_records'], row['absent_records']), (1, 1))
+
+        teachers = list(response.context['teacher_attendance'])
+        self.assertEqual(teachers[0]['present_classes'], 2)
+        self.assertEqual(teachers[0]['absent_classes'], 0)
@@ -0,0 +1,67 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import AttendanceRange
+from teachers.models import Assign, AssignTime, AttendanceClass
+from utils.attendance_sessions import expected_sessions, generate_sessions, reconcile_sessions
+from utils.constant import ATTENDANCE_CLASS_MARKED, ATTENDANCE_CLASS_CANCELLED, ATTENDANCE_CLASS_NOT_MARKED
+
+
+class AttendanceSessionTests(AdminViewsBaseTestCase):
+    """Tests cho việc sinh buổi điểm danh từ thời khoá biểu và báo cáo đối chiếu"""
+
+    def setUp(self):
+        super().setUp()
+        self.assign = Assign.objects.create(
+            class_id=self.test_class, subject=self.subject, teacher=self.teacher,
+            academic_year='2024-2025', semester=1)
+        # Hai tiết thứ Hai chỉ tính một buổi
+        AssignTime.objects.create(assign=self.assign, period='7:30 - 8:30', day='Monday')
+        AssignTime.objects.create(assign=self.assign, period='8:30 - 9:30', day='Monday')
+        AssignTime.objects.create(assign=self.assign, period='7:30 - 8:30', day='Wednesday')
+        AttendanceRange.objects.create(start_date=date(2024, 9, 9), end_date=date(2024, 9, 13))
+        self.assigns = Assign.objects.filter(pk=self.assign.pk)
+        self.until = date(2024, 9, 20)
+
+    def test_expected_sessions_skip_holidays(self):
+        """Test lịch dự kiến theo thứ trong tuần, bỏ ngày nghỉ"""
+        self.assertEqual(expected_sessions(self.assigns, self.until), {
+            self.assign.id: [date(2024, 9, 2), date(2024, 9, 4), date(2024, 9, 16), date(2024, 9, 18)],
+        })
+
+    def test_generate_sessions_is_idempotent(self):
+        """Test sinh buổi chưa điểm danh, chạy lại không tạo trùng"""
+        AttendanceClass.objects.create(assign=self.assign, date=date(2024, 9, 2), status=ATTENDANCE_CLASS_MARKED)
+        self.assertEqual(generate_sessions(self.assigns, self.until, dry_run=True), 3)
+        self.assertEqual(AttendanceClass.objects.count(), 1)
+        self.assertEqual(generate_sessions(self.assigns, self.until), 3)
+        self.assertEqual(generate_sessions(self.assigns, self.until), 0)
+        self.assertEqual(AttendanceClass.objects.filter(status=ATTENDANCE_CLASS_NOT_MARKED).count(), 3)
+
+    def test_reconcile_sessions(self):
+        """Test đối chiếu số buổi dự kiến, đã điểm danh, huỷ và bỏ sót theo giáo viên"""
+        generate_sessions(self.assigns, self.until)
+        AttendanceClass.objects.filter(date=date(2024, 9, 2)).update(status=ATTENDANCE_CLASS_MARKED)
+        AttendanceClass.objects.filter(date=date(2024, 9, 4)).update(status=ATTENDANCE_CLASS_CANCELLED)
+
+        row, = reconcile_sessions(self.assigns, self.until)
+        self.assertEqual(row.teacher_id, self.teacher.id)
+        self.assertEqual((row.expected, row.marked, row.cancelled, row.missed), (4, 1, 1, 2))
+        self.assertEqual(row.marked_percentage, 25)
+
+    def test_command_and_report(self):
+        """Test lệnh generate_attendance_sessions và bảng đối chiếu trong báo cáo giảng dạy"""
+        out = StringIO()
+        call_command('generate_attendance_sessions', '--academic-year', '2024-2025', '--semester', '1',
+                     '--until', '2024-09-20', stdout=out)
+        self.assertIn('Created 4 attendance sessions', out.getvalue())
+
+        self.client.login(username='adminuser', password='adminpass123')
+        response = self.client.get(reverse('admin_reports'), {'type': 'teaching', 'academic_year': '2024-2025'})
+        self.assertEqual(response.status_code, 200)
+        row, = response.context['session_reconciliation']
+        self.assertEqual(row.missed, row.expected)
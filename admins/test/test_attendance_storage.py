@@ -0,0 +1,66 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from .test_base import AdminViewsBaseTestCase
+from students.models import Attendance, CompactAttendance, Student
+from teachers.models import Assign, AttendanceClass
+from utils.attendance_store import (
+    encode_presence, is_present, count_present, save_session, session_statuses,
+    student_counts, student_history, attendance_record_count,
+)
+from utils.constant import ATTENDANCE_CLASS_MARKED
+
+
+class AttendanceStorageTests(AdminViewsBaseTestCase):
+    """Tests cho chế độ lưu điểm danh dạng bitset"""
+
+    def setUp(self):
+        super().setUp()
+        self.other = Student.objects.create(
+            USN='1CS20CS002', name='Other Student', class_id=self.test_class,
+            DOB=date(2000, 1, 1))
+        self.assign = Assign.objects.create(
+            class_id=self.test_class, subject=self.subject, teacher=self.teacher)
+        self.session = AttendanceClass.objects.create(
+            assign=self.assign, date=date.today(), status=ATTENDANCE_CLASS_MARKED)
+        self.statuses = {self.student.USN: True, self.other.USN: False}
+
+    def test_bitset_round_trip(self):
+        """Test mã hoá và giải mã bitset"""
+        flags = [True, False, True] * 7
+        bits = encode_presence(flags)
+        self.assertEqual(len(bits), 3)
+        self.assertEqual([is_present(bits, i) for i in range(len(flags))], flags)
+        self.assertEqual(count_present(bits), 14)
+
+    @override_settings(ATTENDANCE_STORAGE='bitset')
+    def test_bitset_mode_writes_one_row(self):
+        """Test chế độ bitset chỉ lưu một dòng cho mỗi buổi học"""
+        save_session(self.session, self.statuses)
+        self.assertFalse(Attendance.objects.exists())
+        compact = CompactAttendance.objects.get()
+        self.assertEqual((compact.present, compact.total), (1, 2))
+        self.assertEqual(session_statuses(self.session), self.statuses)
+        self.assertEqual(student_counts(self.student.USN, self.subject.id), (1, 1))
+        self.assertEqual(student_counts(self.other.USN, self.subject.id), (0, 1))
+        history = student_history(self.other.USN, self.subject.id)
+        self.assertEqual([record.status for record in history], [False])
+        self.assertEqual(attendance_record_count(), 2)
+
+    def test_convert_command_round_trip(self):
+        """Test lệnh chuyển đổi giữa hai định dạng lưu trữ"""
+        save_session(self.session, self.statuses)
+        self.assertEqual(Attendance.objects.count(), 2)
+
+        out = StringIO()
+        call_command('convert_attendance_storage', '--to', 'bitset', stdout=out)
+        self.assertIn('Converted 1', out.getvalue())
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(session_statuses(self.session), self.statuses)
+
+        call_command('convert_attendance_storage', '--to', 'rows', stdout=StringIO())
+        self.assertFalse(CompactAttendance.objects.exists())
+        self.assertEqual(session_statuses(self.session), self.statuses)
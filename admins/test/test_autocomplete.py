@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.forms import TeachingAssignmentForm
+from teachers.models import Teacher, Assign
+from utils.constant import AUTOCOMPLETE_PAGE_SIZE
+from utils.date_utils import determine_semester, determine_academic_year_start
+
+
+class AutocompleteTests(AdminViewsBaseTestCase):
+    """Tests cho các endpoint autocomplete và widget chọn lazy"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+
+    def test_teacher_prefix_search(self):
+        """Test tìm giáo viên theo tiền tố tên, không phân biệt hoa thường"""
+        response = self.client.get(reverse('autocomplete_teachers'), {'q': 'test'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': 'T001', 'text': 'Test Teacher'}])
+
+        response = self.client.get(reverse('autocomplete_teachers'), {'q': 'teacher'})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_teacher_pagination(self):
+        """Test phân trang kết quả autocomplete"""
+        Teacher.objects.bulk_create(
+            Teacher(id=f'T{i:03d}', name=f'Bulk Teacher {i:03d}', DOB=date(1985, 1, 1), dept=self.dept)
+            for i in range(100, 100 + AUTOCOMPLETE_PAGE_SIZE + 5)
+        )
+        url = reverse('autocomplete_teachers')
+        first = self.client.get(url, {'q': 'bulk'}).json()
+        self.assertEqual(len(first['results']), AUTOCOMPLETE_PAGE_SIZE)
+        self.assertTrue(first['pagination']['more'])
+
+        second = self.client.get(url, {'q': 'bulk', 'page': 2}).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertFalse(second['pagination']['more'])
+
+    def test_class_and_assignment_labels(self):
+        """Test nhãn lớp và phân công giống __str__ của model"""
+        assignment = Assign.objects.create(
+            class_id=self.test_class, subject=self.subject, teacher=self.teacher)
+
+        classes = self.client.get(reverse('autocomplete_classes'), {'q': 'cs'}).json()
+        self.assertEqual(classes['results'], [{'id': 'CS-1A', 'text': str(self.test_class)}])
+
+        assignments = self.client.get(reverse('autocomplete_assignments'), {'q': 'test'}).json()
+        self.assertEqual(assignments['results'], [{'id': assignment.id, 'text': str(assignment)}])
+
+    def test_subject_exclude_class(self):
+        """Test bỏ các môn đã phân công cho lớp trong kỳ hiện tại"""
+        url = reverse('autocomplete_subjects')
+        self.assertEqual(len(self.client.get(url).json()['results']), 1)
+
+        today = date.today()
+        Assign.objects.create(
+            class_id=self.test_class, subject=self.subject, teacher=self.teacher,
+            academic_year=str(determine_academic_year_start(today)),
+            semester=determine_semester(today))
+        response = self.client.get(url, {'exclude_class': self.test_class.id})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_widget_renders_only_selected_option(self):
+        """Test widget chỉ render option đang chọn, không render toàn bộ bảng"""
+        Teacher.objects.create(id='T002', name='Other Teacher', DOB=date(1985, 1, 1), dept=self.dept)
+        form = TeachingAssignmentForm(initial={'teacher': 'T001'})
+        html = str(form['teacher'])
+
+        self.assertIn('data-autocomplete-url="%s"' % reverse('autocomplete_teachers'), html)
+        self.assertIn('value="T001" selected', html)
+        self.assertNotIn('Other Teacher', html)
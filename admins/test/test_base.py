@@ -6,6 +6,7 @@ from django.contrib.messages import get_messages
 from datetime import date
 from django.utils import timezone
 from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
 from admins.models import User, Dept, Subject, Class
 from students.models import Student
 from teachers.models import Teacher, Assign, AssignTime
@@ -16,6 +17,8 @@ class AdminViewsBaseTestCase(TestCase):
     
     def setUp(self):
         """Set up test data"""
+        # Các view báo cáo cache kết quả tính toán giữa các request
+        cache.clear()
         self.client = Client()
         
         # Tạo department
@@ -0,0 +1,89 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from utils import change_counters, computed_cache, metrics
+from utils.constant import COMPUTED_CACHE_LOCK_SUFFIX, METRICS_CACHE_PREFIX
+
+
+class ComputedCacheTests(AdminViewsBaseTestCase):
+    """Tests cho cache kết quả tính toán chống stampede"""
+
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+        self.tags = [change_counters.class_roster(self.test_class.id)]
+
+    def _compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def _get(self, name='test', **kwargs):
+        return computed_cache.get_or_compute(name, ['key'], self._compute, tags=self.tags, **kwargs)
+
+    def _counts(self, name='test'):
+        return metrics.snapshot().get(METRICS_CACHE_PREFIX + name, [0, 0, 0])
+
+    def test_hit_miss_and_tag_invalidation(self):
+        """Test lần sau lấy từ cache, bump tag thì tính lại"""
+        before = self._counts()
+        self.assertEqual(self._get(), 'value 1')
+        self.assertEqual(self._get(), 'value 1')
+        with self.captureOnCommitCallbacks(execute=True):
+            change_counters.bump(*self.tags)
+        self.assertEqual(self._get(), 'value 2')
+        after = self._counts()
+        self.assertEqual([a - b for a, b in zip(after, before)], [1, 0, 2])
+        self.assertIn('django_computed_cache_lookups_total{cache="test",outcome="miss"}',
+                      metrics.render_prometheus(metrics.snapshot()))
+
+    def test_stale_while_revalidate(self):
+        """Test giá trị hết hạn được trả lại trong khi worker khác đang tính lại"""
+        self._get(timeout=0)
+        key = computed_cache._key('test', ['key'])
+        cache.add(key + COMPUTED_CACHE_LOCK_SUFFIX, 1)
+        self.assertEqual(self._get(), 'value 1')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self._counts()[1], 1)
+
+        cache.delete(key + COMPUTED_CACHE_LOCK_SUFFIX)
+        self.assertEqual(self._get(), 'value 2')
+
+    def test_single_flight_on_cold_miss(self):
+        """Test khi chưa có giá trị, worker không giữ khoá chờ kết quả thay vì tự tính"""
+        key = computed_cache._key('test', ['key'])
+        versions = change_counters.versions(self.tags)
+        cache.add(key + COMPUTED_CACHE_LOCK_SUFFIX, 1)
+
+        def other_worker_finishes(seconds):
+            computed_cache._compute(key, lambda: 'theirs', versions, 60)
+
+        with mock.patch.object(computed_cache.time, 'sleep', side_effect=other_worker_finishes):
+            self.assertEqual(self._get(), 'theirs')
+        self.assertEqual(self.calls, 0)
+
+    def test_probabilistic_early_expiration(self):
+        """Test giá trị tính lâu được làm mới trước hạn"""
+        key = computed_cache._key('test', ['key'])
+        versions = change_counters.versions(self.tags)
+        cache.set(key, ('slow', versions, time.time() + 10, 0.001))
+        self.assertEqual(self._get(), 'slow')
+        cache.set(key, ('slow', versions, time.time() + 10, 100))
+        with mock.patch.object(computed_cache.random, 'random', return_value=0.5):
+            self.assertEqual(self._get(), 'value 1')
+
+    def test_reports_page_is_cached(self):
+        """Test trang báo cáo lần thứ hai không chạy lại các truy vấn thống kê"""
+        self.client.login(username='adminuser', password='adminpass123')
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse('admin_reports'), {'type': 'data'})
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(reverse('admin_reports'), {'type': 'data'})
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(second), len(first))
+        self.assertEqual(response.context['total_students'], 1)
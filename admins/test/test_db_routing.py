@@ -0,0 +1,121 @@
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from students.models import Student
+from utils import change_counters, computed_cache, db_routing, rankings
+
+# Database "replica" (TEST MIRROR của default), settings khai báo khi chạy manage.py test
+HAS_REPLICA = 'replica' in settings.DATABASES
+
+
+def _reading_alias(request):
+    """View trả về alias mà router chọn cho các lệnh đọc"""
+    return HttpResponse(db_routing.ReplicaRouter().db_for_read(Student) or 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(AdminViewsBaseTestCase):
+    """Tests cho router đọc từ replica"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        db_routing._health.clear()
+        self.view = db_routing.read_replica(_reading_alias)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.admin_user
+
+    def test_read_only_views_use_replica(self):
+        """Test view đánh dấu đọc từ replica, ghi và phần còn lại dùng primary"""
+        router = db_routing.ReplicaRouter()
+        with mock.patch.object(db_routing, 'replica_lag', return_value=0):
+            self.assertEqual(self.view(self.request).content, b'replica')
+        self.assertIsNone(router.db_for_read(Student))
+        with db_routing.replica_reads():
+            self.assertIsNone(router.db_for_write(Student))
+        self.assertFalse(router.allow_migrate('replica', 'students'))
+        self.assertIsNone(router.allow_migrate('default', 'students'))
+
+    def test_write_pins_user_to_primary(self):
+        """Test người vừa ghi đọc lại từ primary (read-your-writes)"""
+        self.client.login(username='adminuser', password='adminpass123')
+        self.client.post(reverse('set_language'), {'language': 'en'})
+        self.assertTrue(db_routing.is_pinned(self.admin_user))
+        with mock.patch.object(db_routing, 'replica_lag', return_value=0):
+            self.assertEqual(self.view(self.request).content, b'default')
+
+        cache.clear()
+        with mock.patch.object(db_routing, 'replica_lag', return_value=0):
+            self.assertEqual(self.view(self.request).content, b'replica')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """Test replica trễ hoặc lỗi kết nối thì đọc từ primary, có cache kết quả kiểm tra"""
+        with mock.patch.object(db_routing, 'replica_lag', return_value=60) as lag, \
+                self.assertLogs('performance', 'WARNING'):
+            self.assertEqual(self.view(self.request).content, b'default')
+            self.assertEqual(self.view(self.request).content, b'default')
+        self.assertEqual(lag.call_count, 1)
+
+        db_routing._health.clear()
+        with mock.patch.object(db_routing, 'replica_lag', side_effect=OperationalError), \
+                self.assertLogs('performance', 'WARNING'):
+            self.assertEqual(self.view(self.request).content, b'default')
+
+    def test_tagged_cache_and_rankings_read_primary(self):
+        """Test giá trị cache gắn tag và bảng xếp hạng vừa tính trong view replica được đọc từ primary"""
+        router = db_routing.ReplicaRouter()
+        with mock.patch.object(db_routing, 'replica_lag', return_value=0), db_routing.replica_reads():
+            with db_routing.primary_reads():
+                self.assertIsNone(router.db_for_read(Student))
+            self.assertEqual(router.db_for_read(Student), 'replica')
+            self.assertEqual(computed_cache.get_or_compute(
+                'routing', [1], lambda: router.db_for_read(Student)), 'replica')
+            self.assertIsNone(computed_cache.get_or_compute(
+                'routing', [2], lambda: router.db_for_read(Student),
+                tags=[change_counters.class_marks(self.test_class.id)]))
+
+        reads = []
+        # Replica "default" chưa có bảng xếp hạng: tính trên primary rồi đọc lại từ primary
+        with mock.patch.object(db_routing, 'healthy_replicas', return_value=['default']), \
+                mock.patch.object(rankings, 'refresh_rankings',
+                                  side_effect=lambda *term: reads.append(router.db_for_read(Student))), \
+                db_routing.replica_reads():
+            term_rankings = rankings.term_rankings('2024-2025', 1)
+        self.assertEqual(reads, [None])
+        self.assertEqual(term_rankings.db, 'default')
+        self.assertEqual(term_rankings._db, 'default')
+
+
+@skipUnless(HAS_REPLICA, 'needs a "replica" database mirroring "default"')
+class ReplicaDatabaseTests(TransactionTestCase):
+    """
+    Tests với hai database (replica là mirror của default). Replica chỉ thấy
+    dữ liệu đã commit nên không chạy trong transaction của TestCase
+    """
+
+    databases = {'default', 'replica'} if HAS_REPLICA else {'default'}
+
+    def setUp(self):
+        AdminViewsBaseTestCase.setUp(self)
+        cache.clear()
+        db_routing._health.clear()
+        self.client.login(username='adminuser', password='adminpass123')
+
+    def test_reports_read_from_replica(self):
+        """Test trang báo cáo chạy truy vấn trên replica"""
+        with override_settings(DATABASE_REPLICAS=['replica']), \
+                CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('admin_reports'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries.captured_queries)
+        # Replica thấy dữ liệu đã commit trên primary
+        self.assertEqual(response.context['total_students'], Student.objects.count())
+        self.assertGreater(response.context['total_students'], 0)
@@ -0,0 +1,90 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import Class, Subject
+from students.models import Student, StudentSubject
+from teachers.models import Assign
+from utils.enrollment import enroll, enroll_student
+
+
+class EnrollmentTests(AdminViewsBaseTestCase):
+    """Tests cho việc tự động đăng ký môn học (StudentSubject)"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+
+    def _enrolled(self, usn):
+        return set(StudentSubject.objects.filter(student_id=usn).values_list('subject_id', flat=True))
+
+    def test_add_subject_to_class_enrolls_students(self):
+        """Test thêm môn cho lớp sẽ đăng ký môn đó cho mọi học sinh của lớp"""
+        response = self.client.post(
+            reverse('add_subject_to_class', args=(self.test_class.id,)),
+            {'subject': self.subject.id, 'teacher': self.teacher.id})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self._enrolled(self.student.USN), {'CS101'})
+
+    def test_class_change_enrolls_new_subjects(self):
+        """Test đổi lớp sẽ đăng ký các môn của lớp mới"""
+        other_class = Class.objects.create(id='CS-1B', dept=self.dept, section='B', sem=1)
+        other_subject = Subject.objects.create(id='CS102', name='Data Structures', dept=self.dept)
+        Assign.objects.create(class_id=other_class, subject=other_subject, teacher=self.teacher)
+
+        self.student.class_id = other_class
+        self.student.save()
+        self.assertEqual(enroll_student(self.student), 1)
+        self.assertEqual(enroll_student(self.student), 0)
+        self.assertEqual(self._enrolled(self.student.USN), {'CS102'})
+
+    def test_reconcile_command(self):
+        """Test lệnh reconcile_enrollments (dry-run và thực thi)"""
+        Assign.objects.create(class_id=self.test_class, subject=self.subject, teacher=self.teacher)
+        Student.objects.create(USN='1CS20CS002', name='Second', class_id=self.test_class, DOB=date(2000, 1, 1))
+
+        out = StringIO()
+        call_command('reconcile_enrollments', '--dry-run', stdout=out)
+        self.assertIn('Missing 2 enrollments', out.getvalue())
+        self.assertFalse(StudentSubject.objects.exists())
+
+        out = StringIO()
+        call_command('reconcile_enrollments', stdout=out)
+        self.assertIn('Created 2 enrollments', out.getvalue())
+        self.assertEqual(StudentSubject.objects.count(), 2)
+
+    def test_only_active_assignments_of_the_term(self):
+        """Test chỉ đăng ký môn của phân công đang hoạt động, lọc được theo kỳ"""
+        old_subject = Subject.objects.create(id='CS099', name='Old Course', dept=self.dept)
+        dropped_subject = Subject.objects.create(id='CS098', name='Dropped Course', dept=self.dept)
+        Assign.objects.create(class_id=self.test_class, subject=self.subject, teacher=self.teacher,
+                              academic_year='2025-2026', semester=1)
+        Assign.objects.create(class_id=self.test_class, subject=old_subject, teacher=self.teacher,
+                              academic_year='2024-2025', semester=2)
+        Assign.objects.create(class_id=self.test_class, subject=dropped_subject, teacher=self.teacher,
+                              academic_year='2025-2026', semester=1, is_active=False)
+
+        out = StringIO()
+        call_command('reconcile_enrollments', '--dry-run', '--academic-year', '2025-2026', '--semester', '1',
+                     stdout=out)
+        self.assertIn('Missing 1 enrollments', out.getvalue())
+        students = Student.objects.filter(pk=self.student.pk)
+        self.assertEqual(enroll(students, academic_year='2025-2026', semester=1), (1, 0))
+        self.assertEqual(self._enrolled(self.student.USN), {'CS101'})
+        enroll_student(self.student)
+        self.assertNotIn('CS098', self._enrolled(self.student.USN))
+
+    def test_inactive_enrollment_is_reactivated(self):
+        """Test học sinh quay lại lớp có môn đã học trước đó: đăng ký cũ được kích hoạt lại, không tạo mới"""
+        Assign.objects.create(class_id=self.test_class, subject=self.subject, teacher=self.teacher)
+        enrollment = StudentSubject.objects.create(student=self.student, subject=self.subject, is_active=False)
+
+        students = Student.objects.filter(pk=self.student.pk)
+        self.assertEqual(enroll(students), (0, 1))
+        enrollment.refresh_from_db()
+        self.assertTrue(enrollment.is_active)
+        self.assertEqual(StudentSubject.objects.filter(student=self.student).count(), 1)
+        self.assertEqual(enroll_student(self.student), 0)
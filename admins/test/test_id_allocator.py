@@ -0,0 +1,44 @@
+from datetime import date
+from django.core.management import call_command
+from io import StringIO
+from .test_base import AdminViewsBaseTestCase
+from admins.models import IdentifierCounter
+from students.models import Student
+from utils.id_allocator import (
+    next_teacher_id, reserve_teacher_ids, next_student_usn, reserve_student_usns
+)
+
+
+class IdentifierAllocatorTests(AdminViewsBaseTestCase):
+    """Tests cho bộ cấp phát mã giáo viên và USN"""
+
+    def test_next_teacher_id_seeds_from_existing(self):
+        """Kiểm tra mã đầu tiên tiếp nối mã lớn nhất đã có (T001)"""
+        self.assertEqual(next_teacher_id(), 'T002')
+        self.assertEqual(next_teacher_id(), 'T003')
+        self.assertEqual(IdentifierCounter.objects.get(key='teacher_id').last_value, 3)
+
+    def test_reserve_teacher_ids_range(self):
+        """Kiểm tra đặt trước một dải mã cho import hàng loạt"""
+        self.assertEqual(reserve_teacher_ids(3), ['T002', 'T003', 'T004'])
+        self.assertEqual(next_teacher_id(), 'T005')
+
+    def test_reserve_skips_manually_created_ids(self):
+        """Kiểm tra bỏ qua mã đã được tạo thủ công"""
+        next_teacher_id()
+        from teachers.models import Teacher
+        Teacher.objects.create(id='T003', name='Manual', DOB='1990-01-01', dept=self.dept)
+        self.assertEqual(reserve_teacher_ids(2), ['T004', 'T005'])
+
+    def test_student_usn_per_dept_and_year(self):
+        """Kiểm tra USN được đánh số riêng theo khoa và năm học"""
+        Student.objects.create(
+            USN='25CS007', name='Existing', DOB=date(2005, 1, 1), class_id=self.test_class)
+        self.assertEqual(next_student_usn('CS', '2025'), '25CS008')
+        self.assertEqual(reserve_student_usns('CS', 2, '2026'), ['26CS001', '26CS002'])
+
+    def test_reserve_ids_command(self):
+        """Kiểm tra lệnh reserve_ids in ra dải mã đã đặt"""
+        out = StringIO()
+        call_command('reserve_ids', 'student', '2', '--dept', 'CS', '--year', '2025', stdout=out)
+        self.assertEqual(out.getvalue().split(), ['25CS001', '25CS002'])
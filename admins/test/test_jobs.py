@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import Job
+from admins.tasks import send_account_email
+from utils import jobs
+from utils.constant import (
+    JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_DONE, JOB_STATUS_FAILED,
+    JOB_PRIORITY_LOW, JOB_PRIORITY_HIGH, JOB_RETRY_BASE_DELAY, JOB_LOCK_TIMEOUT,
+)
+
+
+@jobs.task
+def failing_task(reason):
+    raise RuntimeError(reason)
+
+
+class JobQueueTests(AdminViewsBaseTestCase):
+    """Tests cho hàng đợi job nền trong database"""
+
+    def test_account_email_runs_in_worker(self):
+        """Test thêm học sinh chỉ xếp hàng email, worker gửi và xoá mật khẩu khỏi payload"""
+        self.client.login(username='adminuser', password='adminpass123')
+        self.client.post(reverse('add_student'), {
+            'USN': '1CS20CS099', 'name': 'New Student', 'sex': 'Male', 'DOB': '2000-01-01',
+            'address': 'Addr', 'phone': '0123456789', 'class_id': self.test_class.id,
+            'username': 'newstudent', 'email': 'new@test.com',
+            'password': 'secretpass123', 'password_confirm': 'secretpass123',
+        })
+        job = Job.objects.get()
+        self.assertEqual(job.task, 'admins.tasks.send_account_email')
+        self.assertEqual(job.created_by, self.admin_user)
+        self.assertEqual(len(mail.outbox), 0)
+
+        out = StringIO()
+        call_command('run_workers', '--workers', '0', '--once', stdout=out)
+        self.assertIn('Ran 1 jobs', out.getvalue())
+        self.assertEqual(mail.outbox[0].to, ['new@test.com'])
+        self.assertIn('secretpass123', mail.outbox[0].body)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.payload), (JOB_STATUS_DONE, 1, {}))
+
+    def test_priority_and_delay(self):
+        """Test worker lấy job ưu tiên cao trước, job hẹn giờ chưa đến hạn thì chưa lấy"""
+        low = jobs.enqueue(failing_task, priority=JOB_PRIORITY_LOW, reason='low')
+        jobs.enqueue(failing_task, priority=JOB_PRIORITY_HIGH, delay=60, reason='later')
+        high = jobs.enqueue(failing_task, priority=JOB_PRIORITY_HIGH, reason='high')
+
+        self.assertEqual(jobs.claim('w1').pk, high.pk)
+        claimed = jobs.claim('w2')
+        self.assertEqual((claimed.pk, claimed.status, claimed.locked_by), (low.pk, JOB_STATUS_RUNNING, 'w2'))
+        self.assertIsNone(jobs.claim('w3'))
+
+    def test_retry_with_backoff(self):
+        """Test job lỗi được chạy lại sau thời gian chờ tăng dần, hết lượt thì failed"""
+        job = jobs.enqueue(failing_task, max_attempts=2, reason='boom')
+        with self.assertLogs('jobs', 'WARNING'):
+            self.assertEqual(jobs.work('w1', once=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JOB_STATUS_QUEUED, 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=JOB_RETRY_BASE_DELAY - 5))
+        self.assertEqual(jobs.retry_delay(3), JOB_RETRY_BASE_DELAY * 4)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs', 'ERROR'):
+            jobs.work('w1', once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JOB_STATUS_FAILED, 2))
+        self.assertEqual(job.payload, {'reason': 'boom'})
+
+    def test_connections_recycled_only_in_worker_loop(self):
+        """Test work() trong process của người gọi không đóng kết nối đang trong atomic(), vòng worker thì có"""
+        with mock.patch('utils.jobs.close_old_connections') as close:
+            jobs.work('w1', once=True)
+            close.assert_not_called()
+            jobs.work('w1', once=True, recycle_connections=True)
+            close.assert_called_once()
+
+    def test_stale_and_unique_jobs(self):
+        """Test job của worker đã chết được xếp hàng lại; enqueue unique không tạo job trùng"""
+        job = jobs.enqueue(failing_task, unique=True, reason='x')
+        self.assertEqual(jobs.enqueue(failing_task, unique=True, reason='x').pk, job.pk)
+        self.assertNotEqual(jobs.enqueue(failing_task, unique=True, reason='y').pk, job.pk)
+
+        Job.objects.filter(pk=job.pk).update(
+            status=JOB_STATUS_RUNNING, attempts=1,
+            locked_at=timezone.now() - timedelta(seconds=JOB_LOCK_TIMEOUT + 1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_at), (JOB_STATUS_QUEUED, None))
+
+        with self.assertRaises(ValueError):
+            jobs.enqueue(print)
+
+    def test_status_page_and_retry(self):
+        """Test trang trạng thái đếm theo status và chạy lại job failed"""
+        job = jobs.enqueue(send_account_email, user_id=self.admin_user.pk, full_name='A', password='p')
+        Job.objects.filter(pk=job.pk).update(status=JOB_STATUS_FAILED, attempts=5, last_error='SMTP down')
+        self.client.login(username='adminuser', password='adminpass123')
+
+        response = self.client.get(reverse('job_list'), {'status': JOB_STATUS_FAILED})
+        self.assertContains(response, 'SMTP down')
+        self.assertIn((JOB_STATUS_FAILED, 'Failed', 1), response.context['status_counts'])
+
+        self.client.post(reverse('retry_job', args=[job.pk]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JOB_STATUS_QUEUED, 0))
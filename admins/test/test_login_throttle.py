@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.forms import UnifiedLoginForm, AdminLoginForm
+from utils import login_throttle, metrics
+from utils.constant import (
+    LOGIN_THROTTLE_USERNAME_LIMIT, LOGIN_THROTTLE_IP_LIMIT, LOGIN_THROTTLE_LOCKOUT_BASE,
+    LOGIN_THROTTLED_ERROR, ADMIN_INVALID_CREDENTIALS_ERROR, METRICS_LOGIN_KEY,
+)
+
+
+class LoginThrottleTests(AdminViewsBaseTestCase):
+    """Tests cho giới hạn đăng nhập sai theo username và IP"""
+
+    def login(self, username, password, ip='10.0.0.1', form_class=UnifiedLoginForm):
+        request = RequestFactory().post('/login/', REMOTE_ADDR=ip)
+        form = form_class(request, data={'username': username, 'password': password})
+        return form.is_valid(), form.non_field_errors()
+
+    def fail(self, times, username='teacher1', ip='10.0.0.1'):
+        for _ in range(times):
+            self.login(username, 'wrong', ip)
+
+    def test_lockout_skips_authenticate(self):
+        """Test sau LIMIT lần sai username bị khoá, kể cả mật khẩu đúng, không gọi authenticate"""
+        with self.assertLogs('admin_activity', 'WARNING'):
+            self.fail(LOGIN_THROTTLE_USERNAME_LIMIT)
+        with mock.patch('admins.forms.authenticate') as authenticate:
+            valid, errors = self.login('teacher1', 'teacherpass123', ip='10.0.0.2')
+        self.assertFalse(valid)
+        authenticate.assert_not_called()
+        self.assertEqual(errors, [LOGIN_THROTTLED_ERROR.format(1)])
+
+        # Username khác từ IP khác vẫn đăng nhập bình thường
+        self.assertTrue(self.login('adminuser', 'adminpass123', ip='10.0.0.2', form_class=AdminLoginForm)[0])
+
+    def test_success_resets_failures(self):
+        """Test đăng nhập đúng xoá các lần sai trước đó của username"""
+        self.fail(LOGIN_THROTTLE_USERNAME_LIMIT - 1)
+        self.assertTrue(self.login('teacher1', 'teacherpass123')[0])
+        self.fail(LOGIN_THROTTLE_USERNAME_LIMIT - 1)
+        valid, errors = self.login('teacher1', 'wrong')
+        self.assertEqual(errors, [ADMIN_INVALID_CREDENTIALS_ERROR])
+
+    def test_ip_limit_and_backoff(self):
+        """Test IP thử nhiều username bị khoá, lần khoá sau dài gấp đôi"""
+        with self.assertLogs('admin_activity', 'WARNING'):
+            for index in range(LOGIN_THROTTLE_IP_LIMIT):
+                self.login(f'user{index}', 'wrong', ip='10.0.0.9')
+        request = RequestFactory().post('/login/', REMOTE_ADDR='10.0.0.9')
+        self.assertGreater(login_throttle.retry_after(request, 'someone'), LOGIN_THROTTLE_LOCKOUT_BASE - 2)
+
+        with self.assertLogs('admin_activity', 'WARNING') as logs:
+            login_throttle._lock('ip', '10.0.0.9')
+        self.assertIn(f'for {LOGIN_THROTTLE_LOCKOUT_BASE * 2}s (strike 2)', logs.output[0])
+
+    @override_settings(LOGIN_THROTTLE_EXEMPT_IPS=['10.1.0.0/16'], LOGIN_THROTTLE_EXEMPT_USERNAMES=['kiosk'],
+                       LOGIN_THROTTLE_TRUSTED_PROXIES=1)
+    def test_exemptions_and_proxy(self):
+        """Test IP/username miễn trừ không bị đếm; IP client lấy từ X-Forwarded-For của proxy tin cậy"""
+        request = RequestFactory().post('/login/', REMOTE_ADDR='127.0.0.1',
+                                        HTTP_X_FORWARDED_FOR='1.2.3.4, 10.1.2.3')
+        self.assertEqual(login_throttle.client_ip(request), '10.1.2.3')
+        self.assertEqual(login_throttle._subjects(request, 'Kiosk'), [])
+        self.assertEqual([kind for kind, ident, limit in login_throttle._subjects(request, 'teacher1')], ['user'])
+
+    def test_view_and_metrics(self):
+        """Test trang đăng nhập admin hiển thị lỗi khoá và metrics đếm theo kết quả"""
+        before = metrics.snapshot().get(METRICS_LOGIN_KEY, [0, 0, 0])
+        self.login('adminuser', 'adminpass123', ip='127.0.0.1', form_class=AdminLoginForm)
+        with self.assertLogs('admin_activity', 'WARNING'):
+            self.fail(LOGIN_THROTTLE_USERNAME_LIMIT, username='adminuser', ip='127.0.0.1')
+        response = self.client.post(reverse('admin_login'), {'username': 'adminuser', 'password': 'adminpass123'})
+        self.assertContains(response, LOGIN_THROTTLED_ERROR.format(1))
+
+        after = metrics.snapshot()[METRICS_LOGIN_KEY]
+        self.assertEqual([a - b for a, b in zip(after, before)], [1, LOGIN_THROTTLE_USERNAME_LIMIT, 1])
+        self.assertIn('django_login_attempts_total{outcome="throttled"}',
+                      metrics.render_prometheus(metrics.snapshot()))
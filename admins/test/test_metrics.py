@@ -0,0 +1,80 @@
+import os
+import socket
+import tempfile
+import time
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from utils import metrics
+from utils.constant import METRICS_FLUSH_INTERVAL, METRICS_STALE_FLUSHES
+
+
+class PerformanceMetricsTests(AdminViewsBaseTestCase):
+    """Tests cho middleware đo hiệu năng và endpoint Prometheus"""
+
+    def setUp(self):
+        super().setUp()
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+        override = override_settings(METRICS_DIR=self.metrics_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_metrics_recorded_per_view(self):
+        """Test số request, số query được ghi nhận theo URL name"""
+        self.client.login(username='adminuser', password='adminpass123')
+        before = metrics.snapshot().get('class_list', [0, 0.0, 0])
+        self.client.get(reverse('class_list'))
+        after = metrics.snapshot()['class_list']
+
+        self.assertEqual(after[0], before[0] + 1)
+        self.assertGreater(after[2], before[2])
+
+        response = self.client.get(reverse('admin_metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('django_view_request_duration_seconds_count{view="class_list"}', body)
+        self.assertIn('django_view_db_queries_total{view="class_list"}', body)
+
+    def test_flushed_workers_are_summed(self):
+        """Test cộng dồn số liệu từ file của các worker khác"""
+        metrics.flush()
+        other = metrics._metrics_dir() / 'otherhost-1.json'
+        other.write_text('{"fake_view": [2, 0.5, 7, 0.1, 0, 0, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0]}')
+
+        collected = metrics.collect()
+        self.assertEqual(collected['fake_view'][0], 2)
+        body = metrics.render_prometheus(collected)
+        self.assertIn('django_view_request_duration_seconds_bucket{view="fake_view",le="0.25"} 0', body)
+        self.assertIn('django_view_request_duration_seconds_bucket{view="fake_view",le="0.5"} 2', body)
+        self.assertIn('django_view_db_queries_total{view="fake_view"} 7', body)
+
+    def test_dead_worker_files_are_removed(self):
+        """Test file của worker đã thoát bị xoá khi thoát hoặc khi collect, không cộng vào tổng"""
+        metrics.flush()
+        own = metrics._worker_file()
+        self.assertTrue(own.exists())
+        metrics._remove_worker_file()
+        self.assertFalse(own.exists())
+
+        directory = metrics._metrics_dir()
+        stale = [directory / f'{socket.gethostname()}-999999-1.json', directory / 'otherhost-2-1.json']
+        for path in stale:
+            path.write_text('{"fake_view": [1, 0.5, 7, 0.1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0]}')
+        old = time.time() - METRICS_FLUSH_INTERVAL * METRICS_STALE_FLUSHES - 1
+        os.utime(stale[1], (old, old))
+
+        with mock.patch('os.kill', side_effect=ProcessLookupError):
+            collected = metrics.collect()
+        self.assertNotIn('fake_view', collected)
+        self.assertFalse(any(path.exists() for path in stale))
+
+    def test_metrics_requires_superuser(self):
+        """Test endpoint chỉ dành cho superuser"""
+        self.client.login(username='teacher1', password='teacherpass123')
+        response = self.client.get(reverse('admin_metrics'))
+        self.assertNotEqual(response.status_code, 200)
@@ -0,0 +1,82 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import Dept, Class, Job
+from students.models import Student, StudentSubject, StudentRank
+from teachers.models import Assign, ExamSession, Marks
+from utils import jobs
+from utils.rankings import term_rankings, top_n, bottom_n, at_or_above_percentile
+from utils.constant import RANKING_SCOPE_CLASS, RANKING_SCOPE_DEPT
+
+TERM = ('2024-2025', 1)
+
+
+class RankingTests(AdminViewsBaseTestCase):
+    """Tests cho xếp hạng học sinh bằng window function"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+        ee = Dept.objects.create(id='EE', name='Electrical')
+        ee_class = Class.objects.create(id='EE-1A', dept=ee, section='A', sem=1)
+        # (USN, lớp, điểm) - CIE = ceil(điểm / 2)
+        students = [
+            ('1CS20CS001', None, 80), ('1CS20CS002', self.test_class, 60),
+            ('1CS20CS003', self.test_class, 60), ('1EE20EE001', ee_class, 90),
+            ('1EE20EE002', ee_class, 20),
+        ]
+        for usn, class_obj, value in students:
+            student = self.student if class_obj is None else Student.objects.create(
+                USN=usn, name=usn, class_id=class_obj, DOB=date(2000, 1, 1))
+            student_subject = StudentSubject.objects.create(student=student, subject=self.subject)
+            Marks.objects.create(student_subject=student_subject, marks1=value,
+                                 academic_year=TERM[0], semester=TERM[1])
+
+    def test_ranks_and_percentiles(self):
+        """Test hạng theo lớp, khoa, toàn trường và percentile"""
+        rankings = term_rankings(*TERM)
+        ranks = {rank.student_id: rank for rank in rankings}
+        self.assertEqual(len(ranks), 5)
+        self.assertEqual(ranks['1EE20EE001'].school_rank, 1)
+        self.assertEqual(ranks['1EE20EE001'].school_percentile, 100.0)
+        self.assertEqual(ranks['1EE20EE002'].school_percentile, 0.0)
+        # Hai học sinh bằng điểm có cùng hạng
+        self.assertEqual((ranks['1CS20CS002'].dept_rank, ranks['1CS20CS003'].dept_rank), (2, 2))
+        self.assertEqual(ranks['1CS20CS002'].dept_rank_low, 1)
+
+        dept_top = [(rank.dept_id, rank.student_id) for rank in top_n(rankings, 1, RANKING_SCOPE_DEPT)]
+        self.assertEqual(dept_top, [('CS', '1CS20CS001'), ('EE', '1EE20EE001')])
+        self.assertEqual([rank.student_id for rank in bottom_n(rankings, 1, RANKING_SCOPE_CLASS)],
+                         ['1CS20CS002', '1CS20CS003', '1EE20EE002'])
+        self.assertEqual([rank.student_id for rank in bottom_n(rankings, 1)], ['1EE20EE002'])
+        self.assertEqual([rank.student_id for rank in at_or_above_percentile(rankings, 75)],
+                         ['1EE20EE001', '1CS20CS001'])
+
+    def test_performance_report_and_command(self):
+        """Test báo cáo performance đọc bảng xếp hạng và lệnh refresh_rankings"""
+        response = self.client.get(reverse('admin_reports'), {'type': 'performance'})
+        self.assertEqual(response.context['academic_year'], TERM[0])
+        self.assertEqual(response.context['top_students'][0].student_id, '1EE20EE001')
+
+        Marks.objects.filter(student_subject__student_id='1EE20EE002').update(marks1=100)
+        out = StringIO()
+        call_command('refresh_rankings', stdout=out)
+        self.assertIn('ranked 5 students', out.getvalue())
+        self.assertEqual(StudentRank.objects.get(student_id='1EE20EE002').school_rank, 1)
+
+    def test_marks_change_refreshes_rankings(self):
+        """Test nhập điểm xếp hàng job tính lại bảng xếp hạng của kỳ"""
+        self.assertEqual(term_rankings(*TERM).get(student_id='1CS20CS002').school_rank, 3)
+        assign = Assign.objects.create(class_id=self.test_class, subject=self.subject, teacher=self.teacher,
+                                       academic_year=TERM[0], semester=TERM[1])
+        exam_session = ExamSession.objects.create(assign=assign)
+        self.client.post(reverse('marks_confirm', args=[exam_session.id]), {'1CS20CS002': '100'})
+
+        job = Job.objects.get(task='admins.tasks.refresh_term_rankings')
+        self.assertEqual(job.payload, {'academic_year': TERM[0], 'semester': TERM[1]})
+        jobs.work('w1', once=True)
+        self.assertEqual(StudentRank.objects.get(student_id='1CS20CS002').school_rank, 1)
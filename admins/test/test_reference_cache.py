@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from admins.models import Dept, Subject, Class
+from utils.constant import REFERENCE_DATA_VERSION_KEY
+from utils import reference_cache
+from utils.reference_cache import (
+    get_reference_data, get_dept, get_subject, get_class, class_label,
+)
+
+
+class ReferenceCacheTests(TestCase):
+    """Tests cho reference data cache của Dept/Subject/Class"""
+
+    def setUp(self):
+        cache.clear()
+        self.dept = Dept.objects.create(id='CS', name='Computer Science')
+        self.subject = Subject.objects.create(id='CS101', name='Programming', dept=self.dept)
+        self.test_class = Class.objects.create(id='CS-1A', dept=self.dept, section='A', sem=1)
+
+    def test_lookup_without_queries(self):
+        """Test tra cứu từ snapshot không truy vấn DB"""
+        get_reference_data()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dept('CS').name, 'Computer Science')
+            self.assertEqual(get_subject('CS101').dept_id, 'CS')
+            self.assertEqual(get_class('CS-1A').sem, 1)
+            self.assertEqual(class_label('CS-1A'), str(self.test_class))
+
+    def test_save_and_delete_invalidate(self):
+        """Test save/delete làm mới snapshot và tăng version sau commit"""
+        get_reference_data()
+        version = cache.get(REFERENCE_DATA_VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.name = 'Programming 1'
+            self.subject.save()
+        self.assertEqual(get_subject('CS101').name, 'Programming 1')
+        self.assertNotEqual(cache.get(REFERENCE_DATA_VERSION_KEY), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.delete()
+        self.assertIsNone(get_subject('CS101'))
+
+    def test_new_row_found_on_miss(self):
+        """Test bản ghi mới tạo được nạp lại khi tra cứu bị miss"""
+        get_reference_data()
+        Dept.objects.filter(id='CS').update(name='Informatics')
+        Subject.objects.bulk_create([Subject(id='CS102', name='Data Structure', dept=self.dept)])
+
+        self.assertEqual(get_subject('CS102').name, 'Data Structure')
+        self.assertEqual(get_dept('CS').name, 'Informatics')
+
+    def test_unknown_ids_reload_at_most_once_per_interval(self):
+        """Test id không tồn tại (từ URL, bản ghi đã xoá) không nạp lại bảng ở mỗi lần tra cứu"""
+        get_reference_data()
+        with mock.patch.object(reference_cache, '_load', wraps=reference_cache._load) as load:
+            for _ in range(5):
+                self.assertIsNone(get_subject('NOPE'))
+                self.assertIsNone(get_class('NOPE'))
+        self.assertEqual(load.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(id='CS102', name='Data Structure', dept=self.dept)
+        self.assertEqual(get_subject('CS102').name, 'Data Structure')
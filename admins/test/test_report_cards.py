@@ -0,0 +1,115 @@
+import os
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from students.models import Student, StudentSubject
+from teachers.models import Assign, AttendanceClass, Marks
+from utils import report_cards
+from utils.attendance_store import write_bitset, write_rows
+from utils.constant import ATTENDANCE_CLASS_MARKED
+
+TERM = ('2024-2025', 1)
+
+
+class ReportCardTests(AdminViewsBaseTestCase):
+    """Tests cho xuất phiếu điểm hàng loạt"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+        self.assign = Assign.objects.create(class_id=self.test_class, subject=self.subject, teacher=self.teacher,
+                                            academic_year=TERM[0], semester=TERM[1])
+        self.other = self._add_student('1CS20CS002', 'Other')
+        Marks.objects.create(student_subject=StudentSubject.objects.create(student=self.student, subject=self.subject),
+                             name='Internal test 1', marks1=42, academic_year=TERM[0], semester=TERM[1])
+        for day in range(4):
+            session = AttendanceClass.objects.create(
+                assign=self.assign, date=date(2024, 9, 2) + timedelta(days=day), status=ATTENDANCE_CLASS_MARKED)
+            statuses = {self.student.USN: True, self.other.USN: day == 0}
+            (write_rows if day < 2 else write_bitset)(session, statuses)
+
+    def _add_student(self, usn, name):
+        student = Student.objects.create(USN=usn, name=name, class_id=self.test_class, DOB=date(2000, 1, 1))
+        StudentSubject.objects.create(student=student, subject=self.subject)
+        return student
+
+    def test_collect(self):
+        """Test gom điểm, CIE và điểm danh của từng học sinh"""
+        cards = {card['usn']: card for card in report_cards.collect(*TERM, class_id=self.test_class.id)}
+        self.assertEqual(set(cards), {self.student.USN, self.other.USN})
+
+        subject = cards[self.student.USN]['subjects'][0]
+        self.assertEqual((subject['attended'], subject['total'], subject['attendance']), (4, 4, 100.0))
+        self.assertEqual(subject['marks'][report_cards.TEST_NAMES.index('Internal test 1')], 42)
+        self.assertEqual(subject['teachers'], self.teacher.name)
+
+        weak = cards[self.other.USN]['subjects'][0]
+        self.assertEqual((weak['attended'], weak['total']), (1, 4))
+        self.assertTrue(weak['at_risk'])
+
+    def test_collect_query_count_is_constant(self):
+        """Test số query không tăng theo số học sinh"""
+        with CaptureQueriesContext(connection) as few:
+            report_cards.collect(*TERM)
+        for index in range(3, 13):
+            self._add_student(f'1CS20CS{index:03d}', f'Student {index}')
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(len(report_cards.collect(*TERM)), 12)
+        self.assertEqual(len(many), len(few))
+
+    def test_write_zip(self):
+        """Test ghi từng phiếu vào ZIP và báo tiến độ"""
+        cards = report_cards.collect(*TERM)
+        progress = []
+        buffer = BytesIO()
+        self.assertEqual(report_cards.write_zip(buffer, cards, progress=lambda *args: progress.append(args)), 2)
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+
+        with zipfile.ZipFile(buffer) as archive:
+            self.assertEqual(archive.namelist(), [f'{self.test_class.id}/{self.student.USN}.html',
+                                                  f'{self.test_class.id}/{self.other.USN}.html'])
+            html = archive.read(f'{self.test_class.id}/{self.student.USN}.html').decode()
+        self.assertIn(self.student.name, html)
+        self.assertIn('42', html)
+
+    def test_write_zip_process_pool(self):
+        """Test render trong process pool cho cùng kết quả"""
+        cards = report_cards.collect(*TERM)
+        serial, pooled = BytesIO(), BytesIO()
+        report_cards.write_zip(serial, cards)
+        report_cards.write_zip(pooled, cards, workers=2)
+        with zipfile.ZipFile(serial) as expected, zipfile.ZipFile(pooled) as actual:
+            self.assertEqual(
+                [expected.read(name) for name in expected.namelist()],
+                [actual.read(name) for name in actual.namelist()],
+            )
+
+    def test_class_download(self):
+        """Test tải phiếu điểm của một lớp dưới dạng ZIP stream"""
+        response = self.client.get(reverse('class_report_cards', args=[self.test_class.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+
+        response = self.client.get(reverse('class_report_cards', args=['NOPE']))
+        self.assertRedirects(response, reverse('class_list'))
+
+    def test_command(self):
+        """Test lệnh generate_report_cards cho toàn trường"""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'cards.zip')
+            stdout = StringIO()
+            call_command('generate_report_cards', '--workers', '0', '--output', output, stdout=stdout)
+            with zipfile.ZipFile(output) as archive:
+                self.assertEqual(len(archive.namelist()), 2)
+        self.assertIn('2/2 (100%)', stdout.getvalue())
+        self.assertIn('Wrote 2 report cards', stdout.getvalue())
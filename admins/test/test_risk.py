@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from students.models import RiskScore, Student, StudentSubject
+from teachers.models import Assign, AttendanceClass, Marks
+from utils.attendance_store import write_bitset, write_rows
+from utils.constant import ATTENDANCE_CLASS_MARKED, RISK_LEVEL_AT_RISK, RISK_LEVEL_NONE, RISK_LEVEL_WATCH
+from utils.risk import refresh_risk_scores, score_columns
+
+TERM = ('2024-2025', 1)
+
+
+class RiskScoreTests(AdminViewsBaseTestCase):
+    """Tests cho chấm điểm nguy cơ (at-risk) hằng đêm"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+        assign = Assign.objects.create(class_id=self.test_class, subject=self.subject, teacher=self.teacher,
+                                       academic_year=TERM[0], semester=TERM[1])
+        self.good = Student.objects.create(USN='1CS20CS002', name='Good', class_id=self.test_class,
+                                           DOB=date(2000, 1, 1))
+        self.slipping = Student.objects.create(USN='1CS20CS003', name='Slipping', class_id=self.test_class,
+                                               DOB=date(2000, 1, 1))
+        for student in (self.student, self.good, self.slipping):
+            StudentSubject.objects.create(student=student, subject=self.subject)
+        Marks.objects.create(student_subject=StudentSubject.objects.get(student=self.good),
+                             marks1=60, academic_year=TERM[0], semester=TERM[1])
+
+        # 8 buổi: 4 buổi đầu lưu từng dòng, 4 buổi sau lưu bitset
+        slipping = [True] * 3 + [True, False, True, False, True]
+        for day in range(8):
+            session = AttendanceClass.objects.create(
+                assign=assign, date=date(2024, 9, 2) + timedelta(days=day), status=ATTENDANCE_CLASS_MARKED)
+            statuses = {self.student.USN: day < 3, self.good.USN: True, self.slipping.USN: slipping[day]}
+            (write_rows if day < 4 else write_bitset)(session, statuses)
+
+    def test_score_columns(self):
+        """Test tính cột điểm danh, xu hướng và mức nguy cơ"""
+        attendance, recent, trend, classes_to_attend, score, level = score_columns(
+            [3, 8, 0], [8, 8, 0], [0, 5, 0], [5, 5, 0], [None, 30, 10])
+        self.assertEqual(list(attendance), [37.5, 100.0, 0.0])
+        self.assertEqual(list(trend), [-37.5, 0.0, 0.0])
+        self.assertEqual(list(classes_to_attend), [12, 0, 0])
+        self.assertEqual(list(level), [RISK_LEVEL_AT_RISK, RISK_LEVEL_NONE, RISK_LEVEL_AT_RISK])
+        self.assertGreater(score[0], score[2])
+
+    def test_refresh_risk_scores(self):
+        """Test gộp điểm danh dạng dòng và bitset, CIE và xu hướng các buổi gần nhất"""
+        self.assertEqual(refresh_risk_scores(*TERM), 3)
+        scores = {row.student_subject.student_id: row for row in RiskScore.objects.select_related('student_subject')}
+
+        weak = scores[self.student.USN]
+        self.assertEqual((weak.attended, weak.total, weak.recent_attendance), (3, 8, 0.0))
+        self.assertEqual((weak.level, weak.cie), (RISK_LEVEL_AT_RISK, None))
+
+        self.assertEqual((scores[self.good.USN].level, scores[self.good.USN].cie), (RISK_LEVEL_NONE, 30))
+
+        slipping = scores[self.slipping.USN]
+        self.assertEqual((slipping.attendance, slipping.recent_attendance, slipping.trend), (75.0, 60.0, -15.0))
+        self.assertEqual(slipping.level, RISK_LEVEL_WATCH)
+
+        # Chạy lại thay thế kết quả cũ của kỳ
+        self.assertEqual(refresh_risk_scores(*TERM), 3)
+        self.assertEqual(RiskScore.objects.count(), 3)
+
+    def test_command_digest_and_list(self):
+        """Test lệnh score_at_risk gửi email tổng hợp và trang danh sách at-risk"""
+        out = StringIO()
+        call_command('score_at_risk', '--email', stdout=out)
+        self.assertIn('scored 3 student subjects', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['teacher1@test.com'])
+        self.assertIn(self.student.USN, mail.outbox[0].body)
+        self.assertNotIn(self.good.USN, mail.outbox[0].body)
+
+        response = self.client.get(reverse('at_risk_students'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([score.student_subject.student_id for score in response.context['scores']],
+                         [self.student.USN])
+        response = self.client.get(reverse('at_risk_students'), {'level': RISK_LEVEL_WATCH})
+        self.assertEqual([score.student_subject.student_id for score in response.context['scores']],
+                         [self.slipping.USN])
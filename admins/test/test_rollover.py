@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import Class, Subject
+from students.models import Student, StudentSubject
+from teachers.models import Assign, AssignTime
+from utils.rollover import apply_rollover, next_term, plan_rollover
+
+
+class RolloverTests(AdminViewsBaseTestCase):
+    """Tests cho chuyển kỳ (rollover) và lên lớp"""
+
+    def setUp(self):
+        super().setUp()
+        self.assign = Assign.objects.create(
+            class_id=self.test_class, subject=self.subject, teacher=self.teacher,
+            academic_year='2024-2025', semester=1)
+        AssignTime.objects.create(assign=self.assign, period='7:30 - 8:30', day='Monday')
+        StudentSubject.objects.create(student=self.student, subject=self.subject)
+
+    def test_next_term(self):
+        """Test kỳ tiếp theo giữ nguyên định dạng năm học"""
+        self.assertEqual(next_term('2024-2025', 1), ('2024-2025', 2))
+        self.assertEqual(next_term('2024-2025', 3), ('2025-2026', 1))
+        self.assertEqual(next_term('2025', 3), ('2026', 1))
+
+    def test_rollover_promotes_and_clones(self):
+        """Test rollover tạo lớp kỳ sau, chuyển học sinh, sao chép phân công và đăng ký lại môn"""
+        # Lớp kỳ 2 đã có sẵn nhưng đang tắt: được bật lại và nhận học sinh của CS-1A
+        Class.objects.create(id='CS-2B', dept=self.dept, section='B', sem=2, is_active=False)
+        Class.objects.create(id='CS-1B', dept=self.dept, section='B', sem=1)
+
+        plan = plan_rollover('2024-2025', 1)
+        moves = {move.source: move for move in plan.moves}
+        self.assertEqual(moves['CS-1A'].target, 'CS-2A')
+        self.assertTrue(moves['CS-1A'].create)
+        self.assertEqual((moves['CS-1A'].students, moves['CS-1A'].assigns, moves['CS-1A'].times), (1, 1, 1))
+        self.assertTrue(moves['CS-1B'].reactivate)
+        self.assertFalse(Class.objects.filter(id='CS-2A').exists())
+
+        result = apply_rollover(plan)
+        self.assertEqual((result.classes_created, result.assigns, result.times, result.students), (1, 1, 1, 1))
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.class_id_id, 'CS-2A')
+        self.assertFalse(Class.objects.get(id='CS-1A').is_active)
+        self.assertTrue(Class.objects.get(id='CS-2B').is_active)
+        clone = Assign.objects.get(class_id='CS-2A', academic_year='2024-2025', semester=2)
+        self.assertEqual(clone.assigntime_set.count(), 1)
+        self.assertTrue(StudentSubject.objects.get(student=self.student, subject=self.subject).is_active)
+
+        # Chạy lại không nhân đôi phân công
+        self.assertEqual(apply_rollover(plan_rollover('2024-2025', 1)).assigns, 0)
+
+    def test_rollover_deactivates_dropped_subjects(self):
+        """Test môn không còn dạy ở lớp mới bị tắt đăng ký"""
+        other = Subject.objects.create(id='CS102', name='Data Structures', dept=self.dept)
+        StudentSubject.objects.create(student=self.student, subject=other)
+
+        apply_rollover(plan_rollover('2024-2025', 1))
+        self.assertFalse(StudentSubject.objects.get(student=self.student, subject=other).is_active)
+        self.assertTrue(StudentSubject.objects.get(student=self.student, subject=self.subject).is_active)
+
+    def test_rollover_ignores_other_terms_of_target_class(self):
+        """Test học sinh lên lớp chỉ được đăng ký môn của kỳ mới, không phải môn kỳ cũ của lớp đích"""
+        target = Class.objects.create(id='CS-2A', dept=self.dept, section='A', sem=2)
+        old = Subject.objects.create(id='X200', name='Old Elective', dept=self.dept)
+        Assign.objects.create(class_id=target, subject=old, teacher=self.teacher,
+                              academic_year='2024-2025', semester=1)
+
+        apply_rollover(plan_rollover('2024-2025', 1))
+        self.assertEqual(
+            list(StudentSubject.objects.filter(student=self.student).values_list('subject_id', 'is_active')),
+            [('CS101', True)])
+
+    def test_command_dry_run(self):
+        """Test lệnh rollover_term --dry-run không thay đổi dữ liệu"""
+        out = StringIO()
+        call_command('rollover_term', '--academic-year', '2024-2025', '--semester', '1', '--dry-run', stdout=out)
+        self.assertIn('CS-1A -> CS-2A (new): 1 students', out.getvalue())
+        self.assertEqual(Student.objects.get(pk=self.student.pk).class_id_id, 'CS-1A')
+        self.assertEqual(Assign.objects.count(), 1)
+
+    def test_view_preview_and_run(self):
+        """Test trang rollover: GET xem trước, POST thực hiện (chỉ superuser)"""
+        url = reverse('term_rollover')
+        self.client.login(username='teacher1', password='teacherpass123')
+        self.assertNotEqual(self.client.get(url).status_code, 200)
+
+        self.client.login(username='adminuser', password='adminpass123')
+        response = self.client.get(url, {'academic_year': '2024-2025', 'semester': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'CS-2A')
+
+        response = self.client.post(url, {'academic_year': '2024-2025', 'semester': 1})
+        self.assertRedirects(response, reverse('class_list'))
+        self.assertEqual(Student.objects.get(pk=self.student.pk).class_id_id, 'CS-2A')
@@ -0,0 +1,77 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import SearchEntry
+from students.models import Student
+from utils.constant import SEARCH_ENTITY_CLASS, SEARCH_ENTITY_STUDENT, SEARCH_ENTITY_TEACHER
+from utils.search_index import normalize, search
+
+
+class SearchIndexTests(AdminViewsBaseTestCase):
+    """Tests cho chỉ mục tìm kiếm chung (omnibox)"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+        self.duc = Student.objects.create(USN='1CS20CS002', name='Nguyễn Văn Đức', class_id=self.test_class,
+                                          DOB=date(2000, 1, 1))
+
+    def _found(self, query):
+        return [(row['entity'], row['object_id']) for row in search(query, 10)]
+
+    def test_normalize(self):
+        """Test bỏ dấu tiếng Việt và ký tự không phải chữ/số"""
+        self.assertEqual(normalize('Nguyễn Văn Đức'), ['nguyen', 'van', 'duc'])
+        self.assertEqual(normalize('CS-1A'), ['cs', '1a'])
+
+    def test_diacritic_insensitive_prefix_search(self):
+        """Test tìm không dấu, theo tiền tố từ và thứ tự từ tuỳ ý"""
+        for query in ('duc', 'Đức', 'nguyen van', 'van ngu', 'NGUYỄN'):
+            self.assertIn((SEARCH_ENTITY_STUDENT, self.duc.USN), self._found(query))
+        self.assertNotIn((SEARCH_ENTITY_STUDENT, self.duc.USN), self._found('uc'))
+
+    def test_ranking(self):
+        """Test kết quả bắt đầu bằng cụm từ được xếp trước"""
+        Student.objects.create(USN='1CS20CS003', name='Trần Đức Anh', class_id=self.test_class,
+                               DOB=date(2000, 1, 1))
+        self.assertEqual(self._found('duc')[0], (SEARCH_ENTITY_STUDENT, self.duc.USN))
+        self.assertEqual(self._found('anh')[0], (SEARCH_ENTITY_STUDENT, '1CS20CS003'))
+
+    def test_signals_keep_index_in_sync(self):
+        """Test lưu/xoá đối tượng cập nhật chỉ mục, đổi tên khoa cập nhật lớp và giáo viên"""
+        self.duc.name = 'Lê Minh'
+        self.duc.save()
+        self.assertEqual(self._found('duc'), [])
+        self.assertIn((SEARCH_ENTITY_STUDENT, self.duc.USN), self._found('le minh'))
+
+        self.dept.name = 'Khoa Học Máy Tính'
+        self.dept.save()
+        found = self._found('khoa hoc')
+        self.assertIn((SEARCH_ENTITY_CLASS, self.test_class.id), found)
+        self.assertIn((SEARCH_ENTITY_TEACHER, self.teacher.id), found)
+
+        self.duc.delete()
+        self.assertFalse(SearchEntry.objects.filter(entity=SEARCH_ENTITY_STUDENT, object_id='1CS20CS002').exists())
+
+    def test_rebuild_command(self):
+        """Test lệnh rebuild_search_index dựng lại toàn bộ chỉ mục"""
+        SearchEntry.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        # khoa, môn, lớp, giáo viên và hai học sinh
+        self.assertIn('Indexed 6 search entries', out.getvalue())
+        self.assertIn((SEARCH_ENTITY_STUDENT, self.duc.USN), self._found('duc'))
+
+    def test_omnibox_endpoint(self):
+        """Test endpoint trả về kết quả hỗn hợp kèm đường dẫn"""
+        response = self.client.get(reverse('omnibox_search'), {'q': 'cs'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        urls = {(row['entity'], row['id']): row['url'] for row in results}
+        self.assertEqual(urls[(SEARCH_ENTITY_CLASS, 'CS-1A')], reverse('edit_class', args=['CS-1A']))
+        self.assertEqual(urls[(SEARCH_ENTITY_STUDENT, self.duc.USN)], reverse('edit_student', args=[self.duc.USN]))
+        self.assertEqual(self.client.get(reverse('omnibox_search'), {'q': ' '}).json(), {'results': []})
@@ -36,6 +36,24 @@ class StudentManagementTests(AdminViewsBaseTestCase):
         self.assertTrue(Student.objects.filter(USN='1CS20CS001').exists())
         self.assertTrue(User.objects.filter(username='newstudent01').exists())
     
+    def test_add_student_auto_generates_usn(self):
+        """Test tự sinh USN theo khoa của lớp khi để trống"""
+        data = {
+            'username': 'autostudent01',
+            'email': 'autostudent@test.com',
+            'password': 'studentpass123',
+            'password_confirm': 'studentpass123',
+            'USN': '',
+            'name': 'Auto Student',
+            'sex': 'Male',
+            'DOB': '2000-01-01',
+            'class_id': self.test_class.id
+        }
+
+        self.client.post(reverse('add_student'), data)
+        student = Student.objects.get(user__username='autostudent01')
+        self.assertRegex(student.USN, r'^\d{2}CS001$')
+
     def test_add_student_form_display(self):
         """Test hiển thị form thêm sinh viên"""
         response = self.client.get(reverse('add_student'))
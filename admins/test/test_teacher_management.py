@@ -40,4 +40,23 @@ class TeacherManagementTests(AdminViewsBaseTestCase):
         """Kiểm tra hiển thị form thêm giáo viên"""
         response = self.client.get(reverse('add_teacher'))
         self.assertContains(response, 'form')
-        
\ No newline at end of file
+
+    def test_add_teacher_auto_generates_id(self):
+        """Kiểm tra tự sinh mã giáo viên theo thứ tự số (T010 > T009)"""
+        for teacher_id in ['T009', 'T010']:
+            Teacher.objects.create(id=teacher_id, name=teacher_id, DOB='1990-01-01', dept=self.dept)
+        data = {
+            'username': 'newteacher02',
+            'email': 'teacher2@test.com',
+            'password': 'teacherpass123',
+            'password_confirm': 'teacherpass123',
+            'id': '',
+            'name': 'Auto Teacher',
+            'sex': 'Female',
+            'DOB': '1990-01-01',
+            'dept': self.dept.id
+        }
+
+        response = self.client.post(reverse('add_teacher'), data)
+        self.assertRedirects(response, reverse('admin_dashboard'))
+        self.assertEqual(Teacher.objects.get(user__username='newteacher02').id, 'T011')
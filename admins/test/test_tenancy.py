@@ -0,0 +1,172 @@
+from datetime import date
+
+from django.utils import timezone
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import School, Dept, Class, Subject, User, Job
+from admins.tasks import refresh_term_risk_scores
+from students.models import Student, StudentSubject, AttendanceRollup, RiskScore, StudentRank
+from teachers.models import Teacher, Assign, AttendanceClass, Marks
+from utils import jobs, search_index, tenancy
+from utils.constant import REFERENCE_DATA_VERSION_KEY, RISK_LEVEL_AT_RISK, JOB_STATUS_FAILED
+from utils.reference_cache import get_class, get_reference_data
+
+
+@override_settings(TENANT_BASE_DOMAIN='schools.test', SECURE_SSL_REDIRECT=False,
+                   ALLOWED_HOSTS=['.schools.test', 'beta.example.org', 'testserver'])
+class TenancyTests(AdminViewsBaseTestCase):
+    """Tests cho nhiều trường dùng chung một deployment"""
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        School.objects.create(id='alpha', name='Alpha School')
+        School.objects.create(id='beta', name='Beta School', domain='beta.example.org')
+        Dept.objects.filter(id='CS').update(school_id='alpha')
+        with tenancy.activate('beta'):
+            # Dept mới nhận trường đang phục vụ
+            self.beta_dept = Dept.objects.create(id='BE-CS', name='Beta Computing')
+            self.beta_class = Class.objects.create(id='BE-1A', dept=self.beta_dept, section='A', sem=1)
+            self.beta_student = Student.objects.create(
+                USN='BE001', name='Beta Student', class_id=self.beta_class, DOB=date(2000, 1, 1))
+        self.client.login(username='adminuser', password='adminpass123')
+
+    def test_default_manager_is_scoped(self):
+        """Test manager mặc định chỉ thấy dữ liệu của trường đang phục vụ"""
+        self.assertEqual(self.beta_dept.school_id, 'beta')
+        with tenancy.activate('alpha'):
+            self.assertEqual(list(Class.objects.values_list('id', flat=True)), ['CS-1A'])
+            self.assertEqual(list(Student.objects.values_list('USN', flat=True)), ['1CS20CS001'])
+            self.assertFalse(Class.objects.filter(id='BE-1A').exists())
+            self.assertEqual(Class.all_objects.count(), 2)
+        with tenancy.activate('beta'):
+            self.assertEqual(list(self.beta_dept.class_set.values_list('id', flat=True)), ['BE-1A'])
+        self.assertEqual(Student.objects.count(), 2)
+
+    def test_host_selects_school(self):
+        """Test middleware chọn trường theo subdomain hoặc domain riêng"""
+        response = self.client.get(reverse('class_list'), HTTP_HOST='alpha.schools.test')
+        self.assertContains(response, 'CS-1A')
+        self.assertNotContains(response, 'BE-1A')
+
+        response = self.client.get(reverse('class_list'), HTTP_HOST='beta.example.org')
+        self.assertContains(response, 'BE-1A')
+        self.assertNotContains(response, 'CS-1A')
+
+        response = self.client.get(reverse('edit_class', args=['BE-1A']), HTTP_HOST='alpha.schools.test')
+        self.assertRedirects(response, reverse('class_list'), fetch_redirect_response=False)
+
+    def test_unknown_host(self):
+        """Test host lạ: không giới hạn trường, hoặc 404 khi bắt buộc có trường"""
+        response = self.client.get(reverse('class_list'), HTTP_HOST='other.schools.test')
+        self.assertContains(response, 'BE-1A')
+        with override_settings(TENANT_REQUIRED=True):
+            response = self.client.get(reverse('class_list'), HTTP_HOST='other.schools.test')
+        self.assertEqual(response.status_code, 404)
+
+    def test_reference_data_per_school(self):
+        """Test snapshot và version reference data tách theo trường"""
+        with tenancy.activate('alpha'):
+            self.assertIsNone(get_class('BE-1A'))
+            self.assertEqual(set(get_reference_data().classes), {'CS-1A'})
+        alpha_key = tenancy.cache_key(REFERENCE_DATA_VERSION_KEY, 'alpha')
+        beta_key = tenancy.cache_key(REFERENCE_DATA_VERSION_KEY, 'beta')
+        self.assertEqual(alpha_key, f'school:alpha:{REFERENCE_DATA_VERSION_KEY}')
+        with tenancy.activate('beta'):
+            get_reference_data()
+        versions = cache.get_many([alpha_key, beta_key])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beta_class.section = 'B'
+            self.beta_class.save()
+        self.assertEqual(cache.get(alpha_key), versions[alpha_key])
+        self.assertNotEqual(cache.get(beta_key), versions[beta_key])
+        with tenancy.activate('beta'):
+            self.assertEqual(get_class('BE-1A').section, 'B')
+
+    def test_search_is_scoped(self):
+        """Test omnibox chỉ tìm trong trường đang phục vụ"""
+        search_index.rebuild()
+        with tenancy.activate('alpha'):
+            self.assertEqual(search_index.search('student', 10)[0]['object_id'], '1CS20CS001')
+            self.assertEqual(len(search_index.search('student', 10)), 1)
+        with tenancy.activate('beta'):
+            self.assertEqual([row['object_id'] for row in search_index.search('student', 10)], ['BE001'])
+
+    def term_data(self):
+        """Phân công, điểm, buổi điểm danh và risk score cùng một kỳ ở cả hai trường"""
+        with tenancy.activate('beta'):
+            subject = Subject.objects.create(id='BE101', name='Beta Programming', dept=self.beta_dept)
+            user = User.objects.create_user(username='betateacher', password='betapass123')
+            teacher = Teacher.objects.create(user=user, id='BT001', name='Beta Teacher', dept=self.beta_dept,
+                                             DOB=date(1985, 1, 1))
+        rows = [(self.student, self.subject, self.teacher, self.test_class, 40),
+                (self.beta_student, subject, teacher, self.beta_class, 20)]
+        for student, subject, teacher, class_obj, value in rows:
+            assign = Assign.objects.create(class_id=class_obj, subject=subject, teacher=teacher)
+            student_subject, _ = StudentSubject.objects.get_or_create(student=student, subject=subject)
+            Marks.objects.create(student_subject=student_subject, marks1=value, academic_year='2024-2025', semester=1)
+            session = AttendanceClass.objects.create(assign=assign, date=timezone.now().date(), status=1)
+            AttendanceRollup.objects.refresh_for(session)
+            RiskScore.objects.create(student_subject=student_subject, academic_year='2024-2025', semester=1,
+                                     level=RISK_LEVEL_AT_RISK, score=1, computed_at=timezone.now())
+
+    def test_at_risk_students_is_scoped(self):
+        """Test danh sách học sinh có nguy cơ chỉ gồm học sinh của trường"""
+        self.term_data()
+        response = self.client.get(reverse('at_risk_students'), HTTP_HOST='alpha.schools.test')
+        self.assertContains(response, 'Test Student')
+        self.assertNotContains(response, 'Beta Student')
+
+    def test_attendance_report_is_scoped(self):
+        """Test báo cáo điểm danh chỉ tổng hợp lớp và giáo viên của trường"""
+        self.term_data()
+        response = self.client.get(reverse('admin_reports'), {'type': 'attendance'}, HTTP_HOST='beta.example.org')
+        self.assertEqual([row['class_id__id'] for row in response.context['student_attendance']], ['BE-1A'])
+        self.assertEqual([row['assign__teacher__name'] for row in response.context['teacher_attendance']],
+                         ['Beta Teacher'])
+
+    def test_performance_report_ranks_per_school(self):
+        """Test xếp hạng được tính và lưu riêng từng trường, không xoá hạng của trường khác"""
+        self.term_data()
+        params = {'type': 'performance', 'academic_year': '2024-2025', 'semester': '1'}
+        response = self.client.get(reverse('admin_reports'), params, HTTP_HOST='alpha.schools.test')
+        self.assertContains(response, 'Test Student')
+        self.assertNotContains(response, 'Beta Student')
+
+        response = self.client.get(reverse('admin_reports'), params, HTTP_HOST='beta.example.org')
+        self.assertContains(response, 'Beta Student')
+        self.assertNotContains(response, 'Test Student')
+        self.assertEqual(
+            sorted(StudentRank.all_objects.values_list('student_id', 'school_rank')), [('1CS20CS001', 1), ('BE001', 1)])
+
+    def test_jobs_are_scoped(self):
+        """Test trang job chỉ hiện và chạy lại job của trường"""
+        with tenancy.activate('alpha'):
+            alpha_job = jobs.enqueue(refresh_term_risk_scores, academic_year='2024-2025', semester=1)
+        with tenancy.activate('beta'):
+            beta_job = jobs.enqueue(refresh_term_risk_scores, academic_year='2024-2025', semester=2)
+        Job.all_objects.update(status=JOB_STATUS_FAILED, last_error='boom')
+
+        response = self.client.get(reverse('job_list'), HTTP_HOST='alpha.schools.test')
+        self.assertEqual([job.pk for job in response.context['jobs']], [alpha_job.pk])
+        self.assertIn((JOB_STATUS_FAILED, 'Failed', 1), response.context['status_counts'])
+
+        self.client.post(reverse('retry_job', args=[beta_job.pk]), HTTP_HOST='alpha.schools.test')
+        beta_job.refresh_from_db()
+        self.assertEqual(beta_job.status, JOB_STATUS_FAILED)
+
+    def test_user_list_is_scoped(self):
+        """Test trang tài khoản chỉ có học sinh và giáo viên của trường"""
+        self.term_data()
+        response = self.client.get(reverse('user_list'), HTTP_HOST='alpha.schools.test')
+        usernames = {user.username for user in response.context['users']}
+        self.assertEqual(usernames, {'teacher1', 'student1'})
+
+        beta_user = User.objects.get(username='betateacher')
+        response = self.client.get(reverse('edit_user', args=[beta_user.pk]), HTTP_HOST='alpha.schools.test')
+        self.assertRedirects(response, reverse('user_list'), fetch_redirect_response=False)
@@ -28,6 +28,28 @@ class UserManagementTests(AdminViewsBaseTestCase):
         response = self.client.get(reverse('user_list'), {'q': 'regularuser'})
         self.assertContains(response, 'regularuser')
 
+    def test_search_user_by_student_usn(self):
+        """Kiểm tra tìm kiếm người dùng theo USN của học sinh liên kết"""
+        response = self.client.get(reverse('user_list'), {'q': '1CS20CS001'})
+        users = list(response.context['users'])
+        self.assertEqual(users, [self.student_user])
+
+    def test_search_user_by_teacher_name(self):
+        """Kiểm tra tìm kiếm người dùng theo tên giáo viên liên kết"""
+        response = self.client.get(reverse('user_list'), {'q': 'test teacher'})
+        self.assertIn(self.teacher_user, list(response.context['users']))
+        self.assertNotIn(self.regular_user, list(response.context['users']))
+
+    def test_search_ranks_exact_match_first(self):
+        """Kiểm tra kết quả khớp chính xác được xếp trước"""
+        User.objects.create_user(
+            username='regularuser2', email='other@test.com', password='regularpass123'
+        )
+        response = self.client.get(reverse('user_list'), {'q': 'regularuser'})
+        users = list(response.context['users'])
+        self.assertEqual(users[0], self.regular_user)
+        self.assertEqual(len(users), 2)
+
     def test_filter_user_by_is_active(self):
         """Kiểm tra lọc người dùng theo trạng thái is_active"""
         self.regular_user.is_active = False
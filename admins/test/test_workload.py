@@ -0,0 +1,54 @@
+from datetime import date
+
+from django.urls import reverse
+
+from .test_base import AdminViewsBaseTestCase
+from admins.models import Class, Subject
+from students.models import Student
+from teachers.models import Assign, AssignTime, AttendanceClass, Teacher
+from utils.constant import ATTENDANCE_CLASS_MARKED, ATTENDANCE_CLASS_NOT_MARKED
+from utils.workload import teacher_workload
+
+
+class WorkloadTests(AdminViewsBaseTestCase):
+    """Tests cho thống kê khối lượng giảng dạy bằng subquery"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='adminuser', password='adminpass123')
+        other_class = Class.objects.create(id='CS-1B', dept=self.dept, section='B', sem=1)
+        other_subject = Subject.objects.create(id='CS102', name='Data Structures', dept=self.dept)
+        for index in range(2):
+            Student.objects.create(USN=f'1CS20CS10{index}', name=f'Student {index}',
+                                   class_id=self.test_class, DOB=date(2000, 1, 1))
+        Student.objects.create(USN='1CS20CS200', name='Student B', class_id=other_class,
+                               DOB=date(2000, 1, 1))
+        # Hai môn cùng một lớp: học sinh của lớp chỉ được đếm một lần
+        first = Assign.objects.create(class_id=self.test_class, subject=self.subject, teacher=self.teacher)
+        Assign.objects.create(class_id=self.test_class, subject=other_subject, teacher=self.teacher)
+        Assign.objects.create(class_id=other_class, subject=self.subject, teacher=self.teacher,
+                              academic_year='2025-2026')
+        for day in ('Monday', 'Tuesday', 'Wednesday'):
+            AssignTime.objects.create(assign=first, period='7:30 - 8:30', day=day)
+        AttendanceClass.objects.create(assign=first, date=date(2024, 10, 1), status=ATTENDANCE_CLASS_MARKED)
+        AttendanceClass.objects.create(assign=first, date=date(2024, 10, 2), status=ATTENDANCE_CLASS_NOT_MARKED)
+
+    def test_teacher_workload_counts(self):
+        """Test số liệu không bị nhân lên bởi JOIN và lọc theo kỳ"""
+        stats = teacher_workload(Teacher.objects.filter(pk=self.teacher.pk)).get()
+        self.assertEqual(
+            (stats.total_assignments, stats.total_classes, stats.total_students,
+             stats.weekly_periods, stats.sessions_held),
+            (3, 2, 4, 3, 1))
+
+        stats = teacher_workload(Teacher.objects.filter(pk=self.teacher.pk), '2024-2025', 1).get()
+        self.assertEqual((stats.total_assignments, stats.total_classes, stats.total_students), (2, 1, 3))
+
+    def test_teaching_report(self):
+        """Test báo cáo teaching dùng thống kê workload"""
+        response = self.client.get(reverse('admin_reports'), {'type': 'teaching', 'academic_year': '2025-2026'})
+        self.assertEqual(response.status_code, 200)
+        assignments = list(response.context['teaching_assignments'])
+        self.assertEqual([assignment.total_students for assignment in assignments], [1])
+        workload = {teacher.pk: teacher for teacher in response.context['teacher_workload']}
+        self.assertEqual(workload[self.teacher.pk].total_assignments, 1)
@@ -29,6 +29,7 @@ urlpatterns = [
     path('classes/<str:class_id>/delete/', views.delete_class, name='delete_class'),
     # CRUD học sinh
     path('classes/<str:class_id>/add-student/', views.add_student_to_class, name='add_student_to_class'),
+    path('classes/<str:class_id>/report-cards/', views.class_report_cards, name='class_report_cards'),
     path('students/edit/<str:student_id>/', views.edit_student, name='edit_student'),
     path('students/delete/<str:student_id>/', views.delete_student, name='delete_student'),
 
@@ -50,11 +51,23 @@ urlpatterns = [
     
     #Report admin
     path('reports/', views.admin_reports, name='admin_reports'),
+    path('metrics/', views.admin_metrics, name='admin_metrics'),
+    path('rollover/', views.term_rollover, name='term_rollover'),
+    path('at-risk/', views.at_risk_students, name='at_risk_students'),
+    path('jobs/', views.job_list, name='job_list'),
+    path('jobs/<int:job_id>/retry/', views.retry_job, name='retry_job'),
     
     #Quản lý người dùng
     path('users/', views.user_list, name='user_list'),
     path('users/add/', views.add_user, name='add_user'),
     path('users/<int:user_id>/edit/', views.edit_user, name='edit_user'),
     path('users/<int:user_id>/toggle-status/', views.toggle_user_status, name='toggle_user_status'),
+
+    # Autocomplete JSON cho các ô chọn lớn
+    path('autocomplete/teachers/', views.autocomplete_teachers, name='autocomplete_teachers'),
+    path('autocomplete/subjects/', views.autocomplete_subjects, name='autocomplete_subjects'),
+    path('autocomplete/classes/', views.autocomplete_classes, name='autocomplete_classes'),
+    path('autocomplete/assignments/', views.autocomplete_assignments, name='autocomplete_assignments'),
+    path('search/', views.omnibox_search, name='omnibox_search'),
     
 ]
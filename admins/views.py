@@ -3,14 +3,15 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
-from django.http import HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_protect
 from django.utils.translation import gettext_lazy as _
 from admins.models import User
 from django.db import transaction
 from django.core.paginator import Paginator
 from django.urls import reverse
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Q, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.db.models import Case, When, Value, IntegerField
@@ -20,8 +21,26 @@ from utils.constant import (
     ADMIN_DATETIME_FORMAT,
     ADMIN_WELCOME_MESSAGE,
     ADMIN_LOGOUT_SUCCESS_MESSAGE,
-    PAGE_SIZE, ZERO 
+    PAGE_SIZE, ZERO, USER_SEARCH_FIELDS,
+    AUTOCOMPLETE_PAGE_SIZE, TEACHER_AUTOCOMPLETE_FIELDS, SUBJECT_AUTOCOMPLETE_FIELDS,
+    CLASS_AUTOCOMPLETE_FIELDS, ASSIGN_AUTOCOMPLETE_FIELDS,
+    PROMETHEUS_CONTENT_TYPE, ATTENDANCE_REPORT_DEFAULT_DAYS,
+    ATTENDANCE_CLASS_MARKED, ATTENDANCE_CLASS_NOT_MARKED,
+    RANKING_REPORT_TOP_N, RANKING_REPORT_DEPT_TOP_N, RANKING_REPORT_BOTTOM_N, RANKING_SCOPE_DEPT,
+    MIN_SEMESTER, MAX_SEMESTER, RISK_LEVEL_CHOICES, RISK_LEVEL_AT_RISK,
+    OMNIBOX_RESULT_LIMIT, SEARCH_ENTITY_STUDENT, SEARCH_ENTITY_TEACHER, SEARCH_ENTITY_CLASS,
+    SEARCH_ENTITY_SUBJECT, SEARCH_ENTITY_DEPT, REPORTS_CACHE_TIMEOUT,
+    JOB_STATUS_CHOICES, JOB_STATUS_QUEUED, JOB_STATUS_FAILED,
 )
+from utils import computed_cache, jobs, metrics, report_cards, risk, rollover, search_index, tenancy, workload
+from utils.db_routing import read_replica
+from utils.enrollment import enroll_assignment, enroll_student
+from utils.search_utils import ranked_search
+from utils.attendance_store import student_has_attendance, attendance_record_count
+from utils.attendance_sessions import reconcile_sessions
+from utils.rankings import latest_ranked_term, term_rankings, top_n, bottom_n
+from utils.date_utils import determine_semester, determine_academic_year_start
+from .tasks import send_account_email
 from .forms import (
     AdminLoginForm,
     AddStudentForm,
@@ -38,13 +57,9 @@ from .forms import (
     AddUserForm,
     EditUserForm)
 # Model imports
-from students.models import Student, Attendance, StudentSubject, AttendanceTotal
+from students.models import Student, StudentSubject, AttendanceTotal, AttendanceRollup, RiskScore
 from teachers.models import Teacher, Assign, AssignTime, Marks, ExamSession, AttendanceClass
-from admins.models import User, Dept, Subject, Class
-from django.core.mail import send_mail
-from django.conf import settings
-from django.template.loader import render_to_string
-
+from admins.models import User, Dept, Subject, Class, Job
 
 
 @csrf_protect
@@ -148,27 +163,11 @@ def add_student(request):
                         phone=form.cleaned_data['phone'],
                         class_id=form.cleaned_data['class_id']
                     )
+                    enroll_student(student)
 
-                    # Email 
-                    email_context = {
-                        'full_name': student.name,
-                        'username': user.username,
-                        'password': form.cleaned_data['password'], 
-                    }
-                    email_subject = _('Welcome to Our School System')
-                    email_body = render_to_string('admins/email_templates/account_creation_email.html', email_context)
-                    email_from = settings.DEFAULT_FROM_EMAIL
-                    email_to = [user.email]
-
-                    # Send email
-                    send_mail(
-                        subject=email_subject,
-                        message=email_body, 
-                        from_email=email_from,
-                        recipient_list=email_to,
-                        html_message=email_body,  
-                        fail_silently=False,
-                    )
+                    # Email gửi bởi worker nền (run_workers); job bị huỷ cùng transaction nếu lỗi
+                    jobs.enqueue(send_account_email, user_id=user.pk, full_name=student.name,
+                                 password=form.cleaned_data['password'], created_by=request.user)
 
                     messages.success(request, _(
                         'Student "{}" has been successfully added and an email has been sent.').format(student.name))
@@ -226,26 +225,9 @@ def add_teacher(request):
                         phone=form.cleaned_data['phone'],
                         dept=form.cleaned_data['dept']
                     )
-                    # Email 
-                    email_context = {
-                        'full_name': teacher.name,
-                        'username': user.username,
-                        'password': form.cleaned_data['password'], 
-                    }
-                    email_subject = _('Welcome to Our School System')
-                    email_body = render_to_string('admins/email_templates/account_creation_email.html', email_context)
-                    email_from = settings.DEFAULT_FROM_EMAIL
-                    email_to = [user.email]
-
-                    # Send email
-                    send_mail(
-                        subject=email_subject,
-                        message=email_body, 
-                        from_email=email_from,
-                        recipient_list=email_to,
-                        html_message=email_body,  
-                        fail_silently=False,
-                    )
+                    # Email gửi bởi worker nền (run_workers); job bị huỷ cùng transaction nếu lỗi
+                    jobs.enqueue(send_account_email, user_id=user.pk, full_name=teacher.name,
+                                 password=form.cleaned_data['password'], created_by=request.user)
 
                     messages.success(request, _(
                         'Teacher "{}" has been successfully added and an email has been sent..').format(teacher.name))
@@ -320,7 +302,8 @@ def add_teaching_assignment(request):
     if request.method == 'POST':
         form = TeachingAssignmentForm(request.POST)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                enroll_assignment(form.save())
             messages.success(request, _(
                 'Teaching assignment has been added successfully!'))
             return redirect('teaching_assignments')
@@ -354,7 +337,8 @@ def edit_teaching_assignment(request, assignment_id):
     if request.method == 'POST':
         form = TeachingAssignmentForm(request.POST, instance=assignment)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                enroll_assignment(form.save())
             messages.success(request, _(
                 'Teaching assignment has been updated successfully!'))
             return redirect('teaching_assignments')
@@ -669,7 +653,7 @@ def add_student_to_class(request, class_id):
         return redirect('class_list')
 
     if request.method == 'POST':
-        form = AddStudentForm(request.POST)
+        form = AddStudentForm(request.POST, class_obj=class_obj)
         if form.is_valid():
             try:
                 with transaction.atomic():
@@ -694,6 +678,8 @@ def add_student_to_class(request, class_id):
                         phone=form.cleaned_data['phone'],
                         class_id=class_obj  # Gán lớp cụ thể
                     )
+                    # Đăng ký các môn học đang được dạy cho lớp
+                    enroll_student(student)
 
                     messages.success(request, _(
                         'Student "{}" has been successfully added to class.').format(student.name))
@@ -706,7 +692,7 @@ def add_student_to_class(request, class_id):
                 for error in errors:
                     messages.error(request, error)
     else:
-        form = AddStudentForm(initial={'class_id': class_obj})
+        form = AddStudentForm(initial={'class_id': class_obj}, class_obj=class_obj)
 
     context = {
         'form': form,
@@ -766,7 +752,10 @@ def edit_student(request, student_id):
                     user.save()
 
                     # Cập nhật Student model (form.save() sẽ tự động update vì có instance)
+                    class_changed = 'class_id' in form.changed_data
                     form.save()
+                    if class_changed:
+                        enroll_student(student)
 
                     messages.success(request, _(
                         'Student "{}" has been updated successfully!').format(student.name))
@@ -807,7 +796,7 @@ def delete_student(request, student_id):
 
         # Kiểm tra xem có dữ liệu học tập liên quan không
         has_student_subjects = StudentSubject.objects.filter(student=student).exists()
-        has_attendance = Attendance.objects.filter(student=student).exists()
+        has_attendance = student_has_attendance(student.USN)
         has_attendance_total = AttendanceTotal.objects.filter(student=student).exists()
         has_marks = Marks.objects.filter(student_subject__student=student).exists()
 
@@ -1061,11 +1050,12 @@ def add_subject_to_class(request, class_id):
             try:
                 with transaction.atomic():
                     # Create a new Assign record
-                    Assign.objects.create(
+                    assign = Assign.objects.create(
                         class_id=class_obj,
                         subject=form.cleaned_data['subject'],
                         teacher=form.cleaned_data['teacher']
                     )
+                    enroll_assignment(assign)
                     messages.success(request, _(
                         'Subject "{}" has been successfully assigned to class "{}".').format(
                             form.cleaned_data['subject'], class_obj))
@@ -1108,72 +1098,213 @@ def remove_subject_from_class(request, class_id, assign_id):
         messages.error(request, _('The assignment does not exist!'))
     return redirect('edit_class', class_id=class_id)
 
-def _get_performance_report_context(total_students: int):
-    """Build context for Student Performance report."""
-    student_performance = StudentSubject.objects.select_related('student', 'subject').annotate(
-        avg_marks=Avg('marks__marks1')
-    ).filter(marks__isnull=False)
 
-    top_students = student_performance.order_by('-avg_marks')[:10]
+def _autocomplete_response(request, queryset, fields):
+    """
+    Trả về một trang kết quả autocomplete dạng JSON
+    ({"results": [{"id", "text"}], "pagination": {"more"}}).
+    Lọc theo tiền tố (istartswith) để dùng được index UPPER(col) text_pattern_ops.
+    """
+    term = request.GET.get('q', '').strip()
+    if term:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__istartswith': term})
+        queryset = queryset.filter(condition)
+
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        page = 1
+
+    # Lấy thêm một dòng để biết còn trang sau hay không, tránh COUNT(*)
+    offset = (page - 1) * AUTOCOMPLETE_PAGE_SIZE
+    rows = list(queryset[offset:offset + AUTOCOMPLETE_PAGE_SIZE + 1])
+    return JsonResponse({
+        'results': [{'id': obj.pk, 'text': str(obj)} for obj in rows[:AUTOCOMPLETE_PAGE_SIZE]],
+        'pagination': {'more': len(rows) > AUTOCOMPLETE_PAGE_SIZE},
+    })
 
-    class_performance = Class.objects.annotate(
-        student_count=Count('student'),
-        avg_performance=Avg('student__studentsubject__marks__marks1')
-    )
 
-    return {
+@login_required
+def autocomplete_teachers(request):
+    """
+    Autocomplete endpoint cho giáo viên
+    """
+    queryset = Teacher.objects.only('id', 'name').order_by('name', 'id')
+    return _autocomplete_response(request, queryset, TEACHER_AUTOCOMPLETE_FIELDS)
+
+
+@login_required
+def autocomplete_subjects(request):
+    """
+    Autocomplete endpoint cho môn học; exclude_class bỏ các môn đã phân công
+    cho lớp đó trong kỳ hiện tại (giống AddSubjectToClassForm)
+    """
+    queryset = Subject.objects.only('id', 'name').order_by('name', 'id')
+    exclude_class = request.GET.get('exclude_class')
+    if exclude_class:
+        today = timezone.localdate()
+        queryset = queryset.exclude(id__in=Assign.objects.filter(
+            class_id=exclude_class,
+            academic_year=determine_academic_year_start(today),
+            semester=determine_semester(today),
+        ).values('subject'))
+    return _autocomplete_response(request, queryset, SUBJECT_AUTOCOMPLETE_FIELDS)
+
+
+@login_required
+def autocomplete_classes(request):
+    """
+    Autocomplete endpoint cho lớp học đang hoạt động
+    """
+    queryset = Class.objects.select_related('dept').filter(is_active=True).order_by('id')
+    return _autocomplete_response(request, queryset, CLASS_AUTOCOMPLETE_FIELDS)
+
+
+@login_required
+def autocomplete_assignments(request):
+    """
+    Autocomplete endpoint cho phân công giảng dạy, có thể lọc theo năm/kỳ
+    """
+    queryset = Assign.objects.select_related(
+        'teacher', 'subject', 'class_id__dept'
+    ).order_by('teacher__name', 'subject__name', 'id')
+    academic_year = request.GET.get('academic_year')
+    semester = request.GET.get('semester')
+    if academic_year:
+        queryset = queryset.filter(academic_year__icontains=academic_year)
+    if semester and semester.isdigit():
+        queryset = queryset.filter(semester=int(semester))
+    return _autocomplete_response(request, queryset, ASSIGN_AUTOCOMPLETE_FIELDS)
+
+
+
+def _omnibox_url(entity, object_id):
+    if entity == SEARCH_ENTITY_STUDENT:
+        return reverse('edit_student', args=[object_id])
+    if entity == SEARCH_ENTITY_TEACHER:
+        return f"{reverse('teaching_assignments')}?teacher={object_id}"
+    if entity == SEARCH_ENTITY_CLASS:
+        return reverse('edit_class', args=[object_id])
+    if entity == SEARCH_ENTITY_SUBJECT:
+        return reverse('edit_subject', args=[object_id])
+    if entity == SEARCH_ENTITY_DEPT:
+        return reverse('edit_department', args=[object_id])
+    return ''
+
+
+@login_required
+def omnibox_search(request):
+    """
+    Typeahead endpoint của ô tìm kiếm chung: học sinh, giáo viên, lớp, môn và
+    khoa xếp hạng chung trong một truy vấn trên bảng SearchEntry
+    ({"results": [{"entity", "id", "text", "detail", "url"}]}).
+    """
+    rows = search_index.search(request.GET.get('q', ''), OMNIBOX_RESULT_LIMIT)
+    return JsonResponse({
+        'results': [
+            {
+                'entity': row['entity'],
+                'id': row['object_id'],
+                'text': row['display'],
+                'detail': row['detail'],
+                'url': _omnibox_url(row['entity'], row['object_id']),
+            }
+            for row in rows
+        ],
+    })
+
+def _get_performance_report_context(total_students: int, academic_year=None, semester=None):
+    """Build context for Student Performance report from the materialized term rankings."""
+    context = {
         'report_type': 'performance',
         'total_students': total_students,
-        'top_students': top_students,
-        'class_performance': class_performance,
         'title': 'Student Performance Report'
     }
+    term = (academic_year, semester) if academic_year and semester else latest_ranked_term()
+    if term is None:
+        return context
+
+    # Mỗi truy vấn dưới đây đi theo index (năm học, kỳ, phạm vi, hạng) của StudentRank
+    rankings = term_rankings(*term)
+    context.update({
+        'academic_year': term[0],
+        'semester': term[1],
+        'top_students': top_n(rankings, RANKING_REPORT_TOP_N),
+        'dept_top_students': top_n(rankings, RANKING_REPORT_DEPT_TOP_N, RANKING_SCOPE_DEPT),
+        'bottom_students': bottom_n(rankings, RANKING_REPORT_BOTTOM_N),
+        'class_performance': rankings.values(
+            'class_id', 'class_id__sem', 'class_id__section', 'dept__name'
+        ).annotate(
+            student_count=Count('id'),
+            avg_performance=Avg('score'),
+        ).order_by('class_id'),
+    })
+    return context
+
+
+def _parse_report_date(value):
+    """Parse a YYYY-MM-DD query parameter, returning None when missing or invalid."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except ValueError:
+        return None
 
 
-def _get_attendance_report_context():
-    """Build context for Attendance report."""
-    today = timezone.now().date()
-    month_ago = today - timedelta(days=30)
+def _get_attendance_report_context(start_date=None, end_date=None):
+    """Build context for Attendance report from the daily rollups."""
+    end_date = end_date or timezone.now().date()
+    start_date = start_date or end_date - timedelta(days=ATTENDANCE_REPORT_DEFAULT_DAYS)
 
-    student_attendance = Attendance.objects.filter(
-        date__gte=month_ago
+    # Mỗi buổi học chỉ có một dòng rollup nên cả học kỳ chỉ vài nghìn dòng
+    student_attendance = AttendanceRollup.objects.filter(
+        date__range=(start_date, end_date)
     ).values(
-        'student__class_id__id',
-        'student__class_id__section',
-        'student__class_id__sem',
-        'student__class_id__dept__name',
+        'class_id__id',
+        'class_id__section',
+        'class_id__sem',
+        'class_id__dept__name',
     ).annotate(
-        total_records=Count('id'),
-        present_records=Count('id', filter=Q(status=True)),
-        absent_records=Count('id', filter=Q(status=False))
-    ).order_by('student__class_id__id')
+        total_records=Sum('total'),
+        present_records=Sum('present'),
+        absent_records=Sum('total') - Sum('present'),
+    ).order_by('class_id__id')
 
     teacher_attendance = AttendanceClass.objects.filter(
-        date__gte=month_ago
+        date__range=(start_date, end_date)
     ).values('assign__teacher__name').annotate(
-        total_classes=Count('date'),
-        present_classes=Count('date', filter=Q(status=True)),
-        absent_classes=Count('date', filter=Q(status=False))
+        total_classes=Count('id'),
+        present_classes=Count('id', filter=Q(status=ATTENDANCE_CLASS_MARKED)),
+        absent_classes=Count('id', filter=Q(status=ATTENDANCE_CLASS_NOT_MARKED))
     ).order_by('assign__teacher__name')
 
     return {
         'report_type': 'attendance',
         'student_attendance': student_attendance,
         'teacher_attendance': teacher_attendance,
+        'start_date': start_date,
+        'end_date': end_date,
         'title': 'Attendance Report'
     }
 
 
-def _get_teaching_report_context():
+def _get_teaching_report_context(academic_year=None, semester=None):
     """Build context for Teaching Analytics report."""
-    teaching_assignments = Assign.objects.select_related('teacher', 'subject', 'class_id').annotate(
-        total_students=Count('class_id__student')
+    # Mỗi thống kê là một subquery riêng nên các JOIN không nhân số dòng
+    teaching_assignments = workload.assignment_workload(
+        workload.filter_term(Assign.objects.select_related('teacher', 'subject', 'class_id__dept'),
+                             academic_year, semester)
+    )
+
+    teacher_workload = workload.teacher_workload(
+        Teacher.objects.order_by('name'), academic_year, semester
     )
 
-    teacher_workload = Teacher.objects.annotate(
-        total_assignments=Count('assign'),
-        total_classes=Count('assign__class_id', distinct=True),
-        total_students=Count('assign__class_id__student')
+    # Số buổi theo thời khoá biểu (trừ ngày nghỉ) so với số buổi đã điểm danh
+    session_reconciliation = reconcile_sessions(
+        workload.filter_term(Assign.objects.filter(is_active=True), academic_year, semester),
+        timezone.now().date(),
     )
 
     subject_distribution = Subject.objects.annotate(
@@ -1186,7 +1317,10 @@ def _get_teaching_report_context():
         'report_type': 'teaching',
         'teaching_assignments': teaching_assignments,
         'teacher_workload': teacher_workload,
+        'session_reconciliation': session_reconciliation,
         'subject_distribution': subject_distribution,
+        'academic_year': academic_year,
+        'semester': semester,
         'title': 'Teaching Analytics Report'
     }
 
@@ -1243,7 +1377,7 @@ def _get_overview_report_context(total_students: int, total_teachers: int, total
         'total_subjects': total_subjects,
         'total_assignments': Assign.objects.count(),
         'total_exam_sessions': ExamSession.objects.count(),
-        'total_attendance_records': Attendance.objects.count()
+        'total_attendance_records': attendance_record_count()
     }
 
     return {
@@ -1256,11 +1390,8 @@ def _get_overview_report_context(total_students: int, total_teachers: int, total
     }
 
 
-@login_required
-def admin_reports(request):
-    """Admin Reports and Statistics Dashboard"""
-    report_type = request.GET.get('type', 'overview')
-
+def _get_report_context(report_type, params):
+    """Report-specific context plus the common totals (cached by admin_reports)."""
     # Common totals used across views and summary
     total_students = Student.objects.count()
     total_teachers = Teacher.objects.count()
@@ -1270,11 +1401,23 @@ def admin_reports(request):
 
     # Dispatch to the appropriate report builder
     if report_type == 'performance':
-        context = _get_performance_report_context(total_students)
+        semester = params.get('semester', '')
+        context = _get_performance_report_context(
+            total_students,
+            params.get('academic_year'),
+            int(semester) if semester.isdigit() else None,
+        )
     elif report_type == 'attendance':
-        context = _get_attendance_report_context()
+        context = _get_attendance_report_context(
+            _parse_report_date(params.get('start_date')),
+            _parse_report_date(params.get('end_date')),
+        )
     elif report_type == 'teaching':
-        context = _get_teaching_report_context()
+        semester = params.get('semester', '')
+        context = _get_teaching_report_context(
+            params.get('academic_year'),
+            int(semester) if semester.isdigit() else None,
+        )
     elif report_type == 'data':
         context = _get_data_report_context()
     elif report_type == 'export':
@@ -1284,14 +1427,31 @@ def admin_reports(request):
             total_students, total_teachers, total_classes, total_departments, total_subjects
         )
 
-    # Add common context
     context.update({
-        'admin_user': request.user,
         'total_students': total_students,
         'total_teachers': total_teachers,
         'total_classes': total_classes,
         'total_departments': total_departments,
         'total_subjects': total_subjects,
+    })
+    return context
+
+
+@login_required
+@read_replica
+def admin_reports(request):
+    """Admin Reports and Statistics Dashboard"""
+    report_type = request.GET.get('type', 'overview')
+    # Báo cáo tổng hợp cả trường: cache theo thời gian, chỉ một worker tính lại
+    context = dict(computed_cache.get_or_compute(
+        'admin_reports', sorted(request.GET.lists()),
+        lambda: _get_report_context(report_type, request.GET),
+        timeout=REPORTS_CACHE_TIMEOUT,
+    ))
+
+    # Add common context
+    context.update({
+        'admin_user': request.user,
         'current_date': timezone.now().date(),
         'report_types': [
             ('overview', 'Overview'),
@@ -1305,13 +1465,170 @@ def admin_reports(request):
 
     return render(request, 'admins/admin_reports.html', context)
 
+
+@login_required
+def job_list(request):
+    """Background job queue: counts per status and the latest jobs, filterable by status"""
+    status = request.GET.get('status', '')
+    queryset = Job.objects.select_related('created_by')
+    if status:
+        queryset = queryset.filter(status=status)
+    counts = dict(Job.objects.order_by().values_list('status').annotate(count=Count('id')))
+
+    context = {
+        'jobs': Paginator(queryset, PAGE_SIZE).get_page(request.GET.get('page')),
+        'status': status,
+        'status_counts': [(value, label, counts.get(value, 0)) for value, label in JOB_STATUS_CHOICES],
+        'admin_user': request.user,
+        'title': _('Background Jobs'),
+    }
+    return render(request, 'admins/job_list.html', context)
+
+
+@login_required
+def retry_job(request, job_id):
+    """Queue a failed job again with a fresh attempt budget (POST)"""
+    if request.method == 'POST':
+        updated = Job.objects.filter(id=job_id, status=JOB_STATUS_FAILED).update(
+            status=JOB_STATUS_QUEUED, attempts=0, run_at=timezone.now(), finished_at=None)
+        if updated:
+            messages.success(request, _('Job #{} queued again.').format(job_id))
+        else:
+            messages.error(request, _('Only failed jobs can be retried.'))
+    return redirect('job_list')
+
+
+@login_required
+def admin_metrics(request):
+    """
+    Per-view latency / DB metrics of all workers in Prometheus text format
+    (superuser only)
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.render_prometheus(metrics.collect()), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@login_required
+@read_replica
+def at_risk_students(request):
+    """
+    Students below the attendance or CIE standard in a term, from the
+    RiskScore table refreshed nightly by score_at_risk
+    """
+    academic_year = request.GET.get('academic_year', '').strip()
+    semester = request.GET.get('semester', '')
+    if academic_year and semester.isdigit():
+        term = (academic_year, int(semester))
+    else:
+        term = risk.latest_scored_term()
+    level = request.GET.get('level', str(RISK_LEVEL_AT_RISK))
+
+    scores = RiskScore.objects.none()
+    if term is not None:
+        scores = RiskScore.objects.filter(academic_year=term[0], semester=term[1])
+        if level.isdigit():
+            scores = scores.filter(level=int(level))
+        class_id = request.GET.get('class_id')
+        if class_id:
+            scores = scores.filter(student_subject__student__class_id=class_id)
+        scores = scores.select_related(
+            'student_subject__student', 'student_subject__subject').order_by('-score', 'id')
+
+    # Giữ các bộ lọc khi chuyển trang
+    query = request.GET.copy()
+    query.pop('page', None)
+
+    context = {
+        'scores': Paginator(scores, PAGE_SIZE).get_page(request.GET.get('page')),
+        'academic_year': term[0] if term else academic_year,
+        'semester': term[1] if term else semester,
+        'level': level,
+        'levels': RISK_LEVEL_CHOICES,
+        'class_id': request.GET.get('class_id', ''),
+        'computed_at': scores.values_list('computed_at', flat=True).first() if term else None,
+        'query': query.urlencode(),
+        'admin_user': request.user,
+        'title': _('At-risk Students'),
+    }
+    return render(request, 'admins/at_risk_students.html', context)
+
+
+@login_required
+@read_replica
+def class_report_cards(request, class_id):
+    """
+    Report cards of every student of a class for a term (the newest one by
+    default), streamed as a ZIP of printable HTML documents
+    """
+    if not Class.objects.filter(id=class_id).exists():
+        messages.error(request, _('The class does not exist!'))
+        return redirect('class_list')
+    academic_year = request.GET.get('academic_year', '').strip()
+    semester = request.GET.get('semester', '')
+    if academic_year and semester.isdigit():
+        term = (academic_year, int(semester))
+    else:
+        term = report_cards.latest_term(class_id)
+    if term is None:
+        messages.error(request, _('This class has no teaching assignments to report on.'))
+        return redirect('class_list')
+
+    cards = report_cards.collect(term[0], term[1], class_id)
+    response = StreamingHttpResponse(report_cards.stream_zip(cards), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="report-cards-{class_id}-{term[0]}.{term[1]}.zip"'
+    return response
+
+
+@login_required
+def term_rollover(request):
+    """
+    Dry-run diff of a semester rollover (GET) and its execution (POST),
+    superuser only
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+
+    params = request.POST if request.method == 'POST' else request.GET
+    academic_year = params.get('academic_year', '').strip()
+    semester = params.get('semester', '')
+    if not academic_year or not semester.isdigit():
+        # Mặc định là kỳ mới nhất đã có phân công
+        academic_year, semester = Assign.objects.order_by('-academic_year', '-semester').values_list(
+            'academic_year', 'semester').first() or (determine_academic_year_start(timezone.now().date()),
+                                                    determine_semester(timezone.now().date()))
+    semester = min(max(int(semester), MIN_SEMESTER), MAX_SEMESTER)
+
+    plan, error = None, None
+    try:
+        plan = rollover.plan_rollover(academic_year, semester)
+    except ValueError as exc:
+        error = str(exc)
+
+    if request.method == 'POST' and plan is not None:
+        result = rollover.apply_rollover(plan)
+        messages.success(request, _(
+            'Rolled over to {}.{}: {} students promoted, {} assignments and {} timetable slots cloned.'
+        ).format(plan.next_academic_year, plan.next_semester, result.students, result.assigns, result.times))
+        return redirect('class_list')
+
+    return render(request, 'admins/term_rollover.html', {
+        'admin_user': request.user,
+        'title': _('Semester Rollover'),
+        'academic_year': academic_year,
+        'semester': semester,
+        'plan': plan,
+        'error': error,
+    })
+
+
 @login_required
 @permission_required('auth.view_user', raise_exception=True)
 def user_list(request):
     """
     View list, search, sort accounts
     """
-    users = User.objects.all()
+    users = _school_users()
 
     # Search
     search_query = request.GET.get('q', '').strip()
@@ -1353,16 +1670,24 @@ def user_list(request):
     }
     return render(request, 'admins/user_list.html', context)
 
+def _school_users():
+    """
+    Accounts of the active school: User is shared by all schools, so with a
+    school active only its students' and teachers' accounts are listed
+    """
+    school_id = tenancy.current_school_id()
+    if school_id is None:
+        return User.objects.all()
+    return User.objects.filter(
+        Q(student__class_id__dept__school=school_id) | Q(teacher__dept__school=school_id))
+
+
 def _apply_search(queryset, search_query):
     """
-    Apply search filter on username or email
+    Apply similarity-ranked search on username, email, first/last name
+    and the linked Student/Teacher name and USN
     """
-    if not search_query:
-        return queryset
-    return queryset.filter(
-        Q(username__icontains=search_query) |
-        Q(email__icontains=search_query)
-    )
+    return ranked_search(queryset, search_query, USER_SEARCH_FIELDS)
 
 
 def _apply_filters(queryset, params):
@@ -1442,7 +1767,7 @@ def edit_user(request, user_id):
     View edit account
     """
     try:
-        user = User.objects.get(id=user_id)
+        user = _school_users().get(id=user_id)
     except User.DoesNotExist:
         messages.error(request, _('The user does not exist!'))
         return redirect('user_list')
@@ -1486,7 +1811,7 @@ def toggle_user_status(request, user_id):
     View khóa, mở khóa tk
     """
     try:
-        user = User.objects.get(id=user_id)
+        user = _school_users().get(id=user_id)
         if user == request.user:
             messages.error(request, _(
                 'You cannot deactivate your own account!'))
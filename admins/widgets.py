@@ -0,0 +1,58 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils.http import urlencode
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select for ModelChoiceField that renders only the blank and the selected
+    option; the remaining options are fetched page by page from a JSON
+    autocomplete endpoint by admins/js/autocomplete.js.
+    """
+
+    class Media:
+        js = ('admins/js/autocomplete.js',)
+
+    def __init__(self, url_name, attrs=None, params=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        # Extra query parameters forwarded to the endpoint (e.g. academic year)
+        self.params = params or {}
+
+    def get_url(self):
+        url = reverse(self.url_name)
+        params = {key: value for key, value in self.params.items() if value not in (None, '')}
+        return f'{url}?{urlencode(params)}' if params else url
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = self.get_url()
+        return attrs
+
+    def _selected_objects(self, selected):
+        queryset = getattr(self.choices, 'queryset', None)
+        if queryset is None or not selected:
+            return []
+        try:
+            return list(queryset.filter(pk__in=selected))
+        except (ValueError, TypeError, ValidationError):
+            # Giá trị gửi lên không hợp lệ, form sẽ báo lỗi khi validate
+            return []
+
+    def optgroups(self, name, value, attrs=None):
+        selected = {str(v) for v in value if v not in (None, '')}
+        field = getattr(self.choices, 'field', None)
+
+        choices = []
+        if field is not None and field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        for obj in self._selected_objects(selected):
+            choices.append((str(field.prepare_value(obj)), field.label_from_instance(obj)))
+
+        groups = []
+        for index, (option_value, option_label) in enumerate(choices):
+            option = self.create_option(
+                name, option_value, option_label, option_value in selected, index)
+            groups.append((None, [option], index))
+        return groups
@@ -0,0 +1,104 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from admins.models import User, Dept, Subject, Class
+from students.models import Student, StudentSubject
+from teachers.models import Teacher, Assign, AssignTime, AttendanceClass, Marks
+from utils.attendance_store import save_session
+
+TERM = {'academic_year': '2024-2025', 'semester': 1}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ReadOnlyApiTestCase(TestCase):
+    """Tests cho JSON API chỉ đọc và conditional GET"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        dept = Dept.objects.create(id='CS', name='Computer Science')
+        self.subject = Subject.objects.create(id='CS101', name='Programming', dept=dept)
+        self.class_obj = Class.objects.create(id='C001', dept=dept, section='A', sem=1)
+        self.teacher_user = User.objects.create_user(username='teacher1', password='testpass123')
+        self.teacher = Teacher.objects.create(user=self.teacher_user, id='T001', dept=dept, name='Test Teacher',
+                                              sex='M', DOB='1980-01-01')
+        self.assign = Assign.objects.create(class_id=self.class_obj, subject=self.subject, teacher=self.teacher,
+                                            **TERM)
+        AssignTime.objects.create(assign=self.assign, period='7:30 - 8:30', day='Monday')
+        self.student_user = User.objects.create_user(username='student1', password='testpass123')
+        self.student = Student.objects.create(user=self.student_user, USN='S001', name='Student One',
+                                              class_id=self.class_obj, DOB='2000-01-01')
+        self.student_subject = StudentSubject.objects.create(student=self.student, subject=self.subject)
+        self.client.login(username='student1', password='testpass123')
+
+    def _get(self, name, pk, **headers):
+        return self.client.get(reverse(f'api:{name}', args=[pk]), TERM, **headers)
+
+    def test_student_endpoints(self):
+        """Test thời khoá biểu, điểm danh và điểm của học sinh"""
+        with self.captureOnCommitCallbacks(execute=True):
+            session = AttendanceClass.objects.create(assign=self.assign, date=date(2024, 9, 2))
+            save_session(session, {'S001': True})
+            Marks.objects.create(student_subject=self.student_subject, marks1=40, **TERM)
+
+        timetable = self._get('student_timetable', 'S001').json()
+        self.assertEqual(timetable['slots'][0]['subject'], 'Programming')
+        self.assertEqual(timetable['slots'][0]['teacher'], 'Test Teacher')
+
+        attendance = self._get('student_attendance', 'S001').json()['subjects'][0]
+        self.assertEqual((attendance['attended'], attendance['total'], attendance['percentage']), (1, 1, 100.0))
+
+        marks = self._get('student_marks', 'S001').json()['subjects'][0]
+        self.assertEqual(marks['marks'][0]['marks'], 40)
+
+    def test_conditional_get(self):
+        """Test poll lại với ETag/Last-Modified trả 304 cho đến khi dữ liệu thay đổi"""
+        first = self._get('student_timetable', 'S001')
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        with self.assertNumQueries(3):  # session, user, student: không dựng payload
+            again = self._get('student_timetable', 'S001', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        since = self._get('student_timetable', 'S001', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AssignTime.objects.create(assign=self.assign, period='8:30 - 9:30', day='Monday')
+        changed = self._get('student_timetable', 'S001', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()['slots']), 2)
+
+    def test_attendance_and_marks_bump_counters(self):
+        """Test điểm danh và nhập điểm làm đổi ETag tương ứng"""
+        attendance = self._get('student_attendance', 'S001')['ETag']
+        marks = self._get('student_marks', 'S001')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            save_session(AttendanceClass.objects.create(assign=self.assign, date=date(2024, 9, 2)), {'S001': False})
+        self.assertNotEqual(self._get('student_attendance', 'S001')['ETag'], attendance)
+        self.assertEqual(self._get('student_marks', 'S001')['ETag'], marks)
+        with self.captureOnCommitCallbacks(execute=True):
+            Marks.objects.create(student_subject=self.student_subject, marks1=30, **TERM)
+        self.assertNotEqual(self._get('student_marks', 'S001')['ETag'], marks)
+
+    def test_teacher_endpoints(self):
+        """Test lịch dạy và danh sách lớp; danh sách đổi khi có học sinh mới"""
+        self.client.login(username='teacher1', password='testpass123')
+        schedule = self._get('teacher_schedule', 'T001').json()
+        self.assertEqual(schedule['slots'][0]['class_id'], 'C001')
+
+        first = self._get('teacher_rosters', 'T001')
+        self.assertEqual([row['usn'] for row in first.json()['rosters'][0]['students']], ['S001'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(USN='S002', name='Student Two', class_id=self.class_obj, DOB='2000-01-01')
+        self.assertEqual(self._get('teacher_rosters', 'T001', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_access_control(self):
+        """Test chỉ đọc được dữ liệu của chính mình"""
+        self.assertEqual(self._get('teacher_schedule', 'T001').status_code, 403)
+        self.assertEqual(self._get('student_marks', 'S999').status_code, 404)
+        self.client.logout()
+        self.assertEqual(self._get('student_marks', 'S001').status_code, 401)
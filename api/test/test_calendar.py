@@ -0,0 +1,94 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from admins.models import User, Dept, Subject, Class, AttendanceRange, CalendarToken
+from students.models import Student
+from teachers.models import Teacher, Assign, AssignTime
+from utils.ical import period_times, render_calendar
+
+TERM = {'academic_year': '2024-2025', 'semester': 1}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CalendarFeedTestCase(TestCase):
+    """Tests cho feed iCalendar (.ics) của thời khoá biểu"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        dept = Dept.objects.create(id='CS', name='Computer Science')
+        subject = Subject.objects.create(id='CS101', name='Programming', dept=dept)
+        self.class_obj = Class.objects.create(id='C001', dept=dept, section='A', sem=1)
+        self.teacher_user = User.objects.create_user(username='teacher1', password='testpass123')
+        teacher = Teacher.objects.create(user=self.teacher_user, id='T001', dept=dept, name='Test Teacher',
+                                         sex='M', DOB='1980-01-01')
+        self.assign = Assign.objects.create(class_id=self.class_obj, subject=subject, teacher=teacher, **TERM)
+        AssignTime.objects.create(assign=self.assign, period='12:40 - 1:30', day='Monday')
+        self.student_user = User.objects.create_user(username='student1', password='testpass123')
+        Student.objects.create(user=self.student_user, USN='S001', name='Student One',
+                               class_id=self.class_obj, DOB='2000-01-01')
+
+    def _feed(self, user, **headers):
+        token = CalendarToken.objects.for_user(user).token
+        return self.client.get(reverse('api:calendar_feed', args=[token]), TERM, **headers)
+
+    def test_period_times(self):
+        """Test giờ học theo đồng hồ 12 giờ được đổi sang 24 giờ"""
+        self.assertEqual([str(at) for at in period_times('7:30 - 8:30')], ['07:30:00', '08:30:00'])
+        self.assertEqual([str(at) for at in period_times('12:40 - 1:30')], ['12:40:00', '13:30:00'])
+
+    def test_feed_content(self):
+        """Test mỗi ô thời khoá biểu là một sự kiện lặp hàng tuần, bỏ qua ngày nghỉ"""
+        AttendanceRange.objects.create(start_date=date(2024, 9, 9), end_date=date(2024, 9, 10))
+        response = self._feed(self.student_user)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/calendar'))
+        body, tz = response.content.decode(), settings.TIME_ZONE
+        self.assertIn(f'DTSTART;TZID={tz}:20240902T124000', body)
+        self.assertIn(f'DTEND;TZID={tz}:20240902T133000', body)
+        self.assertIn('RRULE:FREQ=WEEKLY;UNTIL=20250131T', body)
+        self.assertIn(f'EXDATE;TZID={tz}:20240909T124000', body)
+        self.assertIn('SUMMARY:Programming', body)
+        self.assertIn('DESCRIPTION:Test Teacher', body)
+
+        teacher_body = self._feed(self.teacher_user).content.decode()
+        self.assertIn('SUMMARY:Programming (C001)', teacher_body)
+
+    def test_conditional_get(self):
+        """Test feed trả 304 cho đến khi thời khoá biểu thay đổi"""
+        first = self._feed(self.student_user)
+        self.assertEqual(self._feed(self.student_user, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            AssignTime.objects.create(assign=self.assign, period='7:30 - 8:30', day='Tuesday')
+        changed = self._feed(self.student_user, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.content.decode().count('BEGIN:VEVENT'), 2)
+
+    def test_invalid_token(self):
+        """Test token sai hoặc không thuộc giáo viên/học sinh trả 404"""
+        self.assertEqual(self.client.get(reverse('api:calendar_feed', args=['nope'])).status_code, 404)
+        admin = User.objects.create_user(username='admin1', password='testpass123')
+        self.assertEqual(self._feed(admin).status_code, 404)
+
+    def test_long_lines_are_folded(self):
+        """Test dòng dài hơn 75 octet được gập theo RFC 5545"""
+        slots = [{'id': 1, 'day': 'Monday', 'period': '7:30 - 8:30', 'summary': 'Tiếng Việt ' * 10,
+                  'description': ''}]
+        body = render_calendar('C001', slots, date(2024, 9, 1), date(2024, 9, 30), set(), date(2024, 9, 1))
+        for line in body.split('\r\n'):
+            self.assertLessEqual(len(line.encode()), 75)
+
+    @override_settings(TIME_ZONE='Europe/Berlin')
+    def test_vtimezone_defines_tzid(self):
+        """Test TZID của DTSTART được định nghĩa bằng VTIMEZONE, có cả các lần chuyển giờ trong học kỳ"""
+        slots = [{'id': 1, 'day': 'Monday', 'period': '7:30 - 8:30', 'summary': 'Programming', 'description': ''}]
+        body = render_calendar('C001', slots, date(2024, 9, 1), date(2025, 4, 30), set(), date(2024, 9, 1))
+        self.assertIn('BEGIN:VTIMEZONE\r\nTZID:Europe/Berlin\r\n', body)
+        self.assertLess(body.index('END:VTIMEZONE'), body.index('BEGIN:VEVENT'))
+        self.assertIn('BEGIN:STANDARD\r\nDTSTART:20241027T030000\r\nTZOFFSETFROM:+0200\r\nTZOFFSETTO:+0100', body)
+        self.assertIn('BEGIN:DAYLIGHT\r\nDTSTART:20250330T020000\r\nTZOFFSETFROM:+0100\r\nTZOFFSETTO:+0200', body)
+        self.assertIn('DTSTART;TZID=Europe/Berlin:20240902T073000', body)
@@ -0,0 +1,19 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+# Read-only JSON API, mounted under api/v1/ (utils.constant.API_VERSION)
+urlpatterns = [
+    # Student
+    path('students/<str:pk>/timetable/', views.student_timetable, name='student_timetable'),
+    path('students/<str:pk>/attendance/', views.student_attendance, name='student_attendance'),
+    path('students/<str:pk>/marks/', views.student_marks, name='student_marks'),
+
+    # Teacher
+    path('teachers/<str:pk>/schedule/', views.teacher_schedule, name='teacher_schedule'),
+    path('teachers/<str:pk>/rosters/', views.teacher_rosters, name='teacher_rosters'),
+
+    # Timetable .ics feed, authenticated by the token in the URL
+    path('calendar/<str:token>.ics', views.calendar_feed, name='calendar_feed'),
+]
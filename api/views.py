@@ -0,0 +1,256 @@
+import math
+from collections import defaultdict
+from functools import wraps
+
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition, require_GET
+
+from admins.models import CalendarToken
+from students.models import CieScore, Student
+from teachers.models import Assign, AssignTime, Marks, Teacher
+from utils import change_counters, ical
+from utils.attendance_store import student_counts
+from utils.constant import (
+    API_VERSION, DAYS_OF_WEEK, TIME_SLOTS, ATTENDANCE_MIN_PERCENTAGE, ATTENDANCE_CALCULATION_BASE,
+    PERCENTAGE_MULTIPLIER, PERCENTAGE_DECIMAL_PLACES, CALENDAR_MAX_AGE,
+)
+from utils.date_utils import determine_academic_year_start, determine_semester
+from utils.reference_cache import get_reference_data, get_subject
+from utils.workload import filter_term
+
+# Thứ tự sắp xếp các ô thời khoá biểu
+_DAY_ORDER = {day: index for index, (day, _) in enumerate(DAYS_OF_WEEK)}
+_PERIOD_ORDER = {period: index for index, (period, _) in enumerate(TIME_SLOTS)}
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _term(request):
+    """(academic_year, semester) from the query string, the current term by default."""
+    today = timezone.localdate()
+    semester = request.GET.get('semester', '')
+    return (
+        request.GET.get('academic_year') or determine_academic_year_start(today),
+        int(semester) if semester.isdigit() else determine_semester(today),
+    )
+
+
+def _api_view(load, scopes):
+    """
+    Decorator of the read-only endpoints. `load(request, pk)` returns the
+    entity row the user may read (None: 404, False: 403); `scopes(entity)`
+    lists the change counters the payload depends on. ETag/Last-Modified come
+    from those counters, so a poll with If-None-Match/If-Modified-Since
+    costs one cache round trip and answers 304 without building the payload.
+    """
+    def etag(request, pk):
+        return change_counters.etag(request.api_counters, API_VERSION, get_reference_data().version,
+                                    request.GET.urlencode())
+
+    def last_modified(request, pk):
+        return change_counters.last_modified(request.api_counters)
+
+    def decorator(view):
+        conditional = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @require_GET
+        @wraps(view)
+        def wrapper(request, pk):
+            if not request.user.is_authenticated:
+                return _error('Authentication required', 401)
+            entity = load(request, pk)
+            if entity is None:
+                return _error('Not found', 404)
+            if entity is False:
+                return _error('Access denied', 403)
+            request.api_entity = entity
+            request.api_counters = change_counters.versions(scopes(request, entity))
+            return conditional(request, pk)
+        return wrapper
+    return decorator
+
+
+def _load_student(request, usn):
+    student = Student.objects.filter(USN=usn).values('USN', 'name', 'class_id', 'user_id').first()
+    if student is None:
+        return None
+    if student['user_id'] != request.user.pk and not request.user.is_staff:
+        return False
+    return student
+
+
+def _load_teacher(request, teacher_id):
+    teacher = Teacher.objects.filter(id=teacher_id).values('id', 'name', 'dept_id', 'user_id').first()
+    if teacher is None:
+        return None
+    if teacher['user_id'] != request.user.pk and not request.user.is_staff:
+        return False
+    return teacher
+
+
+def _slots(queryset):
+    slots = list(queryset.values(
+        'day', 'period', 'assign_id', 'assign__class_id', 'assign__subject_id',
+        'assign__subject__name', 'assign__teacher_id', 'assign__teacher__name',
+    ))
+    slots.sort(key=lambda slot: (_DAY_ORDER.get(slot['day'], len(_DAY_ORDER)),
+                                 _PERIOD_ORDER.get(slot['period'], len(_PERIOD_ORDER))))
+    return [
+        {
+            'day': slot['day'],
+            'period': slot['period'],
+            'assign': slot['assign_id'],
+            'class_id': slot['assign__class_id'],
+            'subject_id': slot['assign__subject_id'],
+            'subject': slot['assign__subject__name'],
+            'teacher_id': slot['assign__teacher_id'],
+            'teacher': slot['assign__teacher__name'],
+        }
+        for slot in slots
+    ]
+
+
+def _term_payload(academic_year, semester, **payload):
+    return {'version': API_VERSION, 'academic_year': academic_year, 'semester': semester, **payload}
+
+
+# -----------------------------------------------------------------------------
+# Students
+# -----------------------------------------------------------------------------
+
+@_api_view(_load_student, lambda request, student: [change_counters.class_timetable(student['class_id'])])
+def student_timetable(request, pk):
+    student = request.api_entity
+    academic_year, semester = _term(request)
+    slots = _slots(AssignTime.objects.filter(
+        assign__class_id=student['class_id'], assign__is_active=True,
+        assign__academic_year__icontains=academic_year, assign__semester=semester,
+    ))
+    return JsonResponse(_term_payload(academic_year, semester, student=student['USN'],
+                                      class_id=student['class_id'], slots=slots))
+
+
+@_api_view(_load_student, lambda request, student: [
+    change_counters.class_timetable(student['class_id']), change_counters.class_attendance(student['class_id'])])
+def student_attendance(request, pk):
+    student = request.api_entity
+    academic_year, semester = _term(request)
+    subjects = []
+    for subject_id, teacher_name in filter_term(
+            Assign.objects.filter(class_id=student['class_id'], is_active=True), academic_year, semester,
+    ).order_by('subject_id').values_list('subject_id', 'teacher__name'):
+        attended, total = student_counts(student['USN'], subject_id)
+        subjects.append({
+            'subject_id': subject_id,
+            'subject': get_subject(subject_id).name,
+            'teacher': teacher_name,
+            'attended': attended,
+            'total': total,
+            'percentage': round(attended * PERCENTAGE_MULTIPLIER / total, PERCENTAGE_DECIMAL_PLACES) if total else 0,
+            'classes_to_attend': max(0, math.ceil(
+                (ATTENDANCE_MIN_PERCENTAGE * total - attended) / ATTENDANCE_CALCULATION_BASE)),
+        })
+    return JsonResponse(_term_payload(academic_year, semester, student=student['USN'], subjects=subjects))
+
+
+@_api_view(_load_student, lambda request, student: [
+    change_counters.class_timetable(student['class_id']), change_counters.student_marks(student['USN'])])
+def student_marks(request, pk):
+    student = request.api_entity
+    academic_year, semester = _term(request)
+    term = {'academic_year__icontains': academic_year, 'semester': semester}
+    marks = defaultdict(list)
+    for subject_id, name, value in Marks.objects.filter(
+            student_subject__student_id=student['USN'], **term,
+    ).order_by('name').values_list('student_subject__subject_id', 'name', 'marks1'):
+        marks[subject_id].append({'name': name, 'marks': value})
+    cie = dict(CieScore.objects.filter(student_subject__student_id=student['USN'], **term)
+               .values_list('student_subject__subject_id', 'cie'))
+    subject_ids = sorted(set(filter_term(
+        Assign.objects.filter(class_id=student['class_id'], is_active=True), academic_year, semester,
+    ).values_list('subject_id', flat=True)) | marks.keys())
+    subjects = [
+        {'subject_id': subject_id, 'subject': get_subject(subject_id).name,
+         'cie': cie.get(subject_id, 0), 'marks': marks.get(subject_id, [])}
+        for subject_id in subject_ids
+    ]
+    return JsonResponse(_term_payload(academic_year, semester, student=student['USN'], subjects=subjects))
+
+
+# -----------------------------------------------------------------------------
+# Teachers
+# -----------------------------------------------------------------------------
+
+def _teacher_classes(request, teacher):
+    academic_year, semester = _term(request)
+    return filter_term(Assign.objects.filter(teacher_id=teacher['id'], is_active=True), academic_year, semester)
+
+
+@_api_view(_load_teacher, lambda request, teacher: [change_counters.teacher_timetable(teacher['id'])])
+def teacher_schedule(request, pk):
+    teacher = request.api_entity
+    academic_year, semester = _term(request)
+    slots = _slots(AssignTime.objects.filter(
+        assign__teacher_id=teacher['id'], assign__is_active=True,
+        assign__academic_year__icontains=academic_year, assign__semester=semester,
+    ))
+    return JsonResponse(_term_payload(academic_year, semester, teacher=teacher['id'], slots=slots))
+
+
+@_api_view(_load_teacher, lambda request, teacher: [change_counters.teacher_timetable(teacher['id'])] + [
+    change_counters.class_roster(class_id)
+    for class_id in _teacher_classes(request, teacher).values_list('class_id', flat=True).distinct()])
+def teacher_rosters(request, pk):
+    teacher = request.api_entity
+    academic_year, semester = _term(request)
+    assigns = list(_teacher_classes(request, teacher).order_by('class_id', 'subject_id').values_list(
+        'id', 'class_id', 'subject_id'))
+    students = defaultdict(list)
+    for class_id, usn, name in Student.objects.filter(
+            class_id__in={class_id for _, class_id, _ in assigns},
+    ).order_by('USN').values_list('class_id', 'USN', 'name'):
+        students[class_id].append({'usn': usn, 'name': name})
+    rosters = [
+        {'assign': assign_id, 'class_id': class_id, 'subject_id': subject_id, 'students': students[class_id]}
+        for assign_id, class_id, subject_id in assigns
+    ]
+    return JsonResponse(_term_payload(academic_year, semester, teacher=teacher['id'], rosters=rosters))
+
+
+# -----------------------------------------------------------------------------
+# iCalendar feeds
+# -----------------------------------------------------------------------------
+
+@require_GET
+def calendar_feed(request, token):
+    """
+    Timetable of the current term as a .ics feed, authenticated by the
+    secret token in the URL (calendar clients send no session cookie).
+    Teachers get their teaching schedule, students their class timetable.
+    """
+    owner = CalendarToken.objects.filter(token=token).values(
+        'user__teacher__id', 'user__teacher__name', 'user__student__class_id').first()
+    if owner is None:
+        return HttpResponse(status=404)
+    academic_year, semester = _term(request)
+    if owner['user__teacher__id']:
+        feed = ical.teacher_feed(owner['user__teacher__id'], owner['user__teacher__name'], academic_year, semester)
+    elif owner['user__student__class_id']:
+        feed = ical.class_feed(owner['user__student__class_id'], academic_year, semester)
+    else:
+        return HttpResponse(status=404)
+
+    etag = quote_etag(feed.etag)
+    last_modified = int(feed.last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(feed.render(), content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=CALENDAR_MAX_AGE)
+    return response
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,18 +48,25 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "students",
     "teachers",
     "admins",
 ]
 
 MIDDLEWARE = [
+    # Per-view latency/DB metrics, outermost so it measures everything below
+    "admins.middleware.PerformanceMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Chọn trường theo host, trước mọi middleware đọc DB/cache
+    "admins.middleware.TenantMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Giữ người dùng vừa ghi trên primary một lúc (read-your-writes)
+    "admins.middleware.ReplicaPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # Custom admin middlewares
@@ -104,6 +113,34 @@ DATABASES = {
     }
 }
 
+# Read replicas (streaming standbys of "default"), comma separated hosts in
+# REPLICA_HOSTS. Report, student-facing and export views read from them; see
+# utils/db_routing.py for read-your-writes pinning and the lag fallback.
+for _index, _host in enumerate(filter(None, os.getenv("REPLICA_HOSTS", "").split(",")), start=1):
+    DATABASES[f"replica{_index}"] = {
+        **DATABASES["default"],
+        "HOST": _host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+# manage.py test: a "replica" alias mirroring the test database, so the routing
+# tests read through a second connection. Not in DATABASE_REPLICAS, tests that
+# need it enable it with override_settings.
+if sys.argv[1:2] == ["test"]:
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_ROUTERS = ["utils.db_routing.ReplicaRouter"]
+
+
+# Cache shared by all workers (reference data version, ...).
+# File-based by default so it needs no extra service; point CACHE_BACKEND and
+# CACHE_LOCATION at memcached/redis when running on several hosts.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / "cache")),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -186,6 +223,12 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'admin_activity.log',
             'formatter': 'verbose',
         },
+        'performance_file': {
+            'level': 'WARNING',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'performance.log',
+            'formatter': 'verbose',
+        },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
@@ -198,9 +241,41 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'performance': {
+            'handlers': ['performance_file', 'console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
+# Attendance storage for new roll calls: "rows" (one Attendance row per
+# student) or "bitset" (one CompactAttendance row per session). Existing data
+# is converted with the convert_attendance_storage command.
+ATTENDANCE_STORAGE = os.getenv("ATTENDANCE_STORAGE", "rows")
+
+# Multi-school tenancy: a request for <school id>.TENANT_BASE_DOMAIN (or a
+# School.domain) only sees that school's data. Hosts must also be listed in
+# ALLOWED_HOSTS (e.g. ".schools.example.com"). With TENANT_REQUIRED unknown
+# hosts get a 404 instead of the unscoped single-school view.
+TENANT_BASE_DOMAIN = os.getenv("TENANT_BASE_DOMAIN", "")
+TENANT_REQUIRED = os.getenv("TENANT_REQUIRED", "") == "1"
+
+# Login throttling (utils/login_throttle.py). Exempt IPs/networks (e.g. a
+# school's NAT or the monitoring host) skip the per-IP limit and exempt
+# usernames the per-username one. Behind N reverse proxies set
+# LOGIN_THROTTLE_TRUSTED_PROXIES=N so the client IP is read from the
+# X-Forwarded-For entry the outermost proxy appended.
+LOGIN_THROTTLE_EXEMPT_IPS = list(filter(None, os.getenv("LOGIN_THROTTLE_EXEMPT_IPS", "").split(",")))
+LOGIN_THROTTLE_EXEMPT_USERNAMES = list(filter(None, os.getenv("LOGIN_THROTTLE_EXEMPT_USERNAMES", "").split(",")))
+LOGIN_THROTTLE_TRUSTED_PROXIES = int(os.getenv("LOGIN_THROTTLE_TRUSTED_PROXIES", "0"))
+
+# Per-worker performance metric files, summed by the admin metrics endpoint.
+# Test runs write theirs to a temporary directory instead of the project.
+METRICS_DIR = BASE_DIR / 'metrics'
+if sys.argv[1:2] == ["test"]:
+    METRICS_DIR = Path(tempfile.gettempdir()) / 'schoolmanagement-test-metrics'
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'  
 EMAIL_PORT = 587
@@ -33,6 +33,9 @@ urlpatterns = [
     
     # Student URLs (outside i18n for direct access)
     path("student/", include("students.urls")),
+
+    # Read-only JSON API for the portal and the mobile app
+    path("api/v1/", include("api.urls")),
 ]
 
 # Add i18n patterns for internationalized URLs
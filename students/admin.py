@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student, StudentSubject, Attendance, AttendanceTotal
+from .models import Student, StudentSubject, Attendance, AttendanceTotal, CieScore, RiskScore
 
 
 @admin.register(Student)
@@ -31,3 +31,17 @@ class AttendanceTotalAdmin(admin.ModelAdmin):
                     'attendance', 'att_class', 'total_class']
     list_filter = ['subject']
     search_fields = ['student__name', 'subject__name']
+
+
+@admin.register(CieScore)
+class CieScoreAdmin(admin.ModelAdmin):
+    list_display = ['student_subject', 'academic_year', 'semester', 'cie', 'marks_count']
+    list_filter = ['academic_year', 'semester']
+    search_fields = ['student_subject__student__name', 'student_subject__subject__name']
+
+
+@admin.register(RiskScore)
+class RiskScoreAdmin(admin.ModelAdmin):
+    list_display = ['student_subject', 'academic_year', 'semester', 'attendance', 'cie', 'score', 'level']
+    list_filter = ['academic_year', 'semester', 'level']
+    search_fields = ['student_subject__student__name', 'student_subject__subject__name']
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# (index name, column) pairs backing the admin user search
+STUDENT_TRIGRAM_INDEXES = [
+    ('students_student_name_trgm', 'name'),
+    ('students_student_usn_trgm', 'USN'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # GIN trigram indexes only exist on PostgreSQL; other backends use icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, column in STUDENT_TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} '
+            f'ON students_student USING gin ("{column}" gin_trgm_ops);'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _ in STUDENT_TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0004_user_trigram_search_indexes'),
+        ('students', '0004_studentsubject_is_active'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
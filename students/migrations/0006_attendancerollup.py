@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0006_autocomplete_prefix_indexes'),
+        ('students', '0005_student_trigram_search_indexes'),
+        ('teachers', '0007_teacher_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('assign', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='teachers.assign')),
+                ('class_id', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='admins.class')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='admins.subject')),
+            ],
+            options={
+                'unique_together': {('assign', 'date')},
+                'indexes': [models.Index(fields=['date', 'class_id'], name='attendance_rollup_date_class')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0006_autocomplete_prefix_indexes'),
+        ('students', '0006_attendancerollup'),
+        ('teachers', '0007_teacher_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompactAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('roster', models.TextField()),
+                ('presence', models.BinaryField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('attendanceclass', models.OneToOneField(on_delete=django.db.models.deletion.RESTRICT, to='teachers.attendanceclass')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='admins.subject')),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_compactattendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CieScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=20)),
+                ('semester', models.IntegerField()),
+                ('cie', models.IntegerField(default=0)),
+                ('marks_count', models.PositiveSmallIntegerField(default=0)),
+                ('student_subject', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='students.studentsubject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['academic_year', 'semester', 'cie'], name='cie_score_term_cie')],
+                'unique_together': {('student_subject', 'academic_year', 'semester')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0006_autocomplete_prefix_indexes'),
+        ('students', '0008_ciescore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=20)),
+                ('semester', models.IntegerField()),
+                ('score', models.FloatField()),
+                ('subjects', models.PositiveSmallIntegerField(default=0)),
+                ('class_rank', models.PositiveIntegerField()),
+                ('class_rank_low', models.PositiveIntegerField()),
+                ('class_percentile', models.FloatField()),
+                ('dept_rank', models.PositiveIntegerField()),
+                ('dept_rank_low', models.PositiveIntegerField()),
+                ('dept_percentile', models.FloatField()),
+                ('school_rank', models.PositiveIntegerField()),
+                ('school_percentile', models.FloatField()),
+                ('class_id', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='admins.class')),
+                ('dept', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='admins.dept')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='students.student')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['academic_year', 'semester', 'school_rank'], name='student_rank_school'),
+                    models.Index(fields=['academic_year', 'semester', 'dept', 'dept_rank'], name='student_rank_dept'),
+                    models.Index(fields=['academic_year', 'semester', 'class_id', 'class_rank'], name='student_rank_class'),
+                ],
+                'unique_together': {('student', 'academic_year', 'semester')},
+            },
+        ),
+    ]
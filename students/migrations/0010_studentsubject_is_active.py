@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def add_missing_column(apps, schema_editor):
+    # Một số CSDL đã có cột này (thêm tay), nên chỉ tạo khi còn thiếu
+    model = apps.get_model('students', 'StudentSubject')
+    table = model._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        columns = {
+            column.name
+            for column in schema_editor.connection.introspection.get_table_description(cursor, table)
+        }
+    if 'is_active' not in columns:
+        schema_editor.add_field(model, model._meta.get_field('is_active'))
+
+
+class Migration(migrations.Migration):
+    """
+    0004_studentsubject_is_active was committed without its operation; the
+    rollover deactivates enrollments, so the column has to exist.
+    """
+
+    dependencies = [
+        ('students', '0009_studentrank'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='studentsubject',
+                    name='is_active',
+                    field=models.BooleanField(default=True),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_missing_column, migrations.RunPython.noop),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0010_studentsubject_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=20)),
+                ('semester', models.IntegerField()),
+                ('attended', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('attendance', models.FloatField(default=0)),
+                ('recent_attendance', models.FloatField(default=0)),
+                ('trend', models.FloatField(default=0)),
+                ('classes_to_attend', models.PositiveIntegerField(default=0)),
+                ('cie', models.IntegerField(null=True)),
+                ('score', models.FloatField(default=0)),
+                ('level', models.PositiveSmallIntegerField(choices=[(0, 'On track'), (1, 'Watch'), (2, 'At risk')], default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('student_subject', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='students.studentsubject')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['academic_year', 'semester', 'level', 'score'], name='risk_score_term_level'),
+                ],
+                'unique_together': {('student_subject', 'academic_year', 'semester')},
+            },
+        ),
+    ]
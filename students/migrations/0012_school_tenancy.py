@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0009_school_tenancy'),
+        ('students', '0011_riskscore'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['class_id', 'USN'], name='student_class_usn_idx'),
+        ),
+    ]
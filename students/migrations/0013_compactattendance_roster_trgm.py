@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_roster_index(apps, schema_editor):
+    # roster LIKE '%,USN,%' (số liệu/lịch sử điểm danh của một học sinh) được phục
+    # vụ bởi GIN trigram (pg_trgm đã bật ở admins 0004); backend khác quét bảng
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS students_compactattendance_roster_trgm '
+        'ON students_compactattendance USING gin (roster gin_trgm_ops);'
+    )
+
+
+def drop_roster_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS students_compactattendance_roster_trgm;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0004_user_trigram_search_indexes'),
+        ('students', '0012_school_tenancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_roster_index, drop_roster_index),
+    ]
@@ -11,12 +11,15 @@ from utils.constant import (
     DEFAULT_SEX, DEFAULT_EMPTY_STRING, DEFAULT_DEPT_ID, DEFAULT_STATUS_TRUE,
     # Business Logic Constants
     ATTENDANCE_MIN_PERCENTAGE, ATTENDANCE_CALCULATION_BASE, PERCENTAGE_MULTIPLIER,
-    ATTENDANCE_ZERO_THRESHOLD, CIE_CALCULATION_LIMIT, CIE_DIVISOR, STATUS_TRUE_STRING,
+    ATTENDANCE_ZERO_THRESHOLD, CIE_CALCULATION_LIMIT, CIE_DIVISOR,
     PERCENTAGE_DECIMAL_PLACES, STUDENT_ATTRIBUTE, ADMINS_USER_MODEL, ADMINS_CLASS_MODEL,
-    ADMINS_SUBJECT_MODEL, TEACHERS_ATTENDANCE_CLASS_MODEL,
+    ADMINS_SUBJECT_MODEL, ADMINS_DEPT_MODEL, TEACHERS_ATTENDANCE_CLASS_MODEL, TEACHERS_ASSIGN_MODEL,
+    TEST_NAME_CHOICES, CIE_SCORE_BATCH_SIZE, RISK_LEVEL_CHOICES, RISK_LEVEL_NONE,
     # Verbose Names
-    MARKS_VERBOSE_NAME_PLURAL
+    MARKS_VERBOSE_NAME_PLURAL,
+    ATTENDANCE_ROSTER_SEPARATOR
 )
+from utils.tenancy import TenantManager
 
 
 class Student(models.Model):
@@ -31,6 +34,13 @@ class Student(models.Model):
     address = models.TextField(max_length=USER_ADDRESS_MAX_LENGTH, default=DEFAULT_EMPTY_STRING)
     phone = models.CharField(max_length=USER_PHONE_MAX_LENGTH, default=DEFAULT_EMPTY_STRING)
 
+    school_path = 'class_id__dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['class_id', 'USN'], name='student_class_usn_idx')]
+
     def __str__(self):
         return self.name
 
@@ -49,13 +59,15 @@ class StudentSubject(models.Model):
         subject_name = self.subject
         return '%s : %s' % (student_name.name, subject_name.shortname)
 
-    def get_cie(self):
-        marks_list = self.marks_set.all()
-        m = []
-        for mk in marks_list:
-            m.append(mk.marks1)
-        cie = math.ceil(sum(m[:CIE_CALCULATION_LIMIT]) / CIE_DIVISOR)
-        return cie
+    def get_cie(self, academic_year=None, semester=None):
+        """
+        CIE đã lưu trong CieScore của một kỳ; không truyền kỳ thì lấy kỳ gần nhất.
+        """
+        scores = self.ciescore_set.all()
+        if academic_year is not None:
+            scores = scores.filter(academic_year=academic_year, semester=semester)
+        cie = scores.order_by('-academic_year', '-semester').values_list('cie', flat=True).first()
+        return cie or 0
 
     def get_attendance(self):
         try:
@@ -65,10 +77,8 @@ class StudentSubject(models.Model):
             return a.attendance
         except AttendanceTotal.DoesNotExist:
             # If AttendanceTotal doesn't exist, calculate directly from Attendance
-            total_class = Attendance.objects.filter(
-                subject=self.subject, student=self.student).count()
-            att_class = Attendance.objects.filter(
-                subject=self.subject, student=self.student, status=True).count()
+            from utils.attendance_store import student_counts
+            att_class, total_class = student_counts(self.student_id, self.subject_id)
             
             if total_class == 0:
                 return 0
@@ -98,30 +108,22 @@ class AttendanceTotal(models.Model):
     class Meta:
         unique_together = (('student', 'subject'),)
 
+    def _counts(self):
+        # Đếm cả dữ liệu dạng dòng lẫn dạng bitset (CompactAttendance)
+        from utils.attendance_store import student_counts
+        return student_counts(self.student_id, self.subject_id)
+
     @property
     def att_class(self):
-        stud = Student.objects.get(name=self.student)
-        sname = self.subject
-        att_class = Attendance.objects.filter(
-            subject=sname, student=stud, status=STATUS_TRUE_STRING).count()
-        return att_class
+        return self._counts()[0]
 
     @property
     def total_class(self):
-        stud = Student.objects.get(name=self.student)
-        sname = self.subject
-        total_class = Attendance.objects.filter(
-            subject=sname, student=stud).count()
-        return total_class
+        return self._counts()[1]
 
     @property
     def attendance(self):
-        stud = Student.objects.get(name=self.student)
-        sname = self.subject
-        total_class = Attendance.objects.filter(
-            subject=sname, student=stud).count()
-        att_class = Attendance.objects.filter(
-            subject=sname, student=stud, status=STATUS_TRUE_STRING).count()
+        att_class, total_class = self._counts()
         if total_class == ATTENDANCE_ZERO_THRESHOLD:
             attendance = ATTENDANCE_ZERO_THRESHOLD
         else:
@@ -130,13 +132,231 @@ class AttendanceTotal(models.Model):
 
     @property
     def classes_to_attend(self):
-        stud = Student.objects.get(name=self.student)
-        subj = self.subject
-        total_class = Attendance.objects.filter(
-            subject=subj, student=stud).count()
-        att_class = Attendance.objects.filter(
-            subject=subj, student=stud, status=STATUS_TRUE_STRING).count()
+        att_class, total_class = self._counts()
         cta = math.ceil((ATTENDANCE_MIN_PERCENTAGE * total_class - att_class) / ATTENDANCE_CALCULATION_BASE)
         if cta < ATTENDANCE_ZERO_THRESHOLD:
             return ATTENDANCE_ZERO_THRESHOLD
         return cta
+
+
+class AttendanceRollupManager(TenantManager):
+    def refresh_for(self, attendance_class):
+        """
+        Recompute the rollup row of one session (assign, date) from its
+        Attendance rows. Called after a roll call is confirmed or edited.
+        """
+        from utils.attendance_store import session_counts
+        assign = attendance_class.assign
+        present = total = 0
+        for session in type(attendance_class).objects.filter(assign=assign, date=attendance_class.date):
+            session_present, session_total = session_counts(session)
+            present += session_present
+            total += session_total
+        # Khoá đúng dòng (assign, date), không khoá kèm lớp/khoa/trường qua join của manager theo trường
+        rollup, _ = self.model.all_objects.update_or_create(
+            assign=assign,
+            date=attendance_class.date,
+            defaults={
+                'class_id_id': assign.class_id_id,
+                'subject_id': assign.subject_id,
+                'present': present,
+                'total': total,
+            },
+        )
+        return rollup
+
+
+class AttendanceRollup(models.Model):
+    """Số học sinh có mặt / tổng số theo từng buổi (assign, date) cho báo cáo"""
+    class_id = models.ForeignKey(ADMINS_CLASS_MODEL, on_delete=models.RESTRICT)
+    subject = models.ForeignKey(ADMINS_SUBJECT_MODEL, on_delete=models.RESTRICT)
+    assign = models.ForeignKey(TEACHERS_ASSIGN_MODEL, on_delete=models.RESTRICT)
+    date = models.DateField()
+    present = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+
+    school_path = 'class_id__dept__school'
+    objects = AttendanceRollupManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        unique_together = (('assign', 'date'),)
+        indexes = [
+            models.Index(fields=['date', 'class_id'], name='attendance_rollup_date_class'),
+        ]
+
+    def __str__(self):
+        return f"{self.assign_id} {self.date}: {self.present}/{self.total}"
+
+
+class CompactAttendance(models.Model):
+    """
+    Điểm danh một buổi dạng nén: danh sách USN theo thứ tự (roster) và bitset
+    có mặt, bit i ứng với học sinh thứ i trong roster
+    """
+    attendanceclass = models.OneToOneField(TEACHERS_ATTENDANCE_CLASS_MODEL, on_delete=models.RESTRICT)
+    subject = models.ForeignKey(ADMINS_SUBJECT_MODEL, on_delete=models.RESTRICT)
+    date = models.DateField()
+    roster = models.TextField()
+    presence = models.BinaryField()
+    present = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+
+    @property
+    def usns(self):
+        return [usn for usn in self.roster.split(ATTENDANCE_ROSTER_SEPARATOR) if usn]
+
+    def __str__(self):
+        return f"{self.attendanceclass_id}: {self.present}/{self.total}"
+
+
+# Thứ tự bài kiểm tra theo TEST_NAME_CHOICES: CIE lấy CIE_CALCULATION_LIMIT bài đầu
+_EXAM_ORDER = {name: index for index, (name, _) in enumerate(TEST_NAME_CHOICES)}
+
+
+def compute_cie(marks):
+    """CIE from (exam name, marks) pairs, independent of the order they were read in."""
+    ordered = sorted(marks, key=lambda mark: (_EXAM_ORDER.get(mark[0], len(_EXAM_ORDER)), mark[0]))
+    return math.ceil(sum(value for _, value in ordered[:CIE_CALCULATION_LIMIT]) / CIE_DIVISOR)
+
+
+class CieScoreManager(models.Manager):
+    def refresh_for(self, keys):
+        """
+        Recompute the scores of the given (student_subject_id, academic_year,
+        semester) keys from their Marks rows. Keys left without marks lose
+        their score row.
+        """
+        from teachers.models import Marks
+        from utils import change_counters
+        keys = set(keys)
+        if not keys:
+            return
+        students = StudentSubject.objects.filter(
+            id__in={key[0] for key in keys}).values_list('student_id', 'student__class_id')
+        change_counters.bump(*(scope for usn, class_id in students for scope in (
+            change_counters.student_marks(usn), change_counters.class_marks(class_id))))
+        term_filter = models.Q()
+        for student_subject_id, academic_year, semester in keys:
+            term_filter |= models.Q(student_subject_id=student_subject_id,
+                                    academic_year=academic_year, semester=semester)
+        grouped = {}
+        for student_subject_id, academic_year, semester, name, value in Marks.objects.filter(
+                term_filter).values_list('student_subject_id', 'academic_year', 'semester', 'name', 'marks1'):
+            grouped.setdefault((student_subject_id, academic_year, semester), []).append((name, value))
+        self.write(grouped)
+        empty = keys - grouped.keys()
+        if empty:
+            stale = models.Q()
+            for student_subject_id, academic_year, semester in empty:
+                stale |= models.Q(student_subject_id=student_subject_id,
+                                  academic_year=academic_year, semester=semester)
+            self.filter(stale).delete()
+
+    def write(self, grouped):
+        """Upsert scores from {(student_subject_id, academic_year, semester): [(name, marks)]}."""
+        scores = [
+            CieScore(student_subject_id=key[0], academic_year=key[1], semester=key[2],
+                     cie=compute_cie(marks), marks_count=len(marks))
+            for key, marks in grouped.items()
+        ]
+        self.bulk_create(
+            scores,
+            batch_size=CIE_SCORE_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['student_subject', 'academic_year', 'semester'],
+            update_fields=['cie', 'marks_count'],
+        )
+        return len(scores)
+
+
+class CieScore(models.Model):
+    """CIE của một StudentSubject trong một kỳ, cập nhật mỗi khi ghi điểm"""
+    student_subject = models.ForeignKey(StudentSubject, on_delete=models.RESTRICT)
+    academic_year = models.CharField(max_length=20)
+    semester = models.IntegerField()
+    cie = models.IntegerField(default=0)
+    marks_count = models.PositiveSmallIntegerField(default=0)
+
+    objects = CieScoreManager()
+
+    class Meta:
+        unique_together = (('student_subject', 'academic_year', 'semester'),)
+        indexes = [
+            models.Index(fields=['academic_year', 'semester', 'cie'], name='cie_score_term_cie'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_subject_id} {self.academic_year}.{self.semester}: {self.cie}"
+
+
+class StudentRank(models.Model):
+    """
+    Xếp hạng của học sinh trong một kỳ theo CIE trung bình các môn: trong lớp,
+    trong khoa và toàn trường. Percentile 100 là cao nhất trong phạm vi;
+    *_rank_low là hạng tính từ dưới lên (cho truy vấn bottom-N).
+    """
+    student = models.ForeignKey(Student, on_delete=models.RESTRICT)
+    academic_year = models.CharField(max_length=20)
+    semester = models.IntegerField()
+    class_id = models.ForeignKey(ADMINS_CLASS_MODEL, on_delete=models.RESTRICT)
+    dept = models.ForeignKey(ADMINS_DEPT_MODEL, on_delete=models.RESTRICT)
+    score = models.FloatField()
+    subjects = models.PositiveSmallIntegerField(default=0)
+    class_rank = models.PositiveIntegerField()
+    class_rank_low = models.PositiveIntegerField()
+    class_percentile = models.FloatField()
+    dept_rank = models.PositiveIntegerField()
+    dept_rank_low = models.PositiveIntegerField()
+    dept_percentile = models.FloatField()
+    school_rank = models.PositiveIntegerField()
+    school_percentile = models.FloatField()
+
+    school_path = 'dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        unique_together = (('student', 'academic_year', 'semester'),)
+        indexes = [
+            models.Index(fields=['academic_year', 'semester', 'school_rank'], name='student_rank_school'),
+            models.Index(fields=['academic_year', 'semester', 'dept', 'dept_rank'], name='student_rank_dept'),
+            models.Index(fields=['academic_year', 'semester', 'class_id', 'class_rank'], name='student_rank_class'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.academic_year}.{self.semester}: #{self.school_rank}"
+
+
+class RiskScore(models.Model):
+    """
+    Nguy cơ không đạt của một StudentSubject trong một kỳ: tỷ lệ điểm danh,
+    CIE và xu hướng điểm danh các buổi gần nhất. Tính lại hằng đêm bằng
+    lệnh score_at_risk; cie là None khi chưa có điểm.
+    """
+    student_subject = models.ForeignKey(StudentSubject, on_delete=models.RESTRICT)
+    academic_year = models.CharField(max_length=20)
+    semester = models.IntegerField()
+    attended = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    attendance = models.FloatField(default=0)
+    recent_attendance = models.FloatField(default=0)
+    trend = models.FloatField(default=0)
+    classes_to_attend = models.PositiveIntegerField(default=0)
+    cie = models.IntegerField(null=True)
+    score = models.FloatField(default=0)
+    level = models.PositiveSmallIntegerField(choices=RISK_LEVEL_CHOICES, default=RISK_LEVEL_NONE)
+    computed_at = models.DateTimeField()
+
+    school_path = 'student_subject__student__class_id__dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        unique_together = (('student_subject', 'academic_year', 'semester'),)
+        indexes = [
+            models.Index(fields=['academic_year', 'semester', 'level', 'score'], name='risk_score_term_level'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_subject_id} {self.academic_year}.{self.semester}: {self.score}"
@@ -1,4 +1,5 @@
 from django.test import TestCase, Client
+from django.core.cache import cache
 from django.urls import reverse
 from django.contrib.messages import get_messages
 from admins.models import User, Dept, Subject, Class
@@ -14,6 +15,7 @@ class StudentViewsTests(TestCase):
     """Tests cho các view liên quan đến học sinh"""
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(username='student1', password='testpass123')
         self.dept = Dept.objects.create(id='D001', name='Computer Science')
@@ -3,13 +3,18 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 
-from students.models import Student, Attendance
+from students.models import Student, CieScore
 from teachers.models import Assign
 from utils.constant import (
     DAYS_OF_WEEK, TIME_SLOTS, BREAK_PERIOD, LUNCH_PERIOD,
     TIMETABLE_TIME_SLOTS,
     ATTENDANCE_MIN_PERCENTAGE, ATTENDANCE_CALCULATION_BASE
 )
+from utils.reference_cache import get_reference_data, get_subject
+from utils.attendance_store import student_counts, student_history
+from utils.ical import feed_url
+from utils import change_counters, computed_cache
+from utils.db_routing import read_replica
 from datetime import datetime, timedelta, date
 import math
 
@@ -87,6 +92,7 @@ def index(request):
 
 
 @login_required
+@read_replica
 def student_attendance(request, student_usn):
     """
     View student attendance for all subjects in their class (class-based attendance)
@@ -125,14 +131,8 @@ def student_attendance(request, student_usn):
     for assignment in class_assignments:
         subject = assignment.subject
         
-        # Get attendance records for this student and subject
-        attendance_records = Attendance.objects.filter(
-            student=student,
-            subject=subject
-        ).order_by('-date')
-        
-        total_classes = attendance_records.count()
-        attended_classes = attendance_records.filter(status=True).count()
+        # Get attendance counts for this student and subject (rows + bitsets)
+        attended_classes, total_classes = student_counts(student.USN, subject.id)
         attendance_percentage = round((attended_classes / total_classes * 100), 2) if total_classes > 0 else 0
         
         # Calculate classes to attend for 75% attendance
@@ -216,15 +216,12 @@ def student_attendance_detail(request, student_usn, subject_id):
         messages.error(request, _('This subject is not assigned to your class.'))
         return redirect('students:attendance', student_usn=student_usn)
     
-    # Get attendance records for this subject
-    attendance_records = Attendance.objects.filter(
-        student=student,
-        subject=subject
-    ).select_related('attendanceclass').order_by('-date')
+    # Get attendance records for this subject (rows + bitsets), newest first
+    attendance_records = student_history(student.USN, subject.id)
     
     # Calculate statistics
-    total_classes = attendance_records.count()
-    attended_classes = attendance_records.filter(status=True).count()
+    total_classes = len(attendance_records)
+    attended_classes = sum(record.status for record in attendance_records)
     absent_classes = total_classes - attended_classes
     attendance_percentage = round((attended_classes / total_classes * 100), 2) if total_classes > 0 else 0
     
@@ -263,6 +260,7 @@ def student_attendance_detail(request, student_usn, subject_id):
     return render(request, 'students/attendance_detail.html', context)
 
 @login_required 
+@read_replica
 def student_attendance_detail(request, student_usn, subject_id):
     """
     View detailed attendance for a specific subject in student's class
@@ -284,15 +282,12 @@ def student_attendance_detail(request, student_usn, subject_id):
         messages.error(request, _('This subject is not assigned to your class.'))
         return redirect('students:attendance', student_usn=student_usn)
     
-    # Get attendance records for this subject
-    attendance_records = Attendance.objects.filter(
-        student=student,
-        subject=subject
-    ).select_related('attendanceclass').order_by('-date')
+    # Get attendance records for this subject (rows + bitsets), newest first
+    attendance_records = student_history(student.USN, subject.id)
     
     # Calculate statistics
-    total_classes = attendance_records.count()
-    attended_classes = attendance_records.filter(status=True).count()
+    total_classes = len(attendance_records)
+    attended_classes = sum(record.status for record in attendance_records)
     absent_classes = total_classes - attended_classes
     attendance_percentage = round((attended_classes / total_classes * 100), 2) if total_classes > 0 else 0
     
@@ -335,6 +330,7 @@ def student_attendance_detail(request, student_usn, subject_id):
 
 
 @login_required
+@read_replica
 def student_marks_list(request, student_usn):
     """
     View student marks for all subjects in their class
@@ -370,6 +366,14 @@ def student_marks_list(request, student_usn):
     if sem and sem.isdigit():
         class_assignments = class_assignments.filter(semester=int(sem))
     
+    # CIE đã lưu sẵn theo (môn, năm học, kỳ)
+    cie_scores = {
+        (subject_id, academic_year, semester): cie
+        for subject_id, academic_year, semester, cie in CieScore.objects.filter(
+            student_subject__student=student
+        ).values_list('student_subject__subject_id', 'academic_year', 'semester', 'cie')
+    }
+
     marks_data = []
     for assignment in class_assignments:
         # Get marks for this student and subject
@@ -386,18 +390,11 @@ def student_marks_list(request, student_usn):
         marks = marks_qs.order_by('name')
         
         # Get attendance percentage
-        attendance_records = Attendance.objects.filter(
-            student=student,
-            subject=assignment.subject
-        )
-        total_classes = attendance_records.count()
-        attended_classes = attendance_records.filter(status=True).count()
+        attended_classes, total_classes = student_counts(student.USN, assignment.subject_id)
         attendance_percentage = round((attended_classes / total_classes * 100), 2) if total_classes > 0 else 0
         
-        # Calculate CIE
-        from utils.constant import CIE_CALCULATION_LIMIT, CIE_DIVISOR
-        marks_list = [mark.marks1 for mark in marks]
-        cie_score = math.ceil(sum(marks_list[:CIE_CALCULATION_LIMIT]) / CIE_DIVISOR) if marks_list else 0
+        cie_score = cie_scores.get(
+            (assignment.subject_id, assignment.academic_year, assignment.semester), 0)
         
         marks_data.append({
             'subject': assignment.subject,
@@ -443,6 +440,7 @@ def student_marks_list(request, student_usn):
 
 
 @login_required
+@read_replica
 def student_timetable(request, class_id):
     """
     View timetable for student's class (weekly view)
@@ -455,11 +453,9 @@ def student_timetable(request, class_id):
     
     # Import models needed for timetable
     from admins.models import Class
-    from teachers.models import AssignTime
     
-    # Get class and its assignments
+    # Get class
     class_obj = get_object_or_404(Class, id=class_id)
-    assignments = Assign.objects.filter(class_id=class_obj)
 
     # Filters for academic year and semester
     year = request.GET.get('academic_year')
@@ -492,23 +488,6 @@ def student_timetable(request, class_id):
             end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
         except ValueError:
             start = end = None
-
-    # Apply filters
-    if year:
-        assignments = assignments.filter(academic_year__icontains=year)
-    if sem and sem.isdigit():
-        assignments = assignments.filter(semester=int(sem))
-
-    # Get available academic years for filter
-    year_options = (
-        Assign.objects
-        .filter(class_id=class_obj)
-        .values_list('academic_year', flat=True)
-        .distinct()
-        .order_by('academic_year')
-    )
-
-
     
     # Get week dates
     week_start_str = request.GET.get('week_start')
@@ -539,32 +518,18 @@ def student_timetable(request, class_id):
         elif slot == '12:40 - 1:30':
             time_slots_with_breaks.append(LUNCH_PERIOD)
     
-    # Initialize and fill timetable
-    timetable = {day: {slot: None for slot in time_slots_with_breaks} for day in days}
-    
     # Convert day names to dates for the current week
     day_dates = {
         day: datetime.strptime(day_to_date[day], "%Y-%m-%d").date()
         for day in days
     }
-    
-    for assignment in assignments:
-        assign_times = AssignTime.objects.filter(assign=assignment)
-        
-        # Filter by date range if provided
-        if start and end:
-            assign_times = assign_times.filter(day__in=[
-                day for day, date in day_dates.items()
-                if start <= date <= end
-            ])
-            
-        for assign_time in assign_times:
-            if assign_time.day in timetable and assign_time.period in timetable[assign_time.day]:
-                timetable[assign_time.day][assign_time.period] = {
-                    'subject': assignment.subject,
-                    'teacher': assignment.teacher,
-                    'assignment': assignment
-                }
+
+    # Thời khoá biểu của lớp chỉ tính lại khi phân công/lịch dạy của lớp đổi
+    timetable, year_options = computed_cache.get_or_compute(
+        'student_timetable', [class_obj.id, year, sem, start, end, monday_start, get_reference_data().version],
+        lambda: _class_timetable(class_obj, year, sem, start, end, day_dates, time_slots_with_breaks),
+        tags=[change_counters.class_timetable(class_obj.id)],
+    )
     
     context = {
         'student': student,
@@ -578,10 +543,55 @@ def student_timetable(request, class_id):
         'next_week_start': next_week_start,
         'academic_year': year,
         'semester': sem,
-        'year_options': list(year_options),
+        'year_options': year_options,
         'today': today.strftime('%Y-%m-%d'),
         'start_date': start_date if start_date else '',
         'end_date': end_date if end_date else '',
+        'calendar_url': feed_url(request, request.user),
     }
     
-    return render(request, 'students/timetable.html', context)
\ No newline at end of file
+    return render(request, 'students/timetable.html', context)
+
+
+def _class_timetable(class_obj, year, sem, start, end, day_dates, time_slots):
+    """Week grid {day: {slot: entry}} of the class and the academic years it has assignments in."""
+    from teachers.models import AssignTime
+
+    assignments = Assign.objects.filter(class_id=class_obj)
+
+    # Apply filters
+    if year:
+        assignments = assignments.filter(academic_year__icontains=year)
+    if sem and sem.isdigit():
+        assignments = assignments.filter(semester=int(sem))
+
+    # Get available academic years for filter
+    year_options = list(
+        Assign.objects
+        .filter(class_id=class_obj)
+        .values_list('academic_year', flat=True)
+        .distinct()
+        .order_by('academic_year')
+    )
+
+    # Initialize and fill timetable
+    timetable = {day: {slot: None for slot in time_slots} for day in day_dates}
+
+    for assignment in assignments.select_related('teacher'):
+        assign_times = AssignTime.objects.filter(assign=assignment)
+
+        # Filter by date range if provided
+        if start and end:
+            assign_times = assign_times.filter(day__in=[
+                day for day, date in day_dates.items()
+                if start <= date <= end
+            ])
+
+        for assign_time in assign_times:
+            if assign_time.day in timetable and assign_time.period in timetable[assign_time.day]:
+                timetable[assign_time.day][assign_time.period] = {
+                    'subject': get_subject(assignment.subject_id),
+                    'teacher': assignment.teacher,
+                    'assignment': assignment
+                }
+    return timetable, year_options
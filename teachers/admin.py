@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Teacher, Assign, AssignTime, AttendanceClass, Marks, ExamSession
+from .models import Teacher, Assign, AssignTime, AttendanceClass, AttendanceSyncBatch, Marks, ExamSession
 
 
 @admin.register(Teacher)
@@ -26,12 +26,19 @@ class AssignTimeAdmin(admin.ModelAdmin):
 
 @admin.register(AttendanceClass)
 class AttendanceClassAdmin(admin.ModelAdmin):
-    list_display = ['assign', 'date', 'status']
+    list_display = ['assign', 'date', 'status', 'version']
     list_filter = ['date', 'status']
     search_fields = ['assign__teacher__name', 'assign__subject__name']
     date_hierarchy = 'date'
 
 
+@admin.register(AttendanceSyncBatch)
+class AttendanceSyncBatchAdmin(admin.ModelAdmin):
+    list_display = ['teacher', 'key', 'client_timestamp', 'received_at']
+    search_fields = ['teacher__name', 'key']
+    date_hierarchy = 'received_at'
+
+
 @admin.register(Marks)
 class MarksAdmin(admin.ModelAdmin):
     list_display = ['student_subject', 'name', 'marks1', 'academic_year', 'semester', 'total_marks']
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # GIN trigram indexes only exist on PostgreSQL; other backends use icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS teachers_teacher_name_trgm '
+        'ON teachers_teacher USING gin ("name" gin_trgm_ops);'
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS teachers_teacher_name_trgm;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0004_user_trigram_search_indexes'),
+        ('teachers', '0005_alter_marks_unique_together_assign_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+PREFIX_INDEXES = [
+    ('teachers_teacher_id_upper_like', 'teachers_teacher', 'id'),
+    ('teachers_teacher_name_upper_like', 'teachers_teacher', 'name'),
+]
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # Phục vụ lookup istartswith (UPPER(col::text) LIKE ...) của autocomplete
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index, table, column in PREFIX_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index} '
+            f'ON {table} (UPPER("{column}"::text) text_pattern_ops);'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index, _table, _column in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0006_teacher_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
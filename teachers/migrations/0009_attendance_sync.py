@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0008_assign_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceclass',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='AttendanceSyncBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('client_timestamp', models.DateTimeField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('response', models.JSONField(default=dict)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teachers.teacher')),
+            ],
+            options={
+                'unique_together': {('teacher', 'key')},
+            },
+        ),
+    ]
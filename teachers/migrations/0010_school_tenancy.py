@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0009_school_tenancy'),
+        ('teachers', '0009_attendance_sync'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['dept', 'id'], name='teacher_dept_id_idx'),
+        ),
+    ]
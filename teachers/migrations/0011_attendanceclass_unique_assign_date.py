@@ -0,0 +1,70 @@
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+ATTENDANCE_CLASS_NOT_MARKED = 0
+
+
+def merge_duplicate_sessions(apps, schema_editor):
+    """
+    Keep one AttendanceClass per (assign, date) before the constraint exists:
+    the marked one with the highest version (else the oldest) keeps the roll
+    calls of its duplicates, then the day's rollup is recomputed.
+    """
+    AttendanceClass = apps.get_model('teachers', 'AttendanceClass')
+    Attendance = apps.get_model('students', 'Attendance')
+    CompactAttendance = apps.get_model('students', 'CompactAttendance')
+    AttendanceRollup = apps.get_model('students', 'AttendanceRollup')
+
+    duplicates = (
+        AttendanceClass.objects.values('assign_id', 'date')
+        .annotate(count=Count('id')).filter(count__gt=1).order_by()
+    )
+    for group in duplicates.iterator():
+        sessions = list(
+            AttendanceClass.objects.filter(assign_id=group['assign_id'], date=group['date'])
+            .order_by('id')
+        )
+        sessions.sort(key=lambda session: (session.status == ATTENDANCE_CLASS_NOT_MARKED, -session.version))
+        keeper, others = sessions[0], sessions[1:]
+        for session in others:
+            # Học sinh đã có điểm danh ở buổi giữ lại thì bỏ bản ghi của buổi trùng
+            recorded = Attendance.objects.filter(attendanceclass=keeper).values('student_id')
+            Attendance.objects.filter(attendanceclass=session).exclude(
+                student_id__in=recorded).update(attendanceclass=keeper)
+            Attendance.objects.filter(attendanceclass=session).delete()
+            if CompactAttendance.objects.filter(attendanceclass=keeper).exists():
+                CompactAttendance.objects.filter(attendanceclass=session).delete()
+            else:
+                CompactAttendance.objects.filter(attendanceclass=session).update(attendanceclass=keeper)
+            if keeper.status == ATTENDANCE_CLASS_NOT_MARKED and session.status != ATTENDANCE_CLASS_NOT_MARKED:
+                keeper.status = session.status
+            session.delete()
+        keeper.save(update_fields=['status'])
+
+        compact = CompactAttendance.objects.filter(attendanceclass=keeper).values_list('present', 'total').first()
+        if compact is None:
+            counts = Attendance.objects.filter(
+                attendanceclass=keeper, subject_id=keeper.assign.subject_id,
+            ).aggregate(total=Count('id'), present=Count('id', filter=Q(status=True)))
+            compact = (counts['present'], counts['total'])
+        AttendanceRollup.objects.filter(assign_id=keeper.assign_id, date=keeper.date).update(
+            present=compact[0], total=compact[1])
+
+
+class Migration(migrations.Migration):
+    # PostgreSQL không cho ALTER TABLE khi còn trigger khoá ngoại chờ chạy từ
+    # bước gộp dữ liệu, nên bước đó chạy trong transaction riêng
+    atomic = False
+
+    dependencies = [
+        ('students', '0012_school_tenancy'),
+        ('teachers', '0010_school_tenancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_sessions, migrations.RunPython.noop, atomic=True),
+        migrations.AddConstraint(
+            model_name='attendanceclass',
+            constraint=models.UniqueConstraint(fields=('assign', 'date'), name='attendance_class_assign_date'),
+        ),
+    ]
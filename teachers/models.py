@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 import math
 from django.core.validators import MinValueValidator, MaxValueValidator
 from utils.constant import (
@@ -19,8 +19,10 @@ from utils.constant import (
     # Validation Constants
     MIN_MARKS_VALUE, MAX_MARKS_VALUE,
     # Verbose Names
-    ATTENDANCE_VERBOSE_NAME, ATTENDANCE_VERBOSE_NAME_PLURAL
+    ATTENDANCE_VERBOSE_NAME, ATTENDANCE_VERBOSE_NAME_PLURAL,
+    ATTENDANCE_SYNC_KEY_MAX_LENGTH,
 )
+from utils.tenancy import TenantManager
 
 
 class Teacher(models.Model):
@@ -35,6 +37,13 @@ class Teacher(models.Model):
     address = models.TextField(max_length=USER_ADDRESS_MAX_LENGTH, default=DEFAULT_EMPTY_STRING)
     phone = models.CharField(max_length=USER_PHONE_MAX_LENGTH, default=DEFAULT_EMPTY_STRING)
 
+    school_path = 'dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['dept', 'id'], name='teacher_dept_id_idx')]
+
     def __str__(self):
         return self.name
 
@@ -47,6 +56,10 @@ class Assign(models.Model):
     semester = models.IntegerField(default=1)
     is_active = models.BooleanField(default=True)
 
+    school_path = 'class_id__dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
+
     class Meta:
         unique_together = (('subject', 'class_id', 'teacher', 'academic_year', 'semester'),)
     
@@ -164,15 +177,85 @@ class AttendanceClass(models.Model):
     assign = models.ForeignKey(Assign, on_delete=models.RESTRICT)
     date = models.DateField()
     status = models.IntegerField(default=DEFAULT_ATTENDANCE_STATUS)
+    # Tăng mỗi lần lưu điểm danh, để phát hiện sửa đồng thời khi đồng bộ offline
+    version = models.PositiveIntegerField(default=0)
+
+    school_path = 'assign__class_id__dept__school'
+    objects = TenantManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = ATTENDANCE_VERBOSE_NAME
         verbose_name_plural = ATTENDANCE_VERBOSE_NAME_PLURAL
+        constraints = [
+            # Một buổi mỗi ngày cho một phân công: điểm danh tay, sinh theo lịch và đồng bộ offline dùng chung
+            models.UniqueConstraint(fields=['assign', 'date'], name='attendance_class_assign_date'),
+        ]
 
     def __str__(self):
         return f"{self.assign} - {self.date}"
 
 
+class AttendanceSyncBatch(models.Model):
+    """
+    Một lô điểm danh offline đã đồng bộ: gửi lại cùng idempotency key thì
+    nhận lại đúng phản hồi đã lưu thay vì ghi lần nữa
+    """
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    key = models.CharField(max_length=ATTENDANCE_SYNC_KEY_MAX_LENGTH)
+    client_timestamp = models.DateTimeField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    response = models.JSONField(default=dict)
+
+    class Meta:
+        unique_together = ('teacher', 'key')
+
+    def __str__(self):
+        return f"{self.teacher_id}: {self.key}"
+
+
+def _cie_keys(marks):
+    return {(mark.student_subject_id, mark.academic_year, mark.semester) for mark in marks}
+
+
+def _term_keys(queryset):
+    return set(queryset.values_list('student_subject_id', 'academic_year', 'semester').order_by())
+
+
+def _refresh_cie(keys):
+    from students.models import CieScore
+    CieScore.objects.refresh_for(keys)
+
+
+class MarksQuerySet(models.QuerySet):
+    """
+    Every write path (including bulk ones, which send no signals) refreshes
+    the materialized CieScore of the (StudentSubject, term) pairs it touched.
+    bulk_update() goes through update() and needs no override.
+    """
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            before = _term_keys(self.model.objects.filter(pk__in=pks))
+            rows = super().update(**kwargs)
+            _refresh_cie(before | _term_keys(self.model.objects.filter(pk__in=pks)))
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            keys = _term_keys(self)
+            result = super().delete()
+            _refresh_cie(keys)
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            _refresh_cie(_cie_keys(created))
+        return created
+
+
 class Marks(models.Model):
     student_subject = models.ForeignKey(
         STUDENTS_STUDENT_SUBJECT_MODEL, on_delete=models.RESTRICT)
@@ -184,9 +267,30 @@ class Marks(models.Model):
     academic_year = models.CharField(max_length=20, default="2024-2025")
     semester = models.IntegerField(default=1)
 
+    objects = MarksQuerySet.as_manager()
+
     class Meta:
         unique_together = (('student_subject', 'name', 'academic_year', 'semester'),)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = type(self).objects.filter(pk=self.pk).values_list(
+                    'student_subject_id', 'academic_year', 'semester').first()
+            super().save(*args, **kwargs)
+            keys = _cie_keys([self])
+            if previous:
+                keys.add(previous)
+            _refresh_cie(keys)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            keys = _cie_keys([self])
+            result = super().delete(*args, **kwargs)
+            _refresh_cie(keys)
+        return result
+
     @property
     def total_marks(self):
         if self.name == SEMESTER_END_EXAM_NAME:
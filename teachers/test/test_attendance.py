@@ -4,7 +4,7 @@ from django.utils import timezone
 from django.http import Http404
 from admins.models import User, Dept, Subject, Class
 from teachers.models import Teacher, Assign, AttendanceClass
-from students.models import Student, StudentSubject, Attendance
+from students.models import Student, StudentSubject, Attendance, AttendanceRollup
 from utils.constant import DATE_FORMAT, DEFAULT_ATTENDANCE_STATUS
 import uuid
 from datetime import date
@@ -113,6 +113,19 @@ class AttendanceViewsTestCase(TestCase):
         self.assertEqual(att_list[0].absent_students, 1)
         self.assertEqual(att_list[0].attendance_percentage, 50.0)
 
+    def test_create_attendance_twice_same_day(self):
+        """Kiểm tra tạo buổi điểm danh hai lần cùng ngày chỉ có một buổi"""
+        post_data = {
+            'create_attendance': 'true',
+            'attendance_date': timezone.now().strftime(DATE_FORMAT)
+        }
+        for _ in range(2):
+            self.client.post(reverse('t_class_date', args=(self.assign.id,)), post_data)
+        self.assertEqual(AttendanceClass.objects.filter(
+            assign=self.assign,
+            date=timezone.now().date()
+        ).count(), 1)
+
     def test_t_class_date_unauthenticated(self):
         """Kiểm tra t_class_date khi chưa đăng nhập"""
         self.client.logout()
@@ -192,6 +205,25 @@ class AttendanceViewsTestCase(TestCase):
         attendance_class.refresh_from_db()
         self.assertEqual(attendance_class.status, 1)
 
+    def test_confirm_attendance_updates_rollup(self):
+        """Kiểm tra xác nhận và sửa điểm danh cập nhật bảng AttendanceRollup"""
+        attendance_class = AttendanceClass.objects.create(
+            assign=self.assign,
+            date=date.today(),
+            status=DEFAULT_ATTENDANCE_STATUS
+        )
+        url = reverse('att_confirm', args=(attendance_class.id,))
+        self.client.post(url, {self.student.USN: 'present'})
+        rollup = AttendanceRollup.objects.get(assign=self.assign, date=date.today())
+        self.assertEqual((rollup.present, rollup.total), (1, 1))
+        self.assertEqual(rollup.class_id_id, self.class_obj.id)
+
+        # Sửa điểm danh: học sinh vắng
+        self.client.post(url, {self.student.USN: 'absent'})
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.present, rollup.total), (0, 1))
+        self.assertEqual(AttendanceRollup.objects.count(), 1)
+
     def test_confirm_attendance_invalid_data(self):
         """Kiểm tra att_confirm với dữ liệu điểm danh không hợp lệ"""
         attendance_class = AttendanceClass.objects.create(
@@ -378,3 +410,36 @@ class AttendanceViewsTestCase(TestCase):
         )
         self.assertEqual(response.status_code, 302)
         self.assertIn('login', response.url)
+
+    def test_register_matrix_and_csv(self):
+        """Kiểm tra sổ điểm danh theo tháng (HTML và CSV)"""
+        student2 = Student.objects.create(
+            USN='S002', class_id=self.class_obj, name='Second Student',
+            sex='F', DOB='2000-01-01', address='Address', phone='0987654322'
+        )
+        day1, day2 = date(2025, 3, 3), date(2025, 3, 10)
+        for day, statuses in ((day1, (True, False)), (day2, (True, True))):
+            session = AttendanceClass.objects.create(assign=self.assign, date=day, status=1)
+            for student, status in zip((self.student, student2), statuses):
+                Attendance.objects.create(student=student, subject=self.subject,
+                                          attendanceclass=session, date=day, status=status)
+        AttendanceClass.objects.create(assign=self.assign, date=date(2025, 4, 1), status=1)
+
+        url = reverse('t_register', args=(self.assign.id,))
+        response = self.client.get(url, {'month': '2025-03'})
+        self.assertEqual(response.status_code, 200)
+        register = response.context['register']
+        self.assertEqual(register.dates, [day1, day2])
+        self.assertEqual([(row.usn, list(row.cells), row.percentage) for row in register.rows()],
+                         [('S001', [1, 1], 100.0), ('S002', [0, 1], 50.0)])
+        self.assertEqual(register.column_percentages(), [50.0, 100.0])
+        self.assertEqual(register.percentage, 75.0)
+
+        response = self.client.get(url, {'month': '2025-03', 'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = response.content.decode().splitlines()
+        self.assertEqual(lines[0], 'USN,Name,2025-03-03,2025-03-10,Present,Total,Percentage')
+        self.assertEqual(lines[2], 'S002,Second Student,A,P,1,2,50.0')
+
+        response = self.client.get(url, {'month': 'March'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,116 @@
+import json
+from datetime import date
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from admins.models import User, Dept, Subject, Class
+from teachers.models import Teacher, Assign, AttendanceClass, AttendanceSyncBatch
+from students.models import Student, AttendanceRollup
+from utils.attendance_store import session_statuses
+from utils.constant import (
+    ATTENDANCE_CLASS_MARKED, ATTENDANCE_STORAGE_BITSET,
+    ATTENDANCE_SYNC_APPLIED, ATTENDANCE_SYNC_UNCHANGED, ATTENDANCE_SYNC_CONFLICT, ATTENDANCE_SYNC_REJECTED,
+)
+
+DAY = date(2024, 9, 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AttendanceSyncTestCase(TestCase):
+    """Tests cho API đồng bộ điểm danh offline theo lô"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testteacher', password='testpass123')
+        self.dept = Dept.objects.create(id='CS', name='Computer Science')
+        self.teacher = Teacher.objects.create(user=self.user, id='T001', dept=self.dept, name='Test Teacher',
+                                              sex='M', DOB='1980-01-01')
+        self.subject = Subject.objects.create(dept=self.dept, id='CS101', name='Programming')
+        self.class_obj = Class.objects.create(id='C001', dept=self.dept, section='A', sem=1)
+        self.assign = Assign.objects.create(class_id=self.class_obj, subject=self.subject, teacher=self.teacher)
+        for usn in ('S001', 'S002', 'S003'):
+            Student.objects.create(USN=usn, class_id=self.class_obj, name=usn, DOB='2000-01-01')
+        self.session = AttendanceClass.objects.create(assign=self.assign, date=DAY)
+        self.client.login(username='testteacher', password='testpass123')
+
+    def _sync(self, sessions, key='batch-1'):
+        body = {'idempotency_key': key, 'client_timestamp': '2024-09-02T10:00:00+07:00', 'sessions': sessions}
+        return self.client.post(reverse('attendance_sync'), json.dumps(body), content_type='application/json')
+
+    def test_day_sessions(self):
+        """Test tải các buổi học trong ngày để điểm danh offline"""
+        data = self.client.get(reverse('attendance_sync'), {'date': '2024-09-02'}).json()
+        self.assertEqual(len(data['sessions']), 1)
+        session = data['sessions'][0]
+        self.assertEqual((session['session'], session['version']), (self.session.id, 0))
+        self.assertEqual([student['usn'] for student in session['students']], ['S001', 'S002', 'S003'])
+
+    def test_batch_applies_sessions(self):
+        """Test một lô nhiều buổi, kể cả buổi tạo offline theo (assign, date)"""
+        response = self._sync([
+            {'ref': 'a', 'session': self.session.id, 'base_version': 0, 'present': ['S001', 'S003']},
+            {'ref': 'b', 'assign': self.assign.id, 'date': '2024-09-03', 'present': ['S002']},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([row['status'] for row in results], [ATTENDANCE_SYNC_APPLIED] * 2)
+        self.assertEqual(results[0]['version'], 1)
+
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.version), (ATTENDANCE_CLASS_MARKED, 1))
+        self.assertEqual(session_statuses(self.session), {'S001': True, 'S002': False, 'S003': True})
+        created = AttendanceClass.objects.get(assign=self.assign, date=date(2024, 9, 3))
+        self.assertEqual(session_statuses(created), {'S001': False, 'S002': True, 'S003': False})
+        self.assertEqual(AttendanceRollup.objects.get(assign=self.assign, date=DAY).present, 2)
+
+    @override_settings(ATTENDANCE_STORAGE=ATTENDANCE_STORAGE_BITSET)
+    def test_batch_bitset_storage(self):
+        """Test lô điểm danh với định dạng bitset"""
+        self._sync([{'ref': 'a', 'session': self.session.id, 'present': ['S002']}])
+        self.assertEqual(session_statuses(self.session), {'S001': False, 'S002': True, 'S003': False})
+
+    def test_idempotent_replay(self):
+        """Test gửi lại cùng idempotency key trả về phản hồi cũ, không ghi lại"""
+        first = self._sync([{'ref': 'a', 'session': self.session.id, 'present': ['S001']}])
+        replay = self._sync([{'ref': 'a', 'session': self.session.id, 'present': ['S002']}])
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(AttendanceSyncBatch.objects.count(), 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.version, 1)
+        self.assertTrue(session_statuses(self.session)['S001'])
+
+    def test_conflict_detection(self):
+        """Test buổi đã bị sửa sau khi điện thoại offline thì báo xung đột"""
+        self._sync([{'ref': 'web', 'session': self.session.id, 'present': ['S001']}], key='other-device')
+        results = self._sync([
+            {'ref': 'same', 'session': self.session.id, 'base_version': 0, 'present': ['S001']},
+        ], key='phone-1').json()['results']
+        self.assertEqual(results[0]['status'], ATTENDANCE_SYNC_UNCHANGED)
+
+        results = self._sync([
+            {'ref': 'stale', 'session': self.session.id, 'base_version': 0, 'present': ['S002']},
+        ], key='phone-2').json()['results']
+        self.assertEqual(results[0]['status'], ATTENDANCE_SYNC_CONFLICT)
+        self.assertEqual((results[0]['version'], results[0]['present']), (1, ['S001']))
+        self.assertTrue(session_statuses(self.session)['S001'])
+
+    def test_rejected_sessions(self):
+        """Test buổi không tồn tại, của giáo viên khác hoặc học sinh ngoài lớp bị từ chối"""
+        other = Teacher.objects.create(id='T002', dept=self.dept, name='Other', sex='M', DOB='1980-01-01')
+        foreign = AttendanceClass.objects.create(
+            assign=Assign.objects.create(class_id=self.class_obj, subject=self.subject, teacher=other), date=DAY)
+        results = self._sync([
+            {'ref': 'a', 'session': 999999, 'present': []},
+            {'ref': 'b', 'session': foreign.id, 'present': []},
+            {'ref': 'c', 'session': self.session.id, 'present': ['S999']},
+        ]).json()['results']
+        self.assertEqual([row['status'] for row in results], [ATTENDANCE_SYNC_REJECTED] * 3)
+        self.assertIn('S999', results[2]['error'])
+
+    def test_invalid_payload(self):
+        """Test body không hợp lệ trả về 400"""
+        response = self.client.post(reverse('attendance_sync'), 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._sync([]).status_code, 400)
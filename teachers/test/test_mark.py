@@ -3,9 +3,11 @@ from django.urls import reverse
 from django.http import Http404
 from admins.models import User, Dept, Subject, Class
 from teachers.models import Teacher, Assign, ExamSession, Marks
-from students.models import Student, StudentSubject
+from students.models import Student, StudentSubject, CieScore
 from utils.constant import TEST_NAME_CHOICES, FIRST_CHOICE_INDEX, DEFAULT_STATUS_FALSE
 import uuid
+from io import StringIO
+from django.core.management import call_command
 from django.test.utils import override_settings
 
 @override_settings(SECURE_SSL_REDIRECT=False)
@@ -267,3 +269,39 @@ class MarksViewsTestCase(TestCase):
         )
         self.assertEqual(response.status_code, 302)
         self.assertIn('login', response.url)
+
+    def test_cie_score_follows_marks_writes(self):
+        """Kiểm tra CieScore được cập nhật khi ghi điểm (kể cả ghi hàng loạt)"""
+        for index, value in enumerate((20, 30, 10)):
+            exam_session = ExamSession.objects.create(
+                assign=self.assign, name=TEST_NAME_CHOICES[index][0], status=DEFAULT_STATUS_FALSE)
+            self.client.post(reverse('marks_confirm', args=(exam_session.id,)),
+                             {self.student.USN: str(value)})
+        score = CieScore.objects.get(student_subject=self.student_subject)
+        self.assertEqual((score.academic_year, score.semester), (self.assign.academic_year, self.assign.semester))
+        self.assertEqual((score.cie, score.marks_count), (30, 3))
+
+        # Bài thi cuối kỳ không nằm trong CIE_CALCULATION_LIMIT bài đầu
+        Marks.objects.bulk_create([
+            Marks(student_subject=self.student_subject, name=name, marks1=100)
+            for name, _ in TEST_NAME_CHOICES[3:]
+        ])
+        self.assertEqual(CieScore.objects.get().cie, 130)
+        self.assertEqual(self.student_subject.get_cie(), 130)
+
+        Marks.objects.filter(student_subject=self.student_subject).update(marks1=2)
+        self.assertEqual(CieScore.objects.get().cie, 5)
+        Marks.objects.all().delete()
+        self.assertFalse(CieScore.objects.exists())
+
+    def test_recompute_cie_command(self):
+        """Kiểm tra lệnh recompute_cie tính lại và xoá điểm CIE cũ"""
+        Marks.objects.create(student_subject=self.student_subject, name=TEST_NAME_CHOICES[0][0], marks1=41)
+        CieScore.objects.all().update(cie=0)
+        CieScore.objects.create(student_subject=self.student_subject, academic_year='2023-2024', semester=2)
+
+        out = StringIO()
+        call_command('recompute_cie', stdout=out)
+        self.assertIn('Wrote 1 CIE scores, removed 1', out.getvalue())
+        self.assertEqual(CieScore.objects.get().cie, 21)
+
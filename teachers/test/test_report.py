@@ -1,4 +1,5 @@
 from django.test import TestCase, Client
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 from django.http import Http404
@@ -14,6 +15,7 @@ from django.test.utils import override_settings
 class ReportViewsTestCase(TestCase):
     def setUp(self):
         # Thiết lập dữ liệu cơ bản cho các test
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(
             username='testteacher', password='testpass123'
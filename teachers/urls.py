@@ -26,9 +26,11 @@ urlpatterns = [
          views.confirm, name='att_confirm'),
     path('<int:assign_id>/ClassDates/',
          views.t_class_date, name='t_class_date'),
+    path('attendance/sync/', views.attendance_sync, name='attendance_sync'),
     path('<int:ass_c_id>/edit_att/', views.edit_att, name='edit_att'),
     path('<int:ass_c_id>/view_att/', views.view_att, name='view_att'),
     path('<int:asst_id>/Free_teachers/',
          views.free_teachers, name='free_teachers'),
     path('<int:assign_id>/Report/', views.t_report, name='t_report'),
+    path('<int:assign_id>/register/', views.t_register, name='t_register'),
 ]
@@ -6,14 +6,26 @@ from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from teachers.models import Teacher
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponseBadRequest, HttpResponseRedirect, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseRedirect, JsonResponse
 from django.urls import reverse
 from .models import Teacher, Assign, ExamSession, Marks, AssignTime, AttendanceClass
-from students.models import Attendance, StudentSubject
+from students.models import AttendanceRollup, CieScore, StudentSubject
 from django.db import transaction
+from django.db.models import F
 from utils.date_utils import determine_semester, determine_academic_year_start
+from utils.reference_cache import get_class, get_dept, get_subject, class_label
+from utils.attendance_store import (
+    save_session, assign_session_counts, session_records, student_counts,
+)
+from utils.attendance_sync import day_sessions, parse_batch, sync_batch
+from utils.attendance_register import build_register, month_range, write_register_csv
+from utils.workload import teacher_workload
+from utils.ical import feed_url
+from utils import change_counters, computed_cache, jobs
+from admins.tasks import refresh_term_rankings, refresh_term_risk_scores
+from utils.db_routing import read_replica
 from datetime import datetime, timedelta, date
-import math
+import json
 
 from utils.constant import (
     DAYS_OF_WEEK, TIME_SLOTS, TIMETABLE_TIME_SLOTS,
@@ -22,16 +34,54 @@ from utils.constant import (
     FREE_TEACHERS_NO_AVAILABLE_TEACHERS_MESSAGE, FREE_TEACHERS_NO_SUBJECT_KNOWLEDGE_MESSAGE,
     TEACHER_FILTER_DISTINCT_ENABLED, TEACHER_FILTER_BY_CLASS, TEACHER_FILTER_BY_SUBJECT_KNOWLEDGE, DATE_FORMAT,
     ATTENDANCE_STANDARD, CIE_STANDARD,TEST_NAME_CHOICES, BREAK_PERIOD, LUNCH_PERIOD,
-    CIE_CALCULATION_LIMIT, CIE_DIVISOR
+    ATTENDANCE_CLASS_NOT_MARKED, ATTENDANCE_CLASS_MARKED,
+    REGISTER_MONTH_FORMAT, MIN_MARKS_VALUE, MAX_MARKS_VALUE, JOB_PRIORITY_LOW
 )
 
 
-def _calculate_attendance_statistics(attendance_queryset):
+def _class_info(assign, **extra):
+    """
+    Thông tin lớp/môn hiển thị trên các trang điểm danh. Tên khoa, lớp, môn
+    lấy từ reference cache nên không cần truy vấn Dept/Class/Subject.
+    """
+    class_record = get_class(assign.class_id_id)
+    subject_record = get_subject(assign.subject_id)
+    info = {
+        'class_id': class_record.id,
+        'department': get_dept(class_record.dept_id).name,
+        'section': class_record.section,
+        'semester': class_record.sem,
+        'subject': subject_record.name,
+        'subject_code': subject_record.id,
+        'teacher': assign.teacher.name,
+    }
+    info.update(extra)
+    return info
+
+
+def _save_roll_call(assc, students, data):
+    """
+    Lưu kết quả điểm danh của một buổi (present/absent theo USN trong data),
+    đánh dấu buổi học là đã điểm danh và cập nhật bảng tổng hợp AttendanceRollup.
+    """
+    statuses = {student.USN: data.get(student.USN) == 'present' for student in students}
+    with transaction.atomic():
+        # Lưu theo định dạng settings.ATTENDANCE_STORAGE (từng dòng hoặc bitset)
+        save_session(assc, statuses)
+        # Tăng version để bản điểm danh offline cũ hơn bị báo xung đột khi đồng bộ
+        AttendanceClass.objects.filter(pk=assc.pk).update(
+            status=ATTENDANCE_CLASS_MARKED, version=F('version') + 1)
+        assc.status = ATTENDANCE_CLASS_MARKED
+        AttendanceRollup.objects.refresh_for(assc)
+
+
+def _calculate_attendance_statistics(present_students, total_students):
     """
-    Private function to calculate attendance statistics from an attendance queryset.
+    Private function to calculate attendance statistics of a session.
     
     Args:
-        attendance_queryset: QuerySet of Attendance objects
+        present_students: Number of present students
+        total_students: Number of students with a recorded status
         
     Returns:
         dict: Dictionary containing attendance statistics with keys:
@@ -40,8 +90,6 @@ def _calculate_attendance_statistics(attendance_queryset):
             - absent_students: Number of absent students  
             - attendance_percentage: Attendance percentage (rounded to 1 decimal)
     """
-    total_students = attendance_queryset.count()
-    present_students = attendance_queryset.filter(status=True).count()
     absent_students = total_students - present_students
     attendance_percentage = round(
         (present_students / total_students * 100), 1
@@ -74,9 +122,17 @@ def teacher_dashboard(request):
             'Teacher profile not found. Please contact administrator.'))
         return redirect('unified_logout')
 
+    # Khối lượng giảng dạy của kỳ hiện tại
+    today = date.today()
+    workload = teacher_workload(
+        Teacher.objects.filter(pk=teacher.pk),
+        determine_academic_year_start(today), determine_semester(today),
+    ).first()
+
     context = {
         'teacher': teacher,
         'user': request.user,
+        'workload': workload,
     }
 
     return render(request, 't_homepage.html', context)
@@ -282,7 +338,6 @@ def t_clas(request, teacher_id, choice):
         'selected_year': selected_year,
         'selected_semester': selected_semester,
         'selected_semester_int': selected_semester_int,
-    }
         'available_semesters': available_semesters,
         'available_years': available_years,
         'selected_semester': selected_semester,
@@ -384,7 +439,8 @@ def t_marks_entry(request, marks_c_id):
                 )
                 latest_mark = (
                     student_subject.marks_set
-                    .filter(name=exam_session.name)
+                    .filter(name=exam_session.name, academic_year=assignment.academic_year,
+                            semester=assignment.semester)
                     .order_by('-id')
                     .first()
                 )
@@ -419,21 +475,40 @@ def marks_confirm(request, marks_c_id):
         class_object = assignment.class_id
 
         # Chỉ xử lý điểm cho những học sinh đã đăng ký môn học
-        for student in class_object.student_set.all():
-            student_mark = request.POST.get(student.USN)
-            if student_mark is not None:  # Chỉ xử lý nếu có điểm được gửi
-                try:
-                    student_subject = StudentSubject.objects.get(
-                        subject=subject, student=student)
-                    marks_instance, _ = student_subject.marks_set.get_or_create(
-                        name=exam_session.name)
-                    marks_instance.marks1 = student_mark
-                    marks_instance.save()
-                except StudentSubject.DoesNotExist:
-                    # Bỏ qua học sinh chưa đăng ký môn học
-                    continue
+        student_subjects = dict(
+            StudentSubject.objects.filter(subject=subject, student__class_id=class_object)
+            .values_list('student_id', 'id')
+        )
+        term = {'academic_year': assignment.academic_year, 'semester': assignment.semester}
+        existing = {
+            mark.student_subject_id: mark
+            for mark in Marks.objects.filter(
+                student_subject_id__in=student_subjects.values(), name=exam_session.name, **term)
+        }
+        created, changed = [], []
+        for usn, student_subject_id in student_subjects.items():
+            student_mark = request.POST.get(usn)
+            if student_mark is None:  # Chỉ xử lý nếu có điểm được gửi
+                continue
+            try:
+                value = min(max(int(student_mark), MIN_MARKS_VALUE), MAX_MARKS_VALUE)
+            except ValueError:
+                continue
+            mark = existing.get(student_subject_id)
+            if mark is None:
+                created.append(Marks(student_subject_id=student_subject_id, name=exam_session.name,
+                                     marks1=value, **term))
+            elif mark.marks1 != value:
+                mark.marks1 = value
+                changed.append(mark)
+        # Ghi hàng loạt; MarksQuerySet cập nhật CieScore của các học sinh liên quan
+        Marks.objects.bulk_create(created)
+        Marks.objects.bulk_update(changed, ['marks1'])
         exam_session.status = True
         exam_session.save()
+        # Danh sách học sinh có nguy cơ và bảng xếp hạng của kỳ được tính lại ở worker nền
+        for refresh in (refresh_term_risk_scores, refresh_term_rankings):
+            jobs.enqueue(refresh, priority=JOB_PRIORITY_LOW, unique=True, created_by=request.user, **term)
 
     return HttpResponseRedirect(reverse('t_marks_list', args=(assignment.id,)))
 
@@ -476,7 +551,8 @@ def edit_marks(request, marks_c_id):
                 )
                 latest_mark = (
                     student_subject.marks_set
-                    .filter(name=exam_session.name)
+                    .filter(name=exam_session.name, academic_year=assignment.academic_year,
+                            semester=assignment.semester)
                     .order_by('-id')
                     .first()
                 )
@@ -510,7 +586,7 @@ def t_timetable(request, teacher_id):
             messages.error(request, _(TIMETABLE_ACCESS_DENIED_MESSAGE))
             return redirect('teacher_dashboard')
 
-        asst = AssignTime.objects.filter(assign__teacher_id=teacher_id)
+        asst = AssignTime.objects.select_related('assign__teacher').filter(assign__teacher_id=teacher_id)
 
         # Filters
         year = request.GET.get('academic_year')
@@ -595,10 +671,12 @@ def t_timetable(request, teacher_id):
         timetable = {day: {slot: None for slot in time_slots} for day in days}
         for at in asst:
             if at.day in timetable and at.period in timetable[at.day]:
+                # Môn và lớp tra từ reference cache, không truy vấn theo từng ô
                 timetable[at.day][at.period] = {
-                    'subject': at.assign.subject,
+                    'subject': get_subject(at.assign.subject_id),
                     'teacher': at.assign.teacher,
-                    'assignment': at.assign
+                    'assignment': at.assign,
+                    'class_label': class_label(at.assign.class_id_id),
                 }
 
         # Year options cho filter
@@ -626,6 +704,7 @@ def t_timetable(request, teacher_id):
             'today': today.strftime('%Y-%m-%d'),
             'start_date': start_date if start_date else '',
             'end_date': end_date if end_date else '',
+            'calendar_url': feed_url(request, request.user) if teacher.user == request.user else '',
         }
         return render(request, 't_timetable.html', context)
 
@@ -698,12 +777,9 @@ def t_class_date(request, assign_id):
     
     # Thêm thống kê điểm danh cho mỗi buổi học
     att_list_with_stats = []
+    session_counts = assign_session_counts(assign)
     for att_class in att_list:
-        attendance_records = Attendance.objects.filter(
-            attendanceclass=att_class, 
-            subject=assign.subject
-        )
-        stats = _calculate_attendance_statistics(attendance_records)
+        stats = _calculate_attendance_statistics(*session_counts.get(att_class.id, (0, 0)))
         
         att_class.total_students = stats['total_students']
         att_class.present_students = stats['present_students']
@@ -716,15 +792,13 @@ def t_class_date(request, assign_id):
         try:
             attendance_date = timezone.datetime.strptime(
                 date_str, DATE_FORMAT).date()
-            if not AttendanceClass.objects.filter(assign=assign, date=attendance_date).exists():
-                with transaction.atomic():
-                    AttendanceClass.objects.create(
-                        assign=assign,
-                        date=attendance_date,
-                        status=0  # Not Marked
-                    )
-            selected_assc = AttendanceClass.objects.get(
-                assign=assign, date=attendance_date)
+            # Buổi theo thời khoá biểu đã được generate_attendance_sessions tạo sẵn,
+            # nên thường chỉ tốn một truy vấn; buổi ngoài lịch mới phải tạo
+            selected_assc, _ = AttendanceClass.objects.get_or_create(
+                assign=assign,
+                date=attendance_date,
+                defaults={'status': ATTENDANCE_CLASS_NOT_MARKED}
+            )
         except ValueError:
             messages.error(request, _(
                 'Invalid date format. Please use YYYY-MM-DD.'))
@@ -733,24 +807,7 @@ def t_class_date(request, assign_id):
     elif request.method == 'POST' and 'confirm_attendance' in request.POST:
         assc_id = request.POST.get('assc_id')
         assc = get_object_or_404(AttendanceClass, id=assc_id)
-        subject = assign.subject
-
-        with transaction.atomic():
-            for student in students:
-                status_str = request.POST.get(student.USN)
-                status = status_str == 'present'
-                attendance_obj, created = Attendance.objects.get_or_create(
-                    student=student,
-                    subject=subject,
-                    attendanceclass=assc,
-                    date=assc.date,
-                    defaults={'status': status}
-                )
-                if not created:
-                    attendance_obj.status = status
-                    attendance_obj.save()
-            assc.status = 1  # Marked
-            assc.save()
+        _save_roll_call(assc, students, request.POST)
         messages.success(request, _('Attendance successfully recorded.'))
         return HttpResponseRedirect(reverse('t_class_date', args=(assign.id,)))
 
@@ -759,16 +816,7 @@ def t_class_date(request, assign_id):
         selected_assc = get_object_or_404(AttendanceClass, id=assc_id)
 
     # Thêm thông tin chi tiết về lớp học
-    class_info = {
-        'class_id': class_obj.id,
-        'department': class_obj.dept.name,
-        'section': class_obj.section,
-        'semester': class_obj.sem,
-        'total_students': len(students),
-        'subject': assign.subject.name,
-        'subject_code': assign.subject.id,
-        'teacher': assign.teacher.name,
-    }
+    class_info = _class_info(assign, total_students=len(students))
 
     context = {
         'assign': assign,
@@ -782,6 +830,42 @@ def t_class_date(request, assign_id):
     }
     return render(request, 't_class_date.html', context)
 
+# API đồng bộ điểm danh offline (ứng dụng trên điện thoại)
+@login_required
+def attendance_sync(request):
+    """
+    GET ?date=YYYY-MM-DD: các buổi học của giáo viên trong ngày (danh sách
+    học sinh, có mặt, version) để điểm danh offline.
+    POST (JSON): một lô điểm danh {idempotency_key, client_timestamp,
+    sessions: [{ref, session | assign + date, base_version, present}]},
+    áp dụng trong một transaction; trả về kết quả từng buổi.
+    """
+    teacher = Teacher.objects.filter(user=request.user).first()
+    if teacher is None:
+        return JsonResponse({'error': 'Teacher credentials required'}, status=403)
+
+    if request.method == 'GET':
+        day_str = request.GET.get('date')
+        try:
+            day = datetime.strptime(day_str, DATE_FORMAT).date() if day_str else timezone.localdate()
+        except ValueError:
+            return JsonResponse({'error': 'Invalid date format. Please use YYYY-MM-DD.'}, status=400)
+        return JsonResponse({'date': day.strftime(DATE_FORMAT), 'sessions': day_sessions(teacher, day)})
+
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['GET', 'POST'])
+    try:
+        key, client_timestamp, items = parse_batch(json.loads(request.body))
+    except ValueError as error:
+        # json.JSONDecodeError cũng là ValueError
+        return JsonResponse({'error': str(error)}, status=400)
+    response, replayed = sync_batch(teacher, key, client_timestamp, items)
+    response = JsonResponse(response)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
 # Thông tin điểm danh
 
 
@@ -794,17 +878,8 @@ def t_attendance(request, ass_c_id):
     total_students_in_class = students.count()
     
     # Thêm thông tin chi tiết về lớp học
-    class_info = {
-        'class_id': class_obj.id,
-        'department': class_obj.dept.name,
-        'section': class_obj.section,
-        'semester': class_obj.sem,
-        'total_students': total_students_in_class,
-        'subject': assign.subject.name,
-        'subject_code': assign.subject.id,
-        'teacher': assign.teacher.name,
-        'date': assc.date,
-    }
+    class_info = _class_info(
+        assign, total_students=total_students_in_class, date=assc.date)
 
     context = {
         'ass': assign,
@@ -822,29 +897,8 @@ def t_attendance(request, ass_c_id):
 @login_required
 def confirm(request, ass_c_id):
     assc = get_object_or_404(AttendanceClass, id=ass_c_id)
-    assign = assc.assign
-    subject = assign.subject
-    class_obj = assign.class_id
-    has_students = class_obj.student_set.exists()  # Check if students exist
-    students = class_obj.student_set.all() if has_students else [
-    ]  # Fetch students only if needed
-
-    with transaction.atomic():
-        for student in students:
-            status_str = request.POST.get(student.USN)
-            status = status_str == 'present'
-            attendance_obj, created = Attendance.objects.get_or_create(
-                student=student,
-                subject=subject,
-                attendanceclass=assc,
-                date=assc.date,
-                defaults={'status': status}
-            )
-            if not created:
-                attendance_obj.status = status
-                attendance_obj.save()
-        assc.status = 1  # Marked
-        assc.save()
+    students = assc.assign.class_id.student_set.all()
+    _save_roll_call(assc, students, request.POST)
 
     messages.success(request, _('Attendance successfully recorded.'))
     return HttpResponseRedirect(reverse('t_class_date', args=(assc.assign.id,)))
@@ -856,12 +910,12 @@ def confirm(request, ass_c_id):
 def edit_att(request, ass_c_id):
     assc = get_object_or_404(AttendanceClass, id=ass_c_id)
     assign = assc.assign
-    subject = assign.subject
-    att_list = Attendance.objects.filter(attendanceclass=assc, subject=subject)
+    att_list = session_records(assc)
     class_obj = assign.class_id
     
     # Thêm thông tin chi tiết về lớp học và thống kê
-    stats = _calculate_attendance_statistics(att_list)
+    stats = _calculate_attendance_statistics(
+        sum(att.status for att in att_list), len(att_list))
     
     context = {
         'assc': assc,
@@ -881,24 +935,14 @@ def edit_att(request, ass_c_id):
 def view_att(request, ass_c_id):
     assc = get_object_or_404(AttendanceClass, id=ass_c_id)
     assign = assc.assign
-    subject = assign.subject
-    att_list = Attendance.objects.filter(attendanceclass=assc, subject=subject)
-    class_obj = assign.class_id
+    att_list = session_records(assc)
     
     # Tính toán thống kê điểm danh
-    stats = _calculate_attendance_statistics(att_list)
+    stats = _calculate_attendance_statistics(
+        sum(att.status for att in att_list), len(att_list))
     
     # Thêm thông tin chi tiết về lớp học
-    class_info = {
-        'class_id': class_obj.id,
-        'department': class_obj.dept.name,
-        'section': class_obj.section,
-        'semester': class_obj.sem,
-        'subject': assign.subject.name,
-        'subject_code': assign.subject.id,
-        'teacher': assign.teacher.name,
-        'date': assc.date,
-    }
+    class_info = _class_info(assign, date=assc.date)
     
     context = {
         'assc': assc,
@@ -912,17 +956,101 @@ def view_att(request, ass_c_id):
     }
     return render(request, 't_view_att.html', context)
 
+# Sổ điểm danh (học sinh x buổi học) theo tháng hoặc theo khoảng ngày
+
+
+def _register_range(params):
+    """
+    Khoảng ngày của sổ điểm danh: start_date/end_date nếu có (ví dụ cả học kỳ),
+    nếu không thì tháng trong tham số month (mặc định tháng hiện tại).
+    """
+    try:
+        if params.get('start_date') and params.get('end_date'):
+            return (datetime.strptime(params['start_date'], DATE_FORMAT).date(),
+                    datetime.strptime(params['end_date'], DATE_FORMAT).date())
+        if params.get('month'):
+            return month_range(datetime.strptime(params['month'], REGISTER_MONTH_FORMAT).date())
+    except ValueError:
+        return None
+    return month_range(timezone.now().date())
+
+
+@login_required
+@read_replica
+def t_register(request, assign_id):
+    assign = get_object_or_404(Assign.objects.select_related('teacher'), id=assign_id)
+    if assign.teacher.user_id and assign.teacher.user_id != request.user.id and not request.user.is_superuser:
+        messages.error(request, _('Bạn không có quyền truy cập assignment này!'))
+        return redirect('teacher_dashboard')
+
+    date_range = _register_range(request.GET)
+    if date_range is None:
+        return HttpResponseBadRequest(_('Invalid date format. Please use YYYY-MM-DD.'))
+    start_date, end_date = date_range
+    register = build_register(assign, start_date, end_date)
+
+    if request.GET.get('format') == 'csv':
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="register-{assign.class_id_id}-{assign.subject_id}'
+            f'-{start_date:%Y%m%d}-{end_date:%Y%m%d}.csv"')
+        write_register_csv(register, response)
+        return response
+
+    csv_query = request.GET.copy()
+    csv_query['format'] = 'csv'
+    context = {
+        'assign': assign,
+        'register': register,
+        'csv_query': csv_query.urlencode(),
+        'rows': list(register.rows()),
+        'column_totals': list(zip(register.column_present, register.column_total,
+                                  register.column_percentages())),
+        'start_date': start_date,
+        'end_date': end_date,
+        'month': start_date.strftime(REGISTER_MONTH_FORMAT),
+        'class_info': _class_info(assign),
+    }
+    return render(request, 't_register.html', context)
+
 #hiển thị báo cáo học tập của học sinh trong một lớp học cụ thể.
 
 @login_required()
+@read_replica
 def t_report(request, assign_id):
-    ass = get_object_or_404(Assign, id=assign_id)
-    sc_list = []
-    
+    ass = get_object_or_404(Assign.objects.select_related('class_id', 'subject'), id=assign_id)
+
     # Get class information
     class_obj = ass.class_id
     subject_obj = ass.subject
-    
+
+    # Thống kê cả lớp chỉ tính lại khi danh sách lớp, điểm danh hoặc điểm số đổi
+    report = computed_cache.get_or_compute(
+        't_report', [ass.id], lambda: _assign_report(ass),
+        tags=[change_counters.class_roster(class_obj.id), change_counters.class_attendance(class_obj.id),
+              change_counters.class_marks(class_obj.id)],
+    )
+
+    context = {
+        **report,
+        'class_obj': class_obj,
+        'subject_obj': subject_obj,
+        'assignment': ass,
+        'ATTENDANCE_STANDARD': ATTENDANCE_STANDARD,
+        'CIE_STANDARD': CIE_STANDARD,
+        'attendance_success_label': f"≥{ATTENDANCE_STANDARD}%",
+        'attendance_danger_label': f"<{ATTENDANCE_STANDARD}%",
+        'cie_success_label': f"≥{CIE_STANDARD}",
+        'cie_danger_label': f"<{CIE_STANDARD}",
+    }
+
+    return render(request, 't_report.html', context)
+
+
+def _assign_report(ass):
+    """Attendance/CIE row of every student taking the assignment's subject, with the class statistics."""
+    sc_list = []
+
     # Statistics counters
     # Đếm học sinh có điểm danh tốt (≥75%)
     good_attendance_count = 0
@@ -930,55 +1058,49 @@ def t_report(request, assign_id):
     good_cie_count = 0
     # Đếm học sinh cần hỗ trợ (điểm danh <75% HOẶC CIE <25)
     need_support_count = 0
-    
-    for stud in class_obj.student_set.all():
-        student_subjects = StudentSubject.objects.filter(student=stud, subject=subject_obj)
-        if student_subjects.exists():
-            # If student is registered for this subject, add to list
-            student_subject = student_subjects.first()
-            sc_list.append(student_subject)
-            
-            # Calculate statistics with error handling
-            try:
-                attendance = student_subject.get_attendance()
-            except:
-                attendance = 0
-                
-            try:
-                cie = student_subject.get_cie()
-            except:
-                cie = 0
-            
-            # Count statistics
-            if attendance >= ATTENDANCE_STANDARD:
-                good_attendance_count += 1
-            if cie >= CIE_STANDARD:
-                good_cie_count += 1
-            if attendance < ATTENDANCE_STANDARD or cie < CIE_STANDARD:
-                need_support_count += 1
-    
+
+    student_subjects = StudentSubject.objects.filter(
+        student__class_id=ass.class_id_id, subject_id=ass.subject_id
+    ).select_related('student', 'subject').order_by('student_id')
+    for student_subject in student_subjects:
+        # Calculate statistics with error handling
+        try:
+            attendance = student_subject.get_attendance()
+        except:
+            attendance = 0
+
+        try:
+            cie = student_subject.get_cie(ass.academic_year, ass.semester)
+        except:
+            cie = 0
+
+        # Template chỉ dùng các giá trị đã tính, không gọi lại model
+        sc_list.append({
+            'student_id': student_subject.student_id,
+            'name': student_subject.student.name,
+            'attendance': attendance,
+            'cie': cie,
+        })
+
+        # Count statistics
+        if attendance >= ATTENDANCE_STANDARD:
+            good_attendance_count += 1
+        if cie >= CIE_STANDARD:
+            good_cie_count += 1
+        if attendance < ATTENDANCE_STANDARD or cie < CIE_STANDARD:
+            need_support_count += 1
+
     # Calculate pass rate
     total_students = len(sc_list)
     pass_rate = 100 if total_students == 0 else round((total_students - need_support_count) / total_students * 100)
-    
-    context = {
+
+    return {
         'sc_list': sc_list,
-        'class_obj': class_obj,
-        'subject_obj': subject_obj,
-        'assignment': ass,
         'good_attendance_count': good_attendance_count,
         'good_cie_count': good_cie_count,
         'need_support_count': need_support_count,
         'pass_rate': pass_rate,
-        'ATTENDANCE_STANDARD': ATTENDANCE_STANDARD,
-        'CIE_STANDARD': CIE_STANDARD,
-        'attendance_success_label': f"≥{ATTENDANCE_STANDARD}%",
-        'attendance_danger_label': f"<{ATTENDANCE_STANDARD}%",
-        'cie_success_label': f"≥{CIE_STANDARD}",
-        'cie_danger_label': f"<{CIE_STANDARD}",
     }
-    
-    return render(request, 't_report.html', context)
 
 @login_required
 def view_students(request, assign_id):
@@ -995,34 +1117,36 @@ def view_students(request, assign_id):
     # Lấy danh sách sinh viên trong lớp
     students = assignment.class_id.student_set.all().order_by('name')
     
+    # Đăng ký môn học, điểm và CIE (đã lưu sẵn trong CieScore) của kỳ này
+    student_subjects = dict(
+        StudentSubject.objects.filter(subject=assignment.subject, student__class_id=assignment.class_id)
+        .values_list('student_id', 'id')
+    )
+    term = {'academic_year': assignment.academic_year, 'semester': assignment.semester}
+    marks_by_subject = {}
+    for mark in Marks.objects.filter(student_subject_id__in=student_subjects.values(), **term).order_by('name'):
+        marks_by_subject.setdefault(mark.student_subject_id, []).append(mark)
+    cie_by_subject = dict(
+        CieScore.objects.filter(student_subject_id__in=student_subjects.values(), **term)
+        .values_list('student_subject_id', 'cie')
+    )
+
     # Lấy thông tin điểm và điểm danh cho từng sinh viên
     students_data = []
     for student in students:
         # Kiểm tra xem sinh viên có đăng ký môn học này không
-        try:
-            student_subject = StudentSubject.objects.get(
-                student=student,
-                subject=assignment.subject
-            )
-            
-            # Lấy tất cả điểm của sinh viên
-            marks = student_subject.marks_set.all().order_by('name')
+        student_subject_id = student_subjects.get(student.USN)
+        if student_subject_id is not None:
+            marks = marks_by_subject.get(student_subject_id, [])
             total_marks = sum(mark.marks1 for mark in marks)
             
             # Lấy thông tin điểm danh
-            attendance_records = Attendance.objects.filter(
-                student=student,
-                subject=assignment.subject
-            )
-            total_classes = attendance_records.count()
-            attended_classes = attendance_records.filter(status=True).count()
+            attended_classes, total_classes = student_counts(student.USN, assignment.subject_id)
             attendance_percentage = round((attended_classes / total_classes * 100), 2) if total_classes > 0 else 0
             
-            # Tính CIE
-            marks_list = [mark.marks1 for mark in marks]
-            cie_score = math.ceil(sum(marks_list[:CIE_CALCULATION_LIMIT]) / CIE_DIVISOR) if marks_list else 0
+            cie_score = cie_by_subject.get(student_subject_id, 0)
             
-        except StudentSubject.DoesNotExist:
+        else:
             # Sinh viên chưa đăng ký môn học
             marks = []
             total_marks = 0
@@ -1039,7 +1163,7 @@ def view_students(request, assign_id):
             'cie_score': cie_score,
             'total_classes': total_classes,
             'attended_classes': attended_classes,
-            'is_registered': hasattr(locals(), 'student_subject'),
+            'is_registered': student_subject_id is not None,
         })
     
     # Pagination
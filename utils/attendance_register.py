@@ -0,0 +1,141 @@
+import csv
+from array import array
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.db.models import Q
+
+from students.models import Attendance, CompactAttendance, Student
+from teachers.models import AttendanceClass
+from utils.constant import (
+    REGISTER_CELL_NOT_RECORDED, REGISTER_CELL_ABSENT, REGISTER_CELL_PRESENT,
+    PERCENTAGE_MULTIPLIER, PERCENTAGE_DECIMAL_PLACES, ATTENDANCE_ROSTER_SEPARATOR,
+)
+
+
+def _percentage(present, total):
+    return round(present / total * PERCENTAGE_MULTIPLIER, PERCENTAGE_DECIMAL_PLACES) if total else 0
+
+
+class RegisterRow(NamedTuple):
+    usn: str
+    name: str
+    cells: array
+    present: int
+    total: int
+    percentage: float
+
+
+class AttendanceRegister(NamedTuple):
+    """
+    Students x sessions matrix of one Assign. `cells` is row-major with one
+    signed byte per cell (REGISTER_CELL_*); totals count recorded cells only.
+    """
+    students: list
+    dates: list
+    cells: array
+    row_present: array
+    row_total: array
+    column_present: array
+    column_total: array
+
+    @property
+    def width(self):
+        return len(self.dates)
+
+    def rows(self):
+        width = self.width
+        for index, (usn, name) in enumerate(self.students):
+            present, total = self.row_present[index], self.row_total[index]
+            yield RegisterRow(usn, name, self.cells[index * width:(index + 1) * width],
+                              present, total, _percentage(present, total))
+
+    def column_percentages(self):
+        return [_percentage(present, total)
+                for present, total in zip(self.column_present, self.column_total)]
+
+    @property
+    def present(self):
+        return sum(self.row_present)
+
+    @property
+    def total(self):
+        return sum(self.row_total)
+
+    @property
+    def percentage(self):
+        return _percentage(self.present, self.total)
+
+
+def month_range(day):
+    """First and last day of the month containing `day`."""
+    first = day.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return first, following - timedelta(days=1)
+
+
+def build_register(assign, start_date, end_date):
+    """
+    Load the attendance of `assign` between two dates and pivot it into an
+    AttendanceRegister. Each storage format is read with a single query, so
+    the cost does not grow with the number of students or sessions.
+    """
+    sessions = list(
+        AttendanceClass.objects.filter(assign=assign, date__range=(start_date, end_date))
+        .order_by('date', 'id').values_list('id', 'date')
+    )
+    column_of = {session_id: column for column, (session_id, _) in enumerate(sessions)}
+    records = list(
+        Attendance.objects.filter(attendanceclass_id__in=column_of, subject_id=assign.subject_id)
+        .values_list('attendanceclass_id', 'student_id', 'status')
+    )
+    for session_id, roster, presence in CompactAttendance.objects.filter(
+            attendanceclass_id__in=column_of).values_list('attendanceclass_id', 'roster', 'presence'):
+        bits = int.from_bytes(presence, 'little')
+        usns = [usn for usn in roster.split(ATTENDANCE_ROSTER_SEPARATOR) if usn]
+        records.extend((session_id, usn, bool(bits >> index & 1)) for index, usn in enumerate(usns))
+
+    # Học sinh hiện tại của lớp và cả những học sinh đã chuyển lớp nhưng còn dữ liệu
+    recorded = {usn for _, usn, _ in records}
+    students = list(
+        Student.objects.filter(Q(class_id_id=assign.class_id_id) | Q(USN__in=recorded))
+        .order_by('USN').values_list('USN', 'name')
+    )
+    row_of = {usn: row for row, (usn, _) in enumerate(students)}
+
+    width = len(sessions)
+    cells = array('b', [REGISTER_CELL_NOT_RECORDED]) * (len(students) * width)
+    for session_id, usn, status in records:
+        cells[row_of[usn] * width + column_of[session_id]] = (
+            REGISTER_CELL_PRESENT if status else REGISTER_CELL_ABSENT)
+
+    # array.count() chạy trong C; cột lấy bằng slice có bước nhảy
+    row_present, row_total = array('i'), array('i')
+    for row in range(len(students)):
+        line = cells[row * width:(row + 1) * width]
+        row_present.append(line.count(REGISTER_CELL_PRESENT))
+        row_total.append(width - line.count(REGISTER_CELL_NOT_RECORDED))
+    column_present, column_total = array('i'), array('i')
+    for column in range(width):
+        line = cells[column::width]
+        column_present.append(line.count(REGISTER_CELL_PRESENT))
+        column_total.append(len(line) - line.count(REGISTER_CELL_NOT_RECORDED))
+
+    return AttendanceRegister(
+        students, [session_date for _, session_date in sessions], cells,
+        row_present, row_total, column_present, column_total)
+
+
+_CSV_MARKS = {REGISTER_CELL_PRESENT: 'P', REGISTER_CELL_ABSENT: 'A', REGISTER_CELL_NOT_RECORDED: ''}
+
+
+def write_register_csv(register, stream):
+    writer = csv.writer(stream)
+    writer.writerow(['USN', 'Name'] + [day.isoformat() for day in register.dates]
+                    + ['Present', 'Total', 'Percentage'])
+    for row in register.rows():
+        writer.writerow([row.usn, row.name] + [_CSV_MARKS[cell] for cell in row.cells]
+                        + [row.present, row.total, row.percentage])
+    writer.writerow(['', 'Present'] + list(register.column_present)
+                    + [register.present, register.total, register.percentage])
+    writer.writerow(['', 'Percentage'] + register.column_percentages())
@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import timedelta
+from typing import NamedTuple
+
+from admins.models import AttendanceRange
+from teachers.models import AssignTime, AttendanceClass
+from utils.constant import (
+    DAYS_OF_WEEK, ATTENDANCE_CLASS_NOT_MARKED, ATTENDANCE_CLASS_MARKED,
+    ATTENDANCE_SESSION_BATCH_SIZE, PERCENTAGE_MULTIPLIER, PERCENTAGE_DECIMAL_PLACES,
+)
+from utils.date_utils import get_semester_date_range
+
+# AssignTime.day -> date.weekday() (DAYS_OF_WEEK bắt đầu từ thứ Hai)
+_WEEKDAYS = {day: index for index, (day, _) in enumerate(DAYS_OF_WEEK)}
+
+
+class SessionReconciliation(NamedTuple):
+    """Scheduled vs. taken sessions of one teacher up to a date."""
+    teacher_id: str
+    teacher_name: str
+    expected: int
+    marked: int
+    cancelled: int
+    missed: int
+
+    @property
+    def marked_percentage(self):
+        if not self.expected:
+            return 0
+        return round(min(self.marked, self.expected) * PERCENTAGE_MULTIPLIER / self.expected,
+                     PERCENTAGE_DECIMAL_PLACES)
+
+
+def holiday_dates(start, end):
+    """Dates in [start, end] covered by an AttendanceRange (holiday) row."""
+    holidays = set()
+    for range_start, range_end in AttendanceRange.objects.filter(
+            start_date__lte=end, end_date__gte=start).values_list('start_date', 'end_date'):
+        day, last = max(range_start, start), min(range_end, end)
+        while day <= last:
+            holidays.add(day)
+            day += timedelta(days=1)
+    return holidays
+
+
+def scheduled_dates(weekdays, start, end, holidays=frozenset()):
+    """Sorted dates in [start, end] falling on one of `weekdays` (0 = Monday), minus holidays."""
+    dates = []
+    for weekday in weekdays:
+        day = start + timedelta(days=(weekday - start.weekday()) % 7)
+        while day <= end:
+            if day not in holidays:
+                dates.append(day)
+            day += timedelta(weeks=1)
+    return sorted(dates)
+
+
+def expected_sessions(assigns, until):
+    """
+    {Assign id: [dates]} of the sessions an Assign queryset is scheduled for
+    from its term start (get_semester_date_range) up to `until`: one session
+    per date with at least one AssignTime slot. Three queries in total.
+    """
+    weekdays = defaultdict(set)
+    for assign_id, day in AssignTime.objects.filter(assign__in=assigns).values_list('assign_id', 'day'):
+        if day in _WEEKDAYS:
+            weekdays[assign_id].add(_WEEKDAYS[day])
+    if not weekdays:
+        return {}
+
+    terms = {}
+    for assign_id, academic_year, semester in assigns.filter(id__in=weekdays).values_list(
+            'id', 'academic_year', 'semester'):
+        start, end = get_semester_date_range(academic_year, semester)
+        terms[assign_id] = (start, min(end, until))
+    terms = {assign_id: term for assign_id, term in terms.items() if term[0] <= term[1]}
+    if not terms:
+        return {}
+
+    holidays = holiday_dates(min(start for start, _ in terms.values()), max(end for _, end in terms.values()))
+    return {
+        assign_id: scheduled_dates(weekdays[assign_id], start, end, holidays)
+        for assign_id, (start, end) in terms.items()
+    }
+
+
+def generate_sessions(assigns, until, since=None, dry_run=False):
+    """
+    Bulk-create the pending (not marked) AttendanceClass rows an Assign
+    queryset is scheduled for up to `until` (and from `since`) that do not
+    exist yet. Returns how many were (or, with dry_run, would be) created.
+    """
+    expected = expected_sessions(assigns, until)
+    if not expected:
+        return 0
+    existing = set(
+        AttendanceClass.objects.filter(assign__in=assigns, date__lte=until)
+        .values_list('assign_id', 'date')
+    )
+    missing = [
+        AttendanceClass(assign_id=assign_id, date=day, status=ATTENDANCE_CLASS_NOT_MARKED)
+        for assign_id, dates in expected.items()
+        for day in dates
+        if (assign_id, day) not in existing and (since is None or day >= since)
+    ]
+    if not dry_run:
+        # ignore_conflicts: giáo viên có thể vừa mở điểm danh đúng buổi đó
+        AttendanceClass.objects.bulk_create(missing, batch_size=ATTENDANCE_SESSION_BATCH_SIZE, ignore_conflicts=True)
+    return len(missing)
+
+
+def reconcile_sessions(assigns, as_of):
+    """
+    SessionReconciliation per teacher of an Assign queryset: sessions
+    scheduled up to `as_of`, sessions marked or cancelled, and scheduled
+    dates with neither (missed). Teachers with the most missed sessions first.
+    """
+    expected = expected_sessions(assigns, as_of)
+    taken = defaultdict(dict)
+    for assign_id, day, status in AttendanceClass.objects.filter(
+            assign__in=assigns, date__lte=as_of,
+    ).exclude(status=ATTENDANCE_CLASS_NOT_MARKED).values_list('assign_id', 'date', 'status'):
+        taken[assign_id][day] = status
+
+    totals = {}
+    for assign_id, teacher_id, teacher_name in assigns.values_list('id', 'teacher_id', 'teacher__name'):
+        dates = expected.get(assign_id, ())
+        sessions = taken.get(assign_id, {})
+        marked = sum(status == ATTENDANCE_CLASS_MARKED for status in sessions.values())
+        row = totals.setdefault(teacher_id, [teacher_name, 0, 0, 0, 0])
+        row[1] += len(dates)
+        row[2] += marked
+        row[3] += len(sessions) - marked
+        row[4] += sum(day not in sessions for day in dates)
+
+    return sorted(
+        (SessionReconciliation(teacher_id, *row) for teacher_id, row in totals.items()),
+        key=lambda row: (-row.missed, row.teacher_name),
+    )
@@ -0,0 +1,239 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from students.models import Attendance, CompactAttendance, Student
+from utils import change_counters
+from utils.constant import ATTENDANCE_STORAGE_BITSET, ATTENDANCE_ROSTER_SEPARATOR
+
+
+# -----------------------------------------------------------------------------
+# Bitset helpers
+# -----------------------------------------------------------------------------
+
+def encode_presence(flags):
+    """Pack a sequence of booleans into a little-endian bitset (bit i = flags[i])."""
+    bits = bytearray((len(flags) + 7) // 8)
+    for index, present in enumerate(flags):
+        if present:
+            bits[index >> 3] |= 1 << (index & 7)
+    return bytes(bits)
+
+
+def is_present(bits, index):
+    return bool(bits[index >> 3] >> (index & 7) & 1)
+
+
+def count_present(bits):
+    return int.from_bytes(bits, 'little').bit_count()
+
+
+def _roster_text(usns):
+    return ATTENDANCE_ROSTER_SEPARATOR + ATTENDANCE_ROSTER_SEPARATOR.join(usns) + ATTENDANCE_ROSTER_SEPARATOR
+
+
+def _roster_token(usn):
+    return f'{ATTENDANCE_ROSTER_SEPARATOR}{usn}{ATTENDANCE_ROSTER_SEPARATOR}'
+
+
+def bitset_storage_enabled():
+    return settings.ATTENDANCE_STORAGE == ATTENDANCE_STORAGE_BITSET
+
+
+# -----------------------------------------------------------------------------
+# Writes
+# -----------------------------------------------------------------------------
+
+def write_rows(assc, statuses):
+    """Store a session as one Attendance row per student ({USN: present})."""
+    _write_rows_many([(assc, statuses)])
+
+
+def write_bitset(assc, statuses):
+    """Store a session as a single CompactAttendance row ({USN: present})."""
+    _write_bitsets_many([(assc, statuses)])
+
+
+def _bump_attendance(sessions):
+    change_counters.bump(*(change_counters.class_attendance(assc.assign.class_id_id) for assc, _ in sessions))
+
+
+def _write_rows_many(sessions):
+    subjects = {assc.pk: assc.assign.subject_id for assc, _ in sessions}
+    existing = {
+        (record.attendanceclass_id, record.student_id): record
+        for record in Attendance.objects.filter(attendanceclass__in=list(subjects))
+        if record.subject_id == subjects[record.attendanceclass_id]
+    }
+    changed, created = [], []
+    for assc, statuses in sessions:
+        for usn, status in statuses.items():
+            record = existing.get((assc.pk, usn))
+            if record is None:
+                created.append(Attendance(
+                    student_id=usn, subject_id=subjects[assc.pk], attendanceclass=assc,
+                    date=assc.date, status=status))
+            elif record.status != status:
+                record.status = status
+                changed.append(record)
+    with transaction.atomic():
+        Attendance.objects.bulk_create(created)
+        Attendance.objects.bulk_update(changed, ['status'])
+        CompactAttendance.objects.filter(attendanceclass__in=list(subjects)).delete()
+        _bump_attendance(sessions)
+
+
+def _write_bitsets_many(sessions):
+    rows = []
+    for assc, statuses in sessions:
+        usns = list(statuses)
+        bits = encode_presence([statuses[usn] for usn in usns])
+        rows.append(CompactAttendance(
+            attendanceclass=assc, subject_id=assc.assign.subject_id, date=assc.date,
+            roster=_roster_text(usns), presence=bits, present=count_present(bits), total=len(usns),
+        ))
+    with transaction.atomic():
+        CompactAttendance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['attendanceclass'],
+            update_fields=['subject', 'date', 'roster', 'presence', 'present', 'total'],
+        )
+        Attendance.objects.filter(attendanceclass__in=[assc.pk for assc, _ in sessions]).delete()
+        _bump_attendance(sessions)
+
+
+def save_session(assc, statuses):
+    """Store a roll call in the format selected by settings.ATTENDANCE_STORAGE."""
+    save_sessions([(assc, statuses)])
+
+
+def save_sessions(sessions):
+    """
+    Store many roll calls ([(AttendanceClass, {USN: present})], assign loaded)
+    with a constant number of bulk statements, in the configured format.
+    """
+    if not sessions:
+        return
+    if bitset_storage_enabled():
+        _write_bitsets_many(sessions)
+    else:
+        _write_rows_many(sessions)
+
+
+def session_statuses(assc):
+    """{USN: present} of one session, whichever format it is stored in."""
+    compact = CompactAttendance.objects.filter(attendanceclass=assc).first()
+    if compact is not None:
+        bits = bytes(compact.presence)
+        return {usn: is_present(bits, index) for index, usn in enumerate(compact.usns)}
+    return dict(
+        Attendance.objects.filter(attendanceclass=assc, subject_id=assc.assign.subject_id)
+        .order_by('student_id').values_list('student_id', 'status')
+    )
+
+
+# -----------------------------------------------------------------------------
+# Per-session reads
+# -----------------------------------------------------------------------------
+
+def assign_session_counts(assign):
+    """{AttendanceClass id: (present, total)} for every session of an assignment."""
+    counts = {
+        row['attendanceclass_id']: (row['present'], row['total'])
+        for row in Attendance.objects.filter(
+            attendanceclass__assign=assign, subject_id=assign.subject_id
+        ).values('attendanceclass_id').annotate(
+            total=Count('id'), present=Count('id', filter=Q(status=True))
+        ).order_by()
+    }
+    counts.update(
+        (session_id, (present, total))
+        for session_id, present, total in CompactAttendance.objects.filter(
+            attendanceclass__assign=assign
+        ).values_list('attendanceclass_id', 'present', 'total')
+    )
+    return counts
+
+
+def session_counts(assc):
+    """(present, total) of one session."""
+    compact = CompactAttendance.objects.filter(attendanceclass=assc).values_list('present', 'total').first()
+    if compact is not None:
+        return compact
+    counts = Attendance.objects.filter(
+        attendanceclass=assc, subject_id=assc.assign.subject_id
+    ).aggregate(total=Count('id'), present=Count('id', filter=Q(status=True)))
+    return counts['present'], counts['total']
+
+
+def session_records(assc):
+    """
+    Attendance objects of one session for templates (att.student, att.status).
+    Bitset sessions are expanded into unsaved Attendance instances in roster order.
+    """
+    compact = CompactAttendance.objects.filter(attendanceclass=assc).first()
+    if compact is None:
+        return list(
+            Attendance.objects.filter(attendanceclass=assc, subject_id=assc.assign.subject_id)
+            .select_related('student')
+        )
+    bits = bytes(compact.presence)
+    students = Student.objects.in_bulk(compact.usns)
+    return [
+        Attendance(student=students[usn], subject_id=compact.subject_id, attendanceclass=assc,
+                   date=compact.date, status=is_present(bits, index))
+        for index, usn in enumerate(compact.usns) if usn in students
+    ]
+
+
+# -----------------------------------------------------------------------------
+# Per-student reads
+# -----------------------------------------------------------------------------
+
+def _student_sessions(student_id, subject_id):
+    # LIKE '%,USN,%' trên roster: PostgreSQL dùng index GIN trigram (students 0013)
+    return CompactAttendance.objects.filter(subject_id=subject_id, roster__contains=_roster_token(student_id))
+
+
+def student_counts(student_id, subject_id):
+    """(attended, total) sessions of a student in a subject across both formats."""
+    counts = Attendance.objects.filter(student_id=student_id, subject_id=subject_id).aggregate(
+        total=Count('id'), present=Count('id', filter=Q(status=True)))
+    present, total = counts['present'], counts['total']
+    for roster, presence in _student_sessions(student_id, subject_id).values_list('roster', 'presence'):
+        usns = [usn for usn in roster.split(ATTENDANCE_ROSTER_SEPARATOR) if usn]
+        total += 1
+        present += is_present(bytes(presence), usns.index(student_id))
+    return present, total
+
+
+def student_history(student_id, subject_id):
+    """
+    Attendance objects of a student in a subject, newest first, with
+    attendanceclass (and its assign/teacher) loaded.
+    """
+    records = list(
+        Attendance.objects.filter(student_id=student_id, subject_id=subject_id)
+        .select_related('attendanceclass__assign__teacher')
+    )
+    for compact in _student_sessions(student_id, subject_id).select_related(
+            'attendanceclass__assign__teacher'):
+        records.append(Attendance(
+            student_id=student_id, subject_id=subject_id,
+            attendanceclass=compact.attendanceclass, date=compact.date,
+            status=is_present(bytes(compact.presence), compact.usns.index(student_id)),
+        ))
+    records.sort(key=lambda record: record.date, reverse=True)
+    return records
+
+
+def student_has_attendance(student_id):
+    return (Attendance.objects.filter(student_id=student_id).exists()
+            or CompactAttendance.objects.filter(roster__contains=_roster_token(student_id)).exists())
+
+
+def attendance_record_count():
+    """Number of per-student attendance statuses stored, in either format."""
+    compact_total = CompactAttendance.objects.aggregate(total=Sum('total'))['total'] or 0
+    return Attendance.objects.count() + compact_total
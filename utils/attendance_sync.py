@@ -0,0 +1,208 @@
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from students.models import AttendanceRollup, Student
+from teachers.models import AttendanceClass, AttendanceSyncBatch
+from utils.attendance_store import save_sessions, session_statuses
+from utils.constant import (
+    DATE_FORMAT, ATTENDANCE_CLASS_NOT_MARKED, ATTENDANCE_CLASS_MARKED, ATTENDANCE_CLASS_CANCELLED,
+    ATTENDANCE_SYNC_MAX_SESSIONS, ATTENDANCE_SYNC_KEY_MAX_LENGTH,
+    ATTENDANCE_SYNC_APPLIED, ATTENDANCE_SYNC_UNCHANGED, ATTENDANCE_SYNC_CONFLICT, ATTENDANCE_SYNC_REJECTED,
+)
+
+
+def _parse_item(item):
+    if not isinstance(item, dict):
+        raise ValueError('Every session must be an object')
+    parsed = {'ref': item.get('ref')}
+    if item.get('session') is not None:
+        if not isinstance(item['session'], int):
+            raise ValueError('"session" must be an AttendanceClass id')
+        parsed['session'] = item['session']
+    else:
+        try:
+            parsed['assign'] = int(item['assign'])
+            parsed['date'] = datetime.strptime(item['date'], DATE_FORMAT).date()
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('A session needs "session", or "assign" and "date" (YYYY-MM-DD)')
+    base_version = item.get('base_version', 0)
+    if not isinstance(base_version, int) or base_version < 0:
+        raise ValueError('"base_version" must be a non-negative integer')
+    parsed['base_version'] = base_version
+    present = item.get('present')
+    if not isinstance(present, list) or not all(isinstance(usn, str) for usn in present):
+        raise ValueError('"present" must be a list of USNs')
+    parsed['present'] = set(present)
+    return parsed
+
+
+def parse_batch(payload):
+    """
+    Validate a sync request body. Returns (idempotency key, client timestamp,
+    sessions); raises ValueError with a message for the client otherwise.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError('The body must be a JSON object')
+    key = payload.get('idempotency_key')
+    if not isinstance(key, str) or not key or len(key) > ATTENDANCE_SYNC_KEY_MAX_LENGTH:
+        raise ValueError(f'"idempotency_key" must be a string of 1-{ATTENDANCE_SYNC_KEY_MAX_LENGTH} characters')
+    client_timestamp = parse_datetime(payload.get('client_timestamp') or '')
+    if client_timestamp is None:
+        raise ValueError('"client_timestamp" must be an ISO 8601 datetime')
+    if timezone.is_naive(client_timestamp):
+        client_timestamp = timezone.make_aware(client_timestamp)
+    sessions = payload.get('sessions')
+    if not isinstance(sessions, list) or not sessions:
+        raise ValueError('"sessions" must be a non-empty list')
+    if len(sessions) > ATTENDANCE_SYNC_MAX_SESSIONS:
+        raise ValueError(f'At most {ATTENDANCE_SYNC_MAX_SESSIONS} sessions per batch')
+    return key, client_timestamp, [_parse_item(item) for item in sessions]
+
+
+def _resolve_sessions(teacher, items):
+    """
+    AttendanceClass of every item (None when unknown), locked for the rest of
+    the transaction. Sessions given by (assign, date) that do not exist yet
+    are created for the teacher's own assignments.
+    """
+    ids = [item['session'] for item in items if 'session' in item]
+    sessions = AttendanceClass.objects.select_for_update(of=('self',)).select_related('assign')
+    by_id = sessions.in_bulk(ids) if ids else {}
+
+    by_day = {}
+    keys = {(item['assign'], item['date']) for item in items if 'assign' in item}
+    if keys:
+        condition = Q()
+        for assign_id, day in keys:
+            condition |= Q(assign_id=assign_id, date=day)
+        for session in sessions.filter(condition):
+            by_day[(session.assign_id, session.date)] = session
+        owned = teacher.assign_set.in_bulk({assign_id for assign_id, _ in keys})
+        for assign_id, day in keys:
+            if (assign_id, day) not in by_day and assign_id in owned:
+                # Có thể vừa được tạo ở request khác (ràng buộc unique assign, date): lấy và khoá buổi đó
+                by_day[(assign_id, day)], _ = sessions.get_or_create(
+                    assign=owned[assign_id], date=day, defaults={'status': ATTENDANCE_CLASS_NOT_MARKED})
+
+    return [
+        by_id.get(item['session']) if 'session' in item else by_day.get((item['assign'], item['date']))
+        for item in items
+    ]
+
+
+def _result(item, session, status, **extra):
+    result = {'ref': item['ref'], 'session': session.pk if session else None, 'status': status}
+    result.update(extra)
+    return result
+
+
+def apply_sessions(teacher, items):
+    """
+    Apply parsed roll calls of one teacher, already inside a transaction.
+    A session whose version moved past the client's base_version since it
+    went offline is a conflict, unless the stored roll call is identical.
+    Returns one result per item, in order.
+    """
+    sessions = _resolve_sessions(teacher, items)
+    rosters = defaultdict(list)
+    class_ids = {session.assign.class_id_id for session in sessions if session is not None}
+    for class_id, usn in Student.objects.filter(class_id__in=class_ids).values_list('class_id', 'USN'):
+        rosters[class_id].append(usn)
+
+    results, applied, seen = [], [], set()
+    for item, session in zip(items, sessions):
+        if session is None:
+            results.append(_result(item, None, ATTENDANCE_SYNC_REJECTED, error='Unknown session'))
+            continue
+        if session.assign.teacher_id != teacher.pk:
+            results.append(_result(item, session, ATTENDANCE_SYNC_REJECTED, error='Not your assignment'))
+            continue
+        if session.pk in seen:
+            results.append(_result(item, session, ATTENDANCE_SYNC_REJECTED, error='Session repeated in the batch'))
+            continue
+        seen.add(session.pk)
+        if session.status == ATTENDANCE_CLASS_CANCELLED:
+            results.append(_result(item, session, ATTENDANCE_SYNC_REJECTED, error='Session cancelled'))
+            continue
+        roster = rosters[session.assign.class_id_id]
+        unknown = item['present'].difference(roster)
+        if unknown:
+            results.append(_result(item, session, ATTENDANCE_SYNC_REJECTED,
+                                   error=f'Not in class {session.assign.class_id_id}: {", ".join(sorted(unknown))}'))
+            continue
+
+        statuses = {usn: usn in item['present'] for usn in roster}
+        if session.version != item['base_version']:
+            current = session_statuses(session)
+            if current == statuses:
+                results.append(_result(item, session, ATTENDANCE_SYNC_UNCHANGED, version=session.version))
+            else:
+                results.append(_result(
+                    item, session, ATTENDANCE_SYNC_CONFLICT, version=session.version,
+                    present=sorted(usn for usn, present in current.items() if present),
+                ))
+            continue
+        applied.append((session, statuses))
+        results.append(_result(item, session, ATTENDANCE_SYNC_APPLIED, version=session.version + 1))
+
+    save_sessions(applied)
+    if applied:
+        AttendanceClass.objects.filter(pk__in=[session.pk for session, _ in applied]).update(
+            status=ATTENDANCE_CLASS_MARKED, version=F('version') + 1)
+        for session, _ in applied:
+            AttendanceRollup.objects.refresh_for(session)
+    return results
+
+
+def sync_batch(teacher, key, client_timestamp, items):
+    """
+    Apply a batch of offline roll calls in one transaction. Returns
+    (response, replayed): a batch already received under the same
+    idempotency key is not applied again, its stored response is returned.
+    """
+    with transaction.atomic():
+        try:
+            # Lô trùng key đang chạy song song sẽ chờ ở đây đến khi lô kia commit
+            with transaction.atomic():
+                batch = AttendanceSyncBatch.objects.create(
+                    teacher=teacher, key=key, client_timestamp=client_timestamp)
+        except IntegrityError:
+            return AttendanceSyncBatch.objects.get(teacher=teacher, key=key).response, True
+        batch.response = {'idempotency_key': key, 'results': apply_sessions(teacher, items)}
+        batch.save(update_fields=['response'])
+    return batch.response, False
+
+
+def day_sessions(teacher, day):
+    """
+    Sessions of a teacher on one date with what a phone needs to take the
+    roll call offline: roster, current presence and version.
+    """
+    sessions = list(
+        AttendanceClass.objects.filter(assign__teacher=teacher, date=day)
+        .select_related('assign').order_by('assign_id', 'id')
+    )
+    rosters = defaultdict(list)
+    for class_id, usn, name in Student.objects.filter(
+            class_id__in={session.assign.class_id_id for session in sessions},
+    ).order_by('USN').values_list('class_id', 'USN', 'name'):
+        rosters[class_id].append({'usn': usn, 'name': name})
+    return [
+        {
+            'session': session.pk,
+            'assign': session.assign_id,
+            'class_id': session.assign.class_id_id,
+            'subject': session.assign.subject_id,
+            'date': session.date.strftime(DATE_FORMAT),
+            'status': session.status,
+            'version': session.version,
+            'students': rosters[session.assign.class_id_id],
+            'present': sorted(usn for usn, present in session_statuses(session).items() if present),
+        }
+        for session in sessions
+    ]
@@ -0,0 +1,125 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+from utils.constant import CHANGE_COUNTER_KEY_PREFIX
+
+
+# -----------------------------------------------------------------------------
+# Scopes: mỗi scope là một tập dữ liệu mà client có thể poll
+# -----------------------------------------------------------------------------
+
+def class_timetable(class_id):
+    return f'class:{class_id}:timetable'
+
+
+def class_roster(class_id):
+    return f'class:{class_id}:roster'
+
+
+def class_attendance(class_id):
+    return f'class:{class_id}:attendance'
+
+
+def class_marks(class_id):
+    return f'class:{class_id}:marks'
+
+
+def teacher_timetable(teacher_id):
+    return f'teacher:{teacher_id}:timetable'
+
+
+def student_marks(usn):
+    return f'student:{usn}:marks'
+
+
+def holidays():
+    return 'holidays'
+
+
+# -----------------------------------------------------------------------------
+# Counters
+# -----------------------------------------------------------------------------
+
+def _key(scope):
+    return CHANGE_COUNTER_KEY_PREFIX + scope
+
+
+def _write(scopes):
+    cache.set_many({_key(scope): time.time_ns() for scope in scopes}, timeout=None)
+
+
+def bump(*scopes, using=None):
+    """
+    Mark scopes as changed once the current transaction commits. The counter
+    value is the change time in nanoseconds, so it doubles as Last-Modified.
+    """
+    scopes = set(scopes)
+    if scopes:
+        transaction.on_commit(lambda: _write(scopes), using=using)
+
+
+def versions(scopes):
+    """
+    {scope: counter} in one cache round trip. A missing counter (first use
+    or eviction) is seeded with the current time, so it never matches a
+    validator handed out before.
+    """
+    keys = {_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    missing = keys.keys() - found.keys()
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: value for key, value in found.items()}
+
+
+def etag(counters, *extra):
+    """Strong validator of a set of counters plus request-specific parts (query string, format version)."""
+    parts = [f'{scope}={counters[scope]}' for scope in sorted(counters)]
+    parts.extend(str(part) for part in extra)
+    return hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def last_modified(counters):
+    if not counters:
+        return None
+    return datetime.fromtimestamp(max(counters.values()) / 1e9, tz=dt_timezone.utc)
+
+
+# -----------------------------------------------------------------------------
+# Signal receivers (đăng ký trong admins/signals.py). QuerySet.update() và
+# bulk_create() không gửi signal: code ghi hàng loạt gọi bump() trực tiếp
+# -----------------------------------------------------------------------------
+
+def assign_changed(sender, instance, using=None, **kwargs):
+    """Assign or AssignTime saved/deleted: timetables of its class and teacher."""
+    assign = getattr(instance, 'assign', instance)
+    bump(class_timetable(assign.class_id_id), teacher_timetable(assign.teacher_id), using=using)
+
+
+def teacher_changed(sender, instance, using=None, **kwargs):
+    """Tên giáo viên hiển thị trên thời khoá biểu các lớp của giáo viên đó."""
+    class_ids = instance.assign_set.values_list('class_id', flat=True).distinct()
+    bump(teacher_timetable(instance.pk), *map(class_timetable, class_ids), using=using)
+
+
+def student_moving(sender, instance, raw=False, **kwargs):
+    """pre_save: remember the class a student leaves, its roster changes too."""
+    if not raw:
+        instance._previous_class_id = (
+            type(instance).objects.filter(pk=instance.pk).values_list('class_id', flat=True).first())
+
+
+def student_changed(sender, instance, using=None, **kwargs):
+    class_ids = {instance.class_id_id, getattr(instance, '_previous_class_id', None)} - {None}
+    bump(*map(class_roster, class_ids), using=using)
+
+
+def holidays_changed(sender, instance, using=None, **kwargs):
+    bump(holidays(), using=using)
@@ -0,0 +1,93 @@
+import hashlib
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+from utils import change_counters, metrics
+from utils.db_routing import primary_reads
+from utils.constant import (
+    COMPUTED_CACHE_KEY_PREFIX, COMPUTED_CACHE_LOCK_SUFFIX, COMPUTED_CACHE_TIMEOUT, COMPUTED_CACHE_STALE_SECONDS,
+    COMPUTED_CACHE_EARLY_BETA, COMPUTED_CACHE_LOCK_TIMEOUT, COMPUTED_CACHE_LOCK_WAIT, COMPUTED_CACHE_POLL_INTERVAL,
+)
+from utils.tenancy import cache_key
+
+
+def _key(name, parts):
+    digest = hashlib.md5(repr(tuple(parts)).encode(), usedforsecurity=False).hexdigest()
+    return cache_key(f'{COMPUTED_CACHE_KEY_PREFIX}{name}:{digest}')
+
+
+def _is_fresh(expires, delta):
+    # Hết hạn sớm theo xác suất (XFetch): giá trị tính càng lâu càng dễ được
+    # làm mới trước hạn, nên các worker không cùng hết hạn một lúc
+    return time.time() - delta * COMPUTED_CACHE_EARLY_BETA * math.log(1 - random.random()) < expires
+
+
+def _compute(key, compute, versions, timeout):
+    started = time.monotonic()
+    if versions:
+        # Giá trị gắn version chỉ hết hạn khi counter đổi lần sau: tính từ replica
+        # đang trễ thì dữ liệu cũ bị cache dưới version mới, nên đọc từ primary
+        with primary_reads():
+            value = compute()
+    else:
+        value = compute()
+    delta = time.monotonic() - started
+    cache.set(key, (value, versions, time.time() + timeout, delta), timeout + COMPUTED_CACHE_STALE_SECONDS)
+    return value
+
+
+def _wait(key, lock_key, versions):
+    """Poll for the value another worker is computing; None if it gives up or takes too long."""
+    deadline = time.monotonic() + COMPUTED_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(COMPUTED_CACHE_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry[1] == versions:
+            return entry
+        if cache.get(lock_key) is None:
+            return None
+    return None
+
+
+def get_or_compute(name, parts, compute, tags=(), timeout=COMPUTED_CACHE_TIMEOUT):
+    """
+    Value of `compute()` cached under `name` and the key `parts`, in the
+    namespace of the active school. `tags` are change counter scopes (see
+    utils.change_counters): bumping any of them, which the model signals
+    do, invalidates the value. Only one worker recomputes a value at a time;
+    meanwhile the others serve the expired value (up to
+    COMPUTED_CACHE_STALE_SECONDS) or, when there is none, wait for it.
+    Values are pickled, so querysets are evaluated before they are stored.
+    Tagged values are computed from the primary even in read_replica views.
+    """
+    key = _key(name, parts)
+    lock_key = key + COMPUTED_CACHE_LOCK_SUFFIX
+    versions = change_counters.versions(tags)
+    entry = cache.get(key)
+    # Giá trị của version cũ (đã bị tag invalidate) không bao giờ được trả lại
+    if entry is not None and entry[1] != versions:
+        entry = None
+
+    if entry is not None and _is_fresh(entry[2], entry[3]):
+        metrics.record_cache(name, 'hit')
+        return entry[0]
+
+    locked = cache.add(lock_key, 1, COMPUTED_CACHE_LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            metrics.record_cache(name, 'stale')
+            return entry[0]
+        entry = _wait(key, lock_key, versions)
+        if entry is not None:
+            metrics.record_cache(name, 'hit')
+            return entry[0]
+
+    metrics.record_cache(name, 'miss')
+    try:
+        return _compute(key, compute, versions, timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
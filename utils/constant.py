@@ -22,6 +22,8 @@ STUDENT_USN_MAX_LENGTH = 100
 
 TEACHER_ID_MAX_LENGTH = 100
 
+IDENTIFIER_COUNTER_KEY_MAX_LENGTH = 150
+
 ASSIGN_TIME_PERIOD_MAX_LENGTH = 50
 ASSIGN_TIME_DAY_MAX_LENGTH = 15
 
@@ -38,6 +40,9 @@ DEFAULT_DEPT_ID = 1
 DEFAULT_STATUS_FALSE = False
 DEFAULT_STATUS_TRUE = True
 DEFAULT_ATTENDANCE_STATUS = 0
+ATTENDANCE_CLASS_NOT_MARKED = 0  # AttendanceClass.status: chưa điểm danh
+ATTENDANCE_CLASS_MARKED = 1  # AttendanceClass.status: đã điểm danh
+ATTENDANCE_CLASS_CANCELLED = 2  # AttendanceClass.status: buổi học bị huỷ
 DEFAULT_MARKS_VALUE = 0
 
 # =============================================================================
@@ -142,6 +147,7 @@ ADMINS_DEPT_MODEL = 'admins.Dept'  # Reference to Dept model
 ADMINS_SUBJECT_MODEL = 'admins.Subject'  # Reference to Subject model
 STUDENTS_STUDENT_SUBJECT_MODEL = 'students.StudentSubject'  # Reference to StudentSubject model
 TEACHERS_ATTENDANCE_CLASS_MODEL = 'teachers.AttendanceClass'  # Reference to AttendanceClass model
+TEACHERS_ASSIGN_MODEL = 'teachers.Assign'  # Reference to Assign model
 
 # Choice index constants
 FIRST_CHOICE_INDEX = 0  # Index for first choice in choices tuple
@@ -346,3 +352,420 @@ PAGE_SIZE_OPTIONS = [10, 25, 50, 100]  # Available page size options
 MIN_SEMESTER = 1
 MAX_SEMESTER = 3
 ZERO = 0
+
+# =============================================================================
+# SEARCH CONSTANTS
+# =============================================================================
+
+# Queries shorter than this have no usable trigrams and fall back to icontains
+TRIGRAM_MIN_QUERY_LENGTH = 3
+
+# Rank values used by the non-PostgreSQL search fallback
+SEARCH_RANK_EXACT = 3
+SEARCH_RANK_PREFIX = 2
+SEARCH_RANK_SUBSTRING = 1
+
+# Fields searched by the admin user list (User + linked Student/Teacher)
+USER_SEARCH_FIELDS = [
+    'username',
+    'email',
+    'first_name',
+    'last_name',
+    'student__name',
+    'student__USN',
+    'teacher__name',
+]
+
+# SearchEntry.entity values of the omnibox search index
+SEARCH_ENTITY_STUDENT = 'student'
+SEARCH_ENTITY_TEACHER = 'teacher'
+SEARCH_ENTITY_CLASS = 'class'
+SEARCH_ENTITY_SUBJECT = 'subject'
+SEARCH_ENTITY_DEPT = 'dept'
+SEARCH_ENTITY_CHOICES = (
+    (SEARCH_ENTITY_STUDENT, 'Student'),
+    (SEARCH_ENTITY_TEACHER, 'Teacher'),
+    (SEARCH_ENTITY_CLASS, 'Class'),
+    (SEARCH_ENTITY_SUBJECT, 'Subject'),
+    (SEARCH_ENTITY_DEPT, 'Department'),
+)
+SEARCH_ENTITY_MAX_LENGTH = 10
+SEARCH_OBJECT_ID_MAX_LENGTH = 100
+SEARCH_DISPLAY_MAX_LENGTH = 255
+
+# Omnibox typeahead: results returned and rows per INSERT when rebuilding the index
+OMNIBOX_RESULT_LIMIT = 10
+SEARCH_INDEX_BATCH_SIZE = 1000
+
+# =============================================================================
+# IDENTIFIER ALLOCATION CONSTANTS
+# =============================================================================
+
+# Teacher IDs look like T001, T002, ...
+TEACHER_ID_PREFIX = 'T'
+TEACHER_ID_NUMBER_WIDTH = 3
+TEACHER_ID_COUNTER_KEY = 'teacher_id'
+
+# Student USNs look like <yy><dept id><number>, e.g. 25CS001
+STUDENT_USN_PREFIX_TEMPLATE = '{year}{dept}'
+STUDENT_USN_NUMBER_WIDTH = 3
+STUDENT_USN_COUNTER_KEY_TEMPLATE = 'student_usn:{prefix}'
+
+# =============================================================================
+# AUTOCOMPLETE CONSTANTS
+# =============================================================================
+
+# Number of options returned per autocomplete page
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+# Prefix-matched fields per autocomplete endpoint
+TEACHER_AUTOCOMPLETE_FIELDS = ['id', 'name']
+SUBJECT_AUTOCOMPLETE_FIELDS = ['id', 'name', 'shortname']
+CLASS_AUTOCOMPLETE_FIELDS = ['id', 'dept__name']
+ASSIGN_AUTOCOMPLETE_FIELDS = ['teacher__name', 'subject__name', 'subject__shortname', 'class_id__id']
+
+# =============================================================================
+# REFERENCE DATA CACHE CONSTANTS
+# =============================================================================
+
+# Shared-cache key holding the global Dept/Subject/Class data version
+REFERENCE_DATA_VERSION_KEY = 'reference_data:version'
+
+# Seconds a worker trusts its snapshot before re-reading the shared version
+REFERENCE_DATA_CHECK_INTERVAL = 1.0
+
+# =============================================================================
+# PERFORMANCE METRICS CONSTANTS
+# =============================================================================
+
+# Upper bounds (seconds) of the request latency histogram buckets
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between writes of a worker's counters to METRICS_DIR
+METRICS_FLUSH_INTERVAL = 10.0
+
+# A worker file not rewritten for this many flush intervals (a worker that
+# died without removing it) is left out of the totals and deleted
+METRICS_STALE_FLUSHES = 360
+
+# Label used for requests that did not resolve to a URL name (404s)
+METRICS_UNRESOLVED_VIEW = '<unresolved>'
+
+# Slow-request log: fraction of requests whose SQL is captured (0 disables),
+# latency threshold in seconds and number of statements logged
+METRICS_SLOW_SAMPLE_RATE = 0.1
+METRICS_SLOW_REQUEST_THRESHOLD = 1.0
+METRICS_SLOW_TOP_SQL = 5
+
+# Computed cache counters share the per-view stats, under this prefix
+METRICS_CACHE_PREFIX = 'cache:'
+METRICS_CACHE_OUTCOMES = ('hit', 'stale', 'miss')
+
+# Login attempts counted by the login forms (see utils/login_throttle.py)
+METRICS_LOGIN_KEY = 'login'
+METRICS_LOGIN_OUTCOMES = ('success', 'failure', 'throttled')
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# =============================================================================
+# ATTENDANCE ROLLUP CONSTANTS
+# =============================================================================
+
+# Default window (days back from today) of the admin attendance report
+ATTENDANCE_REPORT_DEFAULT_DAYS = 30
+
+# Rows per INSERT when backfilling attendance rollups
+ATTENDANCE_ROLLUP_BATCH_SIZE = 1000
+
+# =============================================================================
+# ATTENDANCE STORAGE CONSTANTS
+# =============================================================================
+
+# settings.ATTENDANCE_STORAGE: one Attendance row per student, or one
+# CompactAttendance row (roster + presence bitset) per session
+ATTENDANCE_STORAGE_ROWS = 'rows'
+ATTENDANCE_STORAGE_BITSET = 'bitset'
+ATTENDANCE_STORAGE_CHOICES = [ATTENDANCE_STORAGE_ROWS, ATTENDANCE_STORAGE_BITSET]
+
+# CompactAttendance.roster is ',USN1,USN2,...,' so a roster__contains=',USN,'
+# lookup finds a student's sessions on every database backend
+ATTENDANCE_ROSTER_SEPARATOR = ','
+
+# =============================================================================
+# ATTENDANCE REGISTER CONSTANTS
+# =============================================================================
+
+# Cell values of the students x sessions register matrix (signed bytes)
+REGISTER_CELL_NOT_RECORDED = -1
+REGISTER_CELL_ABSENT = 0
+REGISTER_CELL_PRESENT = 1
+
+# Month query parameter of the register (?month=2025-03)
+REGISTER_MONTH_FORMAT = '%Y-%m'
+
+# =============================================================================
+# CIE SCORE CONSTANTS
+# =============================================================================
+
+# Rows per INSERT when writing materialized CIE scores
+CIE_SCORE_BATCH_SIZE = 1000
+
+# =============================================================================
+# RANKING CONSTANTS
+# =============================================================================
+
+# Scopes of StudentRank: <scope>_rank / <scope>_percentile columns
+RANKING_SCOPE_CLASS = 'class'
+RANKING_SCOPE_DEPT = 'dept'
+RANKING_SCOPE_SCHOOL = 'school'
+
+# Students listed per scope in the performance report
+RANKING_REPORT_TOP_N = 10
+RANKING_REPORT_DEPT_TOP_N = 10
+RANKING_REPORT_BOTTOM_N = 10
+
+# Rows per INSERT when materializing a term's ranking
+RANKING_BATCH_SIZE = 1000
+
+# =============================================================================
+# ENROLLMENT CONSTANTS
+# =============================================================================
+
+# Rows per INSERT when creating missing StudentSubject enrollments
+ENROLLMENT_BATCH_SIZE = 1000
+
+# =============================================================================
+# ROLLOVER CONSTANTS
+# =============================================================================
+
+# Id of a next-semester class created by the rollover ('CS-2A' for dept CS, sem 2, section A)
+ROLLOVER_CLASS_ID_FORMAT = '{dept}-{sem}{section}'
+
+# Rows per INSERT when cloning assignments and timetable slots
+ROLLOVER_BATCH_SIZE = 1000
+
+# =============================================================================
+# ATTENDANCE SESSION CONSTANTS
+# =============================================================================
+
+# Pending AttendanceClass rows are generated this many days ahead of today
+ATTENDANCE_SESSION_HORIZON_DAYS = 14
+
+# Rows per INSERT when generating scheduled sessions
+ATTENDANCE_SESSION_BATCH_SIZE = 1000
+
+# =============================================================================
+# RISK SCORING CONSTANTS
+# =============================================================================
+
+# RiskScore.level
+RISK_LEVEL_NONE = 0
+RISK_LEVEL_WATCH = 1
+RISK_LEVEL_AT_RISK = 2
+RISK_LEVEL_CHOICES = (
+    (RISK_LEVEL_NONE, 'On track'),
+    (RISK_LEVEL_WATCH, 'Watch'),
+    (RISK_LEVEL_AT_RISK, 'At risk'),
+)
+
+# Trend window: the last N marked sessions of each assignment
+RISK_RECENT_SESSIONS = 5
+# Attendance over the window this many points below the overall rate puts a pair on watch
+RISK_TREND_DROP = 15
+
+# Weights of the attendance deficit, CIE deficit and attendance drop in RiskScore.score (0-1)
+RISK_WEIGHT_ATTENDANCE = 0.45
+RISK_WEIGHT_CIE = 0.4
+RISK_WEIGHT_TREND = 0.15
+
+# Rows per INSERT when materializing a term's risk scores
+RISK_BATCH_SIZE = 1000
+
+# =============================================================================
+# ATTENDANCE SYNC CONSTANTS
+# =============================================================================
+
+# Sessions accepted in one offline sync batch
+ATTENDANCE_SYNC_MAX_SESSIONS = 100
+ATTENDANCE_SYNC_KEY_MAX_LENGTH = 64
+
+# Result of one session of a batch
+ATTENDANCE_SYNC_APPLIED = 'applied'
+ATTENDANCE_SYNC_UNCHANGED = 'unchanged'
+ATTENDANCE_SYNC_CONFLICT = 'conflict'
+ATTENDANCE_SYNC_REJECTED = 'rejected'
+
+# =============================================================================
+# JSON API CONSTANTS
+# =============================================================================
+
+# Cache key prefix of the per-entity change counters behind ETag/Last-Modified
+CHANGE_COUNTER_KEY_PREFIX = 'changes:'
+
+# Bumped when the shape of an API payload changes, so cached validators stop matching
+API_VERSION = 'v1'
+
+# =============================================================================
+# CALENDAR FEED CONSTANTS
+# =============================================================================
+
+# Random bytes of the secret token in a user's .ics feed URL
+CALENDAR_TOKEN_BYTES = 24
+CALENDAR_TOKEN_MAX_LENGTH = 64
+
+# Rendered feeds are cached per timetable version; old versions simply expire
+CALENDAR_CACHE_KEY_PREFIX = 'ics:'
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds calendar clients may reuse a feed without revalidating
+CALENDAR_MAX_AGE = 300
+
+# TIME_SLOTS are written on a 12-hour clock: hours below this are afternoon
+TIMETABLE_FIRST_HOUR = 7
+
+# Domain part of the event UIDs
+CALENDAR_UID_DOMAIN = 'schoolmanagement'
+
+# =============================================================================
+# REPORT CARD CONSTANTS
+# =============================================================================
+
+REPORT_CARD_FORMAT_HTML = 'html'
+REPORT_CARD_FORMAT_PDF = 'pdf'
+REPORT_CARD_FORMATS = (REPORT_CARD_FORMAT_HTML, REPORT_CARD_FORMAT_PDF)
+
+REPORT_CARD_TEMPLATE = 'admins/report_card.html'
+
+# Students rendered per task sent to a worker process
+REPORT_CARD_CHUNK_SIZE = 100
+
+# Tasks in flight per worker: keeps workers busy without queueing every document in memory
+REPORT_CARD_QUEUE_FACTOR = 2
+
+# =============================================================================
+# TENANCY CONSTANTS
+# =============================================================================
+
+SCHOOL_ID_MAX_LENGTH = 32
+SCHOOL_NAME_MAX_LENGTH = 200
+SCHOOL_DOMAIN_MAX_LENGTH = 253
+
+# Cache keys of one school are prefixed 'school:<id>:'
+TENANT_CACHE_KEY_PREFIX = 'school:'
+
+# Host -> school id map of every school, rebuilt when a School changes
+TENANT_HOSTS_CACHE_KEY = 'tenancy:hosts'
+TENANT_HOSTS_CACHE_TIMEOUT = 60 * 5
+
+# Bumped by reference data changes whose school is unknown (bulk updates
+# outside a request): every school's snapshot reloads
+REFERENCE_DATA_SHARED_VERSION_KEY = 'reference_data:shared_version'
+
+# =============================================================================
+# READ REPLICA CONSTANTS
+# =============================================================================
+
+# After a write the user reads from the primary for this long (read-your-writes)
+REPLICA_PIN_KEY_PREFIX = 'replica_pin:'
+REPLICA_PIN_SECONDS = 10
+
+# Replicas further behind than this are skipped until they catch up
+REPLICA_MAX_LAG_SECONDS = 5
+
+# How often each worker re-checks a replica's lag
+REPLICA_LAG_CHECK_INTERVAL = 15
+
+# =============================================================================
+# COMPUTED CACHE CONSTANTS
+# =============================================================================
+
+COMPUTED_CACHE_KEY_PREFIX = 'computed:'
+COMPUTED_CACHE_LOCK_SUFFIX = ':lock'
+
+# Default freshness of a computed value, then how long an expired value may
+# still be served while one worker recomputes it (stale-while-revalidate)
+COMPUTED_CACHE_TIMEOUT = 60 * 5
+COMPUTED_CACHE_STALE_SECONDS = 60 * 5
+
+# Probabilistic early expiration: a value is refreshed early with a
+# probability growing with its compute time (beta > 1 favours earlier refreshes)
+COMPUTED_CACHE_EARLY_BETA = 1.0
+
+# A recompute lock expires by itself if its worker dies; without a value to
+# serve, other workers poll for the result up to COMPUTED_CACHE_LOCK_WAIT
+COMPUTED_CACHE_LOCK_TIMEOUT = 60
+COMPUTED_CACHE_LOCK_WAIT = 5.0
+COMPUTED_CACHE_POLL_INTERVAL = 0.05
+
+# Report pages: aggregates of the whole school, refreshed by time only
+REPORTS_CACHE_TIMEOUT = 60 * 2
+
+# =============================================================================
+# JOB QUEUE CONSTANTS
+# =============================================================================
+
+JOB_TASK_MAX_LENGTH = 200
+JOB_WORKER_MAX_LENGTH = 100
+JOB_STATUS_MAX_LENGTH = 10
+
+JOB_STATUS_QUEUED = 'queued'
+JOB_STATUS_RUNNING = 'running'
+JOB_STATUS_DONE = 'done'
+JOB_STATUS_FAILED = 'failed'
+JOB_STATUS_CHOICES = [
+    (JOB_STATUS_QUEUED, 'Queued'),
+    (JOB_STATUS_RUNNING, 'Running'),
+    (JOB_STATUS_DONE, 'Done'),
+    (JOB_STATUS_FAILED, 'Failed'),
+]
+
+# Higher runs first
+JOB_PRIORITY_LOW = 0
+JOB_PRIORITY_NORMAL = 5
+JOB_PRIORITY_HIGH = 10
+JOB_PRIORITY_CHOICES = [
+    (JOB_PRIORITY_LOW, 'Low'),
+    (JOB_PRIORITY_NORMAL, 'Normal'),
+    (JOB_PRIORITY_HIGH, 'High'),
+]
+
+JOB_MAX_ATTEMPTS = 5
+
+# Retry n waits JOB_RETRY_BASE_DELAY * 2**(n-1) seconds, at most JOB_RETRY_MAX_DELAY
+JOB_RETRY_BASE_DELAY = 30
+JOB_RETRY_MAX_DELAY = 60 * 60
+
+# A running job whose worker has not finished it after this long (worker
+# killed) is queued again
+JOB_LOCK_TIMEOUT = 60 * 30
+
+# Idle workers look for new jobs this often (seconds)
+JOB_POLL_INTERVAL = 2.0
+
+# SQLite fallback: queued job ids read per claim attempt
+JOB_CLAIM_CANDIDATES = 10
+
+# Characters of the traceback kept on a failed attempt
+JOB_ERROR_MAX_LENGTH = 5000
+
+JOB_DEFAULT_WORKERS = 2
+
+# =============================================================================
+# LOGIN THROTTLING CONSTANTS
+# =============================================================================
+
+LOGIN_THROTTLE_KEY_PREFIX = 'login_throttle:'
+
+# Failed logins allowed per sliding window, per username and per client IP
+# (one school NAT can carry many users: exempt it with LOGIN_THROTTLE_EXEMPT_IPS)
+LOGIN_THROTTLE_WINDOW = 60 * 5
+LOGIN_THROTTLE_USERNAME_LIMIT = 5
+LOGIN_THROTTLE_IP_LIMIT = 30
+
+# Each lockout of the same username/IP within LOGIN_THROTTLE_STRIKES_TIMEOUT
+# doubles, from LOGIN_THROTTLE_LOCKOUT_BASE up to LOGIN_THROTTLE_LOCKOUT_MAX
+LOGIN_THROTTLE_LOCKOUT_BASE = 60
+LOGIN_THROTTLE_LOCKOUT_MAX = 60 * 60
+LOGIN_THROTTLE_STRIKES_TIMEOUT = 60 * 60 * 24
+
+LOGIN_THROTTLED_ERROR = 'Too many failed login attempts. Please try again in {} minute(s).'
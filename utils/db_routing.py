@@ -0,0 +1,138 @@
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from utils.constant import (
+    REPLICA_PIN_KEY_PREFIX, REPLICA_PIN_SECONDS, REPLICA_MAX_LAG_SECONDS, REPLICA_LAG_CHECK_INTERVAL,
+)
+
+logger = logging.getLogger('performance')
+
+# Replica đọc của view hiện tại; None: đọc từ primary
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+# alias -> (còn dùng được, thời điểm kiểm tra lại), riêng từng worker
+_health = {}
+
+# Độ trễ replay của standby; 0 khi đã replay hết WAL nhận được (primary rảnh)
+_POSTGRES_LAG_SQL = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+def replica_lag(alias):
+    """Seconds the replica `alias` is behind the primary (0 for backends that cannot tell)."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(_POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0] or 0)
+
+
+def healthy_replicas():
+    """Configured replicas whose lag is within REPLICA_MAX_LAG_SECONDS, checked at most every interval."""
+    now = time.monotonic()
+    healthy = []
+    for alias in settings.DATABASE_REPLICAS:
+        ok, check_at = _health.get(alias, (False, 0))
+        if now >= check_at:
+            try:
+                lag = replica_lag(alias)
+            except DatabaseError:
+                logger.warning('Replica %s unreachable, reading from the primary', alias, exc_info=True)
+                ok = False
+            else:
+                ok = lag <= REPLICA_MAX_LAG_SECONDS
+                if not ok:
+                    logger.warning('Replica %s is %.1fs behind, reading from the primary', alias, lag)
+            _health[alias] = (ok, now + REPLICA_LAG_CHECK_INTERVAL)
+        if ok:
+            healthy.append(alias)
+    return healthy
+
+
+@contextmanager
+def replica_reads():
+    """Send the reads of the block to one healthy replica (the primary when none is)."""
+    replicas = healthy_replicas()
+    token = _read_alias.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside the block, also within a read_replica view:
+    for reads whose result outlives the request (cached under the current
+    change counters) or that follow the view's own writes.
+    """
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+# -----------------------------------------------------------------------------
+# Read-your-writes
+# -----------------------------------------------------------------------------
+
+def _pin_key(user):
+    return f'{REPLICA_PIN_KEY_PREFIX}{user.pk}'
+
+
+def pin(user):
+    """Keep `user` on the primary for REPLICA_PIN_SECONDS so they see what they just wrote."""
+    cache.set(_pin_key(user), 1, REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(_pin_key(user)) is not None
+
+
+def read_replica(view):
+    """
+    Decorator of read-only views that tolerate replica lag: their queries go
+    to a replica unless the user wrote something a moment ago. The view must
+    not read back rows it writes itself (writes always go to the primary)
+    other than inside primary_reads().
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.DATABASE_REPLICAS or is_pinned(request.user):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Reads inside read_replica views/replica_reads() go to the chosen replica,
+    everything else (and every write) to the primary. Replicas hold the same
+    data, so relations across aliases are fine; only the primary migrates.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
@@ -0,0 +1,87 @@
+from typing import NamedTuple
+
+from students.models import Student, StudentSubject
+from utils import change_counters
+from utils.constant import ENROLLMENT_BATCH_SIZE
+
+
+def missing_enrollments(students, subject_id=None, academic_year=None, semester=None):
+    """
+    (USN, subject id) pairs that `students` (a Student queryset) should have
+    from the active assignments of their class but do not, optionally limited
+    to one subject and/or one term. An inactive enrollment (left behind by a
+    rollover) counts as missing. Two queries, whatever the number of
+    students or subjects.
+    """
+    # Một filter() duy nhất: mọi điều kiện áp lên cùng một dòng Assign
+    assigned = {'class_id__assign__is_active': True}
+    if subject_id is not None:
+        assigned['class_id__assign__subject_id'] = subject_id
+    if academic_year is not None:
+        assigned['class_id__assign__academic_year'] = academic_year
+    if semester is not None:
+        assigned['class_id__assign__semester'] = semester
+    expected = set(
+        students.filter(**assigned)
+        .values_list('USN', 'class_id__assign__subject_id').distinct().order_by()
+    )
+    if not expected:
+        return set()
+    existing = set(
+        StudentSubject.objects.filter(
+            student_id__in={usn for usn, _ in expected},
+            subject_id__in={subject_id for _, subject_id in expected},
+            is_active=True,
+        ).values_list('student_id', 'subject_id')
+    )
+    return expected - existing
+
+
+class EnrollResult(NamedTuple):
+    created: int
+    reactivated: int
+
+
+def enroll(students, subject_id=None, academic_year=None, semester=None):
+    """
+    Create the missing StudentSubject rows of `students` and reactivate the
+    inactive ones they should have again (a student moved back to a class,
+    a subject assigned again after a rollover).
+    """
+    missing = missing_enrollments(students, subject_id, academic_year, semester)
+    if not missing:
+        return EnrollResult(0, 0)
+
+    inactive = StudentSubject.objects.filter(
+        student_id__in={usn for usn, _ in missing},
+        subject_id__in={subject_id for _, subject_id in missing},
+        is_active=False,
+    ).values_list('id', 'student_id', 'subject_id')
+    reactivate = {pk: (usn, subject_id) for pk, usn, subject_id in inactive if (usn, subject_id) in missing}
+    reactivated = StudentSubject.objects.filter(id__in=reactivate).update(is_active=True) if reactivate else 0
+
+    # ignore_conflicts: một request khác có thể vừa tạo cùng cặp (student, subject)
+    created = sorted(missing - set(reactivate.values()))
+    StudentSubject.objects.bulk_create(
+        [StudentSubject(student_id=usn, subject_id=subject_id) for usn, subject_id in created],
+        batch_size=ENROLLMENT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # update()/bulk_create() không gửi signal: danh sách đăng ký môn của các lớp này đã đổi
+    class_ids = Student.objects.filter(USN__in={usn for usn, _ in missing}).values_list('class_id', flat=True)
+    change_counters.bump(*map(change_counters.class_roster, set(class_ids)))
+    return EnrollResult(len(created), reactivated)
+
+
+def enroll_student(student):
+    """
+    Enroll one student in every subject of the active assignments of their
+    (new) class. Returns how many enrollments were created or reactivated.
+    """
+    return sum(enroll(Student.objects.filter(pk=student.pk)))
+
+
+def enroll_assignment(assign):
+    """Enroll every student of the assignment's class in its subject (nothing when it is inactive)."""
+    return sum(enroll(Student.objects.filter(class_id=assign.class_id_id), assign.subject_id,
+                      assign.academic_year, assign.semester))
@@ -0,0 +1,219 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+from admins.models import CalendarToken
+from teachers.models import AssignTime
+from utils import change_counters
+from utils.attendance_sessions import holiday_dates
+from utils.constant import (
+    DAYS_OF_WEEK, TIMETABLE_FIRST_HOUR, CALENDAR_UID_DOMAIN, CALENDAR_CACHE_KEY_PREFIX, CALENDAR_CACHE_TIMEOUT,
+)
+from utils.date_utils import get_semester_date_range
+from utils.reference_cache import class_label, get_reference_data, get_subject
+
+_WEEKDAYS = {day: index for index, (day, _) in enumerate(DAYS_OF_WEEK)}
+_LINE_LIMIT = 75
+
+
+def period_times(period):
+    """('7:30 - 8:30' -> (07:30, 08:30)); TIME_SLOTS use a 12-hour clock, '1:30' is 13:30."""
+    def parse(text):
+        hour, minute = (int(part) for part in text.strip().split(':'))
+        if hour < TIMETABLE_FIRST_HOUR:
+            hour += 12
+        return time(hour, minute)
+    start, end = period.split('-')
+    return parse(start), parse(end)
+
+
+def _escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Split a content line into 75-octet chunks (RFC 5545 §3.1), never inside a UTF-8 sequence."""
+    chunks, current, size = [], '', 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > _LINE_LIMIT:
+            chunks.append(current)
+            current, size = ' ', 1
+        current += char
+        size += width
+    chunks.append(current)
+    return '\r\n'.join(chunks)
+
+
+def _local(day, at):
+    return datetime.combine(day, at).strftime('%Y%m%dT%H%M%S')
+
+
+def _utc_offset(delta):
+    minutes = int(delta.total_seconds()) // 60
+    sign = '-' if minutes < 0 else '+'
+    return f'{sign}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}'
+
+
+def _observance(moment, offset_from, offset_to, name, daylight):
+    kind = 'DAYLIGHT' if daylight else 'STANDARD'
+    return [
+        f'BEGIN:{kind}',
+        f'DTSTART:{moment:%Y%m%dT%H%M%S}',
+        f'TZOFFSETFROM:{_utc_offset(offset_from)}',
+        f'TZOFFSETTO:{_utc_offset(offset_to)}',
+        f'TZNAME:{_escape(name)}',
+        f'END:{kind}',
+    ]
+
+
+def _vtimezone(tz_name, start, end):
+    """
+    VTIMEZONE for tz_name covering start..end (RFC 5545 §3.6.5), so clients
+    can resolve the TZID of DTSTART/DTEND/EXDATE without knowing the zone:
+    the offset in force at start plus every UTC offset change up to end.
+    """
+    zone = ZoneInfo(tz_name)
+    moment = datetime.combine(start - timedelta(days=1), time()).replace(tzinfo=zone).astimezone(dt_timezone.utc)
+    finish = datetime.combine(end + timedelta(days=1), time()).replace(tzinfo=zone).astimezone(dt_timezone.utc)
+    local = moment.astimezone(zone)
+    lines = ['BEGIN:VTIMEZONE', f'TZID:{tz_name}']
+    lines += _observance(datetime(1970, 1, 1), local.utcoffset(), local.utcoffset(), local.tzname(),
+                         bool(local.dst()))
+    while moment < finish:
+        after = moment + timedelta(days=1)
+        if after.astimezone(zone).utcoffset() != moment.astimezone(zone).utcoffset():
+            # Tìm phút chuyển giờ trong ngày bằng chia đôi
+            low, high = moment, after
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if middle.astimezone(zone).utcoffset() == low.astimezone(zone).utcoffset():
+                    low = middle
+                else:
+                    high = middle
+            before, changed = low.astimezone(zone), high.astimezone(zone)
+            # DTSTART của observance là giờ địa phương theo offset cũ (TZOFFSETFROM)
+            wall = (high + before.utcoffset()).replace(tzinfo=None, second=0, microsecond=0)
+            lines += _observance(wall, before.utcoffset(), changed.utcoffset(), changed.tzname(),
+                                 bool(changed.dst()))
+        moment = after
+    lines.append('END:VTIMEZONE')
+    return lines
+
+
+def render_calendar(name, slots, start, end, holidays, stamp):
+    """
+    VCALENDAR text with one weekly recurring event per timetable slot between
+    start and end, holidays excluded. `slots` are dicts with id, day, period,
+    summary and description.
+    """
+    tz_name = settings.TIME_ZONE
+    until = datetime.combine(end, time.max).replace(tzinfo=ZoneInfo(tz_name)).astimezone(dt_timezone.utc)
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{CALENDAR_UID_DOMAIN}//timetable//EN',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(name)}',
+        f'X-WR-TIMEZONE:{tz_name}',
+        *_vtimezone(tz_name, start, end),
+    ]
+    for slot in slots:
+        weekday = _WEEKDAYS.get(slot['day'])
+        if weekday is None:
+            continue
+        first = start + timedelta(days=(weekday - start.weekday()) % 7)
+        if first > end:
+            continue
+        begins, ends = period_times(slot['period'])
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:assigntime-{slot["id"]}-{start:%Y%m%d}@{CALENDAR_UID_DOMAIN}',
+            f'DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}',
+            f'DTSTART;TZID={tz_name}:{_local(first, begins)}',
+            f'DTEND;TZID={tz_name}:{_local(first, ends)}',
+            f'RRULE:FREQ=WEEKLY;UNTIL={until:%Y%m%dT%H%M%SZ}',
+        ]
+        skipped = sorted(day for day in holidays if day >= first and day.weekday() == weekday)
+        if skipped:
+            lines.append(f'EXDATE;TZID={tz_name}:' + ','.join(_local(day, begins) for day in skipped))
+        lines += [
+            f'SUMMARY:{_escape(slot["summary"])}',
+            f'DESCRIPTION:{_escape(slot["description"])}',
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def _slots(assign_times, teacher_view):
+    slots = []
+    for slot in assign_times.order_by('id').values(
+            'id', 'day', 'period', 'assign__class_id', 'assign__subject_id', 'assign__teacher__name'):
+        subject = get_subject(slot['assign__subject_id'])
+        if teacher_view:
+            summary = f'{subject.name} ({slot["assign__class_id"]})'
+            description = class_label(slot['assign__class_id'])
+        else:
+            summary = subject.name
+            description = slot['assign__teacher__name']
+        slots.append({'id': slot['id'], 'day': slot['day'], 'period': slot['period'],
+                      'summary': summary, 'description': description})
+    return slots
+
+
+class Feed:
+    """A user's timetable feed for one term: what it depends on and how to render it."""
+
+    def __init__(self, name, scopes, assign_times, teacher_view, academic_year, semester):
+        self.name = name
+        self.assign_times = assign_times
+        self.teacher_view = teacher_view
+        self.academic_year = academic_year
+        self.semester = semester
+        self.counters = change_counters.versions([*scopes, change_counters.holidays()])
+        self.etag = change_counters.etag(self.counters, 'ics', get_reference_data().version,
+                                         academic_year, semester)
+        self.last_modified = change_counters.last_modified(self.counters)
+
+    def render(self):
+        """The feed text, rendered once per timetable version and then served from the cache."""
+        key = f'{CALENDAR_CACHE_KEY_PREFIX}{self.etag}'
+        body = cache.get(key)
+        if body is None:
+            start, end = get_semester_date_range(self.academic_year, self.semester)
+            body = render_calendar(
+                self.name, _slots(self.assign_times, self.teacher_view), start, end,
+                holiday_dates(start, end), self.last_modified,
+            )
+            cache.set(key, body, CALENDAR_CACHE_TIMEOUT)
+        return body
+
+
+def _term_assign_times(academic_year, semester, **filters):
+    return AssignTime.objects.filter(
+        assign__is_active=True, assign__academic_year__icontains=academic_year, assign__semester=semester,
+        **filters,
+    )
+
+
+def teacher_feed(teacher_id, teacher_name, academic_year, semester):
+    return Feed(teacher_name, [change_counters.teacher_timetable(teacher_id)],
+                _term_assign_times(academic_year, semester, assign__teacher_id=teacher_id),
+                True, academic_year, semester)
+
+
+def class_feed(class_id, academic_year, semester):
+    return Feed(class_label(class_id) or class_id, [change_counters.class_timetable(class_id)],
+                _term_assign_times(academic_year, semester, assign__class_id=class_id),
+                False, academic_year, semester)
+
+
+def feed_url(request, user):
+    """Absolute URL of the user's .ics feed, to paste into a calendar app."""
+    token = CalendarToken.objects.for_user(user).token
+    return request.build_absolute_uri(reverse('api:calendar_feed', args=[token]))
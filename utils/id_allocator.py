@@ -0,0 +1,82 @@
+import re
+from datetime import date
+
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Substr
+
+from admins.models import IdentifierCounter
+from students.models import Student
+from teachers.models import Teacher
+from utils.constant import (
+    TEACHER_ID_PREFIX, TEACHER_ID_NUMBER_WIDTH, TEACHER_ID_COUNTER_KEY,
+    STUDENT_USN_PREFIX_TEMPLATE, STUDENT_USN_NUMBER_WIDTH,
+    STUDENT_USN_COUNTER_KEY_TEMPLATE,
+)
+from utils.date_utils import determine_academic_year_start
+
+
+def _max_number_in_use(queryset, field, prefix):
+    """
+    Return the highest numeric suffix of `field` values shaped like
+    <prefix><digits>, compared numerically (T100 > T099), or 0 if none.
+    """
+    numbers = (
+        queryset
+        .filter(**{f'{field}__regex': rf'^{re.escape(prefix)}[0-9]+$'})
+        .annotate(number=Cast(Substr(field, len(prefix) + 1), BigIntegerField()))
+        .aggregate(highest=Max('number'))
+    )
+    return numbers['highest'] or 0
+
+
+def _reserve_unused(key, count, prefix, width, model, field):
+    """
+    Reserve `count` identifiers <prefix><number> from the counter `key`,
+    skipping any that were already created by hand.
+    """
+    def seed():
+        return _max_number_in_use(model.objects.all(), field, prefix)
+
+    identifiers = []
+    while len(identifiers) < count:
+        needed = count - len(identifiers)
+        first = IdentifierCounter.objects.reserve(key, needed, seed=seed)
+        candidates = [f'{prefix}{number:0{width}d}' for number in range(first, first + needed)]
+        taken = set(
+            model.objects.filter(**{f'{field}__in': candidates}).values_list(field, flat=True))
+        identifiers.extend(c for c in candidates if c not in taken)
+    return identifiers
+
+
+def reserve_teacher_ids(count):
+    """Reserve `count` unused Teacher IDs (T001, T002, ...) for bulk imports."""
+    return _reserve_unused(
+        TEACHER_ID_COUNTER_KEY, count, TEACHER_ID_PREFIX, TEACHER_ID_NUMBER_WIDTH,
+        Teacher, 'id')
+
+
+def next_teacher_id():
+    """Allocate the next unused Teacher ID."""
+    return reserve_teacher_ids(1)[0]
+
+
+def student_usn_prefix(dept_id, academic_year=None):
+    """
+    Return the USN prefix for a department and academic year start
+    (e.g. 'CS' and '2025' -> '25CS'). Defaults to the current academic year.
+    """
+    if not academic_year:
+        academic_year = determine_academic_year_start(date.today())
+    return STUDENT_USN_PREFIX_TEMPLATE.format(year=str(academic_year)[-2:], dept=dept_id)
+
+
+def reserve_student_usns(dept_id, count, academic_year=None):
+    """Reserve `count` unused USNs for a department/year for bulk imports."""
+    prefix = student_usn_prefix(dept_id, academic_year)
+    key = STUDENT_USN_COUNTER_KEY_TEMPLATE.format(prefix=prefix)
+    return _reserve_unused(key, count, prefix, STUDENT_USN_NUMBER_WIDTH, Student, 'USN')
+
+
+def next_student_usn(dept_id, academic_year=None):
+    """Allocate the next unused USN for a department/year."""
+    return reserve_student_usns(dept_id, 1, academic_year)[0]
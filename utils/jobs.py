@@ -0,0 +1,171 @@
+import logging
+import os
+import signal
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+import django
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from admins.models import Job
+from utils import tenancy
+from utils.constant import (
+    JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_DONE, JOB_STATUS_FAILED,
+    JOB_PRIORITY_NORMAL, JOB_MAX_ATTEMPTS, JOB_RETRY_BASE_DELAY, JOB_RETRY_MAX_DELAY,
+    JOB_LOCK_TIMEOUT, JOB_POLL_INTERVAL, JOB_CLAIM_CANDIDATES, JOB_ERROR_MAX_LENGTH,
+)
+
+logger = logging.getLogger('jobs')
+
+
+def task(func=None, *, scrub_payload=False):
+    """
+    Mark a module-level function as runnable by the workers. With
+    scrub_payload the job's arguments are erased once it finished or failed
+    for good (arguments holding secrets, e.g. an initial password).
+    """
+    def decorator(func):
+        func.job_task = True
+        func.scrub_payload = scrub_payload
+        return func
+    return decorator(func) if func is not None else decorator
+
+
+def enqueue(func, *, priority=JOB_PRIORITY_NORMAL, delay=0, max_attempts=JOB_MAX_ATTEMPTS,
+            unique=False, created_by=None, **kwargs):
+    """
+    Queue `func(**kwargs)` (JSON-serializable arguments) for the workers and
+    return the Job. Inside a transaction the job only becomes visible to
+    workers on commit, and disappears with a rollback. With `unique` an
+    identical job still waiting in the queue is returned instead.
+    """
+    if not getattr(func, 'job_task', False):
+        raise ValueError(f'{func!r} is not decorated with utils.jobs.task')
+    name = f'{func.__module__}.{func.__qualname__}'
+    if unique:
+        existing = Job.objects.filter(task=name, payload=kwargs, status=JOB_STATUS_QUEUED).first()
+        if existing is not None:
+            return existing
+    return Job.objects.create(
+        task=name, payload=kwargs, priority=priority, max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay), created_by=created_by,
+    )
+
+
+def retry_delay(attempt):
+    """Seconds to wait before retrying after the `attempt`-th failure (exponential backoff)."""
+    return min(JOB_RETRY_BASE_DELAY * 2 ** (attempt - 1), JOB_RETRY_MAX_DELAY)
+
+
+def worker_name():
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+# -----------------------------------------------------------------------------
+# Worker side
+# -----------------------------------------------------------------------------
+
+def claim(worker):
+    """Lock the next due job (highest priority, oldest run_at) for `worker`; None when there is none."""
+    now = timezone.now()
+    due = Job.all_objects.filter(status=JOB_STATUS_QUEUED, run_at__lte=now).order_by('-priority', 'run_at', 'id')
+    claimed = {'status': JOB_STATUS_RUNNING, 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1}
+    using = router.db_for_write(Job)
+
+    if connections[using].features.has_select_for_update_skip_locked:
+        # Các worker bỏ qua dòng đang bị khoá nên không chờ nhau
+        with transaction.atomic(using=using):
+            job_id = due.select_for_update(skip_locked=True).values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            Job.all_objects.filter(pk=job_id).update(**claimed)
+    else:
+        # Không có SKIP LOCKED (SQLite): UPDATE có điều kiện, chỉ một worker đổi được status
+        for job_id in due.values_list('id', flat=True)[:JOB_CLAIM_CANDIDATES]:
+            if Job.all_objects.filter(pk=job_id, status=JOB_STATUS_QUEUED).update(**claimed):
+                break
+        else:
+            return None
+    return Job.all_objects.get(pk=job_id)
+
+
+def requeue_stale():
+    """Give jobs of dead workers (running longer than JOB_LOCK_TIMEOUT) back to the queue."""
+    now = timezone.now()
+    stale = Job.all_objects.filter(status=JOB_STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=JOB_LOCK_TIMEOUT))
+    released = {'locked_by': '', 'locked_at': None, 'last_error': 'Worker stopped while running the job'}
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=JOB_STATUS_FAILED, finished_at=now, **released)
+    return failed + stale.update(status=JOB_STATUS_QUEUED, run_at=now, **released)
+
+
+def run(job):
+    """Run a claimed job in its school and record the outcome. True when it succeeded."""
+    func = None
+    try:
+        func = import_string(job.task)
+        if not getattr(func, 'job_task', False):
+            raise ImportError(f'{job.task} is not a job task')
+        with tenancy.activate(job.school_id):
+            func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()[-JOB_ERROR_MAX_LENGTH:]
+        now = timezone.now()
+        fields = {'locked_by': '', 'locked_at': None, 'last_error': error}
+        if job.attempts < job.max_attempts:
+            logger.warning('Job %s failed (attempt %s/%s), retrying', job, job.attempts, job.max_attempts)
+            fields.update(status=JOB_STATUS_QUEUED, run_at=now + timedelta(seconds=retry_delay(job.attempts)))
+        else:
+            logger.error('Job %s failed for good after %s attempts', job, job.attempts)
+            fields.update(status=JOB_STATUS_FAILED, finished_at=now)
+            if getattr(func, 'scrub_payload', False):
+                fields['payload'] = {}
+        Job.all_objects.filter(pk=job.pk).update(**fields)
+        return False
+
+    fields = {'status': JOB_STATUS_DONE, 'finished_at': timezone.now(), 'locked_by': '', 'locked_at': None}
+    if func.scrub_payload:
+        fields['payload'] = {}
+    Job.all_objects.filter(pk=job.pk).update(**fields)
+    return True
+
+
+def work(worker, once=False, should_stop=lambda: False, recycle_connections=False):
+    """
+    Claim and run jobs until should_stop() returns true, or with `once`
+    until no job is due. Returns the number of jobs run. Only a loop that
+    owns its connections (a worker process) passes recycle_connections.
+    """
+    count = 0
+    while not should_stop():
+        if recycle_connections:
+            # Như sau mỗi request: bỏ kết nối hỏng hoặc quá CONN_MAX_AGE. Không làm
+            # khi chạy trong process của người gọi: close_old_connections() đóng cả
+            # kết nối đang nằm trong atomic() của họ
+            close_old_connections()
+        job = claim(worker)
+        if job is None:
+            if requeue_stale():
+                continue
+            if once:
+                break
+            time.sleep(JOB_POLL_INTERVAL)
+            continue
+        run(job)
+        count += 1
+    return count
+
+
+def worker_process(stop, once):
+    """Entry point of a run_workers process; `stop` is the shared multiprocessing.Event."""
+    # Với start method spawn/forkserver process con phải tự nạp Django
+    django.setup()
+    # Ctrl+C gửi cho cả nhóm process: chỉ process cha xử lý rồi báo qua `stop`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    work(worker_name(), once=once, should_stop=stop.is_set, recycle_connections=True)
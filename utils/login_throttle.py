@@ -0,0 +1,115 @@
+import hashlib
+import ipaddress
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils import metrics
+from utils.constant import (
+    LOGIN_THROTTLE_KEY_PREFIX, LOGIN_THROTTLE_WINDOW, LOGIN_THROTTLE_USERNAME_LIMIT, LOGIN_THROTTLE_IP_LIMIT,
+    LOGIN_THROTTLE_LOCKOUT_BASE, LOGIN_THROTTLE_LOCKOUT_MAX, LOGIN_THROTTLE_STRIKES_TIMEOUT,
+)
+
+logger = logging.getLogger('admin_activity')
+
+
+def client_ip(request):
+    """
+    Client IP of `request`. X-Forwarded-For is only trusted for the
+    LOGIN_THROTTLE_TRUSTED_PROXIES hops our own proxies appended, otherwise
+    an attacker could pick a new IP for every attempt.
+    """
+    if request is None:
+        return None
+    proxies = settings.LOGIN_THROTTLE_TRUSTED_PROXIES
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if proxies and forwarded:
+        return forwarded[-min(proxies, len(forwarded))]
+    return request.META.get('REMOTE_ADDR')
+
+
+def _is_exempt_ip(ip):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network.strip(), strict=False)
+               for network in settings.LOGIN_THROTTLE_EXEMPT_IPS)
+
+
+def _subjects(request, username):
+    """(kind, cache key part, failure limit) of each counter a login attempt counts against."""
+    subjects = []
+    username = (username or '').strip().lower()
+    exempt_usernames = {name.strip().lower() for name in settings.LOGIN_THROTTLE_EXEMPT_USERNAMES}
+    if username and username not in exempt_usernames:
+        # Băm username: key cache ngắn, không chứa ký tự lạ do người dùng nhập
+        digest = hashlib.md5(username.encode(), usedforsecurity=False).hexdigest()
+        subjects.append(('user', digest, LOGIN_THROTTLE_USERNAME_LIMIT))
+    ip = client_ip(request)
+    if ip and not _is_exempt_ip(ip):
+        subjects.append(('ip', ip, LOGIN_THROTTLE_IP_LIMIT))
+    return subjects
+
+
+def _key(kind, ident, suffix):
+    return f'{LOGIN_THROTTLE_KEY_PREFIX}{kind}:{ident}:{suffix}'
+
+
+def retry_after(request, username):
+    """
+    Seconds until `username` or the client IP may try to log in again, 0
+    when neither is locked out. Called before authenticate(), so a locked
+    out attempt costs one cache round trip instead of a password hash.
+    """
+    keys = [_key(kind, ident, 'locked') for kind, ident, limit in _subjects(request, username)]
+    until = max(cache.get_many(keys).values(), default=0)
+    seconds = math.ceil(until - time.time())
+    if seconds > 0:
+        metrics.record_login('throttled')
+        return seconds
+    return 0
+
+
+def _increment(key, timeout):
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key vừa hết hạn/bị đẩy khỏi cache giữa add và incr
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def _lock(kind, ident):
+    # Mỗi lần bị khoá lại trong LOGIN_THROTTLE_STRIKES_TIMEOUT thời gian khoá tăng gấp đôi
+    strikes = _increment(_key(kind, ident, 'strikes'), LOGIN_THROTTLE_STRIKES_TIMEOUT)
+    seconds = min(LOGIN_THROTTLE_LOCKOUT_BASE * 2 ** (strikes - 1), LOGIN_THROTTLE_LOCKOUT_MAX)
+    cache.set(_key(kind, ident, 'locked'), time.time() + seconds, seconds)
+    logger.warning('Login locked out for %s %s for %ss (strike %s)', kind, ident, seconds, strikes)
+
+
+def failed(request, username):
+    """Count a failed login; locks out the username/IP once it exceeds its limit within the window."""
+    metrics.record_login('failure')
+    now = time.time()
+    window = int(now // LOGIN_THROTTLE_WINDOW)
+    elapsed = (now % LOGIN_THROTTLE_WINDOW) / LOGIN_THROTTLE_WINDOW
+    for kind, ident, limit in _subjects(request, username):
+        current = _increment(_key(kind, ident, window), LOGIN_THROTTLE_WINDOW * 2)
+        previous = cache.get(_key(kind, ident, window - 1), 0)
+        # Cửa sổ trượt xấp xỉ: cửa sổ trước tính theo phần còn nằm trong WINDOW giây gần nhất
+        if current + previous * (1 - elapsed) >= limit:
+            _lock(kind, ident)
+
+
+def succeeded(request, username):
+    """Forget the recent failures of `username` after a successful login (the IP counter is kept)."""
+    metrics.record_login('success')
+    window = int(time.time() // LOGIN_THROTTLE_WINDOW)
+    cache.delete_many([_key(kind, ident, suffix)
+                       for kind, ident, limit in _subjects(None, username)
+                       for suffix in (window, window - 1)])
@@ -0,0 +1,282 @@
+import atexit
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+from utils.constant import (
+    METRICS_LATENCY_BUCKETS, METRICS_FLUSH_INTERVAL, METRICS_STALE_FLUSHES,
+    METRICS_SLOW_SAMPLE_RATE, METRICS_SLOW_TOP_SQL,
+    METRICS_CACHE_PREFIX, METRICS_CACHE_OUTCOMES, METRICS_LOGIN_KEY, METRICS_LOGIN_OUTCOMES,
+)
+
+logger = logging.getLogger('performance')
+
+# Layout of one per-view stats list; buckets follow (last one is +Inf)
+_COUNT, _LATENCY_SUM, _QUERIES, _DB_TIME, _BUCKETS = range(5)
+_STATS_LENGTH = _BUCKETS + len(METRICS_LATENCY_BUCKETS) + 1
+
+# Each thread only ever writes its own shard, so recording takes no lock;
+# the registry lock is taken once per thread.
+_shards = []
+_shards_lock = threading.Lock()
+_local = threading.local()
+_next_flush = 0.0
+# (pid, tên file) của process hiện tại; tính lại sau fork
+_worker = None
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() hook counting queries and DB time for one
+    request. SQL text is kept only when the request was sampled for the
+    slow-request log.
+    """
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = [] if keep_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.statements is not None:
+                self.statements.append((elapsed, sql))
+
+
+def should_sample():
+    return METRICS_SLOW_SAMPLE_RATE > 0 and random.random() < METRICS_SLOW_SAMPLE_RATE
+
+
+def _shard():
+    shard = getattr(_local, 'stats', None)
+    if shard is None:
+        shard = {}
+        with _shards_lock:
+            _shards.append(shard)
+        _local.stats = shard
+    return shard
+
+
+def record(view, latency, queries, db_time):
+    """Add one request to the calling thread's counters."""
+    shard = _shard()
+    stats = shard.get(view)
+    if stats is None:
+        stats = shard[view] = [0, 0.0, 0, 0.0] + [0] * (_STATS_LENGTH - _BUCKETS)
+    stats[_COUNT] += 1
+    stats[_LATENCY_SUM] += latency
+    stats[_QUERIES] += queries
+    stats[_DB_TIME] += db_time
+    stats[_BUCKETS + bisect_left(METRICS_LATENCY_BUCKETS, latency)] += 1
+
+
+def _count(key, outcomes, outcome):
+    # Cùng shard với số liệu view, phân biệt bằng tiền tố nên file worker giữ nguyên định dạng
+    shard = _shard()
+    counts = shard.get(key)
+    if counts is None:
+        counts = shard[key] = [0] * len(outcomes)
+    counts[outcomes.index(outcome)] += 1
+
+
+def record_cache(name, outcome):
+    """Count one lookup of the computed cache `name` (outcome in METRICS_CACHE_OUTCOMES)."""
+    _count(METRICS_CACHE_PREFIX + name, METRICS_CACHE_OUTCOMES, outcome)
+
+
+def record_login(outcome):
+    """Count one login attempt (outcome in METRICS_LOGIN_OUTCOMES)."""
+    _count(METRICS_LOGIN_KEY, METRICS_LOGIN_OUTCOMES, outcome)
+
+
+def _merge(target, source):
+    for view, stats in source.items():
+        merged = target.setdefault(view, [0] * len(stats))
+        for index, value in enumerate(stats):
+            merged[index] += value
+    return target
+
+
+def snapshot():
+    """Counters of this process, summed over all threads."""
+    merged = {}
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        _merge(merged, {view: list(stats) for view, stats in list(shard.items())})
+    return merged
+
+
+def _metrics_dir():
+    return Path(settings.METRICS_DIR)
+
+
+def _worker_file():
+    global _worker
+    pid = os.getpid()
+    if _worker is None or _worker[0] != pid:
+        # Thêm thời điểm bắt đầu: pid được cấp lại không ghi đè file của worker cũ
+        _worker = (pid, f'{socket.gethostname()}-{pid}-{time.time_ns()}.json')
+    return _metrics_dir() / _worker[1]
+
+
+def _remove_worker_file():
+    try:
+        _worker_file().unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+# Process con sau fork kế thừa handler này và xoá file của chính nó
+atexit.register(_remove_worker_file)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Process của user khác: vẫn đang chạy
+        pass
+    return True
+
+
+def _is_stale(path, now):
+    """File of a worker that is gone: a dead pid on this host, or not flushed for METRICS_STALE_FLUSHES."""
+    try:
+        host, pid, _ = path.stem.rsplit('-', 2)
+        if host == socket.gethostname() and not _is_alive(int(pid)):
+            return True
+    except ValueError:
+        pass
+    return now - path.stat().st_mtime > METRICS_FLUSH_INTERVAL * METRICS_STALE_FLUSHES
+
+
+def flush():
+    """
+    Write this process's counters to METRICS_DIR/<host>-<pid>-<start>.json.
+    The file is removed when the process exits, so collect() only reads the
+    workers that are still running.
+    """
+    directory = _metrics_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    target = _worker_file()
+    temp = target.with_suffix(f'.{threading.get_ident()}.tmp')
+    temp.write_text(json.dumps(snapshot()))
+    os.replace(temp, target)
+
+
+def maybe_flush():
+    global _next_flush
+    now = time.monotonic()
+    if now < _next_flush:
+        return
+    _next_flush = now + METRICS_FLUSH_INTERVAL
+    try:
+        flush()
+    except OSError:
+        logger.exception('Could not write performance metrics')
+
+
+def collect():
+    """
+    Counters of the running workers: their flushed files plus this process's
+    live values. Files left behind by dead workers are deleted.
+    """
+    merged = {}
+    own_file = _worker_file()
+    directory = _metrics_dir()
+    now = time.time()
+    if directory.is_dir():
+        for path in directory.glob('*.json'):
+            if path == own_file:
+                continue
+            try:
+                if _is_stale(path, now):
+                    path.unlink(missing_ok=True)
+                    continue
+                _merge(merged, json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+    return _merge(merged, snapshot())
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(stats):
+    """Format collected counters in the Prometheus text exposition format."""
+    lines = [
+        '# HELP django_view_request_duration_seconds Request latency per URL name.',
+        '# TYPE django_view_request_duration_seconds histogram',
+    ]
+    views = sorted(view for view in stats
+                   if not view.startswith(METRICS_CACHE_PREFIX) and view != METRICS_LOGIN_KEY)
+    caches = sorted(view for view in stats if view.startswith(METRICS_CACHE_PREFIX))
+    for view in views:
+        values = stats[view]
+        label = _escape(view)
+        cumulative = 0
+        for bound, count in zip(METRICS_LATENCY_BUCKETS, values[_BUCKETS:]):
+            cumulative += count
+            lines.append(
+                f'django_view_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+        lines.append(
+            f'django_view_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {values[_COUNT]}')
+        lines.append(f'django_view_request_duration_seconds_sum{{view="{label}"}} {values[_LATENCY_SUM]}')
+        lines.append(f'django_view_request_duration_seconds_count{{view="{label}"}} {values[_COUNT]}')
+
+    lines += [
+        '# HELP django_view_db_queries_total Database queries executed per URL name.',
+        '# TYPE django_view_db_queries_total counter',
+    ]
+    lines += [f'django_view_db_queries_total{{view="{_escape(view)}"}} {stats[view][_QUERIES]}'
+              for view in views]
+    lines += [
+        '# HELP django_view_db_duration_seconds_total Time spent in database queries per URL name.',
+        '# TYPE django_view_db_duration_seconds_total counter',
+    ]
+    lines += [f'django_view_db_duration_seconds_total{{view="{_escape(view)}"}} {stats[view][_DB_TIME]}'
+              for view in views]
+    lines += [
+        '# HELP django_computed_cache_lookups_total Computed cache lookups per cache name and outcome.',
+        '# TYPE django_computed_cache_lookups_total counter',
+    ]
+    for key in caches:
+        label = _escape(key[len(METRICS_CACHE_PREFIX):])
+        lines += [f'django_computed_cache_lookups_total{{cache="{label}",outcome="{outcome}"}} {count}'
+                  for outcome, count in zip(METRICS_CACHE_OUTCOMES, stats[key])]
+    lines += [
+        '# HELP django_login_attempts_total Login form submissions per outcome.',
+        '# TYPE django_login_attempts_total counter',
+    ]
+    lines += [f'django_login_attempts_total{{outcome="{outcome}"}} {count}'
+              for outcome, count in zip(METRICS_LOGIN_OUTCOMES, stats.get(METRICS_LOGIN_KEY, ()))]
+    return '\n'.join(lines) + '\n'
+
+
+def log_slow_request(request, view, latency, recorder):
+    top = sorted(recorder.statements, key=lambda item: item[0], reverse=True)[:METRICS_SLOW_TOP_SQL]
+    logger.warning(
+        f"Slow request - View: {view}, Action: {request.method} {request.path}, "
+        f"Latency: {latency * 1000:.1f}ms, Queries: {recorder.count}, "
+        f"DB: {recorder.duration * 1000:.1f}ms"
+        + ''.join(f"\n  {elapsed * 1000:.1f}ms {sql}" for elapsed, sql in top)
+    )
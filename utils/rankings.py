@@ -0,0 +1,147 @@
+from django.db import router, transaction
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Subquery
+from django.db.models.functions import PercentRank, Rank
+from django.db.models.expressions import Window
+
+from students.models import CieScore, Student, StudentRank
+from utils import tenancy
+from utils.db_routing import primary_reads
+from utils.constant import (
+    RANKING_SCOPE_CLASS, RANKING_SCOPE_DEPT, RANKING_SCOPE_SCHOOL, RANKING_BATCH_SIZE,
+    PERCENTAGE_MULTIPLIER, PERCENTAGE_DECIMAL_PLACES,
+)
+
+# Cột phân vùng (partition) của từng phạm vi xếp hạng trong StudentRank
+_SCOPE_PARTITION = {
+    RANKING_SCOPE_CLASS: 'class_id',
+    RANKING_SCOPE_DEPT: 'dept',
+    RANKING_SCOPE_SCHOOL: None,
+}
+
+
+def _window(function, partition=None, lowest_first=False):
+    return Window(function, partition_by=[F(partition)] if partition else None,
+                  order_by=F('score').asc() if lowest_first else F('score').desc())
+
+
+def _percentile(percent_rank):
+    return round((1 - percent_rank) * PERCENTAGE_MULTIPLIER, PERCENTAGE_DECIMAL_PLACES)
+
+
+def _term_aggregate(academic_year, semester, aggregate):
+    return Subquery(
+        CieScore.objects.filter(
+            academic_year=academic_year, semester=semester, student_subject__student=OuterRef('pk')
+        ).order_by().values('student_subject__student').annotate(value=aggregate).values('value')
+    )
+
+
+def ranked_term_scores(academic_year, semester):
+    """
+    One query: per-student average CIE of a term with class, department and
+    school ranks (RANK) and percent ranks (PERCENT_RANK) from window functions.
+    The per-term aggregate is a correlated subquery so the windows run over
+    one row per student without a GROUP BY. Students of the active school
+    only; unscoped, the school ranks are still partitioned per school.
+    """
+    return (
+        Student.objects.annotate(
+            score=_term_aggregate(academic_year, semester, Avg('cie', output_field=FloatField())),
+            subjects=_term_aggregate(academic_year, semester, Count('id')),
+        )
+        .filter(score__isnull=False)
+        .annotate(
+            class_rank=_window(Rank(), 'class_id'),
+            class_percent_rank=_window(PercentRank(), 'class_id'),
+            class_rank_low=_window(Rank(), 'class_id', lowest_first=True),
+            dept_rank=_window(Rank(), 'class_id__dept'),
+            dept_percent_rank=_window(PercentRank(), 'class_id__dept'),
+            dept_rank_low=_window(Rank(), 'class_id__dept', lowest_first=True),
+            school_rank=_window(Rank(), 'class_id__dept__school'),
+            school_percent_rank=_window(PercentRank(), 'class_id__dept__school'),
+        )
+        .values('pk', 'class_id', 'class_id__dept', 'score', 'subjects',
+                'class_rank', 'class_percent_rank', 'class_rank_low',
+                'dept_rank', 'dept_percent_rank', 'dept_rank_low',
+                'school_rank', 'school_percent_rank')
+        .order_by()
+    )
+
+
+def refresh_rankings(academic_year, semester):
+    """
+    Replace the materialized StudentRank rows of a term in the active school
+    (every school when unscoped). Returns the row count.
+    """
+    rows = list(ranked_term_scores(academic_year, semester))
+    ranks = [
+        StudentRank(
+            student_id=row['pk'],
+            academic_year=academic_year,
+            semester=semester,
+            class_id_id=row['class_id'],
+            dept_id=row['class_id__dept'],
+            score=row['score'],
+            subjects=row['subjects'],
+            class_rank=row['class_rank'],
+            class_rank_low=row['class_rank_low'],
+            class_percentile=_percentile(row['class_percent_rank']),
+            dept_rank=row['dept_rank'],
+            dept_rank_low=row['dept_rank_low'],
+            dept_percentile=_percentile(row['dept_percent_rank']),
+            school_rank=row['school_rank'],
+            school_percentile=_percentile(row['school_percent_rank']),
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        StudentRank.objects.filter(academic_year=academic_year, semester=semester).delete()
+        StudentRank.objects.bulk_create(ranks, batch_size=RANKING_BATCH_SIZE)
+    return len(ranks)
+
+
+def latest_ranked_term():
+    """(academic_year, semester) of the newest term with CIE scores in the active school, or None."""
+    scores = CieScore.objects.all()
+    school_id = tenancy.current_school_id()
+    if school_id is not None:
+        scores = scores.filter(student_subject__student__class_id__dept__school=school_id)
+    return scores.order_by('-academic_year', '-semester').values_list('academic_year', 'semester').first()
+
+
+def term_rankings(academic_year, semester):
+    """
+    StudentRank rows of a term in the active school, materialized on first
+    use; marks_confirm queues refresh_term_rankings to keep them current.
+    Safe in read_replica views: rows the replica lacks (not replicated yet,
+    or written just now) are read from the primary.
+    """
+    rankings = StudentRank.objects.filter(academic_year=academic_year, semester=semester)
+    if not rankings.exists():
+        rankings = rankings.using(router.db_for_write(StudentRank))
+        if not rankings.exists():
+            with primary_reads():
+                refresh_rankings(academic_year, semester)
+    return rankings.select_related('student', 'class_id', 'dept')
+
+
+def top_n(rankings, n, scope=RANKING_SCOPE_SCHOOL):
+    """The best `n` students of every class/department, or of the school."""
+    partition = _SCOPE_PARTITION[scope]
+    ordering = [f'{scope}_rank', 'student_id']
+    if partition:
+        ordering.insert(0, partition)
+    return rankings.filter(**{f'{scope}_rank__lte': n}).order_by(*ordering)
+
+
+def bottom_n(rankings, n, scope=RANKING_SCOPE_SCHOOL):
+    """The lowest `n` students of every class/department, or of the school."""
+    partition = _SCOPE_PARTITION[scope]
+    if partition is None:
+        return rankings.order_by('-school_rank', 'student_id')[:n]
+    return rankings.filter(**{f'{scope}_rank_low__lte': n}).order_by(
+        partition, f'{scope}_rank_low', 'student_id')
+
+
+def at_or_above_percentile(rankings, percentile, scope=RANKING_SCOPE_SCHOOL):
+    return rankings.filter(**{f'{scope}_percentile__gte': percentile}).order_by(f'{scope}_rank')
@@ -0,0 +1,187 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from admins.models import Dept, Subject, Class
+from utils.constant import (
+    REFERENCE_DATA_VERSION_KEY, REFERENCE_DATA_SHARED_VERSION_KEY, REFERENCE_DATA_CHECK_INTERVAL,
+)
+from utils.tenancy import cache_key, current_school_id
+
+
+class DeptRecord(NamedTuple):
+    id: str
+    name: str
+    school_id: str
+
+
+class SubjectRecord(NamedTuple):
+    id: str
+    name: str
+    shortname: str
+    dept_id: str
+
+
+class ClassRecord(NamedTuple):
+    id: str
+    dept_id: str
+    section: str
+    sem: int
+    is_active: bool
+
+
+class ReferenceData(NamedTuple):
+    """Immutable snapshot of the Dept/Subject/Class rows of one school (or all) at `version`."""
+    version: int
+    depts: MappingProxyType
+    subjects: MappingProxyType
+    classes: MappingProxyType
+
+
+_lock = threading.Lock()
+# school id (None: không giới hạn trường) -> snapshot / thời điểm kiểm tra version kế tiếp
+_snapshots = {}
+_checked_until = {}
+# school id -> thời điểm sớm nhất được nạp lại bắt buộc khi tra cứu bị miss
+_refresh_after = {}
+
+
+def _version_keys(school_id):
+    # Snapshot không giới hạn trường đổi theo mọi thay đổi; snapshot của một
+    # trường chỉ đổi theo trường đó và các thay đổi không rõ trường
+    if school_id is None:
+        return [REFERENCE_DATA_VERSION_KEY]
+    return [REFERENCE_DATA_SHARED_VERSION_KEY, cache_key(REFERENCE_DATA_VERSION_KEY, school_id)]
+
+
+def _current_version(school_id):
+    """
+    Read the versions from the shared cache. A missing key (first start or
+    eviction) is seeded with a fresh timestamp so it never matches an older
+    snapshot.
+    """
+    keys = _version_keys(school_id)
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns())
+        found.update(cache.get_many(missing))
+    return tuple(found[key] for key in keys)
+
+
+def _load(version):
+    # Manager mặc định đã giới hạn theo trường đang phục vụ
+    depts = {
+        row[0]: DeptRecord(*row)
+        for row in Dept.objects.values_list('id', 'name', 'school_id')
+    }
+    subjects = {
+        row[0]: SubjectRecord(*row)
+        for row in Subject.objects.values_list('id', 'name', 'shortname', 'dept_id')
+    }
+    classes = {
+        row[0]: ClassRecord(*row)
+        for row in Class.objects.values_list('id', 'dept_id', 'section', 'sem', 'is_active')
+    }
+    return ReferenceData(
+        version, MappingProxyType(depts), MappingProxyType(subjects), MappingProxyType(classes))
+
+
+def get_reference_data(refresh=False):
+    """
+    Return the current snapshot of the active school. The shared version is
+    checked at most once per REFERENCE_DATA_CHECK_INTERVAL; the tables are
+    reloaded only when it changed (or when `refresh` is set).
+    """
+    school_id = current_school_id()
+    now = time.monotonic()
+    snapshot = _snapshots.get(school_id)
+    if snapshot is not None and not refresh and now < _checked_until.get(school_id, 0.0):
+        return snapshot
+
+    version = _current_version(school_id)
+    if snapshot is None or refresh or snapshot.version != version:
+        with _lock:
+            snapshot = _snapshots.get(school_id)
+            if snapshot is None or refresh or snapshot.version != version:
+                snapshot = _load(version)
+                _snapshots[school_id] = snapshot
+    _checked_until[school_id] = now + REFERENCE_DATA_CHECK_INTERVAL
+    return snapshot
+
+
+def _lookup(table, key):
+    """
+    Look up a record, reloading on a miss (row created moments ago by another
+    worker) at most once per REFERENCE_DATA_CHECK_INTERVAL: ids taken from
+    URLs or of deleted rows must not reload the tables on every lookup.
+    """
+    if key is None:
+        return None
+    record = getattr(get_reference_data(), table).get(key)
+    if record is None:
+        school_id = current_school_id()
+        now = time.monotonic()
+        if now >= _refresh_after.get(school_id, 0.0):
+            _refresh_after[school_id] = now + REFERENCE_DATA_CHECK_INTERVAL
+            record = getattr(get_reference_data(refresh=True), table).get(key)
+    return record
+
+
+def get_dept(dept_id):
+    return _lookup('depts', dept_id)
+
+
+def get_subject(subject_id):
+    return _lookup('subjects', subject_id)
+
+
+def get_class(class_id):
+    return _lookup('classes', class_id)
+
+
+def class_label(class_id):
+    """Same text as Class.__str__ ('<dept name> : <sem> <section>') without queries."""
+    class_record = get_class(class_id)
+    if class_record is None:
+        return ''
+    dept = get_dept(class_record.dept_id)
+    return '%s : %d %s' % (dept.name if dept else class_record.dept_id,
+                           class_record.sem, class_record.section)
+
+
+def _bump_version(school_id):
+    keys = [REFERENCE_DATA_VERSION_KEY,
+            cache_key(REFERENCE_DATA_VERSION_KEY, school_id) if school_id else REFERENCE_DATA_SHARED_VERSION_KEY]
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns())
+    _snapshots.clear()
+
+
+def _school_of(instance):
+    if isinstance(instance, Dept):
+        return instance.school_id
+    return Dept.all_objects.filter(pk=instance.dept_id).values_list('school_id', flat=True).first()
+
+
+def invalidate_reference_data(instance=None, **kwargs):
+    """
+    post_save/post_delete receiver. The local snapshots are dropped right away;
+    other workers see the new version only after commit, so they never reload
+    rows that are not visible to them yet. Only the snapshots of the row's
+    school are invalidated. QuerySet.update() sends no signal and must call
+    this explicitly (the active school, or every school outside a request).
+    """
+    school_id = _school_of(instance) if instance is not None else current_school_id()
+    _snapshots.clear()
+    # Dữ liệu vừa đổi: lần miss kế tiếp được nạp lại ngay
+    _refresh_after.clear()
+    transaction.on_commit(lambda: _bump_version(school_id), using=kwargs.get('using'))
@@ -0,0 +1,201 @@
+import importlib.util
+import zipfile
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+from django.template.loader import render_to_string
+
+from students.models import Student
+from teachers.models import Assign, Marks
+from utils import risk
+from utils.constant import (
+    TEST_NAME_CHOICES, ATTENDANCE_STANDARD, CIE_STANDARD, RISK_LEVEL_AT_RISK,
+    REPORT_CARD_FORMAT_HTML, REPORT_CARD_FORMAT_PDF, REPORT_CARD_TEMPLATE,
+    REPORT_CARD_CHUNK_SIZE, REPORT_CARD_QUEUE_FACTOR,
+)
+from utils.reference_cache import class_label, get_subject
+
+TEST_NAMES = [name for name, _ in TEST_NAME_CHOICES]
+
+
+def latest_term(class_id=None):
+    """(academic_year, semester) of the newest term with active assignments, or None."""
+    assigns = Assign.objects.filter(is_active=True)
+    if class_id:
+        assigns = assigns.filter(class_id=class_id)
+    return assigns.order_by('-academic_year', '-semester').values_list('academic_year', 'semester').first()
+
+
+def pdf_available():
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+# -----------------------------------------------------------------------------
+# Thu thập dữ liệu: số query cố định, không phụ thuộc số học sinh
+# -----------------------------------------------------------------------------
+
+def collect(academic_year, semester, class_id=None):
+    """
+    Report card data of every student of a term (or of one class), ordered
+    by class and USN. Cards are plain dicts so they can be pickled to worker
+    processes; marks, CIE and attendance come from grouped queries whose
+    count does not grow with the number of students.
+    """
+    pairs = risk.term_pairs(academic_year, semester, class_id)
+    _, attended, total, recent_attended, recent_total, cie = risk.load_term(
+        academic_year, semester, class_id, pairs=pairs)
+    attendance, _, _, classes_to_attend, _, level = risk.score_columns(
+        attended, total, recent_attended, recent_total, cie)
+
+    assigns = Assign.objects.filter(academic_year=academic_year, semester=semester, is_active=True)
+    students = Student.objects.all()
+    marks_rows = Marks.objects.filter(academic_year=academic_year, semester=semester)
+    if class_id:
+        assigns = assigns.filter(class_id=class_id)
+        students = students.filter(class_id=class_id)
+        marks_rows = marks_rows.filter(student_subject__student__class_id=class_id)
+
+    teachers = defaultdict(list)
+    for assign_class, subject_id, teacher_name in assigns.order_by('teacher__name').values_list(
+            'class_id', 'subject_id', 'teacher__name'):
+        teachers[(assign_class, subject_id)].append(teacher_name)
+    marks = defaultdict(dict)
+    for pair_id, name, value in marks_rows.values_list('student_subject_id', 'name', 'marks1'):
+        marks[pair_id][name] = value
+
+    subjects = defaultdict(list)
+    for i, (pair_id, usn, subject_id) in enumerate(pairs):
+        subjects[usn].append({
+            'id': subject_id,
+            'name': get_subject(subject_id).name,
+            'attended': attended[i],
+            'total': total[i],
+            'attendance': attendance[i],
+            'classes_to_attend': classes_to_attend[i],
+            'cie': cie[i],
+            'marks': [marks[pair_id].get(name) for name in TEST_NAMES],
+            'at_risk': level[i] == RISK_LEVEL_AT_RISK,
+        })
+
+    cards = []
+    for usn, name, student_class in students.order_by('class_id', 'USN').values_list('USN', 'name', 'class_id'):
+        rows = subjects.get(usn)
+        if not rows:
+            continue
+        rows.sort(key=lambda row: row['name'])
+        for row in rows:
+            row['teachers'] = ', '.join(teachers.get((student_class, row['id']), ()))
+        cards.append({
+            'usn': usn,
+            'name': name,
+            'class_id': student_class,
+            'class_label': class_label(student_class) or student_class,
+            'academic_year': academic_year,
+            'semester': semester,
+            'subjects': rows,
+        })
+    return cards
+
+
+# -----------------------------------------------------------------------------
+# Render: chạy trong process con, chỉ nhận dict, không đụng tới DB
+# -----------------------------------------------------------------------------
+
+def _init_worker():
+    # Với start method spawn/forkserver process con phải tự nạp Django
+    django.setup()
+
+
+def filename(card, fmt):
+    return f"{card['class_id']}/{card['usn']}.{fmt}"
+
+
+def render_chunk(cards, fmt=REPORT_CARD_FORMAT_HTML):
+    """(filename, content bytes) of each card of a chunk."""
+    rendered = []
+    for card in cards:
+        html = render_to_string(REPORT_CARD_TEMPLATE, {
+            **card, 'test_names': TEST_NAMES,
+            'ATTENDANCE_STANDARD': ATTENDANCE_STANDARD, 'CIE_STANDARD': CIE_STANDARD,
+        })
+        if fmt == REPORT_CARD_FORMAT_PDF:
+            from weasyprint import HTML
+            content = HTML(string=html).write_pdf()
+        else:
+            content = html.encode()
+        rendered.append((filename(card, fmt), content))
+    return rendered
+
+
+def documents(cards, fmt=REPORT_CARD_FORMAT_HTML, workers=None):
+    """
+    Yield (filename, content) in card order. With `workers` the cards are
+    rendered in a process pool, chunk by chunk, keeping only a few chunks in
+    flight so memory stays flat however many students there are.
+    """
+    chunks = [cards[i:i + REPORT_CARD_CHUNK_SIZE] for i in range(0, len(cards), REPORT_CARD_CHUNK_SIZE)]
+    if not workers:
+        for chunk in chunks:
+            yield from render_chunk(chunk, fmt)
+        return
+
+    # Không để process con thừa hưởng socket DB của process cha
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(render_chunk, chunk, fmt))
+            if len(pending) >= workers * REPORT_CARD_QUEUE_FACTOR:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _compression(fmt):
+    # PDF đã được nén sẵn
+    return zipfile.ZIP_STORED if fmt == REPORT_CARD_FORMAT_PDF else zipfile.ZIP_DEFLATED
+
+
+def write_zip(fileobj, cards, fmt=REPORT_CARD_FORMAT_HTML, workers=None, progress=None):
+    """
+    Write the report cards into a ZIP as they are rendered; `progress(done,
+    total)` is called after each document. Returns the number of documents.
+    """
+    total = len(cards)
+    with zipfile.ZipFile(fileobj, 'w', _compression(fmt)) as archive:
+        for done, (name, content) in enumerate(documents(cards, fmt, workers), 1):
+            archive.writestr(name, content)
+            if progress:
+                progress(done, total)
+    return total
+
+
+class _Pipe:
+    """Write-only file object drained after every document (ZipFile handles the missing seek/tell)."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_zip(cards, fmt=REPORT_CARD_FORMAT_HTML):
+    """ZIP of the report cards as an iterator of bytes, for a StreamingHttpResponse."""
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', _compression(fmt)) as archive:
+        for name, content in documents(cards, fmt):
+            archive.writestr(name, content)
+            yield pipe.drain()
+    yield pipe.drain()
@@ -0,0 +1,243 @@
+import math
+from array import array
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mail
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from students.models import Attendance, CieScore, CompactAttendance, RiskScore, StudentSubject
+from teachers.models import Assign, AttendanceClass
+from utils import tenancy
+from utils.attendance_store import is_present
+from utils.constant import (
+    ATTENDANCE_STANDARD, CIE_STANDARD, ATTENDANCE_MIN_PERCENTAGE, ATTENDANCE_CALCULATION_BASE,
+    ATTENDANCE_CLASS_MARKED, ATTENDANCE_ROSTER_SEPARATOR, PERCENTAGE_MULTIPLIER, PERCENTAGE_DECIMAL_PLACES,
+    RISK_LEVEL_NONE, RISK_LEVEL_WATCH, RISK_LEVEL_AT_RISK, RISK_RECENT_SESSIONS, RISK_TREND_DROP,
+    RISK_WEIGHT_ATTENDANCE, RISK_WEIGHT_CIE, RISK_WEIGHT_TREND, RISK_BATCH_SIZE,
+)
+
+
+def _percentages(part, whole):
+    return array('d', (
+        round(p * PERCENTAGE_MULTIPLIER / w, PERCENTAGE_DECIMAL_PLACES) if w else 0.0
+        for p, w in zip(part, whole)
+    ))
+
+
+def score_columns(attended, total, recent_attended, recent_total, cie):
+    """
+    Risk of every (student, subject) pair in one column-wise pass. Inputs are
+    parallel sequences (cie entries may be None: no marks yet); returns the
+    columns attendance, recent, trend, classes_to_attend, score and level.
+    """
+    attendance = _percentages(attended, total)
+    recent = _percentages(recent_attended, recent_total)
+    trend = array('d', (r - a if n else 0.0 for r, a, n in zip(recent, attendance, recent_total)))
+    classes_to_attend = array('l', (
+        max(0, math.ceil((ATTENDANCE_MIN_PERCENTAGE * t - a) / ATTENDANCE_CALCULATION_BASE))
+        for a, t in zip(attended, total)
+    ))
+    # Thiếu hụt so với chuẩn, chuẩn hoá về 0-1; chưa có buổi học/điểm thì không tính
+    attendance_gap = array('d', (
+        max(0.0, ATTENDANCE_STANDARD - a) / ATTENDANCE_STANDARD if t else 0.0
+        for a, t in zip(attendance, total)
+    ))
+    cie_gap = array('d', (
+        max(0.0, CIE_STANDARD - c) / CIE_STANDARD if c is not None else 0.0
+        for c in cie
+    ))
+    drop = array('d', (max(0.0, -t) / PERCENTAGE_MULTIPLIER for t in trend))
+    score = array('d', (
+        round(RISK_WEIGHT_ATTENDANCE * a + RISK_WEIGHT_CIE * c + RISK_WEIGHT_TREND * d, 4)
+        for a, c, d in zip(attendance_gap, cie_gap, drop)
+    ))
+    level = array('b', (
+        RISK_LEVEL_AT_RISK if a > 0 or c > 0
+        else RISK_LEVEL_WATCH if t <= -RISK_TREND_DROP
+        else RISK_LEVEL_NONE
+        for a, c, t in zip(attendance_gap, cie_gap, trend)
+    ))
+    return attendance, recent, trend, classes_to_attend, score, level
+
+
+def _recent_sessions(academic_year, semester, class_id=None):
+    """Ids of the last RISK_RECENT_SESSIONS marked sessions of every assignment of a term."""
+    recent, seen = set(), defaultdict(int)
+    sessions = AttendanceClass.objects.filter(
+        assign__academic_year=academic_year, assign__semester=semester, status=ATTENDANCE_CLASS_MARKED)
+    if class_id:
+        sessions = sessions.filter(assign__class_id=class_id)
+    for assign_id, session_id in sessions.order_by('assign_id', '-date', '-id').values_list('assign_id', 'id'):
+        if seen[assign_id] < RISK_RECENT_SESSIONS:
+            seen[assign_id] += 1
+            recent.add(session_id)
+    return recent
+
+
+def _recent_cutoff():
+    """Date of the RISK_RECENT_SESSIONS-th newest marked session of the row's assignment."""
+    return Coalesce(
+        Subquery(
+            AttendanceClass.objects.filter(
+                assign=OuterRef('attendanceclass__assign'), status=ATTENDANCE_CLASS_MARKED,
+            ).order_by('-date', '-id').values('date')[RISK_RECENT_SESSIONS - 1:RISK_RECENT_SESSIONS]
+        ),
+        Value(date.min),
+    )
+
+
+def term_pairs(academic_year, semester, class_id=None):
+    """(id, usn, subject_id) of the StudentSubject rows taught in a term, optionally in one class."""
+    in_class = {'student__class_id': class_id} if class_id else {}
+    return list(
+        StudentSubject.objects.filter(
+            **in_class,
+            is_active=True,
+            subject__assign__class_id=F('student__class_id'),
+            subject__assign__academic_year=academic_year,
+            subject__assign__semester=semester,
+            subject__assign__is_active=True,
+        ).values_list('id', 'student_id', 'subject_id').distinct().order_by('id')
+    )
+
+
+def load_term(academic_year, semester, class_id=None, pairs=None):
+    """
+    Pairs of a term and their aggregates as parallel columns: ids of the
+    StudentSubject rows, attended, total, recent_attended, recent_total, cie.
+    Row-format attendance is aggregated in SQL; bitset sessions are counted
+    from their roster. `class_id` limits everything to one class; `pairs`
+    are the term_pairs() when the caller already loaded them.
+    """
+    if pairs is None:
+        pairs = term_pairs(academic_year, semester, class_id)
+    index = {(usn, subject_id): position for position, (_, usn, subject_id) in enumerate(pairs)}
+    size = len(pairs)
+    attended, total = array('l', [0]) * size, array('l', [0]) * size
+    recent_attended, recent_total = array('l', [0]) * size, array('l', [0]) * size
+
+    term = {
+        'attendanceclass__assign__academic_year': academic_year,
+        'attendanceclass__assign__semester': semester,
+    }
+    if class_id:
+        term['attendanceclass__assign__class_id'] = class_id
+    recent = Q(attendanceclass__date__gte=_recent_cutoff())
+    for row in Attendance.objects.filter(
+            subject=F('attendanceclass__assign__subject'), **term,
+    ).values('student_id', 'subject_id').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status=True)),
+        recent_total=Count('id', filter=recent),
+        recent_present=Count('id', filter=recent & Q(status=True)),
+    ).order_by():
+        position = index.get((row['student_id'], row['subject_id']))
+        if position is None:
+            continue
+        total[position] += row['total']
+        attended[position] += row['present']
+        recent_total[position] += row['recent_total']
+        recent_attended[position] += row['recent_present']
+
+    recent_sessions = _recent_sessions(academic_year, semester, class_id)
+    for session_id, subject_id, roster, presence in CompactAttendance.objects.filter(**term).values_list(
+            'attendanceclass_id', 'subject_id', 'roster', 'presence'):
+        bits = bytes(presence)
+        in_window = session_id in recent_sessions
+        usns = [usn for usn in roster.split(ATTENDANCE_ROSTER_SEPARATOR) if usn]
+        for bit, usn in enumerate(usns):
+            position = index.get((usn, subject_id))
+            if position is None:
+                continue
+            present = is_present(bits, bit)
+            total[position] += 1
+            attended[position] += present
+            if in_window:
+                recent_total[position] += 1
+                recent_attended[position] += present
+
+    scores = dict(
+        CieScore.objects.filter(
+            academic_year=academic_year, semester=semester, marks_count__gt=0,
+            **({'student_subject__student__class_id': class_id} if class_id else {}),
+        ).values_list('student_subject_id', 'cie')
+    )
+    cie = [scores.get(pair_id) for pair_id, _, _ in pairs]
+    return [pair_id for pair_id, _, _ in pairs], attended, total, recent_attended, recent_total, cie
+
+
+def refresh_risk_scores(academic_year, semester):
+    """Replace the RiskScore rows of a term, for every school. Returns the row count."""
+    # Thay cả kỳ một lần nên luôn tính cho mọi trường, kể cả khi đang phục vụ một trường
+    with tenancy.activate(None):
+        pair_ids, attended, total, recent_attended, recent_total, cie = load_term(academic_year, semester)
+    attendance, recent, trend, classes_to_attend, score, level = score_columns(
+        attended, total, recent_attended, recent_total, cie)
+    now = timezone.now()
+    rows = [
+        RiskScore(
+            student_subject_id=pair_id, academic_year=academic_year, semester=semester,
+            attended=attended[i], total=total[i], attendance=attendance[i],
+            recent_attendance=recent[i], trend=round(trend[i], PERCENTAGE_DECIMAL_PLACES),
+            classes_to_attend=classes_to_attend[i], cie=cie[i], score=score[i], level=level[i],
+            computed_at=now,
+        )
+        for i, pair_id in enumerate(pair_ids)
+    ]
+    with transaction.atomic():
+        RiskScore.all_objects.filter(academic_year=academic_year, semester=semester).delete()
+        RiskScore.objects.bulk_create(rows, batch_size=RISK_BATCH_SIZE)
+    return len(rows)
+
+
+def latest_scored_term():
+    """(academic_year, semester) of the newest term with risk scores in the active school, or None."""
+    return (RiskScore.objects.order_by('-academic_year', '-semester')
+            .values_list('academic_year', 'semester').first())
+
+
+def send_digests(academic_year, semester):
+    """
+    Email every teacher of the term the at-risk students of their
+    assignments. Returns the number of emails sent.
+    """
+    teachers = defaultdict(set)
+    names = {}
+    for class_id, subject_id, teacher_id, name, email in Assign.objects.filter(
+            academic_year=academic_year, semester=semester, is_active=True,
+    ).values_list(
+            'class_id', 'subject_id', 'teacher_id', 'teacher__name', 'teacher__user__email'):
+        if email:
+            teachers[(class_id, subject_id)].add(teacher_id)
+            names[teacher_id] = (name, email)
+
+    digests = defaultdict(list)
+    for risk in RiskScore.objects.filter(
+            academic_year=academic_year, semester=semester, level=RISK_LEVEL_AT_RISK,
+    ).select_related('student_subject__student', 'student_subject__subject').order_by('-score'):
+        student = risk.student_subject.student
+        for teacher_id in teachers.get((student.class_id_id, risk.student_subject.subject_id), ()):
+            digests[teacher_id].append(risk)
+
+    connection = get_connection()
+    for teacher_id, risks in digests.items():
+        name, email = names[teacher_id]
+        body = render_to_string('admins/email_templates/at_risk_digest.html', {
+            'full_name': name, 'risks': risks, 'academic_year': academic_year, 'semester': semester,
+            'ATTENDANCE_STANDARD': ATTENDANCE_STANDARD, 'CIE_STANDARD': CIE_STANDARD,
+        })
+        send_mail(
+            subject=f'At-risk students {academic_year}.{semester}',
+            message=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[email],
+            html_message=body,
+            connection=connection,
+        )
+    return len(digests)
@@ -0,0 +1,229 @@
+import re
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+
+from admins.models import Class
+from students.models import Student, StudentSubject
+from teachers.models import Assign, AssignTime
+from utils.constant import MIN_SEMESTER, MAX_SEMESTER, ROLLOVER_CLASS_ID_FORMAT, ROLLOVER_BATCH_SIZE
+from utils import change_counters
+from utils.enrollment import enroll
+from utils.reference_cache import invalidate_reference_data
+from utils.search_index import index_objects, reindex
+
+
+class ClassMove(NamedTuple):
+    """Promotion of one class: its students and assignments go to `target`."""
+    source: str
+    target: str
+    dept_id: str
+    section: str
+    sem: int
+    create: bool
+    reactivate: bool
+    students: int
+    assigns: int
+    times: int
+
+
+class RolloverPlan(NamedTuple):
+    academic_year: str
+    semester: int
+    next_academic_year: str
+    next_semester: int
+    moves: tuple
+    final_classes: tuple
+    enrollments: int
+
+    @property
+    def students(self):
+        return sum(move.students for move in self.moves)
+
+    @property
+    def assigns(self):
+        return sum(move.assigns for move in self.moves)
+
+    @property
+    def times(self):
+        return sum(move.times for move in self.moves)
+
+    @property
+    def new_classes(self):
+        return sum(move.create for move in self.moves)
+
+
+class RolloverResult(NamedTuple):
+    classes_created: int
+    classes_deactivated: int
+    assigns: int
+    times: int
+    students: int
+    enrollments_deactivated: int
+    enrollments_reactivated: int
+    enrollments_created: int
+
+
+def next_term(academic_year, semester):
+    """Term after (academic_year, semester); the year keeps its format ('2024-2025' or '2025')."""
+    if semester < MAX_SEMESTER:
+        return academic_year, semester + 1
+    return re.sub(r'\d{4}', lambda match: str(int(match.group()) + 1), academic_year), MIN_SEMESTER
+
+
+def plan_rollover(academic_year, semester):
+    """
+    Dry run: which class every active class below MAX_SEMESTER is promoted to
+    and how many students, assignments and timetable slots move with it.
+    A constant number of queries whatever the size of the school. Raises
+    ValueError when a class to create would take the id of an unrelated class.
+    """
+    next_year, next_semester = next_term(academic_year, semester)
+
+    classes = list(Class.objects.order_by('is_active', 'id').values_list('id', 'dept_id', 'section', 'sem', 'is_active'))
+    taken = {class_id for class_id, *_ in classes}
+    # Lớp đang hoạt động được ưu tiên khi có nhiều lớp cùng (khoa, section, kỳ)
+    by_key = {(dept_id, section, sem): (class_id, is_active) for class_id, dept_id, section, sem, is_active in classes}
+    active = [row for row in classes if row[4]]
+    sources = [row for row in active if row[3] < MAX_SEMESTER]
+    source_ids = [row[0] for row in sources]
+
+    students = dict(
+        Student.objects.filter(class_id__in=source_ids)
+        .values('class_id').annotate(count=Count('pk')).order_by().values_list('class_id', 'count')
+    )
+    assigns = {
+        row['class_id']: row
+        for row in Assign.objects.filter(
+            academic_year=academic_year, semester=semester, is_active=True, class_id__in=source_ids
+        ).values('class_id').annotate(assigns=Count('id', distinct=True), times=Count('assigntime')).order_by()
+    }
+
+    moves = []
+    for class_id, dept_id, section, sem, _ in sources:
+        target = by_key.get((dept_id, section, sem + 1))
+        if target is None:
+            target_id = ROLLOVER_CLASS_ID_FORMAT.format(dept=dept_id, sem=sem + 1, section=section)
+            if target_id in taken:
+                raise ValueError(f'Cannot create class "{target_id}" for {class_id}: the id is already used')
+            taken.add(target_id)
+            by_key[(dept_id, section, sem + 1)] = (target_id, True)
+            create, reactivate = True, False
+        else:
+            target_id, target_active = target
+            create, reactivate = False, not target_active
+        counts = assigns.get(class_id, {})
+        moves.append(ClassMove(
+            class_id, target_id, dept_id, section, sem + 1, create, reactivate,
+            students.get(class_id, 0), counts.get('assigns', 0), counts.get('times', 0),
+        ))
+
+    return RolloverPlan(
+        academic_year, semester, next_year, next_semester,
+        tuple(moves),
+        tuple(row[0] for row in active if row[3] >= MAX_SEMESTER),
+        StudentSubject.objects.filter(student__class_id__in=source_ids, is_active=True).count(),
+    )
+
+
+def _clone_assignments(plan, targets):
+    """INSERT the next-term copies of the source assignments and their timetable slots."""
+    existing = set(
+        Assign.objects.filter(
+            academic_year=plan.next_academic_year, semester=plan.next_semester,
+            class_id__in=set(targets.values()),
+        ).values_list('class_id', 'subject_id', 'teacher_id')
+    )
+    clones, created = {}, []
+    for assign_id, class_id, subject_id, teacher_id in Assign.objects.filter(
+            academic_year=plan.academic_year, semester=plan.semester, is_active=True, class_id__in=targets,
+    ).values_list('id', 'class_id', 'subject_id', 'teacher_id'):
+        key = (targets[class_id], subject_id, teacher_id)
+        # Phân công đã có ở kỳ mới (chạy lại rollover) thì giữ nguyên, kể cả thời khoá biểu
+        if key in existing:
+            continue
+        existing.add(key)
+        clones[assign_id] = key
+        created.append(Assign(
+            class_id_id=key[0], subject_id=subject_id, teacher_id=teacher_id,
+            academic_year=plan.next_academic_year, semester=plan.next_semester,
+        ))
+    # bulk_create bỏ qua Assign.save()/full_clean: dữ liệu lấy từ các dòng đã hợp lệ
+    Assign.objects.bulk_create(created, batch_size=ROLLOVER_BATCH_SIZE)
+
+    new_ids = {
+        (class_id, subject_id, teacher_id): assign_id
+        for assign_id, class_id, subject_id, teacher_id in Assign.objects.filter(
+            academic_year=plan.next_academic_year, semester=plan.next_semester,
+            class_id__in=set(targets.values()),
+        ).values_list('id', 'class_id', 'subject_id', 'teacher_id')
+    }
+    times = AssignTime.objects.bulk_create(
+        [
+            AssignTime(assign_id=new_ids[clones[assign_id]], period=period, day=day)
+            for assign_id, period, day in AssignTime.objects.filter(assign_id__in=clones)
+            .order_by('id').values_list('assign_id', 'period', 'day')
+        ],
+        batch_size=ROLLOVER_BATCH_SIZE,
+    )
+    return len(created), len(times)
+
+
+def apply_rollover(plan):
+    """
+    Carry out a plan in one transaction: create/reactivate the target classes,
+    clone the assignments, move the students with a single CASE UPDATE,
+    deactivate the old classes and enrollments, then re-enroll the students
+    in the subjects their new class is taught in the next term.
+    """
+    targets = {move.source: move.target for move in plan.moves}
+    if not targets:
+        return RolloverResult(0, 0, 0, 0, 0, 0, 0, 0)
+
+    with transaction.atomic():
+        new_classes = Class.objects.bulk_create([
+            Class(id=move.target, dept_id=move.dept_id, section=move.section, sem=move.sem)
+            for move in plan.moves if move.create
+        ])
+        Class.objects.filter(id__in=set(targets.values()), is_active=False).update(is_active=True)
+
+        assigns, times = _clone_assignments(plan, targets)
+
+        enrollments_deactivated = StudentSubject.objects.filter(
+            student__class_id__in=targets, is_active=True,
+        ).update(is_active=False)
+        # Mọi lớp được chuyển cùng lúc trong một câu lệnh, nên lớp vừa là
+        # nguồn vừa là đích (kỳ 1 -> 2 -> 3) không bị chuyển hai lần
+        students = Student.objects.filter(class_id__in=targets).update(class_id=Case(
+            *[When(class_id=source, then=Value(target)) for source, target in targets.items()],
+            default=F('class_id'),
+        ))
+        classes_deactivated = Class.objects.filter(
+            id__in=set(targets) - set(targets.values()),
+        ).update(is_active=False)
+
+        promoted = Student.objects.filter(class_id__in=set(targets.values()))
+        # Chỉ các môn của kỳ mới: lớp đích có thể còn phân công của các kỳ cũ
+        enrollments_created, enrollments_reactivated = enroll(
+            promoted, academic_year=plan.next_academic_year, semester=plan.next_semester)
+
+        # update()/bulk_create() không gửi signal nên phải tự làm mới bộ nhớ đệm
+        # lớp, chỉ mục tìm kiếm (lớp mới, lớp hiện tại của học sinh) và
+        # change counter của danh sách lớp/thời khoá biểu
+        invalidate_reference_data()
+        index_objects(new_classes)
+        reindex(promoted)
+        change_counters.bump(
+            *map(change_counters.class_roster, set(targets) | set(targets.values())),
+            *map(change_counters.class_timetable, set(targets.values())),
+            *map(change_counters.teacher_timetable, Assign.objects.filter(
+                academic_year=plan.next_academic_year, semester=plan.next_semester,
+                class_id__in=set(targets.values()),
+            ).values_list('teacher_id', flat=True).distinct()),
+        )
+
+    return RolloverResult(
+        len(new_classes), classes_deactivated, assigns, times, students,
+        enrollments_deactivated, enrollments_reactivated, enrollments_created,
+    )
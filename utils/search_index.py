@@ -0,0 +1,174 @@
+import re
+import unicodedata
+
+from django.db.models import Case, IntegerField, Value, When
+
+from admins.models import Class, Dept, SearchEntry, Subject
+from students.models import Student
+from teachers.models import Teacher
+from utils.constant import (
+    SEARCH_ENTITY_STUDENT, SEARCH_ENTITY_TEACHER, SEARCH_ENTITY_CLASS, SEARCH_ENTITY_SUBJECT, SEARCH_ENTITY_DEPT,
+    SEARCH_RANK_EXACT, SEARCH_RANK_PREFIX, SEARCH_RANK_SUBSTRING,
+    SEARCH_DISPLAY_MAX_LENGTH, SEARCH_INDEX_BATCH_SIZE,
+)
+from utils.reference_cache import get_class, get_dept
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """Lowercase ASCII words of `text`, Vietnamese diacritics removed ('Đỗ Thị Ánh' -> ['do', 'thi', 'anh'])."""
+    text = unicodedata.normalize('NFKD', str(text).replace('đ', 'd').replace('Đ', 'D'))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', text.lower()).split()
+
+
+def _tokens(*values):
+    words = []
+    for value in values:
+        if value not in (None, ''):
+            words.extend(normalize(value))
+    # Mỗi từ có dấu cách ở trước (và sau) để khớp tiền tố từ / nguyên từ bằng LIKE
+    return ' ' + ' '.join(dict.fromkeys(words)) + ' '
+
+
+def _dept_name(dept_id):
+    dept = get_dept(dept_id)
+    return dept.name if dept else dept_id
+
+
+def _school(dept_id):
+    dept = get_dept(dept_id)
+    return dept.school_id if dept else None
+
+
+def _entry(entity, object_id, tokens, display, detail='', school_id=None):
+    return SearchEntry(entity=entity, object_id=object_id, tokens=tokens, school_id=school_id,
+                       display=display[:SEARCH_DISPLAY_MAX_LENGTH], detail=detail[:SEARCH_DISPLAY_MAX_LENGTH])
+
+
+def _student_entry(student):
+    class_record = get_class(student.class_id_id)
+    return _entry(SEARCH_ENTITY_STUDENT, student.USN, _tokens(student.name, student.USN, student.class_id_id),
+                  student.name, f'{student.USN} · {student.class_id_id}',
+                  _school(class_record.dept_id) if class_record else None)
+
+
+def _teacher_entry(teacher):
+    dept = _dept_name(teacher.dept_id)
+    return _entry(SEARCH_ENTITY_TEACHER, teacher.id, _tokens(teacher.name, teacher.id, dept),
+                  teacher.name, f'{teacher.id} · {dept}', _school(teacher.dept_id))
+
+
+def _class_entry(class_obj):
+    dept = _dept_name(class_obj.dept_id)
+    return _entry(SEARCH_ENTITY_CLASS, class_obj.id,
+                  _tokens(class_obj.id, dept, class_obj.section, class_obj.sem),
+                  class_obj.id, f'{dept} : {class_obj.sem} {class_obj.section}', _school(class_obj.dept_id))
+
+
+def _subject_entry(subject):
+    dept = _dept_name(subject.dept_id)
+    return _entry(SEARCH_ENTITY_SUBJECT, subject.id, _tokens(subject.name, subject.id, subject.shortname, dept),
+                  subject.name, f'{subject.id} · {dept}', _school(subject.dept_id))
+
+
+def _dept_entry(dept):
+    return _entry(SEARCH_ENTITY_DEPT, dept.id, _tokens(dept.name, dept.id), dept.name, dept.id, dept.school_id)
+
+
+# model -> (entity, builder)
+_INDEXED = {
+    Student: (SEARCH_ENTITY_STUDENT, _student_entry),
+    Teacher: (SEARCH_ENTITY_TEACHER, _teacher_entry),
+    Class: (SEARCH_ENTITY_CLASS, _class_entry),
+    Subject: (SEARCH_ENTITY_SUBJECT, _subject_entry),
+    Dept: (SEARCH_ENTITY_DEPT, _dept_entry),
+}
+
+
+def _upsert(entries):
+    SearchEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['entity', 'object_id'],
+        update_fields=['tokens', 'display', 'detail', 'school'],
+        batch_size=SEARCH_INDEX_BATCH_SIZE,
+    )
+    return len(entries)
+
+
+def index_objects(instances):
+    """Insert or refresh the entries of model instances (any mix of indexed models)."""
+    return _upsert([_INDEXED[type(instance)][1](instance) for instance in instances])
+
+
+def reindex(queryset):
+    """Refresh the entries of every row of a queryset of an indexed model, in batches."""
+    build = _INDEXED[queryset.model][1]
+    count, batch = 0, []
+    for instance in queryset.iterator(chunk_size=SEARCH_INDEX_BATCH_SIZE):
+        batch.append(build(instance))
+        if len(batch) >= SEARCH_INDEX_BATCH_SIZE:
+            count += _upsert(batch)
+            batch = []
+    return count + _upsert(batch)
+
+
+def remove_object(instance):
+    SearchEntry.objects.filter(entity=_INDEXED[type(instance)][0], object_id=instance.pk).delete()
+
+
+def rebuild():
+    """Rebuild the whole index. Returns the number of entries."""
+    SearchEntry.objects.all().delete()
+    return sum(reindex(model.objects.all()) for model in _INDEXED)
+
+
+# -----------------------------------------------------------------------------
+# Signal receivers (đăng ký trong admins/signals.py)
+# -----------------------------------------------------------------------------
+
+def update_search_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_objects([instance])
+    if sender is Dept:
+        # Tên khoa nằm trong tokens của lớp, môn và giáo viên thuộc khoa
+        for model in (Class, Subject, Teacher):
+            reindex(model.objects.filter(dept_id=instance.pk))
+
+
+def delete_search_entry(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+# -----------------------------------------------------------------------------
+# Query
+# -----------------------------------------------------------------------------
+
+def search(query, limit):
+    """
+    Mixed entries matching every word of `query` as a word prefix,
+    diacritics ignored. One query: entries whose text starts with the query
+    rank first, then entries containing it as whole words, then prefix-only
+    matches. Returns dicts with entity, object_id, display and detail.
+    """
+    words = normalize(query)
+    if not words:
+        return []
+    entries = SearchEntry.objects.all()
+    for word in words:
+        entries = entries.filter(tokens__contains=f' {word}')
+    phrase = ' ' + ' '.join(words) + ' '
+    rank = Case(
+        When(tokens__startswith=phrase, then=Value(SEARCH_RANK_EXACT)),
+        When(tokens__contains=phrase, then=Value(SEARCH_RANK_PREFIX)),
+        default=Value(SEARCH_RANK_SUBSTRING),
+        output_field=IntegerField(),
+    )
+    return list(
+        entries.annotate(search_rank=rank)
+        .order_by('-search_rank', 'display', 'entity', 'object_id')
+        .values('entity', 'object_id', 'display', 'detail')[:limit]
+    )
@@ -0,0 +1,60 @@
+from django.db import connections
+from django.db.models import Q, Case, When, Value, IntegerField
+from django.db.models.functions import Greatest
+
+from utils.constant import (
+    TRIGRAM_MIN_QUERY_LENGTH,
+    SEARCH_RANK_EXACT, SEARCH_RANK_PREFIX, SEARCH_RANK_SUBSTRING,
+)
+
+
+def _uses_trigram(queryset, search_query):
+    """Trigram matching needs PostgreSQL and at least one full trigram."""
+    return (
+        connections[queryset.db].vendor == 'postgresql'
+        and len(search_query) >= TRIGRAM_MIN_QUERY_LENGTH
+    )
+
+
+def ranked_search(queryset, search_query, fields):
+    """
+    Filter queryset to rows where any of fields matches search_query,
+    annotate each row with ``search_rank`` and order best match first.
+
+    On PostgreSQL the match is the pg_trgm word-similarity operator (served by
+    the gin_trgm_ops indexes) and the rank is the best word similarity over
+    all fields. Other backends (SQLite in tests) fall back to icontains and
+    rank exact > prefix > substring matches.
+    """
+    search_query = (search_query or '').strip()
+    if not search_query:
+        return queryset
+
+    if _uses_trigram(queryset, search_query):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__trigram_word_similar': search_query})
+        similarities = [TrigramWordSimilarity(search_query, field) for field in fields]
+        rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    else:
+        condition = Q()
+        exact_matches = Q()
+        prefix_matches = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': search_query})
+            exact_matches |= Q(**{f'{field}__iexact': search_query})
+            prefix_matches |= Q(**{f'{field}__istartswith': search_query})
+        rank = Case(
+            When(exact_matches, then=Value(SEARCH_RANK_EXACT)),
+            When(prefix_matches, then=Value(SEARCH_RANK_PREFIX)),
+            default=Value(SEARCH_RANK_SUBSTRING),
+            output_field=IntegerField(),
+        )
+
+    return (
+        queryset.filter(condition)
+        .annotate(search_rank=rank)
+        .order_by('-search_rank', 'pk')
+    )
@@ -0,0 +1,77 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+from utils.constant import TENANT_CACHE_KEY_PREFIX, TENANT_HOSTS_CACHE_KEY, TENANT_HOSTS_CACHE_TIMEOUT
+
+# Trường đang được phục vụ; ContextVar nên an toàn cho cả thread lẫn async
+_current_school = contextvars.ContextVar('current_school', default=None)
+
+
+def current_school_id():
+    """Id of the school the current request/command works on, None when unscoped."""
+    return _current_school.get()
+
+
+@contextmanager
+def activate(school_id):
+    """Scope the queries and cache keys of the block to one school (None: unscoped)."""
+    token = _current_school.set(school_id)
+    try:
+        yield
+    finally:
+        _current_school.reset(token)
+
+
+def cache_key(key, school_id=None):
+    """`key` in the namespace of a school (the active one by default); unchanged when unscoped."""
+    school_id = school_id or current_school_id()
+    return f'{TENANT_CACHE_KEY_PREFIX}{school_id}:{key}' if school_id else key
+
+
+class TenantManager(models.Manager):
+    """
+    Default manager limiting every query to the active school through the
+    model's `school_path` (the lookup from the model to School). Without an
+    active school (commands, single-school deployments) it is a plain
+    manager; use the model's `all_objects` to cross schools on purpose.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        school_id = current_school_id()
+        if school_id is None:
+            return queryset
+        return queryset.filter(**{self.model.school_path: school_id})
+
+
+# -----------------------------------------------------------------------------
+# Host -> school
+# -----------------------------------------------------------------------------
+
+def _hosts():
+    from admins.models import School
+
+    hosts = cache.get(TENANT_HOSTS_CACHE_KEY)
+    if hosts is None:
+        hosts = {}
+        for school_id, domain in School.objects.values_list('id', 'domain'):
+            if settings.TENANT_BASE_DOMAIN:
+                hosts[f'{school_id}.{settings.TENANT_BASE_DOMAIN}'.lower()] = school_id
+            if domain:
+                hosts[domain.lower()] = school_id
+        cache.set(TENANT_HOSTS_CACHE_KEY, hosts, TENANT_HOSTS_CACHE_TIMEOUT)
+    return hosts
+
+
+def school_for_host(host):
+    """School id served on `host` (its own domain or <id>.TENANT_BASE_DOMAIN), or None."""
+    return _hosts().get(host.lower().rstrip('.'))
+
+
+def schools_changed(sender, using=None, **kwargs):
+    """School saved/deleted: drop the host map once the change is visible."""
+    transaction.on_commit(lambda: cache.delete(TENANT_HOSTS_CACHE_KEY), using=using)
@@ -0,0 +1,66 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from students.models import Student
+from teachers.models import Assign, AssignTime, AttendanceClass
+from utils.constant import ATTENDANCE_CLASS_MARKED
+
+
+def _term(prefix, academic_year=None, semester=None):
+    """Filter kwargs selecting one term on the Assign reached through `prefix`."""
+    term = {}
+    if academic_year:
+        term[f'{prefix}academic_year__icontains'] = academic_year
+    if semester:
+        term[f'{prefix}semester'] = semester
+    return term
+
+
+def _count(queryset, outer_field, expression=None, **conditions):
+    """
+    Correlated COUNT subquery: rows of `queryset` whose `outer_field` is the
+    outer row's pk (and matching `conditions`, applied in the same filter()
+    so multi-valued joins are shared). Each statistic gets its own subquery,
+    so the joins of one never multiply the rows counted by another.
+    """
+    counted = (
+        queryset.filter(**{outer_field: OuterRef('pk')}, **conditions)
+        .order_by().values(outer_field)
+        .annotate(total=expression or Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def teacher_workload(teachers, academic_year=None, semester=None):
+    """
+    Annotate a Teacher queryset with total_assignments, total_classes,
+    total_students (distinct), weekly_periods and sessions_held for a term.
+    """
+    return teachers.annotate(
+        total_assignments=_count(
+            Assign.objects.all(), 'teacher', **_term('', academic_year, semester)),
+        total_classes=_count(
+            Assign.objects.all(), 'teacher', Count('class_id', distinct=True),
+            **_term('', academic_year, semester)),
+        total_students=_count(
+            Student.objects.all(), 'class_id__assign__teacher', Count('pk', distinct=True),
+            **_term('class_id__assign__', academic_year, semester)),
+        weekly_periods=_count(
+            AssignTime.objects.all(), 'assign__teacher', **_term('assign__', academic_year, semester)),
+        sessions_held=_count(
+            AttendanceClass.objects.filter(status=ATTENDANCE_CLASS_MARKED), 'assign__teacher',
+            **_term('assign__', academic_year, semester)),
+    )
+
+
+def assignment_workload(assignments):
+    """Annotate an Assign queryset with total_students, weekly_periods and sessions_held."""
+    return assignments.annotate(
+        total_students=_count(Student.objects.all(), 'class_id__assign'),
+        weekly_periods=_count(AssignTime.objects.all(), 'assign'),
+        sessions_held=_count(AttendanceClass.objects.filter(status=ATTENDANCE_CLASS_MARKED), 'assign'),
+    )
+
+
+def filter_term(assignments, academic_year=None, semester=None):
+    return assignments.filter(**_term('', academic_year, semester))